@@ -176,6 +176,23 @@ def mask_password(url):
         # If anything goes wrong, return a completely masked URL
         return "******"
 
+def get_cache_config(app):
+    """
+    Get the Flask-Caching configuration for the application.
+    
+    Cached values (Chad stats, cabal rankings, cabal access versions) are
+    invalidated explicitly, which only works across processes when the cache
+    is shared, so Redis is used whenever REDIS_URL is configured.
+    """
+    redis_url = app.config.get('REDIS_URL')
+    if redis_url:
+        app.logger.info(f"Using Redis cache: {mask_password(redis_url)}")
+        return {'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': redis_url}
+    
+    if not app.config.get('TESTING') and not app.config.get('DEBUG'):
+        app.logger.warning("REDIS_URL is not set, cache invalidation will not reach other processes")
+    return {'CACHE_TYPE': 'SimpleCache'}
+
 def initialize_extensions(app):
     """Initialize Flask extensions."""
     app.logger.info("Initializing extensions")
@@ -200,7 +217,15 @@ def initialize_extensions(app):
         
         # Initialize Flask-Caching
         app.logger.info("Initializing Flask-Caching")
-        cache.init_app(app)
+        cache.init_app(app, config=get_cache_config(app))
+        
+        # Keep the in-memory rank indexes in sync with committed Chad changes
+        from app.utils.leaderboard import register_rank_listeners
+        register_rank_listeners()
+        
+        # Bump cabal access versions only after membership changes commit
+        from app.utils.cabal_loader import register_access_listeners
+        register_access_listeners()
         
         # Initialize user loader
         from app.models.user import User
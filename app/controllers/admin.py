@@ -4,6 +4,7 @@ Admin controller for Chad Battles.
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from app.extensions import db
+from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -50,4 +51,28 @@ def stats():
         'nft_count': NFT.query.count()
     }
     
-    return render_template('admin/stats.html', stats=stats) 
\ No newline at end of file
+    return render_template('admin/stats.html', stats=stats) 
+
+@admin_bp.route('/tournaments', methods=['POST'])
+@login_required
+def create_tournament():
+    """Start a tournament for the top-rated Chads; the bot loop plays a round per run."""
+    from app.utils.tournament import create_top_rated_tournament
+    
+    name = request.form.get('name', '').strip() or f"Chad Tournament {datetime.utcnow():%Y-%m-%d}"
+    size = request.form.get('size', 16, type=int)
+    if size is None or size < 2:
+        flash('A tournament needs at least two entrants.', 'danger')
+        return redirect(url_for('admin.index'))
+    
+    try:
+        tournament = create_top_rated_tournament(name, size)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.index'))
+    
+    if tournament is None:
+        flash('Error creating the tournament.', 'danger')
+    else:
+        flash(f"Tournament '{tournament.name}' created with {tournament.entrant_count} entrants.", 'success')
+    return redirect(url_for('admin.index'))
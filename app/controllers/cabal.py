@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from flask_wtf.csrf import CSRFProtect, generate_csrf
 from app import db, cache
 from app.models.cabal import Cabal, CabalMember, CabalOfficerRole, CabalVote, CabalBattle, CabalBattleParticipant
+from app.utils.cabal_loader import get_cabal_or_404, load_cabal_page
 from datetime import datetime, timedelta
 import re
 from werkzeug.utils import escape
@@ -26,80 +27,12 @@ def sanitize_input(input_str):
 @login_required
 def index():
     """Display the user's cabal"""
-    cabals = Cabal.query.filter_by(leader_id=current_user.chad.id).all()
-    
-    # Also check if user is a member of a cabal
-    cabal_member = CabalMember.query.filter_by(chad_id=current_user.chad.id).first()
-    if cabal_member:
-        cabal = cabal_member.cabal
-        
-        # Get officers
-        officers = {}
-        for role_type in ['clout', 'roast_level', 'cringe_resistance', 'drip_factor']:
-            officer_role = cabal.get_officer(role_type)
-            if officer_role:
-                from app.models.chad import Chad
-                officer_chad = Chad.query.get(officer_role.chad_id)
-                if officer_chad:
-                    from app.models.user import User
-                    officer_user = User.query.filter_by(chad_id=officer_chad.id).first()
-                    officers[role_type] = {
-                        'id': officer_chad.id,
-                        'name': officer_chad.name,
-                        'username': officer_user.twitter_handle if officer_user else 'Unknown',
-                        'title': cabal.get_officer_title(role_type)
-                    }
-        
-        # Get vote counts for leader removal
-        leader_removal_votes = CabalVote.query.filter_by(
-            cabal_id=cabal.id,
-            vote_type='remove_leader',
-            target_id=cabal.leader_id
-        ).count()
-        
-        active_members_count = cabal.get_active_member_count()
-        removal_vote_percentage = (leader_removal_votes / active_members_count * 100) if active_members_count > 0 else 0
-        
-        # Get scheduled battles
-        upcoming_battles = CabalBattle.query.filter_by(
-            cabal_id=cabal.id,
-            completed=False
-        ).filter(
-            CabalBattle.scheduled_at > datetime.utcnow()
-        ).order_by(CabalBattle.scheduled_at).all()
-        
-        # Check if user has voted for leader removal
-        user_voted = CabalVote.query.filter_by(
-            cabal_id=cabal.id,
-            voter_id=current_user.chad.id,
-            vote_type='remove_leader',
-            target_id=cabal.leader_id
-        ).first() is not None
-        
-        # Add current datetime for template
-        now = datetime.utcnow()
-        
-        # Get leader information
-        from app.models.chad import Chad
-        from app.models.user import User
-        
-        leader = Chad.query.get(cabal.leader_id)
-        if leader:
-            leader.user = User.query.filter_by(chad_id=leader.id).first()
-        
-        cabal.leader = leader
-        
-        return render_template('cabal/index.html', 
-                              cabal=cabal,
-                              officers=officers,
-                              leader_removal_votes=leader_removal_votes,
-                              removal_vote_percentage=removal_vote_percentage,
-                              upcoming_battles=upcoming_battles,
-                              user_voted=user_voted,
-                              is_leader=(cabal.leader_id == current_user.chad.id),
-                              now=now)
-    
-    return render_template('cabal/index.html', cabal=None)
+    # Membership, cabal, leader, officers, votes and schedule in two queries
+    page = load_cabal_page(current_user)
+    if page is None:
+        return render_template('cabal/index.html', cabal=None)
+    
+    return render_template('cabal/index.html', **page)
 
 @cabal_bp.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -145,7 +78,7 @@ def create():
             return redirect(url_for('cabal.create'))
         
         # Check if user is already in a cabal
-        existing_membership = CabalMember.query.filter_by(chad_id=current_user.chad.id).first()
+        existing_membership = CabalMember.query.filter_by(user_id=current_user.id, is_active=True).first()
         if existing_membership:
             flash('You are already in a cabal', 'danger')
             return redirect(url_for('cabal.index'))
@@ -161,13 +94,13 @@ def create():
             cabal = Cabal(
                 name=name,
                 description=description,
-                leader_id=current_user.chad.id
+                leader_id=current_user.id
             )
             
             db.session.add(cabal)
             
             # Create the first member entry (the leader)
-            success, message = cabal.add_member(current_user.chad.id)
+            success, message = cabal.add_member(current_user, role='leader')
             if not success:
                 db.session.rollback()
                 flash(f'Failed to add leader as member: {message}', 'danger')
@@ -194,7 +127,7 @@ def join():
         flash('You need to create a character first', 'danger')
         return redirect(url_for('main.index'))
     
-    existing_membership = CabalMember.query.filter_by(chad_id=current_user.chad.id).first()
+    existing_membership = CabalMember.query.filter_by(user_id=current_user.id, is_active=True).first()
     if existing_membership:
         flash('You are already in a cabal', 'danger')
         return redirect(url_for('cabal.index'))
@@ -250,7 +183,7 @@ def join():
         # Use transaction management
         try:
             # Add the user to the cabal
-            success, message = cabal.add_member(current_user.chad.id)
+            success, message = cabal.add_member(current_user)
             
             if not success:
                 flash(message, 'danger')
@@ -335,7 +268,7 @@ def join():
         # Use transaction management
         try:
             # Add the user to the cabal
-            success, message = cabal.add_member(current_user.chad.id)
+            success, message = cabal.add_member(current_user)
             
             if not success:
                 flash(message, 'danger')
@@ -391,16 +324,16 @@ def join():
 @login_required
 def leave(cabal_id):
     """Leave a cabal"""
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Cannot leave if you're the leader
-    if cabal.leader_id == current_user.chad.id:
+    if cabal.leader_id == current_user.id:
         flash('The cabal leader cannot leave. Disband the cabal or transfer leadership first.', 'danger')
         return redirect(url_for('cabal.index'))
     
     # Use transaction management
     try:
-        success, message = cabal.remove_member(current_user.chad.id)
+        success, message = cabal.remove_member(current_user.id)
         
         if not success:
             flash(message, 'danger')
@@ -432,7 +365,7 @@ def edit(cabal_id):
         return redirect(url_for('cabal.index'))
     
     # Only the leader can edit the cabal
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the cabal leader can edit cabal details', 'danger')
         return redirect(url_for('cabal.index'))
     
@@ -506,7 +439,7 @@ def edit(cabal_id):
 @login_required
 def battles(cabal_id):
     """View cabal battles"""
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     from app.models.battle import Battle
     battles = Battle.get_cabal_battle_history(cabal_id)
@@ -522,10 +455,10 @@ def remove_member(cabal_id):
         flash('Invalid cabal ID format', 'danger')
         return redirect(url_for('cabal.index'))
         
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Only leader can remove members
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the cabal leader can remove members', 'danger')
         return redirect(url_for('cabal.index'))
     
@@ -539,9 +472,16 @@ def remove_member(cabal_id):
         flash('Invalid member ID format', 'danger')
         return redirect(url_for('cabal.index'))
     
+    # Members are stored by user; the form identifies them by their chad
+    from app.models.chad import Chad
+    chad = Chad.query.get(chad_id)
+    if not chad:
+        flash('Member not found', 'danger')
+        return redirect(url_for('cabal.index'))
+    
     # Use transaction management
     try:
-        success, message = cabal.remove_member(chad_id)
+        success, message = cabal.remove_member(chad.user_id)
         
         if not success:
             flash(message, 'danger')
@@ -562,10 +502,10 @@ def remove_member(cabal_id):
 @login_required
 def promote_leader(cabal_id):
     """Promote a member to cabal leader"""
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Only current leader can promote
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the cabal leader can promote members', 'danger')
         return redirect(url_for('cabal.index'))
     
@@ -582,6 +522,7 @@ def promote_leader(cabal_id):
     success, message = cabal.change_leader(chad_id)
     
     if success:
+        cabal.invalidate_access()
         flash('Leadership transferred successfully', 'success')
     else:
         flash(message, 'danger')
@@ -592,16 +533,17 @@ def promote_leader(cabal_id):
 @login_required
 def disband(cabal_id):
     """Disband the cabal"""
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Only leader can disband
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the cabal leader can disband the cabal', 'danger')
         return redirect(url_for('cabal.index'))
     
     success, message = cabal.disband()
     
     if success:
+        cabal.invalidate_access()
         flash('Cabal disbanded successfully', 'success')
     else:
         flash(message, 'danger')
@@ -617,10 +559,10 @@ def appoint_officer(cabal_id):
         flash('Invalid cabal ID format', 'danger')
         return redirect(url_for('cabal.index'))
         
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Only the cabal leader can appoint officers
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the Lord of the Shill can appoint officers', 'danger')
         return redirect(url_for('cabal.index'))
     
@@ -665,6 +607,7 @@ def appoint_officer(cabal_id):
         
         if success:
             db.session.commit()
+            cabal.invalidate_access()
             flash(message, 'success')
         else:
             flash(message, 'danger')
@@ -679,10 +622,10 @@ def appoint_officer(cabal_id):
 @login_required
 def remove_officer(cabal_id, role_type):
     """Remove an officer from their role"""
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Only leader can remove officers
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the Lord of the Shill can remove officers', 'danger')
         return redirect(url_for('cabal.index'))
     
@@ -695,6 +638,7 @@ def remove_officer(cabal_id, role_type):
     success, message = cabal.remove_officer(role_type)
     
     if success:
+        cabal.invalidate_access()
         flash(message, 'success')
     else:
         flash(message, 'danger')
@@ -705,16 +649,17 @@ def remove_officer(cabal_id, role_type):
 @login_required
 def vote_remove_leader(cabal_id):
     """Vote to remove the current cabal leader"""
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Leader can't vote to remove themselves
-    if cabal.leader_id == current_user.chad.id:
+    if cabal.leader_id == current_user.id:
         flash('You cannot vote to remove yourself as leader', 'danger')
         return redirect(url_for('cabal.index'))
     
     success, message = cabal.vote_to_remove_leader(current_user.chad.id)
     
     if success:
+        cabal.invalidate_access()
         flash(message, 'success')
     else:
         flash(message, 'danger')
@@ -731,10 +676,10 @@ def schedule_battle(cabal_id):
         return redirect(url_for('cabal.index'))
         
     now = datetime.utcnow()
-    cabal = Cabal.query.get_or_404(cabal_id)
+    cabal = get_cabal_or_404(cabal_id)
     
     # Only the leader can schedule battles
-    if cabal.leader_id != current_user.chad.id:
+    if cabal.leader_id != current_user.id:
         flash('Only the Lord of the Shill can schedule battles', 'danger')
         return redirect(url_for('cabal.index'))
     
@@ -843,14 +788,15 @@ def opt_into_battle(battle_id):
     """Opt into participating in a cabal battle"""
     battle = CabalBattle.query.get_or_404(battle_id)
     
-    # Check if user is in the cabal
-    cabal_member = CabalMember.query.filter_by(
-        chad_id=current_user.chad.id,
-        cabal_id=battle.cabal_id
+    # Check if user is in either cabal
+    cabal_member = CabalMember.query.filter(
+        CabalMember.user_id == current_user.id,
+        CabalMember.is_active == True,
+        CabalMember.cabal_id.in_([battle.cabal_id, battle.opponent_cabal_id])
     ).first()
     
     if not cabal_member:
-        flash('You are not a member of this cabal', 'danger')
+        flash('You are not a member of either cabal in this battle', 'danger')
         return redirect(url_for('cabal.index'))
     
     # Try to opt in
@@ -868,24 +814,23 @@ def opt_into_battle(battle_id):
 def all_battles():
     """View all upcoming cabal battles"""
     # Get user's cabal
-    cabal_member = CabalMember.query.filter_by(chad_id=current_user.chad.id).first()
+    cabal_member = CabalMember.query.filter_by(user_id=current_user.id, is_active=True).first()
     
     if not cabal_member:
         flash('You are not a member of a cabal', 'danger')
         return redirect(url_for('cabal.index'))
     
-    # Get upcoming battles for user's cabal
-    upcoming_battles = CabalBattle.query.filter_by(
-        cabal_id=cabal_member.cabal_id,
-        completed=False
-    ).filter(
+    # Get upcoming battles for user's cabal, whichever side scheduled them
+    upcoming_battles = CabalBattle.query.filter(
+        CabalBattle.involving(cabal_member.cabal_id),
+        CabalBattle.completed == False,
         CabalBattle.scheduled_at > datetime.utcnow()
     ).order_by(CabalBattle.scheduled_at).all()
     
     # Get past battles
-    past_battles = CabalBattle.query.filter_by(
-        cabal_id=cabal_member.cabal_id,
-        completed=True
+    past_battles = CabalBattle.query.filter(
+        CabalBattle.involving(cabal_member.cabal_id),
+        CabalBattle.completed == True
     ).order_by(CabalBattle.scheduled_at.desc()).limit(10).all()
     
     # Check which battles the user has opted into
@@ -925,11 +870,10 @@ def leaderboard():
         cabal.update_rank()
         
         # Get leader
-        leader_chad = Chad.query.get(cabal.leader_id)
-        if leader_chad:
-            leader_user = User.query.filter_by(chad_id=leader_chad.id).first()
-            leader_name = leader_chad.name
-            leader_username = leader_user.twitter_handle if leader_user else 'Unknown'
+        leader_user = User.query.get(cabal.leader_id)
+        if leader_user:
+            leader_name = leader_user.chad.name if leader_user.chad else leader_user.x_username
+            leader_username = leader_user.x_username or 'Unknown'
         else:
             leader_name = 'Unknown'
             leader_username = 'Unknown'
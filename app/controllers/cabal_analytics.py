@@ -4,16 +4,25 @@ Controllers for cabal analytics.
 This module provides endpoints for displaying analytics data for cabals.
 """
 
+import hashlib
 import logging
 from flask import Blueprint, render_template, jsonify, request, abort
 from flask_login import login_required, current_user
 from app.models.cabal import Cabal, CabalMember
 from app.models.chad import Chad
-from app.models.cabal_analytics import CabalAnalytics
+from app.models.cabal_analytics import CabalAnalytics, ROLLUP_RESOLUTIONS, choose_resolution
 from app.utils.permissions import require_cabal_membership
+from app.utils.cabal_loader import get_cabal_or_404
+from app.utils.downsample import downsample_series, MIN_POINTS
 
 logger = logging.getLogger(__name__)
 
+def format_history_date(timestamp, resolution):
+    """Format a history point's date, with the time for sub-daily resolutions."""
+    if resolution in ('raw', 'hour'):
+        return timestamp.strftime('%Y-%m-%d %H:%M')
+    return timestamp.strftime('%Y-%m-%d')
+
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
 @analytics_bp.route('/cabal/<cabal_id>')
@@ -29,16 +38,18 @@ def cabal_analytics(cabal_id):
     Returns:
         HTML: The analytics dashboard for the cabal
     """
-    cabal = Cabal.query.get_or_404(cabal_id)
+    # Already loaded with the membership check
+    cabal = get_cabal_or_404(cabal_id)
     
     # Get latest analytics snapshot
     latest = CabalAnalytics.get_latest(cabal_id)
     
     # Get last 30 days of history
-    history = CabalAnalytics.get_history(cabal_id, days=30)
+    resolution = choose_resolution(30)
+    history = CabalAnalytics.get_history(cabal_id, days=30, resolution=resolution)
     
     # Prepare data for charts
-    dates = [record.timestamp.strftime('%Y-%m-%d') for record in history]
+    dates = [format_history_date(record.timestamp, resolution) for record in history]
     power_data = [float(record.total_power) for record in history]
     member_data = [record.member_count for record in history]
     rank_data = [record.rank for record in history]
@@ -70,11 +81,20 @@ def cabal_history_api(cabal_id):
     if days > 365:
         days = 365  # Limit to 1 year of history
     
-    history = CabalAnalytics.get_history(cabal_id, days=days)
+    # Resolution defaults to the one that suits the window
+    resolution = request.args.get('resolution') or choose_resolution(days)
+    if resolution != 'raw' and resolution not in ROLLUP_RESOLUTIONS:
+        return jsonify({'error': f'Unknown resolution: {resolution}'}), 400
     
-    # Format data for API response
-    data = {
-        'dates': [record.timestamp.strftime('%Y-%m-%d') for record in history],
+    # Optional server-side downsampling to at most `points` points
+    points = request.args.get('points', type=int)
+    if points is not None and points < MIN_POINTS:
+        return jsonify({'error': f'points must be at least {MIN_POINTS}'}), 400
+    
+    history = CabalAnalytics.get_history(cabal_id, days=days, resolution=resolution)
+    
+    timestamps = [record.timestamp for record in history]
+    series = {
         'power': [float(record.total_power) for record in history],
         'members': [record.member_count for record in history],
         'active_members': [record.active_member_count for record in history],
@@ -84,7 +104,21 @@ def cabal_history_api(cabal_id):
         'referrals': [record.referrals for record in history]
     }
     
-    return jsonify(data)
+    # Keep the points that preserve the shape of the power chart
+    if points is not None:
+        timestamps, series = downsample_series(timestamps, series, points, key='power')
+    
+    # Format data for API response
+    data = {
+        'resolution': resolution,
+        'dates': [format_history_date(timestamp, resolution) for timestamp in timestamps],
+        **series
+    }
+    
+    # Unchanged histories are answered with 304 Not Modified
+    response = jsonify(data)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    return response.make_conditional(request)
 
 @analytics_bp.route('/api/cabal/<cabal_id>/latest')
 @login_required
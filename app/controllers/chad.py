@@ -3,7 +3,7 @@ from flask_login import login_required, current_user
 from app import db
 from app.models.chad import Chad, ChadClass
 from app.models.item import CharacterItem
-from app.utils.twitter_api import get_user_tweets, analyze_tweets, calculate_clout
+from app.utils.twitter_cache import get_cached_analysis, get_cached_clout
 
 chad_bp = Blueprint('chad', __name__)
 
@@ -52,17 +52,14 @@ def create():
     if request.method == 'POST':
         # Create character from X/Twitter profile
         try:
-            # Get user tweets for analysis
-            tweets = get_user_tweets(current_user.x_username)
-            if not tweets:
+            # Analyze user tweets to determine character class and stats
+            analysis = get_cached_analysis(current_user.x_id, current_user.x_username)
+            if not analysis:
                 flash('Couldn\'t analyze your tweets. Make sure your account is public.', 'danger')
                 return render_template('chad/create.html')
             
-            # Analyze tweets to determine character class and stats
-            analysis = analyze_tweets(tweets)
-            
             # Calculate Clout stat
-            clout = calculate_clout(current_user.x_id)
+            clout = get_cached_clout(current_user.x_id)
             
             # Get or create Chad Class
             chad_class = ChadClass.query.filter_by(name=analysis['chad_class']).first()
@@ -170,16 +167,13 @@ def refresh_stats():
         return jsonify({'success': False, 'message': 'You need to create a Chad character first'})
     
     try:
-        # Get user tweets for analysis
-        tweets = get_user_tweets(current_user.x_username)
-        if not tweets:
+        # Analyze user tweets (from the cached timeline if it is recent) to determine character class and stats
+        analysis = get_cached_analysis(current_user.x_id, current_user.x_username)
+        if not analysis:
             return jsonify({'success': False, 'message': 'Couldn\'t analyze your tweets. Make sure your account is public.'})
         
-        # Analyze tweets to determine character class and stats
-        analysis = analyze_tweets(tweets)
-        
         # Calculate Clout stat
-        clout = calculate_clout(current_user.x_id)
+        clout = get_cached_clout(current_user.x_id)
         
         # Update Chad character
         chad.clout = clout or chad.clout
@@ -206,6 +200,8 @@ def refresh_stats():
             chad.class_id = new_class.id
         
         db.session.commit()
+        # Clout and class bonuses feed the cached total stats
+        Chad.invalidate_stats(chad.id)
         
         # Get updated stats
         stats = chad.calculate_stats()
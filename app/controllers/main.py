@@ -8,7 +8,7 @@ from app.models.user import User
 from app.models.chad import Chad
 from app.models.waifu import Waifu
 from app.models.battle import Battle
-from app.models.cabal import Cabal, CabalMember
+from app.models.cabal import Cabal, CabalMember, CabalBattle
 from datetime import datetime, timedelta
 from app.utils.bot_commands import simulate_battle
 
@@ -25,20 +25,19 @@ def index():
                 
                 # Get recent battles
                 recent_battles = Battle.query.filter(
-                    (Battle.initiator_id == chad.id) | (Battle.target_id == chad.id)
+                    (Battle.initiator_id == chad.id) | (Battle.defender_id == chad.id)
                 ).order_by(Battle.created_at.desc()).limit(5).all()
                 
                 # Check if user is in a cabal
-                cabal_member = CabalMember.query.filter_by(chad_id=chad.id).first()
+                cabal_member = CabalMember.query.filter_by(user_id=current_user.id, is_active=True).first()
                 cabal = cabal_member.cabal if cabal_member else None
                 
-                # Get upcoming cabal battles if in a cabal
+                # Get upcoming cabal battles if in a cabal, whichever side scheduled them
                 upcoming_battles = []
                 if cabal:
-                    upcoming_battles = CabalBattle.query.filter_by(
-                        cabal_id=cabal.id,
-                        completed=False
-                    ).filter(
+                    upcoming_battles = CabalBattle.query.filter(
+                        CabalBattle.involving(cabal.id),
+                        CabalBattle.completed == False,
                         CabalBattle.scheduled_at > datetime.utcnow()
                     ).order_by(CabalBattle.scheduled_at).limit(3).all()
             
@@ -248,16 +247,20 @@ def leaderboard():
     # Get top 5 cabals
     top_cabals = Cabal.query.order_by(Cabal.total_power.desc()).limit(5).all()
     
-    # Get the current user's chad rank if logged in
+    # Get the current user's chad rank (and the chads around it) if logged in
     user_rank = None
-    if current_user.is_authenticated:
-        # Count number of chads with more clout than current user
-        user_rank = Chad.query.filter(Chad.clout > current_user.chad.clout).count() + 1
+    nearby_chads = []
+    if current_user.is_authenticated and current_user.chad:
+        from app.utils.leaderboard import get_chad_rank
+        clout_rank = get_chad_rank('clout', current_user.chad.id)
+        user_rank = clout_rank['rank']
+        nearby_chads = clout_rank['around']
     
     return render_template('leaderboard.html', 
                           top_chads=top_chads,
                           top_cabals=top_cabals,
-                          user_rank=user_rank)
+                          user_rank=user_rank,
+                          nearby_chads=nearby_chads)
 
 @main_bp.route('/how-to-play')
 def how_to_play():
@@ -6,11 +6,13 @@ from app.models.chad import Chad, ChadClass
 from app.models.waifu import Waifu
 from app.models.item import Item
 from app.models.rarity import Rarity
-from app.models.battle import Battle
+from app.models.battle import Battle, MatchmakingEntry
+from app.models.tournament import Tournament, TournamentEntry, TournamentMatch
+from app.models.tweet_tracker import TweetTracker, MentionInbox, TwitterLookupCache
 
 # Other models that might exist in your app
 try:
-    from app.models.cabal_analytics import CabalAnalytics
+    from app.models.cabal_analytics import CabalAnalytics, CabalAnalyticsRollup
 except ImportError:
     pass
 
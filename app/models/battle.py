@@ -2,7 +2,7 @@
 Battle model for Chad Battles.
 """
 from app.extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
 import enum
 import json
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float
@@ -30,6 +30,108 @@ class BattleAction(enum.Enum):
     DEFEND = "defend"
     SPECIAL = "special"
 
+class BattleEventCode(enum.IntEnum):
+    """Interned codes for battle log events."""
+    UNKNOWN = 0
+    BATTLE_STARTED = 1
+    BATTLE_ENDED = 2
+    ROAST = 10
+    FLEX = 11
+    DEFEND = 12
+    SPECIAL = 13
+    
+    @classmethod
+    def from_name(cls, name):
+        """Get the code for an event or action name (e.g. 'battle_started', 'roast')."""
+        try:
+            return cls[str(name).upper()]
+        except KeyError:
+            return cls.UNKNOWN
+    
+    @property
+    def is_action(self):
+        """Whether this code is a player action rather than a lifecycle event."""
+        return self.value >= BattleEventCode.ROAST.value
+
+class BattleEvent(db.Model):
+    """
+    One entry of a battle log.
+    
+    Events are append-only rows, so recording a turn is a single insert
+    instead of rewriting the whole log.
+    """
+    __tablename__ = 'battle_events'
+    
+    id = Column(Integer, primary_key=True)
+    battle_id = Column(String(36), ForeignKey('battles.id'), nullable=False, index=True)
+    sequence = Column(Integer, nullable=False)
+    turn = Column(Integer, nullable=False, default=0)
+    code = Column(db.SmallInteger, nullable=False)
+    chad_id = Column(Integer, nullable=True)
+    text = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('battle_id', 'sequence', name='uq_battle_events_battle_sequence'),
+    )
+    
+    def __repr__(self):
+        return f'<BattleEvent {self.battle_id}#{self.sequence}: {BattleEventCode(self.code).name}>'
+    
+    def to_dict(self):
+        """Convert the event to the legacy battle log entry format."""
+        code = BattleEventCode(self.code)
+        timestamp = self.created_at.isoformat() if self.created_at else None
+        
+        if code.is_action:
+            return {
+                "turn": self.turn,
+                "timestamp": timestamp,
+                "chad_id": self.chad_id,
+                "action": code.name.lower(),
+                "result": self.text
+            }
+        
+        return {
+            "turn": self.turn,
+            "timestamp": timestamp,
+            "event": code.name.lower(),
+            "description": self.text
+        }
+
+class BattleLogView:
+    """
+    Lazy, read-only view of a battle's log in the legacy list-of-dicts format.
+    
+    Events are only loaded (in one query) the first time the view is read.
+    """
+    
+    def __init__(self, battle):
+        self._battle = battle
+        self._entries = None
+    
+    def _load(self):
+        if self._entries is None:
+            events = self._battle.events.order_by(BattleEvent.sequence).all()
+            self._entries = [event.to_dict() for event in events]
+        return self._entries
+    
+    def __getitem__(self, index):
+        return self._load()[index]
+    
+    def __iter__(self):
+        return iter(self._load())
+    
+    def __len__(self):
+        return len(self._load())
+    
+    def __bool__(self):
+        return len(self) > 0
+    
+    def to_json(self):
+        """Serialize the log in the legacy JSON text format."""
+        return json.dumps(self._load())
+
 class Battle(db.Model):
     """Battle model for tracking battles between users"""
     __tablename__ = 'battles'
@@ -50,19 +152,152 @@ class Battle(db.Model):
     initiator_bonus = Column(Float, nullable=False, default=0)
     defender_bonus = Column(Float, nullable=False, default=0)
     
-    # Battle outcome
-    result_description = Column(Text, nullable=True)
+    # Battle outcome (prose is regenerated from the replay when not stored, see result_description)
+    _result_description = Column('result_description', Text, nullable=True)
     chadcoin_reward = Column(Integer, nullable=False, default=0)
     xp_reward = Column(Integer, nullable=False, default=0)
     
+    # Battle log (see BattleEvent)
+    event_count = Column(Integer, nullable=False, default=0)
+    
+    # Deterministic replay (see app.utils.battle_replay)
+    seed = Column(Integer, nullable=True)
+    replay_data = Column(Text, nullable=True)
+    
+    # Tweet the battle was started from; one battle per tweet, so a retried mention finds it
+    challenge_tweet_id = Column(String(64), nullable=True, unique=True, index=True)
+    
     # Relationships
     initiator = relationship('Chad', foreign_keys=[initiator_id])
     defender = relationship('Chad', foreign_keys=[defender_id])
     winner = relationship('Chad', foreign_keys=[winner_id])
+    events = relationship('BattleEvent', backref='battle', lazy='dynamic', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Battle {self.id}: {self.initiator_id} vs {self.defender_id}>'
     
+    def add_event(self, code, text=None, chad_id=None, turn=None):
+        """
+        Append an entry to the battle log.
+        
+        This is a single insert; existing entries are never loaded or rewritten.
+        
+        Args:
+            code: BattleEventCode or event/action name (e.g. 'battle_started', 'roast')
+            text: Description of the event or result of the action
+            chad_id: ID of the acting Chad for player actions
+            turn: Turn number (defaults to the current turn)
+            
+        Returns:
+            BattleEvent: The appended event
+        """
+        if not isinstance(code, BattleEventCode):
+            code = BattleEventCode.from_name(code)
+        
+        if turn is None:
+            turn = getattr(self, 'current_turn', None) or 0
+        
+        self.event_count = (self.event_count or 0) + 1
+        event = BattleEvent(
+            sequence=self.event_count,
+            turn=turn,
+            code=code.value,
+            chad_id=chad_id,
+            text=text,
+            created_at=datetime.utcnow()
+        )
+        self.events.append(event)
+        
+        # Drop any materialized view so it picks up the new entry
+        self.__dict__.pop('_log_view', None)
+        return event
+    
+    @property
+    def log(self):
+        """Lazy view of the battle log as a list of legacy log entries."""
+        view = self.__dict__.get('_log_view')
+        if view is None:
+            view = BattleLogView(self)
+            self.__dict__['_log_view'] = view
+        return view
+    
+    @property
+    def battle_log(self):
+        """The battle log in the legacy JSON text format."""
+        return self.log.to_json()
+    
+    @property
+    def result_description(self):
+        """
+        Description of the battle's outcome.
+        
+        Battles with a replay record do not store prose; it is regenerated
+        from the seed and replay record on demand.
+        """
+        if self._result_description:
+            return self._result_description
+        
+        result = self.replay()
+        return result['description'] if result else None
+    
+    @result_description.setter
+    def result_description(self, value):
+        self._result_description = value
+    
+    def replay(self):
+        """
+        Recompute this battle in memory from its seed and replay record.
+        
+        Returns:
+            dict: Replay result (see app.utils.battle_replay.replay_battle), or None
+        """
+        from app.utils.battle_replay import replay_battle
+        
+        if not self.replay_data:
+            return None
+        
+        initiator, opponent = self._get_participants()
+        return replay_battle(
+            self.seed,
+            self.replay_data,
+            initiator_name=initiator.name if initiator else 'Initiator',
+            opponent_name=opponent.name if opponent else 'NPC'
+        )
+    
+    def _get_participants(self):
+        """
+        Get the initiating and opposing Chads, as the battle was resolved.
+        
+        Auto-resolved battles (simulate_battle, resolve_battles) fight
+        initiator_chad against opponent_chad; turn-based battles fight
+        initiator against defender, which is unset against an NPC.
+        """
+        initiator = getattr(self, 'initiator_chad', None) or self.initiator
+        opponent = getattr(self, 'opponent_chad', None) or self.defender
+        return initiator, opponent
+    
+    def _get_replay_record(self):
+        """Get the decoded replay record, cached on the instance."""
+        record = self.__dict__.get('_replay_record')
+        if record is None and self.replay_data:
+            from app.utils.battle_replay import decode_replay
+            record = decode_replay(self.replay_data)
+            self.__dict__['_replay_record'] = record
+        return record
+    
+    def _record_action(self, code):
+        """Append an action code to the replay record."""
+        from app.utils.battle_replay import encode_replay, REPLAY_TURNS
+        
+        record = self._get_replay_record()
+        if record is None:
+            return
+        
+        record['actions'].append(int(code))
+        self.replay_data = encode_replay(
+            REPLAY_TURNS, record['initiator_stats'], record['opponent_stats'], record['actions']
+        )
+    
     def calculate_power(self):
         """Calculate battle power for both participants"""
         # This is a simplified version for deployment
@@ -105,15 +340,26 @@ class Battle(db.Model):
         if self.status != BattleStatus.PENDING.value:
             return False, "Battle is not in pending status"
         
+        from app.utils.battle_replay import new_battle_seed, encode_replay, REPLAY_TURNS
+        
         self.status = BattleStatus.IN_PROGRESS.value
         self.started_at = datetime.utcnow()
         self.current_turn = 1
-        self.battle_log = json.dumps([{
-            "turn": 0,
-            "timestamp": datetime.utcnow().isoformat(),
-            "event": "battle_started",
-            "description": f"Battle between {self.initiator.name} and {self.defender.name if self.defender else 'NPC'} has begun!"
-        }])
+        
+        # Snapshot both sides so every turn can be replayed deterministically
+        if self.seed is None:
+            self.seed = new_battle_seed()
+        self.replay_data = encode_replay(
+            REPLAY_TURNS,
+            self.initiator.get_total_stats(),
+            self.defender.get_total_stats() if self.defender else None
+        )
+        self.__dict__.pop('_replay_record', None)
+        self.add_event(
+            BattleEventCode.BATTLE_STARTED,
+            f"Battle between {self.initiator.name} and {self.defender.name if self.defender else 'NPC'} has begun!",
+            turn=0
+        )
         db.session.commit()
         
         return True, "Battle started successfully"
@@ -137,6 +383,7 @@ class Battle(db.Model):
         
         # Update battle log
         self._add_to_battle_log(acting_chad.id, action_type, result)
+        self._record_action(BattleEventCode.from_name(action_type))
         
         # Increment turn counter
         self.current_turn += 1
@@ -152,55 +399,26 @@ class Battle(db.Model):
     
     def _process_action(self, acting_chad, target_chad, action_type, target=None):
         """Process a battle action and return the result."""
-        # Implementation would depend on game mechanics
-        # This is a simplified version
+        from app.utils.battle_replay import describe_action
         
-        if action_type == BattleAction.ROAST.value:
-            damage = acting_chad.get_total_stats()["roast_level"]
-            resistance = target_chad.get_total_stats()["cringe_resistance"]
-            net_damage = max(1, damage - resistance // 2)
-            
-            # Apply damage to target's "health" (could be a temporary battle stat)
-            # For simplicity, we'll just record the result
-            
-            return f"{acting_chad.name} roasted {target_chad.name} for {net_damage} damage!"
-            
-        elif action_type == BattleAction.FLEX.value:
-            flex_power = acting_chad.get_total_stats()["clout"]
-            
-            # Flexing could increase a temporary battle stat or apply a buff
-            
-            return f"{acting_chad.name} flexed their clout for {flex_power} power!"
-            
-        elif action_type == BattleAction.DEFEND.value:
-            defense = acting_chad.get_total_stats()["cringe_resistance"]
-            
-            # Defending could increase resistance for the next turn
-            
-            return f"{acting_chad.name} prepared to defend with {defense} cringe resistance!"
-            
-        elif action_type == BattleAction.SPECIAL.value:
-            drip = acting_chad.get_total_stats()["drip_factor"]
-            
-            # Special moves could have unique effects based on the chad's class
-            
-            return f"{acting_chad.name} used a special move with {drip} drip factor!"
+        # Use the snapshots taken when the battle started so the turn can be replayed
+        record = self._get_replay_record()
+        if record is not None:
+            is_initiator = acting_chad is self.initiator
+            acting_stats = record['initiator_stats'] if is_initiator else record['opponent_stats']
+            target_stats = record['opponent_stats'] if is_initiator else record['initiator_stats']
+        else:
+            acting_stats = acting_chad.get_total_stats()
+            target_stats = target_chad.get_total_stats() if target_chad else None
         
-        return "Invalid action"
+        target_name = target_chad.name if target_chad else "NPC"
+        return describe_action(
+            BattleEventCode.from_name(action_type), acting_chad.name, target_name, acting_stats, target_stats
+        )
     
     def _add_to_battle_log(self, chad_id, action_type, result):
         """Add an action to the battle log."""
-        log = json.loads(self.battle_log) if self.battle_log else []
-        
-        log.append({
-            "turn": self.current_turn,
-            "timestamp": datetime.utcnow().isoformat(),
-            "chad_id": chad_id,
-            "action": action_type,
-            "result": result
-        })
-        
-        self.battle_log = json.dumps(log)
+        self.add_event(action_type, result, chad_id=chad_id, turn=self.current_turn)
     
     def _check_battle_end(self):
         """Check if the battle should end."""
@@ -213,31 +431,31 @@ class Battle(db.Model):
         self.status = BattleStatus.COMPLETED.value
         self.completed_at = datetime.utcnow()
         
+        from app.utils.battle_replay import initiator_wins_on_score
+        from app.utils.leaderboard import record_battle_result
+        
         # Determine winner (simplified)
         # In a real implementation, this would be based on remaining health or other metrics
-        initiator_score = sum(self.initiator.get_total_stats().values())
-        defender_score = sum(self.defender.get_total_stats().values()) if self.defender else 0
+        record = self._get_replay_record()
+        if record is not None:
+            initiator_stats, defender_stats = record['initiator_stats'], record['opponent_stats']
+        else:
+            initiator_stats = self.initiator.get_total_stats()
+            defender_stats = self.defender.get_total_stats() if self.defender else None
         
-        if initiator_score > defender_score:
-            self.winner_id = self.initiator_id
-            self.loser_id = self.defender_id
-            winner_name = self.initiator.name
-            loser_name = self.defender.name if self.defender else "NPC"
+        # winner_id and loser_id are user IDs, as for auto-resolved battles (see finish_battle)
+        if initiator_wins_on_score(initiator_stats, defender_stats):
+            winner, loser = self.initiator, self.defender
         else:
-            self.winner_id = self.defender_id
-            self.loser_id = self.initiator_id
-            winner_name = self.defender.name if self.defender else "NPC"
-            loser_name = self.initiator.name
+            winner, loser = self.defender, self.initiator
+        self.winner_id = winner.user_id if winner else None
+        self.loser_id = loser.user_id if loser else None
+        winner_name = winner.name if winner else "NPC"
+        loser_name = loser.name if loser else "NPC"
+        record_battle_result(winner, loser)
         
         # Add final event to battle log
-        log = json.loads(self.battle_log) if self.battle_log else []
-        log.append({
-            "turn": self.current_turn,
-            "timestamp": datetime.utcnow().isoformat(),
-            "event": "battle_ended",
-            "description": f"{winner_name} defeated {loser_name}!"
-        })
-        self.battle_log = json.dumps(log)
+        self.add_event(BattleEventCode.BATTLE_ENDED, f"{winner_name} defeated {loser_name}!", turn=self.current_turn)
         
         # Process rewards
         if self.winner_id:
@@ -251,7 +469,7 @@ class Battle(db.Model):
                 user_id=self.winner_id,
                 amount=reward_amount,
                 description=f"Battle reward for defeating {loser_name}",
-                related_entity=('chad', self.initiator_id if self.winner_id == self.initiator_id else self.defender_id)
+                related_entity=('chad', winner.id)
             )
             
             # Update winner's Chadcoin balance
@@ -284,79 +502,284 @@ class Battle(db.Model):
         """
         Get the top players for the leaderboard
         
+        Served from the in-memory battle leaderboard, which mirrors the
+        per-Chad battle counters, so the cost does not grow with battle history.
+        
         Returns:
             list: List of dictionaries with chad info and battle stats
         """
-        from sqlalchemy import func, case, literal_column
-        from sqlalchemy.sql import text
-        from app.models.chad import Chad
-        from app.models.user import User
+        import logging
+        from app.utils.leaderboard import battle_leaderboard
         
         try:
-            # First attempt: Use SQLAlchemy
-            try:
-                # Get battle stats for each chad
-                subq = db.session.query(
-                    cls.initiator_id.label('chad_id'),
-                    func.count(cls.id).label('battles'),
-                    func.sum(case([(cls.winner_id == cls.initiator_id, 1)], else_=0)).label('wins')
-                ).group_by(cls.initiator_id).union(
-                    db.session.query(
-                        cls.defender_id.label('chad_id'),
-                        func.count(cls.id).label('battles'),
-                        func.sum(case([(cls.winner_id == cls.defender_id, 1)], else_=0)).label('wins')
-                    ).group_by(cls.defender_id)
-                ).subquery()
-                
-                # Aggregate the battle stats
-                battle_stats = db.session.query(
-                    subq.c.chad_id,
-                    func.sum(subq.c.battles).label('battles'),
-                    func.sum(subq.c.wins).label('wins')
-                ).group_by(subq.c.chad_id).subquery()
-                
-                # Join with Chad and User tables
-                result = db.session.query(
-                    Chad.id,
-                    User.username.label('chad_name'),
-                    Chad.chad_class.label('class_name'),
-                    battle_stats.c.wins,
-                    battle_stats.c.battles,
-                    (func.cast(battle_stats.c.wins, db.Float) / func.cast(battle_stats.c.battles, db.Float)).label('win_rate'),
-                    (battle_stats.c.wins * 10 + battle_stats.c.battles * 5).label('score')
-                ).join(battle_stats, Chad.id == battle_stats.c.chad_id
-                ).join(User, Chad.id == User.chad_id
-                ).filter(battle_stats.c.battles > 0
-                ).order_by(text('score DESC')
-                ).limit(limit).all()
-                
-                # Convert to list of dictionaries
-                leaderboard = []
-                for row in result:
-                    leaderboard.append({
-                        'chad_id': row.id,
-                        'chad_name': row.chad_name,
-                        'class_name': row.class_name,
-                        'wins': row.wins,
-                        'battles': row.battles,
-                        'win_rate': row.win_rate or 0,
-                        'score': row.score
-                    })
-                
-                return leaderboard
-                
-            except Exception as e:
-                # Log the error but continue with fallback
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error in primary leaderboard query: {str(e)}")
-                
-                # Fallback: Return empty list for now
-                return []
-                
-        except Exception as outer_e:
-            # Return empty list in case of any error
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error in leaderboard query: {str(outer_e)}")
-            return [] 
\ No newline at end of file
+            return battle_leaderboard.top(limit)
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error reading battle leaderboard, falling back to counters: {str(e)}")
+        
+        # Fallback: read the counters directly (indexed, no battle history scan)
+        from app.models.chad import Chad, ChadClass
+        
+        rows = db.session.query(
+            Chad.id, Chad.name, ChadClass.name, Chad.battles_won, Chad.battles_lost, Chad.battle_score
+        ).outerjoin(
+            ChadClass, Chad.class_id == ChadClass.id
+        ).filter(
+            Chad.battle_score > 0
+        ).order_by(Chad.battle_score.desc(), Chad.id).limit(limit).all()
+        
+        leaderboard = []
+        for chad_id, name, class_name, wins, losses, score in rows:
+            battles = (wins or 0) + (losses or 0)
+            leaderboard.append({
+                'chad_id': chad_id,
+                'chad_name': name,
+                'class_name': class_name,
+                'wins': wins or 0,
+                'battles': battles,
+                'win_rate': (wins or 0) / battles if battles else 0,
+                'score': score
+            })
+        return leaderboard
+
+class MatchmakingEntry(db.Model):
+    """
+    A Chad in the matchmaking queue.
+    
+    The queue lives in this table so every bot process matches against the
+    same waiting Chads and nobody is forgotten on a restart. A row waits
+    (opponent_chad_id unset) until it is paired; both rows of a pair then
+    point at each other until their battle is resolved, which deletes them.
+    Resolving claims a pair under a lease, like the mention inbox, so a
+    process dying mid-batch leaves the pair to be resolved by the next run.
+    
+    The queue operations use Core statements on the table; waiting Chads
+    are looked up through the (opponent_chad_id, rating) index.
+    """
+    __tablename__ = 'matchmaking_queue'
+    
+    chad_id = Column(Integer, primary_key=True)
+    rating = Column(Integer, nullable=False)
+    tweet_id = Column(String(64), nullable=True)
+    username = Column(String(64), nullable=True)
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    opponent_chad_id = Column(Integer, nullable=True)
+    matched_at = Column(DateTime, nullable=True)
+    claim_token = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_matchmaking_queue_waiting', 'opponent_chad_id', 'rating'),
+    )
+    
+    COLUMNS = ('chad_id', 'rating', 'tweet_id', 'username', 'enqueued_at', 'opponent_chad_id')
+    
+    def __repr__(self):
+        return f'<MatchmakingEntry {self.chad_id}: {self.rating}>'
+    
+    @classmethod
+    def _select(cls):
+        from sqlalchemy import select
+        
+        table = cls.__table__
+        return select(*(table.c[name] for name in cls.COLUMNS))
+    
+    @classmethod
+    def count_waiting(cls):
+        """Get the number of Chads waiting for an opponent."""
+        from sqlalchemy import select, func
+        
+        table = cls.__table__
+        return db.session.execute(
+            select(func.count()).select_from(table).where(table.c.opponent_chad_id.is_(None))
+        ).scalar()
+    
+    @classmethod
+    def is_queued(cls, chad_id):
+        """Whether a Chad is waiting, or matched and waiting for its battle."""
+        from sqlalchemy import select
+        
+        table = cls.__table__
+        return db.session.execute(
+            select(table.c.chad_id).where(table.c.chad_id == chad_id)
+        ).first() is not None
+    
+    @classmethod
+    def neighbours(cls, rating):
+        """
+        Get the waiting Chads either side of a rating in the queue's order.
+        
+        Returns:
+            list: Up to two row mappings, the closest at or below the rating and the closest above it
+        """
+        table = cls.__table__
+        waiting = table.c.opponent_chad_id.is_(None)
+        below = cls._select().where(waiting, table.c.rating <= rating).order_by(
+            table.c.rating.desc(), table.c.enqueued_at.desc(), table.c.chad_id.desc()
+        ).limit(1)
+        above = cls._select().where(waiting, table.c.rating > rating).order_by(
+            table.c.rating, table.c.enqueued_at, table.c.chad_id
+        ).limit(1)
+        return [row for row in (db.session.execute(below).mappings().first(),
+                                db.session.execute(above).mappings().first()) if row is not None]
+    
+    @classmethod
+    def waiting(cls):
+        """Get every waiting Chad, ordered by rating, then queue time, then id."""
+        table = cls.__table__
+        return db.session.execute(
+            cls._select().where(table.c.opponent_chad_id.is_(None)).order_by(
+                table.c.rating, table.c.enqueued_at, table.c.chad_id
+            )
+        ).mappings().all()
+    
+    @classmethod
+    def add(cls, chad_id, rating, enqueued_at, tweet_id=None, username=None, opponent_chad_id=None):
+        """Insert a queue row, without committing."""
+        from sqlalchemy import insert
+        
+        db.session.execute(insert(cls.__table__).values(
+            chad_id=chad_id,
+            rating=rating,
+            tweet_id=tweet_id,
+            username=username,
+            enqueued_at=enqueued_at,
+            opponent_chad_id=opponent_chad_id,
+            matched_at=enqueued_at if opponent_chad_id is not None else None,
+            attempts=0
+        ))
+    
+    @classmethod
+    def take(cls, chad_id, opponent_chad_id, now):
+        """
+        Pair a waiting Chad with an opponent, without committing.
+        
+        The update only applies while the Chad is still waiting, so two
+        processes can never pair the same Chad.
+        
+        Returns:
+            bool: True if the Chad was still waiting
+        """
+        from sqlalchemy import update
+        
+        table = cls.__table__
+        result = db.session.execute(
+            update(table).where(
+                table.c.chad_id == chad_id, table.c.opponent_chad_id.is_(None)
+            ).values(opponent_chad_id=opponent_chad_id, matched_at=now)
+        )
+        return result.rowcount == 1
+    
+    @classmethod
+    def remove_waiting(cls, chad_id):
+        """
+        Remove a waiting Chad, without committing (matched Chads stay until their battle).
+        
+        Returns:
+            bool: True if the Chad was waiting
+        """
+        from sqlalchemy import delete
+        
+        table = cls.__table__
+        result = db.session.execute(
+            delete(table).where(table.c.chad_id == chad_id, table.c.opponent_chad_id.is_(None))
+        )
+        return result.rowcount == 1
+    
+    @classmethod
+    def claim_pairs(cls, limit, lease_seconds):
+        """
+        Claim matched pairs to resolve, oldest match first.
+        
+        Pairs not yet claimed, or whose lease has expired, are claimable. Both
+        rows of each pair are tagged with a fresh token in one conditional
+        UPDATE, so concurrent processes never claim the same pair.
+        
+        Args:
+            limit (int): Maximum number of pairs to claim
+            lease_seconds (int): How long the claim lasts before it can be taken over
+            
+        Returns:
+            tuple: (token, pairs), each pair being the two row mappings, the earlier queued first
+        """
+        from sqlalchemy import select, update, or_
+        
+        table = cls.__table__
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        
+        claimable = or_(table.c.lease_expires_at.is_(None), table.c.lease_expires_at < now)
+        # One row per pair: the one with the lower id
+        candidates = select(table.c.chad_id).where(
+            table.c.opponent_chad_id.isnot(None),
+            table.c.chad_id < table.c.opponent_chad_id,
+            claimable
+        ).order_by(table.c.matched_at, table.c.chad_id).limit(limit).scalar_subquery()
+        
+        db.session.execute(
+            update(table).where(
+                or_(table.c.chad_id.in_(candidates), table.c.opponent_chad_id.in_(candidates)),
+                table.c.opponent_chad_id.isnot(None),
+                claimable
+            ).values(
+                claim_token=token,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=table.c.attempts + 1
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        
+        rows = {
+            row['chad_id']: row
+            for row in db.session.execute(
+                cls._select().where(table.c.claim_token == token)
+            ).mappings().all()
+        }
+        pairs = []
+        for chad_id, row in rows.items():
+            opponent = rows.get(row['opponent_chad_id'])
+            if opponent is not None and chad_id < opponent['chad_id']:
+                pairs.append(tuple(sorted((row, opponent), key=lambda entry: (entry['enqueued_at'], entry['chad_id']))))
+        pairs.sort(key=lambda pair: (pair[0]['enqueued_at'], pair[0]['chad_id']))
+        return token, pairs
+    
+    @classmethod
+    def finish(cls, token):
+        """Delete claimed pairs, without committing (their battles commit with it)."""
+        from sqlalchemy import delete
+        
+        table = cls.__table__
+        db.session.execute(delete(table).where(table.c.claim_token == token))
+    
+    @classmethod
+    def held(cls, token):
+        """Get the number of rows still held by a claim (0 once its battles are resolved)."""
+        from sqlalchemy import select, func
+        
+        table = cls.__table__
+        return db.session.execute(
+            select(func.count()).select_from(table).where(table.c.claim_token == token)
+        ).scalar()
+    
+    @classmethod
+    def give_up(cls, token, max_attempts):
+        """
+        Drop claimed pairs whose resolution has failed max_attempts times.
+        
+        The other pairs keep their lease and are retried once it expires.
+        
+        Returns:
+            list: Row mappings of the dropped Chads
+        """
+        from sqlalchemy import delete
+        
+        table = cls.__table__
+        rows = db.session.execute(
+            cls._select().where(table.c.claim_token == token, table.c.attempts >= max_attempts)
+        ).mappings().all()
+        if rows:
+            db.session.execute(
+                delete(table).where(table.c.claim_token == token, table.c.attempts >= max_attempts)
+            )
+        db.session.commit()
+        return rows
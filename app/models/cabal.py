@@ -2,7 +2,7 @@
 Cabal model for Chad Battles.
 """
 from app.extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
 import enum
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float
 from sqlalchemy.orm import relationship
@@ -30,6 +30,7 @@ class Cabal(db.Model):
     member_count = Column(Integer, nullable=False, default=0)
     victory_count = Column(Integer, nullable=False, default=0)
     defeat_count = Column(Integer, nullable=False, default=0)
+    rank = Column(Integer, nullable=True, index=True)  # Dense rank by total power, set by the rankings job
     
     # Cabal status
     is_active = Column(Boolean, nullable=False, default=True)
@@ -42,73 +43,111 @@ class Cabal(db.Model):
     # Relationships
     leader = relationship('User', foreign_keys=[leader_id], backref='led_cabals')
     members = relationship('CabalMember', back_populates='cabal', cascade='all, delete-orphan')
+    officer_roles = relationship('CabalOfficerRole', back_populates='cabal', cascade='all, delete-orphan')
+    
+    # Officer roles and their titles
+    OFFICER_TITLES = {
+        'clout': 'Duke of Dank Memes',
+        'roast_level': 'Earl of Edgelords',
+        'cringe_resistance': 'Baron of Bagholders',
+        'drip_factor': 'Viscount of Vaporware'
+    }
     
     def __repr__(self):
         return f'<Cabal {self.id}: {self.name}>'
     
+    def get_officer(self, role_type):
+        """Get the officer holding a role, or None"""
+        return CabalOfficerRole.query.filter_by(cabal_id=self.id, role_type=role_type).first()
+    
+    @classmethod
+    def get_officer_title(cls, role_type):
+        """Get the display title of an officer role"""
+        return cls.OFFICER_TITLES.get(role_type, role_type)
+    
+    def get_active_member_count(self):
+        """Get the number of active members (kept in the member_count column)"""
+        return self.member_count or 0
+    
     @property
     def max_size(self):
         """Get the maximum size of the cabal"""
         return current_app.config.get('MAX_CABAL_SIZE', 21)
     
     def calculate_total_power(self):
-        """Calculate the total power of the cabal based on members"""
-        # This is a simplified version for deployment
-        # In the full version, we would calculate based on member stats
-        total = 0
-        for member in self.members:
-            if member.is_active:
-                total += member.power_contribution
-        self.total_power = total
+        """Recalculate the total power of the cabal from its active members"""
+        from sqlalchemy import func
+        
+        total = db.session.query(
+            func.coalesce(func.sum(CabalMember.power_contribution), 0)
+        ).filter(
+            CabalMember.cabal_id == self.id,
+            CabalMember.is_active == True
+        ).scalar()
+        self.total_power = float(total)
+        Cabal.invalidate_rankings()
         return self.total_power
     
     def update_member_count(self):
-        """Update the member count"""
-        self.member_count = sum(1 for member in self.members if member.is_active)
+        """Recount the active members of the cabal"""
+        self.member_count = CabalMember.query.filter_by(cabal_id=self.id, is_active=True).count()
+        Cabal.invalidate_rankings()
         return self.member_count
     
     def add_member(self, user, role='member'):
-        """Add a user to the cabal"""
-        from app.models.cabal_member import CabalMember
+        """
+        Add a user to the cabal
         
+        The membership and the cabal's member_count/total_power columns are
+        written in the same transaction, using in-database increments so
+        concurrent joins cannot lose an update.
+        """
         # Check if user is already a member
         existing_member = CabalMember.query.filter_by(cabal_id=self.id, user_id=user.id).first()
-        if existing_member:
-            if existing_member.is_active:
-                return False, "User is already a member of this cabal"
-            else:
-                existing_member.is_active = True
-                existing_member.role = role
-                db.session.commit()
-                self.update_member_count()
-                return True, "User rejoined the cabal"
+        if existing_member and existing_member.is_active:
+            return False, "User is already a member of this cabal"
         
         # Check if the cabal is full
-        active_members = sum(1 for member in self.members if member.is_active)
-        if active_members >= self.max_size:
+        if (self.member_count or 0) >= self.max_size:
             return False, f"Cabal is full (maximum {self.max_size} members)"
         
-        # Create new member
-        member = CabalMember(
-            cabal_id=self.id,
-            user_id=user.id,
-            role=role,
-            joined_at=datetime.utcnow()
-        )
-        db.session.add(member)
-        db.session.commit()
-        
-        # Update cabal stats
-        self.update_member_count()
-        self.calculate_total_power()
-        db.session.commit()
+        try:
+            if existing_member:
+                member = existing_member
+                member.is_active = True
+                member.role = role
+                member.left_at = None
+                message = "User rejoined the cabal"
+            else:
+                member = CabalMember(
+                    cabal_id=self.id,
+                    user_id=user.id,
+                    role=role,
+                    power_contribution=0,
+                    joined_at=datetime.utcnow()
+                )
+                db.session.add(member)
+                message = "User added to cabal"
+            
+            self.member_count = Cabal.member_count + 1
+            self.total_power = Cabal.total_power + (member.power_contribution or 0)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error adding user {user.id} to cabal {self.id}: {str(e)}")
+            return False, "Error joining cabal"
         
-        return True, "User added to cabal"
+        Cabal.invalidate_rankings()
+        self.invalidate_access()
+        return True, message
     
     def remove_member(self, user_id):
-        """Remove a user from the cabal"""
-        from app.models.cabal_member import CabalMember
+        """
+        Remove a user from the cabal
         
+        The membership and the cabal's aggregate columns are updated in the
+        same transaction.
+        """
         member = CabalMember.query.filter_by(cabal_id=self.id, user_id=user_id, is_active=True).first()
         if not member:
             return False, "User is not a member of this cabal"
@@ -117,26 +156,290 @@ class Cabal(db.Model):
         if user_id == self.leader_id:
             return False, "Cannot remove the cabal leader"
         
-        member.is_active = False
-        member.left_at = datetime.utcnow()
-        db.session.commit()
-        
-        # Update cabal stats
-        self.update_member_count()
-        self.calculate_total_power()
-        db.session.commit()
+        try:
+            member.is_active = False
+            member.left_at = datetime.utcnow()
+            self.member_count = Cabal.member_count - 1
+            self.total_power = Cabal.total_power - (member.power_contribution or 0)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error removing user {user_id} from cabal {self.id}: {str(e)}")
+            return False, "Error leaving cabal"
         
+        Cabal.invalidate_rankings()
+        self.invalidate_access()
         return True, "User removed from cabal"
-
-    @property
-    def member_count(self):
-        """Get the number of members in the cabal"""
-        return len(self.members)
     
-    @property
-    def total_power(self):
-        """Get the total power of all members in the cabal"""
-        return sum([member.power_contribution for member in self.members if member.is_active])
+    def change_leader(self, chad_id):
+        """
+        Hand leadership of the cabal to another member
+        
+        Args:
+            chad_id: ID of the new leader's chad
+            
+        Returns:
+            tuple: (success, message)
+        """
+        from app.models.chad import Chad
+        
+        chad = Chad.query.get(chad_id)
+        if not chad:
+            return False, "Chad not found"
+        
+        # leader_id holds the leader's user ID, like CabalMember.user_id
+        if chad.user_id == self.leader_id:
+            return False, "This member is already the leader"
+        
+        new_leader = CabalMember.query.filter_by(cabal_id=self.id, user_id=chad.user_id, is_active=True).first()
+        if not new_leader:
+            return False, "User is not a member of this cabal"
+        
+        try:
+            old_leader = CabalMember.query.filter_by(cabal_id=self.id, user_id=self.leader_id, is_active=True).first()
+            if old_leader:
+                old_leader.role = 'member'
+            new_leader.role = 'leader'
+            self.leader_id = chad.user_id
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error changing leader of cabal {self.id}: {str(e)}")
+            return False, "Error changing leader"
+        
+        self.invalidate_access()
+        return True, "Leadership transferred"
+    
+    @classmethod
+    def reconcile_aggregates(cls):
+        """
+        Verify every cabal's member_count/total_power against its memberships
+        
+        The true values are computed with one grouped query and every cabal
+        that drifted is repaired with one bulk UPDATE.
+        
+        Returns:
+            int: Number of cabals repaired
+        """
+        from sqlalchemy import func
+        
+        actual = {
+            cabal_id: (member_count, float(total_power))
+            for cabal_id, member_count, total_power in db.session.query(
+                CabalMember.cabal_id,
+                func.count(CabalMember.id),
+                func.coalesce(func.sum(CabalMember.power_contribution), 0)
+            ).filter(
+                CabalMember.is_active == True
+            ).group_by(CabalMember.cabal_id).all()
+        }
+        
+        repairs = []
+        for cabal_id, member_count, total_power in db.session.query(cls.id, cls.member_count, cls.total_power).all():
+            expected_count, expected_power = actual.get(cabal_id, (0, 0.0))
+            if member_count != expected_count or abs((total_power or 0) - expected_power) > 1e-6:
+                repairs.append({'id': cabal_id, 'member_count': expected_count, 'total_power': expected_power})
+        
+        if repairs:
+            cls._bulk_update(repairs)
+            db.session.commit()
+            cls.invalidate_rankings()
+            current_app.logger.warning(
+                f"Repaired aggregate drift in {len(repairs)} cabals: {[repair['id'] for repair in repairs]}"
+            )
+        
+        return len(repairs)
+    
+    def can_schedule_battle(self):
+        """Check whether the cabal may schedule another battle this week"""
+        return CabalBattle.count_battles_this_week(self.id) < CabalBattle.MAX_BATTLES_PER_WEEK
+    
+    def schedule_battle(self, opponent_cabal_id, scheduled_at):
+        """Schedule a battle against another cabal"""
+        if opponent_cabal_id == self.id:
+            return False, "A cabal cannot battle itself"
+        
+        if not self.can_schedule_battle():
+            return False, f"Your cabal has already scheduled the maximum {CabalBattle.MAX_BATTLES_PER_WEEK} battles this week"
+        
+        try:
+            battle = CabalBattle(
+                cabal_id=self.id,
+                opponent_cabal_id=opponent_cabal_id,
+                scheduled_at=scheduled_at,
+                week_number=scheduled_at.isocalendar()[1]
+            )
+            db.session.add(battle)
+            db.session.commit()
+            return True, "Battle scheduled successfully"
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error scheduling battle for cabal {self.id}: {str(e)}")
+            return False, "Error scheduling battle"
+    
+    @classmethod
+    def compute_rankings(cls):
+        """
+        Compute every active cabal's aggregates and dense rank in one statement
+        
+        Member counts, power and referrals are aggregated in grouped
+        subqueries and ranked with DENSE_RANK() over total power.
+        
+        Returns:
+            list: Dictionaries with cabal_id, member_count, active_member_count,
+                  total_power, rank, battles_won, battles_lost and referrals
+        """
+        from sqlalchemy import func, case, cast
+        from app.models.referral import Referral
+        
+        members = db.session.query(
+            CabalMember.cabal_id.label('cabal_id'),
+            func.count(CabalMember.id).label('member_count'),
+            func.sum(case((CabalMember.is_active == True, 1), else_=0)).label('active_member_count'),
+            func.sum(case((CabalMember.is_active == True, CabalMember.power_contribution), else_=0)).label('total_power')
+        ).group_by(CabalMember.cabal_id).subquery()
+        
+        referrals = db.session.query(
+            Referral.cabal_id.label('cabal_id'),
+            func.count(Referral.id).label('referrals')
+        ).group_by(Referral.cabal_id).subquery()
+        
+        total_power = func.coalesce(members.c.total_power, 0)
+        rows = db.session.query(
+            cls.id,
+            func.coalesce(members.c.member_count, 0),
+            func.coalesce(members.c.active_member_count, 0),
+            total_power,
+            func.dense_rank().over(order_by=total_power.desc()),
+            cls.victory_count,
+            cls.defeat_count,
+            func.coalesce(referrals.c.referrals, 0)
+        ).outerjoin(
+            members, members.c.cabal_id == cls.id
+        ).outerjoin(
+            referrals, referrals.c.cabal_id == cast(cls.id, String)
+        ).filter(
+            cls.is_active == True
+        ).all()
+        
+        return [
+            {
+                'cabal_id': cabal_id,
+                'member_count': member_count,
+                'active_member_count': active_member_count,
+                'total_power': float(power),
+                'rank': rank,
+                'battles_won': battles_won or 0,
+                'battles_lost': battles_lost or 0,
+                'referrals': referral_count
+            }
+            for cabal_id, member_count, active_member_count, power, rank, battles_won, battles_lost, referral_count in rows
+        ]
+    
+    @classmethod
+    def apply_rankings(cls, rankings):
+        """
+        Write computed aggregates and ranks back with one bulk UPDATE, without committing
+        
+        Args:
+            rankings: Rows produced by compute_rankings()
+        """
+        if not rankings:
+            return
+        
+        cls._bulk_update([
+            {
+                'id': row['cabal_id'],
+                'member_count': row['active_member_count'],
+                'total_power': row['total_power'],
+                'rank': row['rank']
+            }
+            for row in rankings
+        ])
+        cls.invalidate_rankings()
+    
+    @classmethod
+    def _bulk_update(cls, rows):
+        """
+        Update many cabals with one executemany UPDATE, without committing
+        
+        A Core UPDATE matched on a bound ID, so it runs the same on
+        SQLAlchemy 1.4 and 2.0 (the ORM bulk UPDATE by primary key that
+        session.execute(update(Cabal), rows) relies on is 2.0 only).
+        
+        Args:
+            rows: Dictionaries with the cabal's 'id' and the columns to set,
+                  the same columns in every row
+        """
+        from sqlalchemy import update, bindparam
+        
+        table = cls.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('b_id')),
+            [{'b_id': row['id'], **{column: value for column, value in row.items() if column != 'id'}} for row in rows]
+        )
+    
+    @classmethod
+    def invalidate_rankings(cls):
+        """Drop the cached cabal ranking after a membership or power change"""
+        from app.utils.cache import invalidate_cabal_rankings
+        invalidate_cabal_rankings()
+    
+    def invalidate_access(self):
+        """Drop cached memberships and roles after someone joins, leaves or changes role"""
+        from app.utils.cabal_loader import invalidate_cabal_access
+        invalidate_cabal_access(self.id)
+    
+    @classmethod
+    def get_cabal_rankings(cls):
+        """
+        Get every cabal with active members, ranked by total power
+        
+        The ranking is read from the persisted aggregate columns with one
+        indexed query and cached until a membership or power change
+        invalidates it.
+        
+        Returns:
+            dict: {'ranking': list of (cabal_id, cabal_name, member_count, total_power)
+                   tuples, best first, 'ranks': mapping of cabal_id to 1-based dense rank}
+        """
+        from app.utils.cache import get_cached_cabal_rankings, cache_cabal_rankings
+        
+        rankings = get_cached_cabal_rankings()
+        if rankings is not None:
+            return rankings
+        
+        ranking = [
+            (cabal_id, name, member_count, float(total_power or 0))
+            for cabal_id, name, member_count, total_power in cls._query_cabal_rankings()
+        ]
+        # Dense, like the persisted rank column: cabals with equal power share a rank
+        ranks = {}
+        rank, previous_power = 0, None
+        for cabal_id, _, _, total_power in ranking:
+            if total_power != previous_power:
+                rank += 1
+                previous_power = total_power
+            ranks[cabal_id] = rank
+        
+        rankings = {'ranking': ranking, 'ranks': ranks}
+        cache_cabal_rankings(rankings)
+        return rankings
+    
+    @classmethod
+    def _query_cabal_rankings(cls):
+        """Read the persisted member counts and power of every ranked cabal"""
+        return db.session.query(
+            cls.id,
+            cls.name,
+            cls.member_count,
+            cls.total_power
+        ).filter(
+            cls.is_active == True,
+            cls.member_count > 0
+        ).order_by(
+            cls.total_power.desc(), cls.id
+        ).all()
     
     @classmethod
     def get_top_cabals(cls, limit=10):
@@ -147,41 +450,108 @@ class Cabal(db.Model):
             list: List of tuples (cabal_id, cabal_name, member_count, total_power)
         """
         try:
-            cabals = cls.query.all()
-            
-            # Calculate stats for each cabal
-            cabal_stats = []
-            for cabal in cabals:
-                members = cabal.members
-                member_count = len(members)
-                
-                if member_count == 0:
-                    continue
-                    
-                # Calculate total power (this is just an example, adjust as needed)
-                total_power = 0
-                for membership in members:
-                    if membership.is_active:
-                        total_power += membership.power_contribution
-                
-                cabal_stats.append((
-                    cabal.id,
-                    cabal.name,
-                    member_count,
-                    total_power
-                ))
-            
-            # Sort by total power descending
-            cabal_stats.sort(key=lambda x: x[3], reverse=True)
-            
-            # Return top cabals
-            return cabal_stats[:limit]
-            
+            return cls.get_cabal_rankings()['ranking'][:limit]
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
             logger.error(f"Error getting top cabals: {str(e)}")
             return []
+    
+    @classmethod
+    def get_cabal_rank(cls, cabal_id):
+        """
+        Get a cabal's rank on the leaderboard
+        
+        Ranks are dense, as in the rank column compute_rankings() persists:
+        cabals with equal power share a rank and the next rank follows on.
+        
+        Returns:
+            int: 1-based rank, or None if the cabal has no active members
+        """
+        try:
+            return cls.get_cabal_rankings()['ranks'].get(cabal_id)
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Error getting rank of cabal {cabal_id}: {str(e)}")
+            return None
+
+    @classmethod
+    def get_weekly_recap_stats(cls, cabal_ids, since):
+        """
+        Get the weekly recap figures of several cabals with one grouped query each
+
+        Battles are counted from either side, so each battle is read once as
+        the scheduling cabal and once as the opponent.
+
+        Args:
+            cabal_ids: IDs of the cabals to report on
+            since: Start of the reporting period
+
+        Returns:
+            dict: Mapping of cabal_id to a dict with wins, losses, new_members,
+                  referrals and leader_handle (None if the leader has no X handle)
+        """
+        from sqlalchemy import func, case, cast, and_, select, union_all
+        from app.models.referral import Referral
+        from app.models.user import User
+
+        stats = {
+            cabal_id: {'wins': 0, 'losses': 0, 'new_members': 0, 'referrals': 0, 'leader_handle': None}
+            for cabal_id in cabal_ids
+        }
+        if not stats:
+            return stats
+
+        fought = and_(CabalBattle.completed == True, CabalBattle.scheduled_at >= since)
+        sides = union_all(
+            select(CabalBattle.cabal_id.label('cabal_id'), CabalBattle.winner_id.label('winner_id')).where(
+                fought, CabalBattle.cabal_id.in_(cabal_ids)
+            ),
+            select(CabalBattle.opponent_cabal_id.label('cabal_id'), CabalBattle.winner_id.label('winner_id')).where(
+                fought, CabalBattle.opponent_cabal_id.in_(cabal_ids)
+            )
+        ).subquery()
+
+        battles = db.session.query(
+            sides.c.cabal_id,
+            func.sum(case((sides.c.winner_id == sides.c.cabal_id, 1), else_=0)),
+            func.sum(case((and_(sides.c.winner_id.isnot(None), sides.c.winner_id != sides.c.cabal_id), 1), else_=0))
+        ).group_by(sides.c.cabal_id).all()
+
+        for cabal_id, wins, losses in battles:
+            stats[cabal_id]['wins'] = wins or 0
+            stats[cabal_id]['losses'] = losses or 0
+
+        new_members = db.session.query(
+            CabalMember.cabal_id, func.count(CabalMember.id)
+        ).filter(
+            CabalMember.cabal_id.in_(cabal_ids),
+            CabalMember.joined_at >= since
+        ).group_by(CabalMember.cabal_id).all()
+
+        for cabal_id, count in new_members:
+            stats[cabal_id]['new_members'] = count
+
+        # Referral.cabal_id is a string column
+        referrals = db.session.query(
+            Referral.cabal_id, func.count(Referral.id)
+        ).filter(
+            Referral.cabal_id.in_([str(cabal_id) for cabal_id in cabal_ids]),
+            Referral.created_at >= since
+        ).group_by(Referral.cabal_id).all()
+
+        for cabal_id, count in referrals:
+            stats[int(cabal_id)]['referrals'] = count
+
+        leaders = db.session.query(cls.id, User.x_username).join(
+            User, User.id == cls.leader_id
+        ).filter(cls.id.in_(cabal_ids)).all()
+
+        for cabal_id, handle in leaders:
+            stats[cabal_id]['leader_handle'] = handle
+
+        return stats
 
 class CabalMember(db.Model):
     """Model for cabal membership"""
@@ -207,50 +577,91 @@ class CabalMember(db.Model):
     def __repr__(self):
         return f'<CabalMember {self.id}: {self.user_id} in {self.cabal_id}>'
     
+    def opt_into_battle(self, battle_id):
+        """Opt this member's Chad into an upcoming battle of their cabal"""
+        battle = CabalBattle.query.get(battle_id)
+        if not battle or battle.completed or battle.scheduled_at <= datetime.utcnow():
+            return False, "This battle is no longer open"
+        
+        if battle.side_of(self.cabal_id) is None:
+            return False, "Your cabal is not part of this battle"
+        
+        chad = self.user.chad if self.user else None
+        if not chad:
+            return False, "You need a Chad to battle"
+        
+        if battle.participants.filter_by(chad_id=chad.id).first():
+            return False, "You have already opted into this battle"
+        
+        try:
+            battle.participants.append(CabalBattleParticipant(cabal_id=self.cabal_id, chad_id=chad.id))
+            db.session.commit()
+            return True, "You have opted into the battle"
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error opting Chad {chad.id} into battle {battle_id}: {str(e)}")
+            return False, "Error opting into battle"
+    
     def calculate_power_contribution(self):
         """Calculate the power contribution of this member"""
         # This is a simplified version for deployment
         # In the full version, we would calculate based on user stats
-        self.power_contribution = 100  # Placeholder
+        self.set_power_contribution(100)  # Placeholder
         return self.power_contribution
+    
+    def set_power_contribution(self, power):
+        """
+        Change this member's power contribution, without committing
+        
+        An active member's cabal total_power is adjusted by the difference in
+        the same transaction.
+        """
+        delta = power - (self.power_contribution or 0)
+        self.power_contribution = power
+        
+        if delta and self.is_active:
+            Cabal.query.filter(Cabal.id == self.cabal_id).update(
+                {Cabal.total_power: Cabal.total_power + delta}
+            )
+            Cabal.invalidate_rankings()
 
-# Simple stub implementation of CabalBattle to resolve import errors
-class CabalBattle:
-    """
-    Stub implementation of CabalBattle for deployment.
-    This class is included to resolve import errors but is not fully implemented.
-    """
+class CabalBattle(db.Model):
+    """A scheduled war between two cabals, fought by their opted-in members"""
+    __tablename__ = 'cabal_battles'
     
-    @classmethod
-    def query(cls):
-        """Return a query-like object with filter_by method that always returns empty results."""
-        class StubQuery:
-            def filter_by(self, **kwargs):
-                return self
-                
-            def filter(self, *args):
-                return self
-                
-            def order_by(self, *args):
-                return self
-                
-            def limit(self, n):
-                return []
-                
-            def all(self):
-                return []
-                
-            def first(self):
-                return None
-                
-            def count(self):
-                return 0
-                
-            def get_or_404(self, id):
-                from flask import abort
-                abort(404)
-        
-        return StubQuery()
+    # Battles each cabal may schedule per ISO week
+    MAX_BATTLES_PER_WEEK = 3
+    
+    id = Column(Integer, primary_key=True)
+    cabal_id = Column(Integer, ForeignKey('cabals.id'), nullable=False, index=True)
+    opponent_cabal_id = Column(Integer, ForeignKey('cabals.id'), nullable=False, index=True)
+    scheduled_at = Column(DateTime, nullable=False, index=True)
+    week_number = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Outcome (result is from the scheduling cabal's point of view)
+    completed = Column(Boolean, nullable=False, default=False)
+    completed_at = Column(DateTime, nullable=True)
+    winner_id = Column(Integer, ForeignKey('cabals.id'), nullable=True)
+    result = Column(String(10), nullable=True)
+    seed = Column(Integer, nullable=True)
+    participant_count = Column(Integer, nullable=False, default=0)
+    opponent_participant_count = Column(Integer, nullable=False, default=0)
+    cabal_power = Column(Float, nullable=False, default=0)
+    opponent_power = Column(Float, nullable=False, default=0)
+    xp_earned = Column(Integer, nullable=False, default=0)
+    
+    # Failed attempts at resolving the battle (see app.utils.cabal_war)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    
+    # Relationships
+    cabal = relationship('Cabal', foreign_keys=[cabal_id])
+    opponent_cabal = relationship('Cabal', foreign_keys=[opponent_cabal_id])
+    participants = relationship('CabalBattleParticipant', back_populates='battle', lazy='dynamic', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<CabalBattle {self.id}: {self.cabal_id} vs {self.opponent_cabal_id}>'
     
     @staticmethod
     def get_current_week_number():
@@ -260,34 +671,107 @@ class CabalBattle:
     @classmethod
     def count_battles_this_week(cls, cabal_id):
         """Get the count of battles this week."""
-        return 0
-
-# Simple stub for CabalBattleParticipant
-class CabalBattleParticipant:
-    """
-    Stub implementation of CabalBattleParticipant for deployment.
-    """
+        now = datetime.utcnow()
+        week_start = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+        return cls.query.filter(
+            cls.cabal_id == cabal_id,
+            cls.created_at >= week_start
+        ).count()
+    
+    def result_for(self, cabal_id):
+        """Get 'win' or 'loss' from the given cabal's point of view (None if not fought yet)."""
+        if not self.completed or self.winner_id is None:
+            return None
+        return 'win' if self.winner_id == cabal_id else 'loss'
+    
+    def side_of(self, cabal_id):
+        """Whether the given cabal is the scheduling side (True), the opponent (False) or neither (None)."""
+        if cabal_id == self.cabal_id:
+            return True
+        if cabal_id == self.opponent_cabal_id:
+            return False
+        return None
+    
+    def opponent_of(self, cabal_id):
+        """Get the cabal the given cabal is fighting in this battle."""
+        return self.opponent_cabal if self.side_of(cabal_id) else self.cabal
+    
+    def participant_count_for(self, cabal_id):
+        """Get how many members of the given cabal fought in this battle."""
+        return self.participant_count if self.side_of(cabal_id) else self.opponent_participant_count
     
     @classmethod
-    def query(cls):
-        """Return a query-like object that always returns empty results."""
-        class StubQuery:
-            def filter_by(self, **kwargs):
-                return self
-                
-            def first(self):
-                return None
-        
-        return StubQuery()
+    def involving(cls, cabal_id):
+        """Filter for battles the given cabal fights in, on either side."""
+        from sqlalchemy import or_
+        return or_(cls.cabal_id == cabal_id, cls.opponent_cabal_id == cabal_id)
 
-# Additional class stubs for other missing classes referenced in imports
-class CabalOfficerRole:
-    """Stub for CabalOfficerRole."""
-    pass
+class CabalBattleParticipant(db.Model):
+    """A Chad that opted into a cabal battle, with its rewards once fought"""
+    __tablename__ = 'cabal_battle_participants'
+    
+    id = Column(Integer, primary_key=True)
+    battle_id = Column(Integer, ForeignKey('cabal_battles.id'), nullable=False, index=True)
+    cabal_id = Column(Integer, ForeignKey('cabals.id'), nullable=False)
+    chad_id = Column(Integer, ForeignKey('chads.id'), nullable=False)
+    opted_in_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Filled in when the battle is resolved
+    power = Column(Float, nullable=False, default=0)
+    roll = Column(Float, nullable=False, default=0)
+    xp_earned = Column(Integer, nullable=False, default=0)
+    chadcoin_earned = Column(Integer, nullable=False, default=0)
+    
+    # Relationships
+    battle = relationship('CabalBattle', back_populates='participants')
+    chad = relationship('Chad')
+    
+    __table_args__ = (
+        db.UniqueConstraint('battle_id', 'chad_id', name='uq_cabal_battle_participants_battle_chad'),
+    )
+    
+    def __repr__(self):
+        return f'<CabalBattleParticipant {self.chad_id} in {self.battle_id}>'
+
+class CabalOfficerRole(db.Model):
+    """A Chad appointed to one of a cabal's stat officer roles"""
+    __tablename__ = 'cabal_officer_roles'
+    
+    id = Column(Integer, primary_key=True)
+    cabal_id = Column(Integer, ForeignKey('cabals.id'), nullable=False, index=True)
+    chad_id = Column(Integer, ForeignKey('chads.id'), nullable=False)
+    role_type = Column(String(32), nullable=False)
+    appointed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relationships
+    cabal = relationship('Cabal', back_populates='officer_roles')
+    chad = relationship('Chad')
+    
+    __table_args__ = (
+        db.UniqueConstraint('cabal_id', 'role_type', name='uq_cabal_officer_roles_cabal_role'),
+    )
+    
+    def __repr__(self):
+        return f'<CabalOfficerRole {self.role_type}: {self.chad_id} in {self.cabal_id}>'
 
-class CabalVote:
-    """Stub for CabalVote."""
-    pass
+class CabalVote(db.Model):
+    """A member's vote in a cabal decision (e.g. removing the leader)"""
+    __tablename__ = 'cabal_votes'
+    
+    id = Column(Integer, primary_key=True)
+    cabal_id = Column(Integer, ForeignKey('cabals.id'), nullable=False)
+    voter_id = Column(Integer, ForeignKey('chads.id'), nullable=False)
+    vote_type = Column(String(32), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('cabal_id', 'voter_id', 'vote_type', 'target_id', name='uq_cabal_votes_ballot'),
+        db.Index('ix_cabal_votes_tally', 'cabal_id', 'vote_type', 'target_id'),
+    )
+    
+    def __repr__(self):
+        return f'<CabalVote {self.vote_type}: {self.voter_id} on {self.target_id} in {self.cabal_id}>'
 
 class CabalMembership(db.Model):
     """
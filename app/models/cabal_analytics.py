@@ -3,12 +3,58 @@ Cabal analytics model for tracking metrics over time.
 
 This module provides a model for tracking various metrics about cabals over time,
 which can be used for analytics dashboards and trend analysis.
+
+Raw snapshots are only kept for a short retention window. Every snapshot is
+also folded into hourly, daily and weekly rollups as it is written, and
+history queries read whichever resolution suits the requested window.
 """
 
 from app.extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 
+# Days of raw snapshots kept before pruning
+RAW_RETENTION_DAYS = 2
+
+# Rollup resolutions: name -> (bucket length, days retained or None to keep forever)
+ROLLUP_RESOLUTIONS = {
+    'hour': (timedelta(hours=1), 14),
+    'day': (timedelta(days=1), 400),
+    'week': (timedelta(weeks=1), None)
+}
+
+def get_bucket_start(timestamp, resolution):
+    """Get the start of the rollup bucket a timestamp falls into."""
+    if resolution == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    
+    day_start = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == 'day':
+        return day_start
+    if resolution == 'week':
+        return day_start - timedelta(days=day_start.weekday())
+    
+    raise ValueError(f"Unknown rollup resolution: {resolution}")
+
+def choose_resolution(days):
+    """
+    Pick the resolution to serve a history window of `days` from.
+    
+    Raw snapshots are used while they cover the whole window; beyond that,
+    the finest rollup still retained for the whole window is used.
+    
+    Returns:
+        str: 'raw', 'hour', 'day' or 'week'
+    """
+    if days <= RAW_RETENTION_DAYS:
+        return 'raw'
+    
+    for resolution, (_, retention_days) in ROLLUP_RESOLUTIONS.items():
+        if retention_days is None or days <= retention_days:
+            return resolution
+    
+    return 'week'
+
 class CabalAnalytics(db.Model):
     """
     Model for tracking cabal metrics over time.
@@ -50,6 +96,19 @@ class CabalAnalytics(db.Model):
         """String representation of the analytics record."""
         return f'<CabalAnalytics for {self.cabal_id} at {self.timestamp}>'
     
+    def to_rollup_row(self):
+        """Get this snapshot in the row format CabalAnalyticsRollup.add_snapshots() takes."""
+        return {
+            'cabal_id': self.cabal_id,
+            'member_count': self.member_count,
+            'active_member_count': self.active_member_count,
+            'total_power': self.total_power,
+            'rank': self.rank,
+            'battles_won': self.battles_won,
+            'battles_lost': self.battles_lost,
+            'referrals': self.referrals
+        }
+    
     @classmethod
     def create_snapshot(cls, cabal_id):
         """
@@ -80,35 +139,104 @@ class CabalAnalytics(db.Model):
             active_member_count=active_member_count,
             total_power=cabal.total_power,
             rank=cabal.rank or 0,
-            battles_won=cabal.battles_won,
-            battles_lost=cabal.battles_lost,
+            battles_won=cabal.victory_count,
+            battles_lost=cabal.defeat_count,
             referrals=referral_count
         )
         
         db.session.add(analytics)
+        CabalAnalyticsRollup.add_snapshots([analytics.to_rollup_row()], analytics.timestamp or datetime.utcnow())
         db.session.commit()
         
         return analytics
     
     @classmethod
-    def get_history(cls, cabal_id, days=30):
+    def bulk_create_snapshots(cls, rankings, timestamp=None):
+        """
+        Record snapshots for many cabals with one bulk INSERT, without committing.
+        
+        Args:
+            rankings (list): Rows produced by Cabal.compute_rankings()
+            timestamp (datetime): Snapshot time shared by every row (defaults to now)
+            
+        Returns:
+            int: Number of snapshots written
+        """
+        from sqlalchemy import insert
+        
+        if not rankings:
+            return 0
+        
+        timestamp = timestamp or datetime.utcnow()
+        db.session.execute(insert(cls), [
+            {
+                'id': str(uuid.uuid4()),
+                'cabal_id': row['cabal_id'],
+                'timestamp': timestamp,
+                'member_count': row['member_count'],
+                'active_member_count': row['active_member_count'],
+                'total_power': row['total_power'],
+                'rank': row['rank'],
+                'battles_won': row['battles_won'],
+                'battles_lost': row['battles_lost'],
+                'referrals': row['referrals']
+            }
+            for row in rankings
+        ])
+        CabalAnalyticsRollup.add_snapshots(rankings, timestamp)
+        
+        return len(rankings)
+    
+    @classmethod
+    def get_history(cls, cabal_id, days=30, resolution=None):
         """
         Get historical analytics data for a cabal.
         
         Args:
             cabal_id (str): The ID of the cabal to get history for
             days (int): Number of days of history to retrieve
+            resolution (str): 'raw', 'hour', 'day' or 'week'; picked from the
+                window by choose_resolution() if not given
             
         Returns:
-            list: CabalAnalytics records for the specified period
+            list: CabalAnalytics or CabalAnalyticsRollup records for the
+                  specified period, oldest first
         """
-        cutoff_date = datetime.utcnow() - datetime.timedelta(days=days)
+        resolution = resolution or choose_resolution(days)
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        
+        if resolution != 'raw':
+            return CabalAnalyticsRollup.get_history(cabal_id, resolution, cutoff_date)
         
         return cls.query.filter(
             cls.cabal_id == cabal_id,
             cls.timestamp >= cutoff_date
         ).order_by(cls.timestamp).all()
     
+    @classmethod
+    def prune(cls, now=None):
+        """
+        Delete raw snapshots and rollups that are past their retention, without committing.
+        
+        Returns:
+            int: Number of rows deleted
+        """
+        now = now or datetime.utcnow()
+        
+        deleted = cls.query.filter(
+            cls.timestamp < now - timedelta(days=RAW_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+        
+        for resolution, (_, retention_days) in ROLLUP_RESOLUTIONS.items():
+            if retention_days is None:
+                continue
+            deleted += CabalAnalyticsRollup.query.filter(
+                CabalAnalyticsRollup.resolution == resolution,
+                CabalAnalyticsRollup.timestamp < now - timedelta(days=retention_days)
+            ).delete(synchronize_session=False)
+        
+        return deleted
+    
     @classmethod
     def get_latest(cls, cabal_id):
         """
@@ -122,4 +250,134 @@ class CabalAnalytics(db.Model):
         """
         return cls.query.filter_by(cabal_id=cabal_id).order_by(
             cls.timestamp.desc()
-        ).first() 
\ No newline at end of file
+        ).first()
+
+class CabalAnalyticsRollup(db.Model):
+    """
+    Cabal metrics aggregated over an hour, a day or a week.
+    
+    Rollups are updated incrementally as snapshots are written. Power is
+    averaged over the bucket's snapshots; counters and rank hold the last
+    snapshot's values, with the best rank seen kept separately.
+    
+    Attributes:
+        cabal_id (int): ID of the cabal being tracked
+        resolution (str): 'hour', 'day' or 'week'
+        timestamp (datetime): Start of the bucket
+        sample_count (int): Number of snapshots folded into the bucket
+        total_power (float): Average total power over the bucket
+        best_rank (int): Best rank seen during the bucket
+    """
+    __tablename__ = 'cabal_analytics_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cabal_id = db.Column(db.Integer, db.ForeignKey('cabals.id'), nullable=False)
+    resolution = db.Column(db.String(8), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Power (average over the bucket, plus the running sum it is derived from)
+    total_power = db.Column(db.Float, nullable=False, default=0)
+    total_power_sum = db.Column(db.Float, nullable=False, default=0)
+    max_power = db.Column(db.Float, nullable=False, default=0)
+    
+    # Last values seen in the bucket
+    member_count = db.Column(db.Integer, nullable=False, default=0)
+    active_member_count = db.Column(db.Integer, nullable=False, default=0)
+    rank = db.Column(db.Integer, nullable=False, default=0)
+    best_rank = db.Column(db.Integer, nullable=False, default=0)
+    battles_won = db.Column(db.Integer, nullable=False, default=0)
+    battles_lost = db.Column(db.Integer, nullable=False, default=0)
+    referrals = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('cabal_id', 'resolution', 'timestamp', name='uq_cabal_analytics_rollups_bucket'),
+        db.Index('ix_cabal_analytics_rollups_lookup', 'resolution', 'cabal_id', 'timestamp'),
+    )
+    
+    def __repr__(self):
+        """String representation of the rollup."""
+        return f'<CabalAnalyticsRollup {self.resolution} for {self.cabal_id} at {self.timestamp}>'
+    
+    def add_sample(self, row):
+        """Fold one snapshot row into this bucket."""
+        power = float(row['total_power'] or 0)
+        rank = row['rank'] or 0
+        
+        self.sample_count = (self.sample_count or 0) + 1
+        self.total_power_sum = (self.total_power_sum or 0) + power
+        self.total_power = self.total_power_sum / self.sample_count
+        self.max_power = max(self.max_power or 0, power)
+        
+        self.member_count = row['member_count']
+        self.active_member_count = row['active_member_count']
+        self.rank = rank
+        self.best_rank = min(self.best_rank, rank) if self.best_rank and rank else (self.best_rank or rank)
+        self.battles_won = row['battles_won']
+        self.battles_lost = row['battles_lost']
+        self.referrals = row['referrals']
+    
+    @classmethod
+    def add_snapshots(cls, rows, timestamp):
+        """
+        Fold snapshots taken at one time into every resolution, without committing.
+        
+        The affected buckets are loaded with one query; new buckets are
+        inserted and existing ones updated when the session flushes.
+        
+        Args:
+            rows (list): Snapshot rows (see CabalAnalytics.to_rollup_row())
+            timestamp (datetime): When the snapshots were taken
+        """
+        if not rows:
+            return
+        
+        buckets = {resolution: get_bucket_start(timestamp, resolution) for resolution in ROLLUP_RESOLUTIONS}
+        
+        existing = {
+            (rollup.cabal_id, rollup.resolution): rollup
+            for rollup in cls.query.filter(
+                cls.cabal_id.in_({row['cabal_id'] for row in rows}),
+                db.or_(*[
+                    db.and_(cls.resolution == resolution, cls.timestamp == bucket_start)
+                    for resolution, bucket_start in buckets.items()
+                ])
+            ).all()
+        }
+        
+        for row in rows:
+            for resolution, bucket_start in buckets.items():
+                rollup = existing.get((row['cabal_id'], resolution))
+                if rollup is None:
+                    rollup = cls(
+                        cabal_id=row['cabal_id'],
+                        resolution=resolution,
+                        timestamp=bucket_start,
+                        sample_count=0,
+                        total_power_sum=0,
+                        max_power=0,
+                        best_rank=0
+                    )
+                    db.session.add(rollup)
+                    existing[(row['cabal_id'], resolution)] = rollup
+                rollup.add_sample(row)
+    
+    @classmethod
+    def get_history(cls, cabal_id, resolution, cutoff_date):
+        """
+        Get a cabal's rollups at one resolution since a cutoff.
+        
+        Returns:
+            list: CabalAnalyticsRollup records, oldest first
+        """
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        
+        # Include the bucket the cutoff falls into
+        since = get_bucket_start(cutoff_date, resolution)
+        
+        return cls.query.filter(
+            cls.resolution == resolution,
+            cls.cabal_id == cabal_id,
+            cls.timestamp >= since
+        ).order_by(cls.timestamp).all()
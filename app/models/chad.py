@@ -4,6 +4,52 @@ Chad model for Chad Battles.
 from app.extensions import db
 from datetime import datetime
 
+class ChadStats:
+    """
+    Snapshot of a Chad's total stats (base + class + equipment bonuses).
+    
+    Supports both attribute access (stats.clout) and read-only mapping
+    access (stats['clout'], stats.values()) for existing callers.
+    """
+    __slots__ = ('clout', 'roast_level', 'cringe_resistance', 'drip_factor')
+    
+    STAT_NAMES = ('clout', 'roast_level', 'cringe_resistance', 'drip_factor')
+    
+    def __init__(self, clout, roast_level, cringe_resistance, drip_factor):
+        self.clout = clout
+        self.roast_level = roast_level
+        self.cringe_resistance = cringe_resistance
+        self.drip_factor = drip_factor
+    
+    def __getitem__(self, name):
+        if name not in self.STAT_NAMES:
+            raise KeyError(name)
+        return getattr(self, name)
+    
+    def __iter__(self):
+        return iter(self.STAT_NAMES)
+    
+    def __eq__(self, other):
+        if not isinstance(other, ChadStats):
+            return NotImplemented
+        return self.values() == other.values()
+    
+    def __repr__(self):
+        return f'<ChadStats {self.to_dict()}>'
+    
+    def keys(self):
+        return self.STAT_NAMES
+    
+    def values(self):
+        return tuple(getattr(self, name) for name in self.STAT_NAMES)
+    
+    def items(self):
+        return tuple((name, getattr(self, name)) for name in self.STAT_NAMES)
+    
+    def to_dict(self):
+        """Return the stats as a dictionary."""
+        return dict(self.items())
+
 class ChadClass(db.Model):
     """Chad class model for different character types."""
     __tablename__ = 'chad_classes'
@@ -43,6 +89,8 @@ class Chad(db.Model):
     # Battle stats
     battles_won = db.Column(db.Integer, default=0)
     battles_lost = db.Column(db.Integer, default=0)
+    battle_score = db.Column(db.Integer, nullable=False, default=0, index=True)  # Battle leaderboard score
+    rating = db.Column(db.Integer, nullable=False, default=1200, index=True)  # Elo-style matchmaking rating
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -85,7 +133,7 @@ class Chad(db.Model):
     def __repr__(self):
         return f'<Chad {self.name} (Level {self.level})>'
     
-    def add_xp(self, amount):
+    def add_xp(self, amount, commit=True):
         """Add XP to the Chad and level up if necessary."""
         if amount <= 0:
             return False
@@ -98,7 +146,8 @@ class Chad(db.Model):
             self.level_up()
             xp_needed = self.get_xp_for_next_level()
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return True
     
     def level_up(self):
@@ -111,6 +160,7 @@ class Chad(db.Model):
         self.cringe_resistance += 2 + self.chad_class.base_cringe_resistance_bonus // 5
         self.drip_factor += 2 + self.chad_class.base_drip_bonus // 5
         
+        Chad.invalidate_stats(self.id)
         return True
     
     def get_xp_for_next_level(self):
@@ -131,64 +181,160 @@ class Chad(db.Model):
         return self.get_total_stats()
     
     def get_total_stats(self):
-        """Calculate total stats from base + bonuses from equipped items and waifus."""
+        """
+        Get total stats from base + bonuses from equipped items and waifus.
+        
+        The result is a cached ChadStats snapshot, so repeated calls (e.g. every
+        turn of a battle) do not hit the database. The snapshot is invalidated
+        whenever equipment, level or active elixirs change.
+        """
+        from app.utils.cache import get_cached_chad_stats, cache_chad_stats
+        
+        cached = get_cached_chad_stats([self.id]).get(self.id)
+        if cached is not None:
+            return cached
+        
         try:
-            # Create a Stats class to hold the calculated stats
-            class Stats:
-                def __init__(self, clout, roast_level, cringe_resistance, drip_factor):
-                    self.clout = clout
-                    self.roast_level = roast_level
-                    self.cringe_resistance = cringe_resistance
-                    self.drip_factor = drip_factor
-            
-            # Start with base stats
-            total_clout = self.clout
-            total_roast = self.roast_level
-            total_cringe = self.cringe_resistance
-            total_drip = self.drip_factor
-            
-            # Add class bonuses if available
-            if hasattr(self, 'chad_class') and self.chad_class:
-                total_clout += self.chad_class.base_clout_bonus or 0
-                total_roast += self.chad_class.base_roast_bonus or 0
-                total_cringe += self.chad_class.base_cringe_resistance_bonus or 0
-                total_drip += self.chad_class.base_drip_bonus or 0
-            
-            # Add bonuses from equipped items
-            try:
-                from flask import current_app
-                from app.models.item import Item
-                
-                equipped_items = Item.query.filter_by(chad_id=self.id, is_equipped=True).all()
-                for item in equipped_items:
-                    total_clout += item.clout_bonus or 0
-                    total_roast += item.roast_bonus or 0
-                    total_cringe += item.cringe_resistance_bonus or 0
-                    total_drip += item.drip_bonus or 0
-            except Exception as e:
-                # Log error but continue
-                from flask import current_app
-                current_app.logger.error(f"Error getting equipped items for Chad {self.id}: {str(e)}")
-            
-            # Add bonuses from equipped waifus
-            try:
-                equipped_waifus = self.get_equipped_waifus()
-                for waifu in equipped_waifus:
-                    total_clout += waifu.clout_bonus or 0
-                    total_roast += waifu.roast_bonus or 0
-                    total_cringe += waifu.cringe_resistance_bonus or 0
-                    total_drip += waifu.drip_bonus or 0
-            except Exception as e:
-                # Log error but continue
-                from flask import current_app
-                current_app.logger.error(f"Error getting equipped waifus for Chad {self.id}: {str(e)}")
-            
-            return Stats(total_clout, total_roast, total_cringe, total_drip)
+            stats = self._compute_total_stats()
         except Exception as e:
-            # Return base stats if there's an error
+            # Return base stats if there's an error, but don't cache them
             from flask import current_app
             current_app.logger.error(f"Error calculating total stats for Chad {self.id}: {str(e)}")
-            return Stats(self.clout, self.roast_level, self.cringe_resistance, self.drip_factor)
+            return ChadStats(self.clout, self.roast_level, self.cringe_resistance, self.drip_factor)
+        
+        cache_chad_stats({self.id: stats})
+        return stats
+    
+    def _compute_total_stats(self):
+        """Calculate total stats from the database, bypassing the snapshot cache."""
+        # Start with base stats
+        total_clout = self.clout
+        total_roast = self.roast_level
+        total_cringe = self.cringe_resistance
+        total_drip = self.drip_factor
+        
+        # Add class bonuses if available
+        if hasattr(self, 'chad_class') and self.chad_class:
+            total_clout += self.chad_class.base_clout_bonus or 0
+            total_roast += self.chad_class.base_roast_bonus or 0
+            total_cringe += self.chad_class.base_cringe_resistance_bonus or 0
+            total_drip += self.chad_class.base_drip_bonus or 0
+        
+        # Add bonuses from equipped items
+        try:
+            from app.models.item import Item
+            
+            equipped_items = Item.query.filter_by(chad_id=self.id, is_equipped=True).all()
+            for item in equipped_items:
+                total_clout += item.clout_bonus or 0
+                total_roast += item.roast_bonus or 0
+                total_cringe += item.cringe_resistance_bonus or 0
+                total_drip += item.drip_bonus or 0
+        except Exception as e:
+            # Log error but continue
+            from flask import current_app
+            current_app.logger.error(f"Error getting equipped items for Chad {self.id}: {str(e)}")
+        
+        # Add bonuses from equipped waifus
+        try:
+            equipped_waifus = self.get_equipped_waifus()
+            for waifu in equipped_waifus:
+                total_clout += waifu.clout_bonus or 0
+                total_roast += waifu.roast_bonus or 0
+                total_cringe += waifu.cringe_resistance_bonus or 0
+                total_drip += waifu.drip_bonus or 0
+        except Exception as e:
+            # Log error but continue
+            from flask import current_app
+            current_app.logger.error(f"Error getting equipped waifus for Chad {self.id}: {str(e)}")
+        
+        return ChadStats(total_clout, total_roast, total_cringe, total_drip)
+    
+    @classmethod
+    def invalidate_stats(cls, *chad_ids):
+        """Drop the cached stat snapshots of the given Chads."""
+        from app.utils.cache import invalidate_chad_stats
+        invalidate_chad_stats(*chad_ids)
+    
+    @classmethod
+    def get_total_stats_bulk(cls, chad_ids):
+        """
+        Get total stats for many Chads with at most one query.
+        
+        Cached snapshots are used where available; the rest are calculated
+        with the same rules as get_total_stats() (base stats + class bonuses
+        + equipped item and waifu bonuses), aggregating the gear bonuses in
+        SQL so the cost does not grow with the number of Chads.
+        
+        Args:
+            chad_ids: Iterable of Chad IDs
+            
+        Returns:
+            dict: Mapping of chad_id to ChadStats
+        """
+        from sqlalchemy import func
+        from flask import current_app
+        from app.models.item import Item
+        from app.utils.cache import get_cached_chad_stats, cache_chad_stats
+        
+        chad_ids = list(set(chad_ids))
+        if not chad_ids:
+            return {}
+        
+        snapshots = get_cached_chad_stats(chad_ids)
+        missing_ids = [chad_id for chad_id in chad_ids if chad_id not in snapshots]
+        if not missing_ids:
+            return snapshots
+        
+        def bonus_totals(model, chad_column, equipped_column):
+            return db.session.query(
+                chad_column.label('chad_id'),
+                func.sum(model.clout_bonus).label('clout'),
+                func.sum(model.roast_bonus).label('roast_level'),
+                func.sum(model.cringe_resistance_bonus).label('cringe_resistance'),
+                func.sum(model.drip_bonus).label('drip_factor')
+            ).filter(
+                chad_column.in_(missing_ids),
+                equipped_column == True
+            ).group_by(chad_column).subquery()
+        
+        bonus_subqueries = [bonus_totals(Item, Item.chad_id, Item.is_equipped)]
+        
+        # Waifu bonuses are optional, exactly like in get_total_stats()
+        try:
+            from app.models.waifu import Waifu
+            bonus_subqueries.append(bonus_totals(Waifu, Waifu.chad_id, Waifu.is_equipped))
+        except Exception as e:
+            current_app.logger.error(f"Error getting equipped waifus for bulk stats: {str(e)}")
+        
+        class_bonuses = {
+            'clout': ChadClass.base_clout_bonus,
+            'roast_level': ChadClass.base_roast_bonus,
+            'cringe_resistance': ChadClass.base_cringe_resistance_bonus,
+            'drip_factor': ChadClass.base_drip_bonus
+        }
+        
+        columns = []
+        for name in ChadStats.STAT_NAMES:
+            total = getattr(cls, name) + func.coalesce(class_bonuses[name], 0)
+            for subquery in bonus_subqueries:
+                total = total + func.coalesce(getattr(subquery.c, name), 0)
+            columns.append(total.label(name))
+        
+        query = db.session.query(cls.id, *columns).outerjoin(
+            ChadClass, ChadClass.id == cls.class_id
+        )
+        for subquery in bonus_subqueries:
+            query = query.outerjoin(subquery, subquery.c.chad_id == cls.id)
+        
+        computed = {
+            row.id: ChadStats(*(getattr(row, name) for name in ChadStats.STAT_NAMES))
+            for row in query.filter(cls.id.in_(missing_ids)).all()
+        }
+        cache_chad_stats(computed)
+        
+        snapshots.update(computed)
+        return snapshots
     
     def get_equipped_waifus(self):
         """Get all equipped waifus for this Chad."""
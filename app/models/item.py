@@ -91,11 +91,16 @@ class Item(db.Model):
             item.waifu_id = None
         
         # Equip this item
+        previous_chad_id = self.chad_id
         self.chad_id = chad_id
         self.waifu_id = None
         self.is_equipped = True
         db.session.commit()
         
+        # Equipment changed, so the cached stat snapshots are stale
+        from app.models.chad import Chad
+        Chad.invalidate_stats(chad_id, previous_chad_id)
+        
         return True
     
     def equip_to_waifu(self, waifu_id):
@@ -114,20 +119,29 @@ class Item(db.Model):
             item.waifu_id = None
         
         # Equip this item
+        previous_chad_id = self.chad_id
         self.waifu_id = waifu_id
         self.chad_id = None
         self.is_equipped = True
         db.session.commit()
         
+        # The item may have been moved off a Chad
+        from app.models.chad import Chad
+        Chad.invalidate_stats(previous_chad_id)
+        
         return True
     
     def unequip(self):
         """Unequip the item."""
+        previous_chad_id = self.chad_id
         self.chad_id = None
         self.waifu_id = None
         self.is_equipped = False
         db.session.commit()
         
+        from app.models.chad import Chad
+        Chad.invalidate_stats(previous_chad_id)
+        
         return True
 
 class WaifuItem(Item):
@@ -94,4 +94,8 @@ class MemeElixir(db.Model):
         db.session.add(active_elixir)
         db.session.commit()
         
+        # Active elixirs feed into total stats
+        from app.models.chad import Chad
+        Chad.invalidate_stats(chad.id)
+        
         return True, "Elixir activated successfully" 
\ No newline at end of file
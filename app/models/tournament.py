@@ -0,0 +1,118 @@
+"""
+Tournament models for Chad Battles.
+"""
+from app.extensions import db
+from datetime import datetime
+import enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float
+from sqlalchemy.orm import relationship
+
+class TournamentStatus(enum.Enum):
+    """Enum for tournament statuses."""
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+class Tournament(db.Model):
+    """Single-elimination tournament bracket (BattleType.TOURNAMENT)"""
+    __tablename__ = 'tournaments'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, default=TournamentStatus.PENDING.value)
+    bracket_size = Column(Integer, nullable=False)
+    entrant_count = Column(Integer, nullable=False)
+    current_round = Column(Integer, nullable=False, default=0)
+    winner_chad_id = Column(Integer, ForeignKey('chads.id'), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    entries = relationship('TournamentEntry', back_populates='tournament', lazy='dynamic', cascade='all, delete-orphan')
+    matches = relationship('TournamentMatch', back_populates='tournament', lazy='dynamic', cascade='all, delete-orphan')
+    winner = relationship('Chad', foreign_keys=[winner_chad_id])
+    
+    def __repr__(self):
+        return f'<Tournament {self.id}: {self.name}>'
+    
+    @property
+    def total_rounds(self):
+        """Number of rounds needed to finish the bracket."""
+        return max(1, (self.bracket_size - 1).bit_length())
+    
+    @property
+    def is_finished(self):
+        """Whether the tournament has a champion."""
+        return self.status == TournamentStatus.COMPLETED.value
+
+class TournamentEntry(db.Model):
+    """A Chad's place in a tournament bracket, with its stats frozen at seeding time"""
+    __tablename__ = 'tournament_entries'
+    
+    id = Column(Integer, primary_key=True)
+    tournament_id = Column(Integer, ForeignKey('tournaments.id'), nullable=False, index=True)
+    chad_id = Column(Integer, ForeignKey('chads.id'), nullable=False)
+    seed_rank = Column(Integer, nullable=False)
+    bracket_slot = Column(Integer, nullable=False)
+    power = Column(Float, nullable=False, default=0)
+    eliminated_round = Column(Integer, nullable=True)
+    
+    # Stat snapshot
+    clout = Column(Integer, nullable=False, default=0)
+    roast_level = Column(Integer, nullable=False, default=0)
+    cringe_resistance = Column(Integer, nullable=False, default=0)
+    drip_factor = Column(Integer, nullable=False, default=0)
+    
+    # Relationships
+    tournament = relationship('Tournament', back_populates='entries')
+    chad = relationship('Chad')
+    
+    __table_args__ = (
+        db.UniqueConstraint('tournament_id', 'chad_id', name='uq_tournament_entries_tournament_chad'),
+    )
+    
+    def __repr__(self):
+        return f'<TournamentEntry {self.tournament_id}: Chad {self.chad_id} (seed {self.seed_rank})>'
+    
+    def get_stats(self):
+        """Get the stat snapshot taken when the bracket was seeded."""
+        from app.models.chad import ChadStats
+        return ChadStats(self.clout, self.roast_level, self.cringe_resistance, self.drip_factor)
+
+class TournamentMatch(db.Model):
+    """
+    A resolved bracket match.
+    
+    Matches store a seed and replay record like battles, so they can be
+    replayed and audited with app.utils.battle_replay.
+    """
+    __tablename__ = 'tournament_matches'
+    
+    id = Column(Integer, primary_key=True)
+    tournament_id = Column(Integer, ForeignKey('tournaments.id'), nullable=False, index=True)
+    round = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)
+    initiator_id = Column(Integer, ForeignKey('chads.id'), nullable=False)
+    opponent_id = Column(Integer, ForeignKey('chads.id'), nullable=True)
+    winner_id = Column(Integer, ForeignKey('chads.id'), nullable=False)
+    seed = Column(Integer, nullable=True)
+    replay_data = Column(Text, nullable=True)
+    xp_reward = Column(Integer, nullable=False, default=0)
+    chadcoin_reward = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relationships
+    tournament = relationship('Tournament', back_populates='matches')
+    
+    __table_args__ = (
+        db.UniqueConstraint('tournament_id', 'round', 'position', name='uq_tournament_matches_round_position'),
+    )
+    
+    def __repr__(self):
+        return f'<TournamentMatch {self.tournament_id} R{self.round}#{self.position}>'
+    
+    @property
+    def is_bye(self):
+        """Whether the initiator advanced without an opponent."""
+        return self.opponent_id is None
@@ -89,7 +89,7 @@ class Transaction(db.Model):
         }
     
     @classmethod
-    def record_chadcoin_transaction(cls, user_id, amount, description, related_entity=None):
+    def record_chadcoin_transaction(cls, user_id, amount, description, related_entity=None, commit=True):
         """
         Record a Chadcoin transaction.
         
@@ -98,6 +98,7 @@ class Transaction(db.Model):
             amount: The amount of Chadcoin (positive for earned, negative for spent)
             description: Description of the transaction
             related_entity: Optional tuple of (entity_type, entity_id) for related entity
+            commit: Whether to commit the session (False lets callers batch writes)
         
         Returns:
             The created Transaction object
@@ -122,7 +123,8 @@ class Transaction(db.Model):
                 transaction.nft_id = entity_id
         
         db.session.add(transaction)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         
         return transaction
     
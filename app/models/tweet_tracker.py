@@ -1,5 +1,7 @@
+import json
+import uuid
 from app.extensions import db
-from datetime import datetime
+from datetime import datetime, timedelta
 
 class TweetTracker(db.Model):
     """Model to track tweets posted by the system and manage reply status."""
@@ -14,4 +16,585 @@ class TweetTracker(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f'<TweetTracker {self.id}: {self.tweet_type} {self.tweet_id}>' 
\ No newline at end of file
+        return f'<TweetTracker {self.id}: {self.tweet_type} {self.tweet_id}>' 
+
+class MentionInbox(db.Model):
+    """
+    Durable inbox of mentions received by the bot.
+    
+    Every mention is recorded once (tweet_id is unique), then claimed by one
+    bot worker under a lease, handled, and marked done. A worker that dies
+    mid-batch leaves its claims to expire, after which any worker can claim
+    them again, so several bot processes can share the inbox and a restart
+    picks up exactly where the last run stopped.
+    
+    Carrying out a mention's command and posting its replies are tracked
+    apart: once the command has run, the mention is marked handled with the
+    replies still to post. If a reply then fails (or the worker dies before
+    posting it), claiming the mention again only posts the stored replies;
+    the command is never run twice.
+    
+    The queue operations use Core statements on the table, so claiming a
+    batch is a fixed number of statements however many mentions it holds.
+    """
+    
+    __tablename__ = 'mention_inbox'
+    
+    PENDING = 'pending'
+    CLAIMED = 'claimed'
+    HANDLED = 'handled'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tweet_id = db.Column(db.String(64), unique=True, nullable=False)
+    author_id = db.Column(db.String(64), nullable=True, index=True)
+    payload = db.Column(db.Text, nullable=False)  # The mention's JSON, as returned by monitor_mentions()
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    claim_token = db.Column(db.String(64), nullable=True)
+    claimed_by = db.Column(db.String(128), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    replies = db.Column(db.Text, nullable=True)  # JSON list of replies still to post once handled
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_mention_inbox_claimable', 'status', 'lease_expires_at'),
+    )
+    
+    def __repr__(self):
+        return f'<MentionInbox {self.tweet_id}: {self.status}>'
+    
+    @classmethod
+    def record(cls, mentions):
+        """
+        Record newly fetched mentions, ignoring any already in the inbox.
+        
+        Args:
+            mentions (list): Mention dicts as returned by monitor_mentions()
+            
+        Returns:
+            int: Number of mentions that were new
+        """
+        from sqlalchemy import select, insert
+        
+        table = cls.__table__
+        by_id = {}
+        for mention in sorted(mentions, key=lambda m: int(m.get('id_str', '0'))):
+            if mention.get('id_str'):
+                by_id.setdefault(mention['id_str'], mention)
+        if not by_id:
+            return 0
+        
+        existing = set(db.session.execute(
+            select(table.c.tweet_id).where(table.c.tweet_id.in_(list(by_id)))
+        ).scalars())
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                'tweet_id': tweet_id,
+                'author_id': mention.get('user', {}).get('id_str'),
+                'payload': json.dumps(mention),
+                'status': cls.PENDING,
+                'attempts': 0,
+                'received_at': now
+            }
+            for tweet_id, mention in by_id.items()
+            if tweet_id not in existing
+        ]
+        if not rows:
+            return 0
+        
+        # Another bot process may record the same mentions at the same time
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(table).on_conflict_do_nothing(index_elements=['tweet_id'])
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(table).on_conflict_do_nothing(index_elements=['tweet_id'])
+        else:
+            stmt = insert(table)
+        
+        db.session.execute(stmt, rows)
+        db.session.commit()
+        return len(rows)
+    
+    @classmethod
+    def latest_tweet_id(cls):
+        """
+        Get the newest mention ID in the inbox, to fetch newer mentions from.
+        
+        Returns:
+            str: The tweet ID, or None if the inbox is empty
+        """
+        from sqlalchemy import select, func
+        
+        table = cls.__table__
+        # Tweet IDs are numeric strings, so longer means newer
+        return db.session.execute(
+            select(table.c.tweet_id).order_by(
+                func.length(table.c.tweet_id).desc(), table.c.tweet_id.desc()
+            ).limit(1)
+        ).scalar()
+    
+    @classmethod
+    def claim(cls, worker, limit=100, lease_seconds=300, max_attempts=3):
+        """
+        Claim a batch of mentions to handle.
+        
+        Pending mentions, mentions whose lease has expired and handled
+        mentions with replies to retry are claimable, oldest first. Authors
+        with a mention still claimed by a live lease are skipped, so one
+        author's mentions are not handled by two workers at once. The claim is
+        a single conditional UPDATE tagged with a fresh token, so concurrent
+        workers never claim the same mention.
+        
+        A claimable mention that has already been attempted max_attempts
+        times (its worker kept dying, or its replies kept failing) is marked
+        failed instead.
+        
+        Args:
+            worker (str): Name of the claiming worker (host:pid)
+            limit (int): Maximum number of mentions to claim
+            lease_seconds (int): How long the claim lasts before it can be taken over
+            max_attempts (int): Attempts after which a mention is given up on
+            
+        Returns:
+            list: Dicts with 'tweet_id', 'token', 'attempts', 'mention' (the payload)
+                  and 'replies' (the replies left to post if already handled,
+                  otherwise None), oldest first
+        """
+        from sqlalchemy import select, update, or_, and_, case
+        
+        table = cls.__table__
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        
+        expired = or_(
+            and_(table.c.status == cls.CLAIMED, table.c.lease_expires_at < now),
+            and_(table.c.status == cls.HANDLED,
+                 or_(table.c.lease_expires_at.is_(None), table.c.lease_expires_at < now))
+        )
+        db.session.execute(
+            update(table).where(
+                expired, table.c.attempts >= max_attempts
+            ).values(
+                status=cls.FAILED,
+                claim_token=None,
+                lease_expires_at=None,
+                last_error=case(
+                    (table.c.status == cls.HANDLED, 'Replies not posted by the last attempt'),
+                    else_='Lease expired on the last attempt'
+                )
+            )
+        )
+        
+        claimable = or_(table.c.status == cls.PENDING, expired)
+        busy_authors = select(table.c.author_id).where(
+            table.c.status == cls.CLAIMED,
+            table.c.lease_expires_at >= now,
+            table.c.author_id.isnot(None)
+        )
+        candidates = select(table.c.id).where(
+            claimable,
+            or_(table.c.author_id.is_(None), table.c.author_id.not_in(busy_authors))
+        ).order_by(table.c.id).limit(limit)
+        
+        db.session.execute(
+            update(table).where(
+                table.c.id.in_(candidates.scalar_subquery()), claimable
+            ).values(
+                # A handled mention stays handled: only its replies are retried
+                status=case((table.c.status == cls.HANDLED, cls.HANDLED), else_=cls.CLAIMED),
+                claim_token=token,
+                claimed_by=worker,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=table.c.attempts + 1
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        
+        rows = db.session.execute(
+            select(
+                table.c.tweet_id, table.c.payload, table.c.attempts, table.c.status, table.c.replies
+            ).where(table.c.claim_token == token).order_by(table.c.id)
+        ).all()
+        return [
+            {
+                'tweet_id': tweet_id,
+                'token': token,
+                'attempts': attempts,
+                'mention': json.loads(payload),
+                'replies': json.loads(replies or '[]') if status == cls.HANDLED else None
+            }
+            for tweet_id, payload, attempts, status, replies in rows
+        ]
+    
+    @classmethod
+    def complete(cls, tweet_id, token):
+        """
+        Mark a claimed mention as done: handled, and every reply posted.
+        
+        Only the holder of the claim can complete it; a worker whose lease
+        expired and was taken over is ignored.
+        
+        Returns:
+            bool: True if the mention was marked done
+        """
+        from sqlalchemy import update
+        
+        table = cls.__table__
+        result = db.session.execute(
+            update(table).where(
+                table.c.tweet_id == tweet_id, table.c.claim_token == token,
+                table.c.status.in_([cls.CLAIMED, cls.HANDLED])
+            ).values(status=cls.DONE, processed_at=datetime.utcnow(), lease_expires_at=None, replies=None)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def mark_handled(cls, tweet_id, token, replies, lease_seconds):
+        """
+        Record that a claimed mention's command has been carried out.
+        
+        The replies it queued are stored, so that if they fail (or the worker
+        dies first) they are posted again without running the command again.
+        The claim is kept for lease_seconds while they wait to be posted, and
+        the attempts count starts again for them.
+        
+        Args:
+            replies (list): The replies still to post (see outbound.describe_post)
+            
+        Returns:
+            bool: True if the claim was still held
+        """
+        from sqlalchemy import update
+        
+        table = cls.__table__
+        result = db.session.execute(
+            update(table).where(
+                table.c.tweet_id == tweet_id, table.c.claim_token == token, table.c.status == cls.CLAIMED
+            ).values(
+                status=cls.HANDLED,
+                replies=json.dumps(replies),
+                attempts=1,
+                processed_at=datetime.utcnow(),
+                lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)
+            )
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def retry_replies(cls, tweet_id, token, error, replies):
+        """
+        Give back a handled mention whose replies failed to post.
+        
+        Only the replies not posted yet are kept, and the next claim posts
+        them (up to max_attempts in all, see claim()).
+        
+        Returns:
+            bool: True if the claim was still held
+        """
+        from sqlalchemy import update
+        
+        table = cls.__table__
+        result = db.session.execute(
+            update(table).where(
+                table.c.tweet_id == tweet_id, table.c.claim_token == token, table.c.status == cls.HANDLED
+            ).values(
+                replies=json.dumps(replies),
+                claim_token=None,
+                lease_expires_at=None,
+                last_error=str(error)[:1000]
+            )
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def release(cls, tweet_id, token, error, max_attempts=3):
+        """
+        Give back a claimed mention whose command failed.
+        
+        It returns to the inbox to be retried, unless it has already been
+        attempted max_attempts times, in which case it is marked failed.
+        
+        Returns:
+            bool: True if the claim was still held
+        """
+        from sqlalchemy import update, case
+        
+        table = cls.__table__
+        db.session.rollback()
+        result = db.session.execute(
+            update(table).where(
+                table.c.tweet_id == tweet_id, table.c.claim_token == token, table.c.status == cls.CLAIMED
+            ).values(
+                status=case((table.c.attempts >= max_attempts, cls.FAILED), else_=cls.PENDING),
+                claim_token=None,
+                lease_expires_at=None,
+                last_error=str(error)[:1000]
+            )
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def prune(cls, days=7):
+        """
+        Delete handled mentions older than the given number of days, without committing.
+        
+        The newest mention is always kept, since the next fetch starts from it.
+        
+        Returns:
+            int: Number of rows deleted
+        """
+        from sqlalchemy import delete
+        
+        table = cls.__table__
+        latest = cls.latest_tweet_id()
+        result = db.session.execute(
+            delete(table).where(
+                table.c.status == cls.DONE,
+                table.c.processed_at < datetime.utcnow() - timedelta(days=days),
+                table.c.tweet_id != latest
+            )
+        )
+        return result.rowcount
+
+class OutboundRateLimit(db.Model):
+    """
+    Token buckets pacing the bot's posts, shared by every process posting.
+    
+    Each endpoint has one row holding the tokens left when it was last
+    updated. Taking a token is a read followed by an UPDATE conditioned on
+    the version read, retried if another process got there first, so no two
+    processes spend the same token.
+    """
+    
+    __tablename__ = 'outbound_rate_limits'
+    
+    endpoint = db.Column(db.String(64), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<OutboundRateLimit {self.endpoint}: {self.tokens:.2f}>'
+    
+    @classmethod
+    def try_take(cls, endpoint, capacity, rate, tokens=1, retries=5):
+        """
+        Take tokens from an endpoint's bucket if it has them.
+        
+        The bucket holds up to capacity tokens and refills at rate tokens per
+        second; a new bucket starts full.
+        
+        Args:
+            endpoint (str): The endpoint posted to
+            capacity (float): Most tokens the bucket holds (the burst)
+            rate (float): Tokens added per second
+            tokens (float): Tokens to take
+            retries (int): Attempts when other processes update the bucket concurrently
+            
+        Returns:
+            float: 0.0 if the tokens were taken, otherwise the seconds until
+                   the bucket will hold them
+        """
+        from sqlalchemy import select, insert, update
+        from sqlalchemy.exc import IntegrityError
+        
+        table = cls.__table__
+        for _ in range(retries):
+            now = datetime.utcnow()
+            row = db.session.execute(
+                select(table.c.tokens, table.c.version, table.c.updated_at).where(table.c.endpoint == endpoint)
+            ).first()
+            
+            if row is None:
+                try:
+                    db.session.execute(
+                        insert(table).values(endpoint=endpoint, tokens=capacity - tokens, version=0, updated_at=now)
+                    )
+                    db.session.commit()
+                    return 0.0
+                except IntegrityError:
+                    # Created by another process in the meantime
+                    db.session.rollback()
+                    continue
+            
+            elapsed = max(0.0, (now - row.updated_at).total_seconds())
+            available = min(capacity, row.tokens + elapsed * rate)
+            if available < tokens:
+                db.session.rollback()
+                return (tokens - available) / rate
+            
+            result = db.session.execute(
+                update(table).where(
+                    table.c.endpoint == endpoint, table.c.version == row.version
+                ).values(tokens=available - tokens, version=row.version + 1, updated_at=now)
+            )
+            db.session.commit()
+            if result.rowcount == 1:
+                return 0.0
+        
+        # Lost every race; try again shortly
+        return 1.0
+
+class TwitterLookupCache(db.Model):
+    """
+    Persistent cache of Twitter lookups (profiles, timelines, clout) and of the
+    analyses derived from them.
+    
+    Each row holds one lookup's JSON value, keyed by kind and user. A value is
+    fresh until fresh_until; after that it may still be served, while it is
+    refreshed, until stale_until. refreshing_until is a short lease held by
+    whoever is refreshing the row, so a stale value is refetched once rather
+    than by every request that sees it. Derived values record the version of
+    the code that produced them.
+    """
+    
+    __tablename__ = 'twitter_lookup_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)  # profile, timeline, clout or analysis
+    lookup_key = db.Column(db.String(128), nullable=False)  # User ID (lower-cased screen name for profiles)
+    payload = db.Column(db.Text, nullable=False)
+    version = db.Column(db.String(32), nullable=True)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    fresh_until = db.Column(db.DateTime, nullable=False)
+    stale_until = db.Column(db.DateTime, nullable=False, index=True)
+    refreshing_until = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'lookup_key', name='uq_twitter_lookup_cache_kind_key'),
+    )
+    
+    def __repr__(self):
+        return f'<TwitterLookupCache {self.kind}:{self.lookup_key}>'
+    
+    @classmethod
+    def lookup(cls, kind, key):
+        """
+        Get a cached value that may still be served.
+        
+        Args:
+            kind (str): Kind of lookup
+            key (str): The user it is for
+            
+        Returns:
+            dict: 'value', 'version', 'fetched_at' and 'fresh' (False once it
+                  should be refreshed), or None if nothing servable is cached
+        """
+        from sqlalchemy import select
+        
+        table = cls.__table__
+        now = datetime.utcnow()
+        row = db.session.execute(
+            select(table.c.payload, table.c.version, table.c.fetched_at, table.c.fresh_until).where(
+                table.c.kind == kind,
+                table.c.lookup_key == key,
+                table.c.stale_until > now
+            )
+        ).first()
+        if row is None:
+            return None
+        
+        return {
+            'value': json.loads(row.payload),
+            'version': row.version,
+            'fetched_at': row.fetched_at,
+            'fresh': row.fresh_until > now
+        }
+    
+    @classmethod
+    def store(cls, kind, key, value, ttl, stale_seconds, version=None):
+        """
+        Cache a value, replacing any cached for the same kind and user, and
+        release the refresh lease.
+        
+        Args:
+            kind (str): Kind of lookup
+            key (str): The user it is for
+            value: JSON-serializable value
+            ttl (int): Seconds the value is fresh for
+            stale_seconds (int): Further seconds it may be served while being refreshed
+            version (str): Version of the code that derived the value, if any
+            
+        Returns:
+            datetime: The value's fetched_at
+        """
+        from sqlalchemy import insert, update
+        
+        table = cls.__table__
+        now = datetime.utcnow()
+        values = {
+            'payload': json.dumps(value),
+            'version': version,
+            'fetched_at': now,
+            'fresh_until': now + timedelta(seconds=ttl),
+            'stale_until': now + timedelta(seconds=ttl + stale_seconds),
+            'refreshing_until': None
+        }
+        
+        # Two processes may cache the same lookup at the same time
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            stmt = dialect_insert(table).values(kind=kind, lookup_key=key, **values)
+            db.session.execute(stmt.on_conflict_do_update(index_elements=['kind', 'lookup_key'], set_=values))
+        else:
+            result = db.session.execute(
+                update(table).where(table.c.kind == kind, table.c.lookup_key == key).values(**values)
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(table).values(kind=kind, lookup_key=key, **values))
+        
+        db.session.commit()
+        return now
+    
+    @classmethod
+    def claim_refresh(cls, kind, key, lease_seconds=60):
+        """
+        Take the lease on refreshing a cached value.
+        
+        Returns:
+            bool: True if the caller should refresh it, False if another
+                  refresh holds the lease (or nothing is cached)
+        """
+        from sqlalchemy import update, or_
+        
+        table = cls.__table__
+        now = datetime.utcnow()
+        result = db.session.execute(
+            update(table).where(
+                table.c.kind == kind,
+                table.c.lookup_key == key,
+                or_(table.c.refreshing_until.is_(None), table.c.refreshing_until < now)
+            ).values(refreshing_until=now + timedelta(seconds=lease_seconds))
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
+    @classmethod
+    def prune(cls):
+        """
+        Delete values that are too stale to serve, without committing.
+        
+        Returns:
+            int: Number of rows deleted
+        """
+        from sqlalchemy import delete
+        
+        table = cls.__table__
+        result = db.session.execute(delete(table).where(table.c.stale_until < datetime.utcnow()))
+        return result.rowcount
@@ -75,7 +75,7 @@ class User(UserMixin, db.Model):
         """Check if the provided password matches the hash."""
         return check_password_hash(self.password_hash, password)
     
-    def add_chadcoin(self, amount):
+    def add_chadcoin(self, amount, commit=True):
         """Add Chadcoin to the user's balance and record the transaction."""
         if amount <= 0:
             return False
@@ -92,7 +92,8 @@ class User(UserMixin, db.Model):
         )
         
         db.session.add(transaction)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         
         return True
     
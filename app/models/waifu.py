@@ -161,16 +161,25 @@ class Waifu(db.Model):
             waifu.is_equipped = False
         
         # Equip this waifu
+        previous_chad_id = getattr(self, 'chad_id', None)
         self.chad_id = chad_id
         self.is_equipped = True
         db.session.commit()
         
+        # Equipment changed, so the cached stat snapshots are stale
+        from app.models.chad import Chad
+        Chad.invalidate_stats(chad_id, previous_chad_id)
+        
         return True
     
     def unequip(self):
         """Unequip the Waifu."""
+        previous_chad_id = getattr(self, 'chad_id', None)
         self.chad_id = None
         self.is_equipped = False
         db.session.commit()
         
+        from app.models.chad import Chad
+        Chad.invalidate_stats(previous_chad_id)
+        
         return True 
\ No newline at end of file
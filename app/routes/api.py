@@ -164,20 +164,43 @@ def get_user_items():
         logger.error(f"Error fetching items: {str(e)}")
         return jsonify({'error': 'Error fetching items'}), 500
 
+@api.route('/api/matchup/<int:chad_id>/<int:opponent_id>')
+@limiter.limit("30 per minute")
+def get_matchup_odds(chad_id, opponent_id):
+    """Get the estimated odds of one chad beating another"""
+    from app.utils.battle_resolver import get_matchup_odds as estimate_matchup_odds
+    
+    try:
+        if chad_id == opponent_id:
+            return jsonify({'error': 'A chad cannot battle itself'}), 400
+        
+        odds = estimate_matchup_odds(chad_id, opponent_id)
+        if not odds:
+            return jsonify({'error': 'Chad not found'}), 404
+        
+        return jsonify(odds)
+    except Exception as e:
+        logger.error(f"Error estimating matchup {chad_id} vs {opponent_id}: {str(e)}")
+        return jsonify({'error': 'Error estimating matchup'}), 500
+
 @api.route('/api/leaderboard')
 @limiter.limit("10 per minute")
 def get_leaderboard():
     """Get leaderboard data"""
+    from app.utils.leaderboard import chad_rankings
+    
     try:
-        # Get top 25 chads by level
-        top_chads = db.session.query(
+        # Top 25 chads by level (ties by XP), read from the rank index
+        ranked = chad_rankings.top('level', limit=25)
+        
+        rows = db.session.query(
             Chad, User.username
         ).join(
             User, Chad.user_id == User.id
-        ).order_by(
-            Chad.level.desc(),
-            Chad.xp.desc()
-        ).limit(25).all()
+        ).filter(
+            Chad.id.in_([entry['chad_id'] for entry in ranked])
+        ).all() if ranked else []
+        chads = {chad.id: (chad, username) for chad, username in rows}
         
         return jsonify({
             'leaderboard': [
@@ -190,9 +213,32 @@ def get_leaderboard():
                     'class_id': chad.class_id,
                     'score': (chad.level * 100) + (chad.clout + chad.roast_level + chad.cringe_resistance + chad.drip_factor)
                 }
-                for index, (chad, username) in enumerate(top_chads)
+                for index, (chad, username) in enumerate(
+                    chads[entry['chad_id']] for entry in ranked if entry['chad_id'] in chads
+                )
             ]
         })
     except Exception as e:
         logger.error(f"Error fetching leaderboard: {str(e)}")
-        return jsonify({'error': 'Error fetching leaderboard'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Error fetching leaderboard'}), 500
+
+@api.route('/api/leaderboard/<metric>/me')
+@login_required
+@limiter.limit("30 per minute")
+def get_my_rank(metric):
+    """Get the current user's Chad rank and the Chads ranked around it"""
+    from app.utils.leaderboard import get_chad_rank, CHAD_RANK_METRICS, RANK_NEIGHBOURS
+    
+    if metric != 'battle' and metric not in CHAD_RANK_METRICS:
+        return jsonify({'error': f'Unknown leaderboard metric: {metric}'}), 404
+    
+    chad = current_user.chad
+    if not chad:
+        return jsonify({'error': 'No Chad found for user'}), 404
+    
+    try:
+        radius = min(max(request.args.get('radius', RANK_NEIGHBOURS, type=int), 0), 25)
+        return jsonify(get_chad_rank(metric, chad.id, radius))
+    except Exception as e:
+        logger.error(f"Error fetching {metric} rank for Chad {chad.id}: {str(e)}")
+        return jsonify({'error': 'Error fetching rank'}), 500 
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+Deterministic battle replay for Chad Battles.
+
+A battle stores a seed plus a compact replay record: both participants' stat
+snapshots at the start of the battle and, for turn-based battles, the list of
+action codes played. Everything else - the winner, XP and Chadcoin rolls and
+every line of battle prose - is a pure function of that record, so it can be
+recomputed in memory without touching the database. This lets result
+descriptions be regenerated on demand instead of stored, and lets disputed
+battles be audited in bulk.
+"""
+import json
+import logging
+import random
+
+from app.models.battle import BattleEventCode
+from app.models.chad import ChadStats
+from app.utils.battle_resolver import (
+    STAT_NAMES, STAT_WEIGHT, LUCK_WEIGHT, get_battle_rng, draw_battle_luck,
+    calculate_battle_power, get_stat_value, format_battle_summary
+)
+
+logger = logging.getLogger(__name__)
+
+REPLAY_VERSION = 1
+
+# Replay kinds
+REPLAY_AUTO = 'auto'
+REPLAY_TURNS = 'turns'
+
+# Turn-based battles end after this many actions (see Battle._check_battle_end)
+MAX_TURNS = 10
+
+def new_battle_seed():
+    """Generate a fresh seed for a battle."""
+    return random.getrandbits(31)
+
+def pack_stats(stats):
+    """Pack a stats snapshot into a compact list of ints in STAT_NAMES order."""
+    if stats is None:
+        return None
+    return [int(get_stat_value(stats, name)) for name in STAT_NAMES]
+
+def unpack_stats(values):
+    """Unpack a list produced by pack_stats() back into ChadStats."""
+    if values is None:
+        return None
+    return ChadStats(*values)
+
+def encode_replay(kind, initiator_stats, opponent_stats, actions=()):
+    """
+    Encode a battle's replay record.
+
+    Args:
+        kind: REPLAY_AUTO or REPLAY_TURNS
+        initiator_stats: Initiator's total stats at the start of the battle
+        opponent_stats: Opponent's total stats (None for NPC battles)
+        actions: Action codes played so far (turn-based battles only)
+
+    Returns:
+        str: Compact JSON replay record
+    """
+    record = {
+        'v': REPLAY_VERSION,
+        'k': kind,
+        'i': pack_stats(initiator_stats),
+        'o': pack_stats(opponent_stats)
+    }
+    if kind == REPLAY_TURNS:
+        record['a'] = [int(code) for code in actions]
+    return json.dumps(record, separators=(',', ':'))
+
+def decode_replay(replay_data):
+    """
+    Decode a replay record.
+
+    Returns:
+        dict: {'kind', 'initiator_stats', 'opponent_stats', 'actions'}, or None
+              if the battle has no (readable) replay record
+    """
+    if not replay_data:
+        return None
+    try:
+        record = json.loads(replay_data)
+    except (TypeError, ValueError):
+        logger.warning("Unreadable battle replay record")
+        return None
+
+    if record.get('v') != REPLAY_VERSION:
+        return None
+
+    return {
+        'kind': record.get('k'),
+        'initiator_stats': unpack_stats(record.get('i')),
+        'opponent_stats': unpack_stats(record.get('o')),
+        'actions': list(record.get('a', []))
+    }
+
+def replay_auto_battle(seed, initiator_stats, opponent_stats):
+    """
+    Recompute an auto-battle from its seed and stat snapshots.
+
+    This is the single source of truth for auto-battle outcomes:
+    simulate_battle() applies its result and resolve_battles() matches it
+    draw for draw.
+
+    Returns:
+        dict: {'initiator_won', 'winner_xp', 'loser_xp', 'winner_reward'}
+    """
+    initiator_luck, opponent_luck, winner_xp, loser_xp, winner_reward = draw_battle_luck(get_battle_rng(seed))
+
+    initiator_power = calculate_battle_power(initiator_stats)
+    opponent_power = calculate_battle_power(opponent_stats)
+
+    initiator_roll = (initiator_power * STAT_WEIGHT) + (initiator_luck * initiator_power * LUCK_WEIGHT)
+    opponent_roll = (opponent_power * STAT_WEIGHT) + (opponent_luck * opponent_power * LUCK_WEIGHT)
+
+    return {
+        'initiator_won': initiator_roll > opponent_roll,
+        'winner_xp': winner_xp,
+        'loser_xp': loser_xp,
+        'winner_reward': winner_reward
+    }
+
+def describe_action(code, actor_name, target_name, actor_stats, target_stats):
+    """
+    Generate the battle log text for a single action.
+
+    Args:
+        code: BattleEventCode of the action
+        actor_name: Name of the acting Chad
+        target_name: Name of the target Chad
+        actor_stats: Acting Chad's stats snapshot
+        target_stats: Target Chad's stats snapshot (None for NPCs)
+
+    Returns:
+        str: Result text
+    """
+    try:
+        code = BattleEventCode(code)
+    except ValueError:
+        code = BattleEventCode.UNKNOWN
+
+    if code == BattleEventCode.ROAST:
+        resistance = target_stats.cringe_resistance if target_stats is not None else 0
+        net_damage = max(1, actor_stats.roast_level - resistance // 2)
+        return f"{actor_name} roasted {target_name} for {net_damage} damage!"
+
+    if code == BattleEventCode.FLEX:
+        return f"{actor_name} flexed their clout for {actor_stats.clout} power!"
+
+    if code == BattleEventCode.DEFEND:
+        return f"{actor_name} prepared to defend with {actor_stats.cringe_resistance} cringe resistance!"
+
+    if code == BattleEventCode.SPECIAL:
+        return f"{actor_name} used a special move with {actor_stats.drip_factor} drip factor!"
+
+    return "Invalid action"
+
+def initiator_wins_on_score(initiator_stats, opponent_stats):
+    """Decide a turn-based battle: the initiator needs a strictly higher stat total."""
+    initiator_score = sum(initiator_stats.values())
+    opponent_score = sum(opponent_stats.values()) if opponent_stats is not None else 0
+    return initiator_score > opponent_score
+
+def replay_turn_battle(initiator_stats, opponent_stats, actions, initiator_name, opponent_name):
+    """
+    Recompute a turn-based battle from its stat snapshots and action codes.
+
+    Returns:
+        dict: {'log': [(turn, is_initiator, code, text), ...],
+               'finished': bool, 'initiator_won': bool or None}
+    """
+    log = []
+    for index, code in enumerate(actions):
+        is_initiator = index % 2 == 0
+        if is_initiator:
+            text = describe_action(code, initiator_name, opponent_name, initiator_stats, opponent_stats)
+        else:
+            text = describe_action(code, opponent_name, initiator_name, opponent_stats, initiator_stats)
+        log.append((index + 1, is_initiator, code, text))
+
+    finished = len(actions) >= MAX_TURNS
+    return {
+        'log': log,
+        'finished': finished,
+        'initiator_won': initiator_wins_on_score(initiator_stats, opponent_stats) if finished else None
+    }
+
+def replay_battle(seed, replay_data, initiator_name='Initiator', opponent_name='NPC'):
+    """
+    Recompute a stored battle entirely in memory.
+
+    Args:
+        seed: The battle's seed
+        replay_data: The battle's replay record
+        initiator_name: Display name of the initiator, for the regenerated prose
+        opponent_name: Display name of the opponent
+
+    Returns:
+        dict: Replay result including 'initiator_won' and 'description', or
+              None if the battle cannot be replayed
+    """
+    replay = decode_replay(replay_data)
+    if replay is None or replay['initiator_stats'] is None:
+        return None
+
+    initiator_stats = replay['initiator_stats']
+    opponent_stats = replay['opponent_stats']
+
+    if replay['kind'] == REPLAY_AUTO:
+        if seed is None or opponent_stats is None:
+            return None
+        result = replay_auto_battle(seed, initiator_stats, opponent_stats)
+        names = (initiator_name, opponent_name)
+        winner_name, loser_name = names if result['initiator_won'] else names[::-1]
+        winner_stats = initiator_stats if result['initiator_won'] else opponent_stats
+        result['description'] = format_battle_summary(
+            _Named(winner_name), _Named(loser_name),
+            result['winner_xp'], result['loser_xp'], result['winner_reward'], winner_stats
+        )
+        return result
+
+    if replay['kind'] == REPLAY_TURNS:
+        result = replay_turn_battle(initiator_stats, opponent_stats, replay['actions'], initiator_name, opponent_name)
+        if result['finished']:
+            names = (initiator_name, opponent_name)
+            winner_name, loser_name = names if result['initiator_won'] else names[::-1]
+            result['description'] = f"{winner_name} defeated {loser_name}!"
+        else:
+            result['description'] = None
+        return result
+
+    return None
+
+def audit_battles(battles):
+    """
+    Re-verify many completed battles against their replays.
+
+    No database access happens here; pass battles that are already loaded,
+    with their initiator. winner_id is the winning user's ID for auto-resolved
+    and turn-based battles alike (finish_battle and Battle._end_battle both
+    store user IDs), so it is compared with the initiator's user_id rather
+    than initiator_id, which is a chad ID.
+
+    Args:
+        battles: Battles with seed, replay_data, initiator and winner_id
+
+    Returns:
+        dict: {'verified': [battle ids], 'mismatched': [battle ids],
+               'unreplayable': [battle ids]}
+    """
+    report = {'verified': [], 'mismatched': [], 'unreplayable': []}
+
+    for battle in battles:
+        result = replay_battle(battle.seed, battle.replay_data)
+        if result is None or result.get('initiator_won') is None:
+            report['unreplayable'].append(battle.id)
+            continue
+
+        initiator = battle.initiator
+        if initiator is None:
+            report['unreplayable'].append(battle.id)
+            continue
+
+        if result['initiator_won'] == (battle.winner_id == initiator.user_id):
+            report['verified'].append(battle.id)
+        else:
+            report['mismatched'].append(battle.id)
+
+    if report['mismatched']:
+        logger.warning(f"Battle audit found {len(report['mismatched'])} mismatched battles: {report['mismatched']}")
+
+    return report
+
+class _Named:
+    """Minimal stand-in for a Chad when only the name is needed."""
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
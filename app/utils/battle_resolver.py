@@ -0,0 +1,332 @@
+"""
+Battle resolution utilities for Chad Battles.
+
+This module holds the auto-battle rules shared by the scalar bot path
+(bot_commands.simulate_battle) and the batch resolver, which settles many
+battles at once: participant stats are loaded in bulk, the 60% stats / 40%
+luck rolls are computed as NumPy arrays and all winners, XP and Chadcoin
+rewards are written in a single transaction. The same formula also powers
+the Monte Carlo matchup odds behind "can I beat X?".
+"""
+import logging
+import random
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models.chad import Chad
+from app.models.battle import BattleEventCode
+from app.utils.leaderboard import battle_leaderboard, record_battle_result
+
+logger = logging.getLogger(__name__)
+
+STAT_NAMES = ('clout', 'roast_level', 'cringe_resistance', 'drip_factor')
+
+# Share of a Chad's power that is guaranteed vs. left to luck
+STAT_WEIGHT = 0.6
+LUCK_WEIGHT = 0.4
+
+# Elo-style matchmaking rating
+DEFAULT_RATING = 1200
+RATING_K_FACTOR = 32
+
+# Simulated battles per win-probability estimate (standard error < 0.2%)
+MATCHUP_TRIALS = 100000
+
+BATTLE_FAILED_MESSAGE = "The battle couldn't be completed due to technical difficulties. Both Chads walked away unharmed."
+
+def get_battle_rng(seed=None):
+    """
+    Get the random source for a battle.
+
+    Args:
+        seed: Optional battle seed. Without one the global random module is used.
+
+    Returns:
+        An object exposing random() and randint()
+    """
+    if seed is None:
+        return random
+    return random.Random(seed)
+
+def draw_battle_luck(rng):
+    """
+    Draw every random value an auto-battle needs, in a fixed order.
+
+    Both the scalar and the batch path call this, so a given seed always
+    produces the same battle.
+
+    Args:
+        rng: Random source from get_battle_rng()
+
+    Returns:
+        tuple: (initiator_luck, opponent_luck, winner_xp, loser_xp, winner_reward)
+    """
+    initiator_luck = rng.random()
+    opponent_luck = rng.random()
+    winner_xp = rng.randint(50, 100)
+    loser_xp = rng.randint(10, 30)
+    winner_reward = rng.randint(100, 200)
+    return initiator_luck, opponent_luck, winner_xp, loser_xp, winner_reward
+
+def get_stat_value(stats, name):
+    """Read a stat from either a stats dict or a stats object."""
+    if isinstance(stats, dict):
+        return stats[name]
+    return getattr(stats, name)
+
+def calculate_battle_power(stats):
+    """Calculate a Chad's battle power as the sum of its total stats."""
+    return sum(get_stat_value(stats, name) for name in STAT_NAMES)
+
+def get_best_stat(stats):
+    """Get the display name of a Chad's highest stat."""
+    best = max(STAT_NAMES, key=lambda name: get_stat_value(stats, name))
+    return best.replace('_', ' ')
+
+def roll_battles(initiator_powers, opponent_powers, initiator_luck, opponent_luck):
+    """
+    Resolve the 60/40 stat/luck rolls for many battles at once.
+
+    The arithmetic mirrors the scalar formula operation for operation, so the
+    outcome for a given set of luck draws is bit-for-bit identical.
+
+    Args:
+        initiator_powers: Array of initiator battle powers
+        opponent_powers: Array of opponent battle powers
+        initiator_luck: Array of initiator luck draws in [0, 1)
+        opponent_luck: Array of opponent luck draws in [0, 1)
+
+    Returns:
+        numpy.ndarray: Boolean array, True where the initiator won
+    """
+    initiator_powers = np.asarray(initiator_powers, dtype=np.float64)
+    opponent_powers = np.asarray(opponent_powers, dtype=np.float64)
+
+    initiator_rolls = (initiator_powers * STAT_WEIGHT) + (np.asarray(initiator_luck, dtype=np.float64) * initiator_powers * LUCK_WEIGHT)
+    opponent_rolls = (opponent_powers * STAT_WEIGHT) + (np.asarray(opponent_luck, dtype=np.float64) * opponent_powers * LUCK_WEIGHT)
+
+    return initiator_rolls > opponent_rolls
+
+def estimate_win_probability(initiator_stats, opponent_stats, trials=MATCHUP_TRIALS):
+    """
+    Estimate the initiator's chance of winning an auto-battle by Monte Carlo.
+
+    The 60/40 formula is run over `trials` independent luck draws at once.
+    The odds only depend on the two battle powers, so results are cached per
+    power pair and any matchup between the same stat totals is free.
+
+    Args:
+        initiator_stats: Initiator's total stats
+        opponent_stats: Opponent's total stats
+        trials: Number of simulated battles
+
+    Returns:
+        float: Win probability in [0, 1]
+    """
+    from app.utils.cache import get_cached_win_probability, cache_win_probability
+
+    initiator_power = calculate_battle_power(initiator_stats)
+    opponent_power = calculate_battle_power(opponent_stats)
+
+    probability = get_cached_win_probability(initiator_power, opponent_power, trials)
+    if probability is not None:
+        return probability
+
+    # Seeded from the matchup itself so the same query always gives the same answer
+    rng = np.random.default_rng([int(initiator_power), int(opponent_power), int(trials)])
+    initiator_luck = rng.random(trials)
+    opponent_luck = rng.random(trials)
+
+    wins = roll_battles(
+        np.full(trials, initiator_power, dtype=np.float64),
+        np.full(trials, opponent_power, dtype=np.float64),
+        initiator_luck,
+        opponent_luck
+    )
+    probability = float(wins.mean())
+
+    cache_win_probability(initiator_power, opponent_power, trials, probability)
+    return probability
+
+def get_matchup_odds(chad_id, opponent_chad_id, trials=MATCHUP_TRIALS):
+    """
+    Get the odds of one Chad beating another in an auto-battle.
+
+    Args:
+        chad_id: ID of the challenging Chad
+        opponent_chad_id: ID of the opponent Chad
+        trials: Number of simulated battles
+
+    Returns:
+        dict: Matchup odds, or None if either Chad has no stats
+    """
+    stats = Chad.get_total_stats_bulk([chad_id, opponent_chad_id])
+    if chad_id not in stats or opponent_chad_id not in stats:
+        return None
+
+    return {
+        'chad_id': chad_id,
+        'opponent_chad_id': opponent_chad_id,
+        'chad_power': calculate_battle_power(stats[chad_id]),
+        'opponent_power': calculate_battle_power(stats[opponent_chad_id]),
+        'win_probability': estimate_win_probability(stats[chad_id], stats[opponent_chad_id], trials),
+        'trials': trials
+    }
+
+def calculate_rating_change(winner_rating, loser_rating, k_factor=RATING_K_FACTOR):
+    """
+    Calculate the Elo rating points a winner takes from a loser.
+
+    Upsets are worth more than expected wins; every win is worth at least 1.
+    """
+    expected = 1 / (1 + 10 ** ((loser_rating - winner_rating) / 400))
+    return max(1, round(k_factor * (1 - expected)))
+
+def record_match_result(winner, loser):
+    """
+    Update the winner's and loser's ratings and battle counters, without committing.
+
+    Every resolved Chad-vs-Chad match goes through this, whether it was a
+    battle or a tournament match.
+    """
+    winner_rating = winner.rating if winner.rating is not None else DEFAULT_RATING
+    loser_rating = loser.rating if loser.rating is not None else DEFAULT_RATING
+    rating_change = calculate_rating_change(winner_rating, loser_rating)
+    winner.rating = winner_rating + rating_change
+    loser.rating = loser_rating - rating_change
+
+    record_battle_result(winner, loser)
+
+def finish_battle(battle, winner, loser):
+    """Mark a battle as completed, update ratings and counters and append the final battle log entry."""
+    battle.winner_id = winner.user_id
+    battle.loser_id = loser.user_id
+    battle.status = 'completed'
+    battle.completed_at = datetime.utcnow()
+
+    record_match_result(winner, loser)
+
+    battle.add_event(BattleEventCode.BATTLE_ENDED, f"{winner.name} defeated {loser.name}!", turn=1)
+
+def apply_battle_rewards(winner, loser, winner_xp, loser_xp, winner_reward):
+    """
+    Award battle XP and Chadcoin without committing.
+
+    The caller is responsible for committing the session, which lets the
+    batch resolver write every battle in one transaction.
+    """
+    from app.models.transaction import Transaction
+
+    winner.add_xp(winner_xp, commit=False)
+    loser.add_xp(loser_xp, commit=False)
+
+    winner.user.add_chadcoin(winner_reward, commit=False)
+    Transaction.record_chadcoin_transaction(
+        user_id=winner.user_id,
+        amount=winner_reward,
+        description=f"Battle reward for defeating {loser.name}",
+        related_entity=('chad', winner.id),
+        commit=False
+    )
+
+def format_battle_summary(winner, loser, winner_xp, loser_xp, winner_reward, winner_stats):
+    """Generate the battle summary posted back to Twitter."""
+    return (
+        f"🔥 {winner.name} has defeated {loser.name}! 🔥\n"
+        f"\n"
+        f"📊 BATTLE STATS:\n"
+        f"• {winner.name}: {winner_xp} XP gained, {winner_reward} Chadcoin earned\n"
+        f"• {loser.name}: {loser_xp} XP gained (for effort)\n"
+        f"\n"
+        f"The battle was fierce, but {winner.name}'s superior {get_best_stat(winner_stats)} won the day!"
+    )
+
+def resolve_battles(battles, seeds=None):
+    """
+    Resolve many auto-battles at once.
+
+    Every participant's stats are loaded with one bulk query, the rolls are
+    computed vectorially and all results and rewards are committed together.
+    For the same seeds the outcome matches calling simulate_battle() on each
+    battle in turn.
+
+    Args:
+        battles (list): Battle objects with initiator_chad_id and opponent_chad_id set
+        seeds (list): Optional per-battle seeds (None entries get a fresh seed)
+
+    Returns:
+        list: Battle summary messages, in the same order as battles
+    """
+    battles = list(battles)
+    if not battles:
+        return []
+
+    if seeds is None:
+        seeds = [None] * len(battles)
+    if len(seeds) != len(battles):
+        raise ValueError("One seed is required per battle")
+
+    from app.utils.battle_replay import new_battle_seed, encode_replay, REPLAY_AUTO
+
+    # Every battle gets a seed so it can be replayed and audited later
+    seeds = [new_battle_seed() if seed is None else seed for seed in seeds]
+
+    try:
+        chad_ids = set()
+        for battle in battles:
+            chad_ids.add(battle.initiator_chad_id)
+            chad_ids.add(battle.opponent_chad_id)
+
+        chads = {
+            chad.id: chad
+            for chad in Chad.query.options(
+                joinedload(Chad.user),
+                joinedload(Chad.chad_class)
+            ).filter(Chad.id.in_(chad_ids)).all()
+        }
+        stats = Chad.get_total_stats_bulk(chad_ids)
+
+        # Draw luck per battle, in battle order, so seeds stay reproducible
+        draws = np.array([draw_battle_luck(get_battle_rng(seed)) for seed in seeds], dtype=np.float64)
+
+        initiator_powers = [calculate_battle_power(stats[battle.initiator_chad_id]) for battle in battles]
+        opponent_powers = [calculate_battle_power(stats[battle.opponent_chad_id]) for battle in battles]
+
+        initiator_wins = roll_battles(initiator_powers, opponent_powers, draws[:, 0], draws[:, 1])
+
+        summaries = []
+        for index, battle in enumerate(battles):
+            initiator_chad = chads[battle.initiator_chad_id]
+            opponent_chad = chads[battle.opponent_chad_id]
+
+            if initiator_wins[index]:
+                winner, loser = initiator_chad, opponent_chad
+            else:
+                winner, loser = opponent_chad, initiator_chad
+
+            winner_xp, loser_xp, winner_reward = (int(value) for value in draws[index, 2:])
+
+            battle.seed = seeds[index]
+            battle.replay_data = encode_replay(
+                REPLAY_AUTO, stats[battle.initiator_chad_id], stats[battle.opponent_chad_id]
+            )
+
+            finish_battle(battle, winner, loser)
+            apply_battle_rewards(winner, loser, winner_xp, loser_xp, winner_reward)
+
+            summaries.append(format_battle_summary(
+                winner, loser, winner_xp, loser_xp, winner_reward, stats[winner.id]
+            ))
+
+        db.session.commit()
+
+        logger.info(f"Resolved {len(battles)} battles in one batch")
+        return summaries
+    except Exception as e:
+        db.session.rollback()
+        battle_leaderboard.invalidate()
+        logger.error(f"Error resolving battle batch: {str(e)}")
+        return [BATTLE_FAILED_MESSAGE] * len(battles)
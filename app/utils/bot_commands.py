@@ -1,79 +1,47 @@
 import logging
-import re
 from datetime import datetime, timedelta
 from app import db
 from app.models.user import User
 from app.models.chad import Chad, ChadClass
 from app.models.waifu import Waifu, WaifuType, WaifuRarity
-from app.models.battle import Battle
-from app.utils.twitter_api import (
-    get_user_profile, get_user_tweets, analyze_tweets, 
-    calculate_clout, post_reply
+from app.models.battle import Battle, BattleEventCode
+from app.utils.twitter_cache import (
+    get_cached_user_profile, get_cached_analysis, get_cached_clout
+)
+from app.utils.outbound import schedule_reply
+from app.utils.battle_resolver import (
+    BATTLE_FAILED_MESSAGE, finish_battle, apply_battle_rewards, format_battle_summary
 )
-import json
-import random
 
 logger = logging.getLogger(__name__)
 
-# Command patterns
-CREATE_CHARACTER_PATTERN = re.compile(r'CREATE\s+CHARACTER', re.IGNORECASE)
-FIGHT_REQUEST_PATTERN = re.compile(r'.*@(\w+).*CHALLENGE\s+TO\s+BATTLE', re.IGNORECASE)
-CHECK_STATS_PATTERN = re.compile(r'CHECK\s+STATS', re.IGNORECASE)
-JOIN_CABAL_PATTERN = re.compile(r'JOIN\s+CABAL\s+([A-Za-z0-9_\s]+)', re.IGNORECASE)
-CREATE_CABAL_PATTERN = re.compile(r'CREATE\s+CABAL\s+([A-Za-z0-9_\s]+)', re.IGNORECASE)
-APPOINT_OFFICER_PATTERN = re.compile(r'APPOINT\s+@(\w+)\s+AS\s+(CLOUT|ROAST|CRINGE|DRIP)\s+OFFICER', re.IGNORECASE)
-SCHEDULE_BATTLE_PATTERN = re.compile(r'BATTLE\s+CABAL\s+([A-Za-z0-9_\s]+)', re.IGNORECASE)
-VOTE_REMOVE_LEADER_PATTERN = re.compile(r'VOTE\s+REMOVE\s+CABAL\s+LEADER', re.IGNORECASE)
-OPT_IN_BATTLE_PATTERN = re.compile(r'JOIN\s+NEXT\s+CABAL\s+BATTLE', re.IGNORECASE)
-HELP_PATTERN = re.compile(r'HELP', re.IGNORECASE)
-
 def handle_mention(tweet):
-    """Process mentions and route to appropriate handler"""
+    """
+    Process mentions and route to appropriate handler
+    
+    Returns False for mentions that were answered but not carried out (an
+    unknown command, a missing character). Errors are logged and raised, so
+    the mention inbox releases the mention to be retried.
+    """
+    from app.utils.command_router import parse_command
+
     try:
         tweet_id = tweet.get('id_str')
         user_screen_name = tweet.get('user', {}).get('screen_name')
         text = tweet.get('full_text', tweet.get('text', ''))
         
-        # Check which command pattern matches
-        if CREATE_CHARACTER_PATTERN.search(text):
-            return handle_create_character(tweet_id, user_screen_name)
-        elif FIGHT_REQUEST_PATTERN.search(text):
-            match = FIGHT_REQUEST_PATTERN.search(text)
-            opponent_name = match.group(1) if match else None
-            return handle_fight_request(tweet_id, user_screen_name, opponent_name)
-        elif CHECK_STATS_PATTERN.search(text):
-            return handle_check_stats(tweet_id, user_screen_name)
-        elif JOIN_CABAL_PATTERN.search(text):
-            match = JOIN_CABAL_PATTERN.search(text)
-            cabal_name = match.group(1).strip() if match else None
-            return handle_join_cabal(tweet_id, user_screen_name, cabal_name)
-        elif CREATE_CABAL_PATTERN.search(text):
-            match = CREATE_CABAL_PATTERN.search(text)
-            cabal_name = match.group(1).strip() if match else None
-            return handle_create_cabal(tweet_id, user_screen_name, cabal_name)
-        elif APPOINT_OFFICER_PATTERN.search(text):
-            match = APPOINT_OFFICER_PATTERN.search(text)
-            officer_name = match.group(1)
-            officer_type = match.group(2).lower()
-            return handle_appoint_officer(tweet_id, user_screen_name, officer_name, officer_type)
-        elif SCHEDULE_BATTLE_PATTERN.search(text):
-            match = SCHEDULE_BATTLE_PATTERN.search(text)
-            opponent_cabal_name = match.group(1).strip() if match else None
-            return handle_schedule_battle(tweet_id, user_screen_name, opponent_cabal_name)
-        elif VOTE_REMOVE_LEADER_PATTERN.search(text):
-            return handle_vote_remove_leader(tweet_id, user_screen_name)
-        elif OPT_IN_BATTLE_PATTERN.search(text):
-            return handle_opt_in_battle(tweet_id, user_screen_name)
-        elif HELP_PATTERN.search(text):
-            return handle_help(tweet_id, user_screen_name)
-        else:
+        # One pass over the tweet finds the command and its arguments
+        command, args = parse_command(text)
+        handler = COMMAND_HANDLERS.get(command)
+        if handler is None:
             # Unknown command
             reply = f"@{user_screen_name} I don't understand that command. Try 'HELP @RollMasterChad' for a list of commands."
-            post_reply(reply, tweet_id)
+            schedule_reply(reply, tweet_id)
             return False
+        return handler(tweet_id, user_screen_name, **args)
     except Exception as e:
         logger.error(f"Error handling mention: {str(e)}")
-        return False
+        raise
 
 def handle_create_character(tweet_id, username):
     """Handle character creation request"""
@@ -82,28 +50,25 @@ def handle_create_character(tweet_id, username):
         user = User.query.filter_by(x_username=username).first()
         if user and user.chad:
             reply = f"@{username} You already have a Chad character! Tweet CHECK STATS @RollMasterChad to see your stats."
-            post_reply(reply, tweet_id)
+            schedule_reply(reply, tweet_id)
             return False
         
-        # Get user data from Twitter API
-        user_profile = get_user_profile(username)
+        # Get user data from Twitter API (cached, so retries don't refetch it)
+        user_profile = get_cached_user_profile(username)
         if not user_profile:
             # This might happen if the user has a private profile and doesn't follow the bot
             error_message = f"@{username} I couldn't access your profile! If your account is private, please follow @RollMasterChad so I can analyze your tweets. Once you've followed, try again!"
-            post_reply(error_message, tweet_id)
+            schedule_reply(error_message, tweet_id)
             return False
             
-        # Fetch user's tweets for analysis
-        tweets = get_user_tweets(username)
-        if not tweets or len(tweets) == 0:
+        # Fetch and analyze user's tweets to determine character class and stats
+        analysis = get_cached_analysis(user_profile.get('id_str'), username)
+        if not analysis:
             # This might happen if the user has no tweets or a private account
             error_message = f"@{username} I couldn't access your tweets! Either you have no tweets, or your account is private. If private, please follow @RollMasterChad and try again!"
-            post_reply(error_message, tweet_id)
+            schedule_reply(error_message, tweet_id)
             return False
         
-        # Analyze tweets to determine character class and stats
-        analysis = analyze_tweets(tweets)
-        
         # Create or update User record
         if not user:
             user = User(
@@ -119,7 +84,7 @@ def handle_create_character(tweet_id, username):
             db.session.commit()
         
         # Calculate Clout stat
-        clout = calculate_clout(user_profile.get('id_str'))
+        clout = get_cached_clout(user_profile.get('id_str'))
         
         # Get or create Chad Class
         chad_class = ChadClass.query.filter_by(name=analysis['chad_class']).first()
@@ -197,14 +162,14 @@ def handle_create_character(tweet_id, username):
             f"Drip Factor: {chad.drip_factor}\n\n"
             f"You received a Starter Waifu! Check your stats with CHECK STATS @RollMasterChad"
         )
-        post_reply(reply, tweet_id)
+        schedule_reply(reply, tweet_id)
         
         return True
     except Exception as e:
         logger.error(f"Error creating character for {username}: {str(e)}")
         reply = f"@{username} You need to create a character first. Tweet CREATE CHARACTER @RollMasterChad to get started."
-        post_reply(reply, tweet_id)
-        return False
+        schedule_reply(reply, tweet_id)
+        raise
 
 def handle_fight_request(tweet_id, username, opponent_name):
     """Handle a fight request by immediately starting the battle"""
@@ -215,52 +180,58 @@ def handle_fight_request(tweet_id, username, opponent_name):
         
         if not initiator or not initiator.chad:
             reply = f"@{username} You need to create a character first. Tweet MAKE ME A CHAD @RollMasterChad to get started."
-            post_reply(reply, tweet_id)
+            schedule_reply(reply, tweet_id, lane='battle')
             return False
         
         if not opponent or not opponent.chad:
             reply = f"@{username} @{opponent_name} doesn't have a Chad character yet!"
-            post_reply(reply, tweet_id)
+            schedule_reply(reply, tweet_id, lane='battle')
             return False
         
-        # Check if there's already a pending or active battle
-        existing_battle = Battle.query.filter(
-            db.or_(
-                db.and_(Battle.initiator_id==initiator.chad.id, Battle.opponent_id==opponent.chad.id),
-                db.and_(Battle.initiator_id==opponent.chad.id, Battle.opponent_id==initiator.chad.id)
-            ),
-            Battle.status.in_(['pending', 'in_progress'])
-        ).first()
-        
-        if existing_battle:
-            reply = f"@{username} There's already an active battle between you and @{opponent_name}!"
-            post_reply(reply, tweet_id)
-            return False
-        
-        # Create a new battle
-        battle = Battle(
-            initiator_id=initiator.chad.id,
-            opponent_id=opponent.chad.id,
-            initiator_chad_id=initiator.chad.id,
-            opponent_chad_id=opponent.chad.id,
-            status='in_progress',  # Start immediately instead of 'pending'
-            challenge_tweet_id=tweet_id,
-            started_at=datetime.utcnow()
-        )
-        db.session.add(battle)
-        db.session.commit()
-        
-        # Initialize battle log
-        battle.battle_log = json.dumps([{
-            "turn": 0,
-            "timestamp": datetime.utcnow().isoformat(),
-            "event": "battle_started",
-            "description": f"Battle between {initiator.chad.name} and {opponent.chad.name} has begun!"
-        }])
-        db.session.commit()
+        # A retried mention carries on with the battle its first attempt started
+        battle = Battle.query.filter_by(challenge_tweet_id=tweet_id).first()
+        if battle is None:
+            # Check if there's already a pending or active battle
+            existing_battle = Battle.query.filter(
+                db.or_(
+                    db.and_(Battle.initiator_id==initiator.chad.id, Battle.opponent_id==opponent.chad.id),
+                    db.and_(Battle.initiator_id==opponent.chad.id, Battle.opponent_id==initiator.chad.id)
+                ),
+                Battle.status.in_(['pending', 'in_progress'])
+            ).first()
+            
+            if existing_battle:
+                reply = f"@{username} There's already an active battle between you and @{opponent_name}!"
+                schedule_reply(reply, tweet_id, lane='battle')
+                return False
+            
+            # Create a new battle
+            battle = Battle(
+                initiator_id=initiator.chad.id,
+                opponent_id=opponent.chad.id,
+                initiator_chad_id=initiator.chad.id,
+                opponent_chad_id=opponent.chad.id,
+                status='in_progress',  # Start immediately instead of 'pending'
+                challenge_tweet_id=tweet_id,
+                started_at=datetime.utcnow()
+            )
+            db.session.add(battle)
+            db.session.commit()
+            
+            # Initialize battle log
+            battle.add_event(
+                BattleEventCode.BATTLE_STARTED,
+                f"Battle between {initiator.chad.name} and {opponent.chad.name} has begun!",
+                turn=0
+            )
+            db.session.commit()
         
-        # Perform automatic battle simulation
-        battle_result = simulate_battle(battle)
+        if battle.status == 'completed':
+            # Resolved (and rewarded) by an earlier attempt; never again
+            battle_result = battle.result_description
+        else:
+            # Perform automatic battle simulation
+            battle_result = simulate_battle(battle)
         
         # Send battle notification and results
         reply = (
@@ -269,17 +240,19 @@ def handle_fight_request(tweet_id, username, opponent_name):
             f"{battle_result}\n\n"
             f"Check your progress by tweeting CHECK STATS @RollMasterChad to see your updated stats!"
         )
-        post_reply(reply, tweet_id)
+        schedule_reply(reply, tweet_id, lane='battle')
         
         return True
     except Exception as e:
         logger.error(f"Error handling fight request from {username} to {opponent_name}: {str(e)}")
         reply = f"@{username} Sorry, there was an error processing your battle challenge. Please try again later."
-        post_reply(reply, tweet_id)
-        return False
+        schedule_reply(reply, tweet_id, lane='battle')
+        raise
 
-def simulate_battle(battle):
+def simulate_battle(battle, seed=None):
     """Simulate a battle automatically"""
+    from app.utils.battle_replay import new_battle_seed, encode_replay, replay_auto_battle, REPLAY_AUTO
+    
     try:
         # Get the participants
         initiator_chad = battle.initiator_chad
@@ -289,74 +262,109 @@ def simulate_battle(battle):
         initiator_stats = initiator_chad.get_total_stats()
         opponent_stats = opponent_chad.get_total_stats()
         
-        initiator_power = sum(initiator_stats.values())
-        opponent_power = sum(opponent_stats.values())
+        # Store the seed and stat snapshots so the battle can be replayed later
+        if seed is None:
+            seed = new_battle_seed()
+        battle.seed = seed
+        battle.replay_data = encode_replay(REPLAY_AUTO, initiator_stats, opponent_stats)
         
-        # Add some randomness (60% stats, 40% luck)
-        initiator_roll = (initiator_power * 0.6) + (random.random() * initiator_power * 0.4)
-        opponent_roll = (opponent_power * 0.6) + (random.random() * opponent_power * 0.4)
+        # 60% stats, 40% luck
+        result = replay_auto_battle(seed, initiator_stats, opponent_stats)
         
         # Determine winner
-        if initiator_roll > opponent_roll:
-            winner = initiator_chad
-            loser = opponent_chad
-            battle.winner_id = initiator_chad.user_id
-            battle.loser_id = opponent_chad.user_id
+        if result['initiator_won']:
+            winner, loser, winner_stats = initiator_chad, opponent_chad, initiator_stats
         else:
-            winner = opponent_chad
-            loser = initiator_chad
-            battle.winner_id = opponent_chad.user_id
-            battle.loser_id = initiator_chad.user_id
-        
-        # Update battle status
-        battle.status = 'completed'
-        battle.completed_at = datetime.utcnow()
-        
-        # Add final battle log entry
-        log = json.loads(battle.battle_log) if battle.battle_log else []
-        log.append({
-            "turn": 1,
-            "timestamp": datetime.utcnow().isoformat(),
-            "event": "battle_ended",
-            "description": f"{winner.name} defeated {loser.name}!"
-        })
-        battle.battle_log = json.dumps(log)
-        
-        # Award XP
-        winner_xp = random.randint(50, 100)
-        loser_xp = random.randint(10, 30)
-        
-        winner.add_xp(winner_xp)
-        loser.add_xp(loser_xp)
-        
-        # Award Chadcoin
-        from app.models.transaction import Transaction
-        winner_reward = random.randint(100, 200)
-        winner.user.add_chadcoin(winner_reward)
-        
-        # Record transaction
-        Transaction.record_chadcoin_transaction(
-            user_id=winner.user_id,
-            amount=winner_reward,
-            description=f"Battle reward for defeating {loser.name}",
-            related_entity=('chad', winner.id)
-        )
+            winner, loser, winner_stats = opponent_chad, initiator_chad, opponent_stats
+        
+        # Update battle status and log
+        finish_battle(battle, winner, loser)
+        
+        # Award XP and Chadcoin
+        apply_battle_rewards(winner, loser, result['winner_xp'], result['loser_xp'], result['winner_reward'])
         
         db.session.commit()
         
         # Generate battle summary
-        return (
-            f"🔥 {winner.name} has defeated {loser.name}! 🔥\n"
-            f"\n"
-            f"📊 BATTLE STATS:\n"
-            f"• {winner.name}: {winner_xp} XP gained, {winner_reward} Chadcoin earned\n"
-            f"• {loser.name}: {loser_xp} XP gained (for effort)\n"
-            f"\n"
-            f"The battle was fierce, but {winner.name}'s superior {max(winner.get_total_stats().items(), key=lambda x: x[1])[0].replace('_', ' ')} won the day!"
+        return format_battle_summary(
+            winner, loser, result['winner_xp'], result['loser_xp'], result['winner_reward'], winner_stats
         )
     except Exception as e:
+        from app.utils.leaderboard import battle_leaderboard
+        db.session.rollback()
+        battle_leaderboard.invalidate()
         logger.error(f"Error simulating battle {battle.id}: {str(e)}")
-        return "The battle couldn't be completed due to technical difficulties. Both Chads walked away unharmed."
+        return BATTLE_FAILED_MESSAGE
+
+def handle_queue_for_battle(tweet_id, username):
+    """Handle a matchmaking queue request"""
+    from app.utils.matchmaking import matchmaking_queue
+    
+    try:
+        user = User.query.filter_by(x_username=username).first()
+        if not user or not user.chad:
+            reply = f"@{username} You need to create a character first. Tweet CREATE CHARACTER @RollMasterChad to get started."
+            schedule_reply(reply, tweet_id, lane='battle')
+            return False
+        
+        chad = user.chad
+        if chad.id in matchmaking_queue:
+            reply = f"@{username} You're already in the queue. Hang tight, we're finding you a worthy opponent!"
+            schedule_reply(reply, tweet_id, lane='battle')
+            return False
+        
+        opponent = matchmaking_queue.enqueue(chad.id, chad.rating, tweet_id=tweet_id, username=username)
+        if opponent:
+            reply = f"@{username} Match found against @{opponent.username}! ⚔️ Battle results incoming..."
+        else:
+            reply = f"@{username} You're in the matchmaking queue (rating {chad.rating}). We'll reply here when we find your opponent!"
+        schedule_reply(reply, tweet_id, lane='battle')
+        return True
+    except Exception as e:
+        logger.error(f"Error queueing {username} for matchmaking: {str(e)}")
+        raise
+
+def handle_matchup_odds(tweet_id, username, opponent_name):
+    """Handle a "can I beat X?" request with Monte Carlo win odds"""
+    from app.utils.battle_resolver import get_matchup_odds, MATCHUP_TRIALS
+    
+    try:
+        user = User.query.filter_by(x_username=username).first()
+        if not user or not user.chad:
+            reply = f"@{username} You need to create a character first. Tweet CREATE CHARACTER @RollMasterChad to get started."
+            schedule_reply(reply, tweet_id)
+            return False
+        
+        opponent = User.query.filter_by(x_username=opponent_name).first()
+        if not opponent or not opponent.chad:
+            reply = f"@{username} @{opponent_name} doesn't have a Chad character yet!"
+            schedule_reply(reply, tweet_id)
+            return False
+        
+        odds = get_matchup_odds(user.chad.id, opponent.chad.id)
+        if not odds:
+            reply = f"@{username} Couldn't size up that matchup right now. Please try again later."
+            schedule_reply(reply, tweet_id)
+            return False
+        
+        win_percent = odds['win_probability'] * 100
+        if win_percent >= 60:
+            verdict = "Send the challenge. 💪"
+        elif win_percent >= 40:
+            verdict = "It's a coin flip. Feeling lucky?"
+        else:
+            verdict = "Maybe hit the gym (and the drip shop) first. 😬"
+        
+        reply = (
+            f"@{username} {user.chad.name} ({odds['chad_power']} power) vs "
+            f"{opponent.chad.name} ({odds['opponent_power']} power):\n\n"
+            f"You win {win_percent:.1f}% of {MATCHUP_TRIALS:,} simulated battles. {verdict}"
+        )
+        schedule_reply(reply, tweet_id)
+        return True
+    except Exception as e:
+        logger.error(f"Error handling matchup odds from {username} against {opponent_name}: {str(e)}")
+        raise
 
 def handle_check_stats(tweet_id, username):
     """Handle stats check request"""
@@ -364,7 +372,7 @@ def handle_check_stats(tweet_id, username):
         user = User.query.filter_by(x_username=username).first()
         if not user or not user.chad:
             reply = f"@{username} You need to create a character first. Tweet CHECK STATS @RollMasterChad to get started."
-            post_reply(reply, tweet_id)
+            schedule_reply(reply, tweet_id)
             return False
         
         chad = user.chad
@@ -394,13 +402,13 @@ def handle_check_stats(tweet_id, username):
             cabal = chad.cabal_membership.cabal
             reply += f"\n\nCabal: {cabal.name} (Level {cabal.level})"
         
-        post_reply(reply, tweet_id)
+        schedule_reply(reply, tweet_id)
         return True
     except Exception as e:
         logger.error(f"Error checking stats for {username}: {str(e)}")
         reply = f"@{username} Sorry, there was an error checking your stats. Please try again later."
-        post_reply(reply, tweet_id)
-        return False
+        schedule_reply(reply, tweet_id)
+        raise
 
 def handle_join_cabal(tweet_id, username, cabal_name):
     """Handle join cabal request"""
@@ -432,7 +440,7 @@ def handle_join_cabal(tweet_id, username, cabal_name):
             return f"@{username} Unable to join cabal: {message}"
     except Exception as e:
         logger.error(f"Error handling join cabal request from {username}: {str(e)}")
-        return f"@{username} Sorry, there was an error joining the cabal. Please try again later."
+        raise
 
 def handle_create_cabal(tweet_id, username, cabal_name):
     """Handle create cabal request"""
@@ -458,7 +466,7 @@ def handle_create_cabal(tweet_id, username, cabal_name):
         cabal = Cabal(
             name=cabal_name,
             description=f"Cabal led by {username}",
-            leader_id=user.chad.id
+            leader_id=user.id
         )
         db.session.add(cabal)
         db.session.commit()
@@ -467,17 +475,21 @@ def handle_create_cabal(tweet_id, username, cabal_name):
         from app.models.cabal import CabalMember
         member = CabalMember(
             cabal_id=cabal.id,
-            chad_id=user.chad.id,
+            user_id=user.id,
+            role='leader',
             is_active=True
         )
         db.session.add(member)
+        cabal.member_count = Cabal.member_count + 1
         db.session.commit()
+        Cabal.invalidate_rankings()
+        cabal.invalidate_access()
         
         return f"@{username} Successfully created cabal '{cabal_name}'! Invite others to join with JOIN CABAL name @RollMasterChad"
         
     except Exception as e:
         logger.error(f"Error creating cabal for {username}: {str(e)}")
-        return f"@{username} Sorry, there was an error creating the cabal. Please try again later."
+        raise
 
 def handle_appoint_officer(tweet_id, username, officer_name, officer_type):
     """Handle appointing a cabal officer"""
@@ -505,7 +517,7 @@ def handle_appoint_officer(tweet_id, username, officer_name, officer_type):
             return f"@{username} You need to create a character first. Tweet CREATE CHARACTER @RollMasterChad to get started."
         
         # Check if user is a cabal leader
-        cabal = Cabal.query.filter_by(leader_id=leader_user.chad.id).first()
+        cabal = Cabal.query.filter_by(leader_id=leader_user.id).first()
         
         if not cabal:
             return f"@{username} You are not the Lord of the Shill for any cabal."
@@ -529,13 +541,14 @@ def handle_appoint_officer(tweet_id, username, officer_name, officer_type):
         success, message = cabal.appoint_officer(officer_user.chad.id, role_type)
         
         if success:
+            cabal.invalidate_access()
             officer_title = cabal.get_officer_title(role_type)
             return f"@{username} @{officer_name} has been appointed as {officer_title} of your cabal."
         else:
             return f"@{username} Unable to appoint officer: {message}"
     except Exception as e:
         logger.error(f"Error appointing officer from {username}: {str(e)}")
-        return f"@{username} Sorry, there was an error appointing the officer. Please try again later."
+        raise
 
 def handle_schedule_battle(tweet_id, username, opponent_cabal_name):
     """Handle scheduling a cabal battle"""
@@ -550,7 +563,7 @@ def handle_schedule_battle(tweet_id, username, opponent_cabal_name):
             return f"@{username} You need to create a character first. Tweet CREATE CHARACTER @RollMasterChad to get started."
         
         # Check if user is a cabal leader
-        cabal = Cabal.query.filter_by(leader_id=leader_user.chad.id).first()
+        cabal = Cabal.query.filter_by(leader_id=leader_user.id).first()
         
         if not cabal:
             return f"@{username} You are not the Lord of the Shill for any cabal."
@@ -575,17 +588,15 @@ def handle_schedule_battle(tweet_id, username, opponent_cabal_name):
         
         if success:
             # Get opponent cabal leader for the mention
-            from app.models.chad import Chad
-            opponent_leader = Chad.query.get(opponent_cabal.leader_id)
-            opponent_user = User.query.filter_by(chad_id=opponent_leader.id).first()
-            opponent_username = opponent_user.twitter_handle if opponent_user else "Unknown"
+            opponent_user = User.query.get(opponent_cabal.leader_id)
+            opponent_username = opponent_user.x_username if opponent_user else "Unknown"
             
             return f"@{username} Battle with '{opponent_cabal_name}' scheduled! @{opponent_username} your cabal has been challenged to battle in 24 hours. Members can opt in with JOIN NEXT CABAL BATTLE @RollMasterChad"
         else:
             return f"@{username} Unable to schedule battle: {message}"
     except Exception as e:
         logger.error(f"Error scheduling battle from {username}: {str(e)}")
-        return f"@{username} Sorry, there was an error scheduling the battle. Please try again later."
+        raise
 
 def handle_vote_remove_leader(tweet_id, username):
     """Handle voting to remove a cabal leader"""
@@ -600,13 +611,13 @@ def handle_vote_remove_leader(tweet_id, username):
             return f"@{username} You need to create a character first. Tweet VOTE REMOVE CABAL LEADER @RollMasterChad to get started."
         
         # Check if voter is in a cabal
-        cabal_member = CabalMember.query.filter_by(chad_id=voter_user.chad.id).first()
+        cabal_member = CabalMember.query.filter_by(user_id=voter_user.id, is_active=True).first()
         
         if not cabal_member:
             return f"@{username} You are not a member of any cabal."
         
         # Check if voter is the leader (can't vote against themselves)
-        if cabal_member.cabal.leader_id == voter_user.chad.id:
+        if cabal_member.cabal.leader_id == voter_user.id:
             return f"@{username} You cannot vote to remove yourself as leader."
         
         # Cast the vote
@@ -615,6 +626,7 @@ def handle_vote_remove_leader(tweet_id, username):
         if success:
             # If the message indicates the leader was removed, a new leader was appointed
             if "is now the leader" in message:
+                cabal_member.cabal.invalidate_access()
                 return f"@{username} Your vote was successful! {message}"
             else:
                 # Get current vote count and percentage
@@ -633,7 +645,7 @@ def handle_vote_remove_leader(tweet_id, username):
             return f"@{username} Unable to vote: {message}"
     except Exception as e:
         logger.error(f"Error processing vote from {username}: {str(e)}")
-        return f"@{username} Sorry, there was an error processing your vote. Please try again later."
+        raise
 
 def handle_opt_in_battle(tweet_id, username):
     """Handle opting into a cabal battle"""
@@ -648,16 +660,15 @@ def handle_opt_in_battle(tweet_id, username):
             return f"@{username} You need to create a character first. Tweet JOIN NEXT CABAL BATTLE @RollMasterChad to get started."
         
         # Check if user is in a cabal
-        cabal_member = CabalMember.query.filter_by(chad_id=user.chad.id).first()
+        cabal_member = CabalMember.query.filter_by(user_id=user.id, is_active=True).first()
         
         if not cabal_member:
             return f"@{username} You are not a member of any cabal."
         
-        # Find the next scheduled battle for this cabal
-        next_battle = CabalBattle.query.filter_by(
-            cabal_id=cabal_member.cabal.id,
-            completed=False
-        ).filter(
+        # Find the next scheduled battle for this cabal, whichever side scheduled it
+        next_battle = CabalBattle.query.filter(
+            CabalBattle.involving(cabal_member.cabal_id),
+            CabalBattle.completed == False,
             CabalBattle.scheduled_at > datetime.utcnow()
         ).order_by(CabalBattle.scheduled_at).first()
         
@@ -669,8 +680,7 @@ def handle_opt_in_battle(tweet_id, username):
         
         if success:
             # Get opponent cabal name
-            from app.models.cabal import Cabal
-            opponent_cabal = Cabal.query.get(next_battle.opponent_cabal_id)
+            opponent_cabal = next_battle.opponent_of(cabal_member.cabal_id)
             opponent_name = opponent_cabal.name if opponent_cabal else "Unknown"
             
             battle_time = next_battle.scheduled_at.strftime("%Y-%m-%d %H:%M UTC")
@@ -680,7 +690,7 @@ def handle_opt_in_battle(tweet_id, username):
             return f"@{username} Unable to opt into battle: {message}"
     except Exception as e:
         logger.error(f"Error opting into battle from {username}: {str(e)}")
-        return f"@{username} Sorry, there was an error opting into the battle. Please try again later."
+        raise
 
 def handle_help(tweet_id, username):
     """Provide help information about available commands"""
@@ -691,13 +701,31 @@ def handle_help(tweet_id, username):
             f"• CHECK STATS @RollMasterChad - Check your character's stats\n"
             f"• SHOW MY WAIFUS @RollMasterChad - View your waifu collection\n"
             f"• CHALLENGE @username TO BATTLE @RollMasterChad - Challenge someone to battle (battles are fully automated!)\n"
+            f"• CAN I BEAT @username @RollMasterChad - See your odds before you challenge\n"
+            f"• FIND ME A BATTLE @RollMasterChad - Get matched with a Chad near your rating\n"
             f"• CREATE CABAL name @RollMasterChad - Create a new cabal\n"
             f"• JOIN CABAL name @RollMasterChad - Join an existing cabal\n"
             f"• SHOW MY BALANCE @RollMasterChad - Check your Chadcoin balance\n\n"
             f"For more details, visit our website or check the how-to-play guide!"
         )
-        post_reply(reply, tweet_id)
+        schedule_reply(reply, tweet_id)
         return True
     except Exception as e:
         logger.error(f"Error handling help request from {username}: {str(e)}")
-        return False 
\ No newline at end of file
+        raise
+
+# Command names from command_router.COMMANDS to their handlers
+COMMAND_HANDLERS = {
+    'create_character': handle_create_character,
+    'fight_request': handle_fight_request,
+    'check_stats': handle_check_stats,
+    'join_cabal': handle_join_cabal,
+    'create_cabal': handle_create_cabal,
+    'appoint_officer': handle_appoint_officer,
+    'schedule_battle': handle_schedule_battle,
+    'vote_remove_leader': handle_vote_remove_leader,
+    'opt_in_battle': handle_opt_in_battle,
+    'queue_battle': handle_queue_for_battle,
+    'matchup_odds': handle_matchup_odds,
+    'help': handle_help
+}
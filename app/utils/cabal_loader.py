@@ -0,0 +1,367 @@
+"""
+Batched loaders for cabal pages.
+
+The cabal home page used to look up every officer, the leader, the vote
+tally and the battle schedule one query at a time. load_cabal_page() fetches
+the membership, cabal, leader, officers and vote tally in one joined query
+and the upcoming schedule in a second.
+
+Everything loaded is kept in a per-request identity cache (on flask.g), so
+other cabal routes and helpers called during the same request reuse the
+objects instead of querying for them again.
+
+get_cabal_access() answers "what is this user in this cabal" for the
+permission decorators and the routes they protect from the same cache, and
+can also keep the answer in the session for CABAL_ACCESS_SESSION_TTL seconds.
+"""
+import logging
+import time
+from datetime import datetime
+
+from flask import g, abort, session, current_app, has_request_context
+from sqlalchemy import func, select, and_
+from sqlalchemy.orm import joinedload, contains_eager
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Marker for lookups that were made and found nothing
+_MISSING = object()
+
+def _identity_cache():
+    """Get this request's identity cache."""
+    if 'cabal_identity_cache' not in g:
+        g.cabal_identity_cache = {}
+    return g.cabal_identity_cache
+
+def remember(*objects):
+    """Add loaded model instances to this request's identity cache."""
+    cache = _identity_cache()
+    for obj in objects:
+        if obj is not None:
+            cache[(type(obj).__name__, obj.id)] = obj
+
+def get_cached(model, object_id):
+    """Get a model instance already loaded during this request, or None."""
+    return _identity_cache().get((model.__name__, object_id))
+
+def get_cabal(cabal_id):
+    """
+    Get a cabal, loading it at most once per request.
+
+    Args:
+        cabal_id: Cabal ID (route parameters may pass it as a string)
+
+    Returns:
+        Cabal: The cabal, or None if it does not exist
+    """
+    from app.models.cabal import Cabal
+
+    try:
+        cabal_id = int(cabal_id)
+    except (TypeError, ValueError):
+        return None
+
+    cabal = get_cached(Cabal, cabal_id)
+    if cabal is None:
+        cabal = Cabal.query.get(cabal_id)
+        remember(cabal)
+    return cabal
+
+def get_cabal_or_404(cabal_id):
+    """Get a cabal like get_cabal(), aborting with 404 if it does not exist."""
+    cabal = get_cabal(cabal_id)
+    if cabal is None:
+        abort(404)
+    return cabal
+
+def get_membership(user_id):
+    """
+    Get a user's active cabal membership, loading it at most once per request.
+
+    The cabal's officer roles are loaded with it, so get_cabal_access() can
+    work out the user's role without another query.
+    
+    Returns:
+        CabalMember: The membership (with its cabal loaded), or None
+    """
+    from app.models.cabal import Cabal, CabalMember, CabalOfficerRole
+
+    cache = _identity_cache()
+    key = ('membership', user_id)
+    membership = cache.get(key)
+    if membership is None:
+        membership = CabalMember.query.options(
+            joinedload(CabalMember.cabal).joinedload(Cabal.officer_roles).joinedload(CabalOfficerRole.chad)
+        ).filter_by(user_id=user_id, is_active=True).first()
+        cache[key] = membership if membership is not None else _MISSING
+        if membership is not None:
+            remember(membership, membership.cabal)
+
+    return None if membership is _MISSING else membership
+
+def _build_access(user, cabal_id):
+    """Work out a user's access to a cabal from their (cached) membership."""
+    membership = get_membership(user.id)
+    if membership is None or membership.cabal_id != cabal_id:
+        return None
+    
+    cabal = membership.cabal
+    officer_roles = sorted(
+        role.role_type for role in cabal.officer_roles
+        if role.chad is not None and role.chad.user_id == user.id
+    )
+    
+    if cabal.leader_id == user.id:
+        role = 'leader'
+    elif officer_roles or membership.role == 'officer':
+        role = 'officer'
+    else:
+        role = 'member'
+    
+    return {
+        'cabal_id': cabal_id,
+        'member_id': membership.id,
+        'role': role,
+        'officer_roles': officer_roles
+    }
+
+def _get_session_access(user_id, cabal_id):
+    """
+    Get a user's access to a cabal from the session, if still valid.
+    
+    Returns:
+        tuple: (True, access) on a hit (access may be None for non-members),
+               (False, None) on a miss
+    """
+    entry = session.get('cabal_access')
+    if not entry or entry.get('user_id') != user_id or entry.get('cabal_id') != cabal_id:
+        return False, None
+    
+    from app.utils.cache import get_cabal_access_version
+    
+    if entry.get('expires_at', 0) < time.time() or entry.get('version') != get_cabal_access_version(cabal_id):
+        session.pop('cabal_access', None)
+        return False, None
+    
+    return True, entry.get('access')
+
+def get_cabal_access(user, cabal_id):
+    """
+    Get a user's membership and role in a cabal, looking it up at most once
+    per request.
+    
+    With CABAL_ACCESS_SESSION_TTL set, the answer is also kept in the session
+    for that many seconds, tagged with the cabal's access version so that
+    invalidate_cabal_access() makes it stale straight away.
+    
+    Args:
+        user: The user to check
+        cabal_id: Cabal ID (route parameters may pass it as a string)
+        
+    Returns:
+        dict: {'cabal_id', 'member_id', 'role', 'officer_roles'} where role is
+              'leader', 'officer' or 'member', or None if the user is not an
+              active member of the cabal
+    """
+    try:
+        cabal_id = int(cabal_id)
+    except (TypeError, ValueError):
+        return None
+    
+    cache = _identity_cache()
+    key = ('access', user.id, cabal_id)
+    if key in cache:
+        access = cache[key]
+        return None if access is _MISSING else access
+    
+    ttl = current_app.config.get('CABAL_ACCESS_SESSION_TTL', 0)
+    hit, access = _get_session_access(user.id, cabal_id) if ttl > 0 else (False, None)
+    
+    if not hit:
+        from app.utils.cache import get_cabal_access_version
+        
+        access = _build_access(user, cabal_id)
+        if ttl > 0:
+            session['cabal_access'] = {
+                'user_id': user.id,
+                'cabal_id': cabal_id,
+                'access': access,
+                'version': get_cabal_access_version(cabal_id),
+                'expires_at': time.time() + ttl
+            }
+    
+    cache[key] = access if access is not None else _MISSING
+    return access
+
+def invalidate_cabal_access(cabal_id):
+    """
+    Invalidate every cached membership and role for a cabal.
+    
+    This should be called whenever anyone joins or leaves the cabal, or its
+    leader or officers change. Entries cached in this request are dropped, and
+    the cabal's access version is bumped so copies kept in other sessions are
+    ignored from their next request.
+    
+    If the change is not committed yet, the bump waits for the commit (see
+    register_access_listeners): bumping first would let another request
+    cache the old role again before the new one is visible to it.
+    
+    Args:
+        cabal_id: The ID of the cabal whose roles changed
+    """
+    from app.utils.cache import bump_cabal_access_version
+    
+    try:
+        cabal_id = int(cabal_id)
+    except (TypeError, ValueError):
+        return
+    
+    db_session = db.session()
+    if db_session.new or db_session.dirty or db_session.deleted or db_session.info.get(_UNCOMMITTED_FLUSH):
+        db_session.info.setdefault(_PENDING_ACCESS_BUMPS, set()).add(cabal_id)
+    else:
+        bump_cabal_access_version(cabal_id)
+    
+    if not has_request_context():
+        return
+    
+    # Memberships are keyed by user, so drop them all rather than guess whose changed
+    if 'cabal_identity_cache' in g:
+        for key in list(g.cabal_identity_cache):
+            if key[0] == 'membership' or (key[0] == 'access' and key[2] == cabal_id):
+                del g.cabal_identity_cache[key]
+    
+    entry = session.get('cabal_access')
+    if entry and entry.get('cabal_id') == cabal_id:
+        session.pop('cabal_access', None)
+
+_PENDING_ACCESS_BUMPS = 'cabal_access_bumps'
+_UNCOMMITTED_FLUSH = 'cabal_uncommitted_flush'
+
+def _note_flush(db_session, flush_context):
+    """Remember that the transaction holds flushed, uncommitted writes."""
+    db_session.info[_UNCOMMITTED_FLUSH] = True
+
+def _apply_access_bumps(db_session):
+    """Bump the access versions of cabals whose changes were just committed."""
+    from app.utils.cache import bump_cabal_access_version
+    
+    db_session.info.pop(_UNCOMMITTED_FLUSH, None)
+    for cabal_id in db_session.info.pop(_PENDING_ACCESS_BUMPS, ()):
+        bump_cabal_access_version(cabal_id)
+
+def _discard_access_bumps(db_session, previous_transaction=None):
+    """Drop bumps for changes that were rolled back."""
+    db_session.info.pop(_UNCOMMITTED_FLUSH, None)
+    db_session.info.pop(_PENDING_ACCESS_BUMPS, None)
+
+def register_access_listeners():
+    """Bump cabal access versions only once the changes are committed (idempotent)."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+    
+    for name, listener in (
+        ('after_flush', _note_flush),
+        ('after_commit', _apply_access_bumps),
+        ('after_rollback', _discard_access_bumps)
+    ):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
+
+def load_cabal_page(user):
+    """
+    Load everything the cabal home page shows for a user, in two queries.
+
+    The first query loads the user's membership, the cabal, its leader (and
+    the leader's Chad), every officer with their Chad and user, and the
+    leader-removal vote tally as correlated subqueries. The second loads the
+    upcoming battles on either side, with both cabals, and whether the
+    user's Chad has opted into each one.
+
+    Args:
+        user: The viewing user
+
+    Returns:
+        dict: Template context for cabal/index.html, or None if the user is
+              not in a cabal
+    """
+    from app.models.cabal import Cabal, CabalMember, CabalOfficerRole, CabalVote, CabalBattle, CabalBattleParticipant
+    from app.models.chad import Chad
+    from app.models.user import User
+
+    chad_id = user.chad.id if user.chad else None
+
+    removal_votes = and_(
+        CabalVote.cabal_id == Cabal.id,
+        CabalVote.vote_type == 'remove_leader',
+        CabalVote.target_id == Cabal.leader_id
+    )
+    vote_count = select(func.count(CabalVote.id)).where(removal_votes).correlate(Cabal).scalar_subquery()
+    user_votes = select(func.count(CabalVote.id)).where(
+        removal_votes, CabalVote.voter_id == chad_id
+    ).correlate(Cabal).scalar_subquery()
+
+    row = db.session.query(CabalMember, vote_count, user_votes).join(
+        Cabal, CabalMember.cabal_id == Cabal.id
+    ).options(
+        contains_eager(CabalMember.cabal).joinedload(Cabal.leader).joinedload(User.chad),
+        contains_eager(CabalMember.cabal).joinedload(Cabal.officer_roles)
+            .joinedload(CabalOfficerRole.chad).joinedload(Chad.user)
+    ).filter(
+        CabalMember.user_id == user.id,
+        CabalMember.is_active == True
+    ).first()
+
+    if row is None:
+        _identity_cache()[('membership', user.id)] = _MISSING
+        return None
+
+    membership, leader_removal_votes, user_vote_count = row
+    cabal = membership.cabal
+    leader = cabal.leader.chad if cabal.leader else None
+
+    _identity_cache()[('membership', user.id)] = membership
+    remember(membership, cabal, cabal.leader, leader)
+
+    officers = {}
+    for role in cabal.officer_roles:
+        remember(role, role.chad, role.chad.user if role.chad else None)
+        if role.chad:
+            officers[role.role_type] = {
+                'id': role.chad.id,
+                'name': role.chad.name,
+                'username': role.chad.user.x_username if role.chad.user else 'Unknown',
+                'title': Cabal.get_officer_title(role.role_type)
+            }
+
+    now = datetime.utcnow()
+    battles = db.session.query(CabalBattle, CabalBattleParticipant.id).outerjoin(
+        CabalBattleParticipant,
+        and_(CabalBattleParticipant.battle_id == CabalBattle.id, CabalBattleParticipant.chad_id == chad_id)
+    ).options(
+        joinedload(CabalBattle.cabal), joinedload(CabalBattle.opponent_cabal)
+    ).filter(
+        CabalBattle.involving(cabal.id),
+        CabalBattle.completed == False,
+        CabalBattle.scheduled_at > now
+    ).order_by(CabalBattle.scheduled_at).all()
+
+    upcoming_battles = [battle for battle, _ in battles]
+    remember(*upcoming_battles)
+
+    active_members_count = cabal.get_active_member_count()
+
+    return {
+        'cabal': cabal,
+        'leader': leader,
+        'officers': officers,
+        'leader_removal_votes': leader_removal_votes,
+        'removal_vote_percentage': (leader_removal_votes / active_members_count * 100) if active_members_count > 0 else 0,
+        'upcoming_battles': upcoming_battles,
+        'participating_battle_ids': {battle.id for battle, participant_id in battles if participant_id is not None},
+        'user_voted': user_vote_count > 0,
+        'is_leader': cabal.leader_id == user.id,
+        'now': now
+    }
@@ -0,0 +1,218 @@
+"""
+Cabal war engine for Chad Battles.
+
+A cabal battle is fought by every member who opted in. Both rosters are
+loaded (with their Chads and users) in one query and their total stats in one
+aggregate query. Every participant rolls the usual 60% stats / 40% luck
+formula as one NumPy array, and each side's score is the sum of its rolls.
+All rewards and results are then written in a single transaction, so the
+number of queries does not grow with the size of the rosters.
+"""
+import logging
+from datetime import datetime
+
+import numpy as np
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models.cabal import Cabal, CabalBattle, CabalBattleParticipant
+from app.models.chad import Chad
+from app.utils.battle_resolver import STAT_NAMES, STAT_WEIGHT, LUCK_WEIGHT
+from app.utils.battle_replay import new_battle_seed
+
+logger = logging.getLogger(__name__)
+
+# Reward multipliers on BATTLE_XP_REWARD / CHADCOIN_BATTLE_REWARD
+WINNER_XP_MULTIPLIER = 4
+LOSER_XP_MULTIPLIER = 1
+WINNER_CHADCOIN_MULTIPLIER = 5
+
+# CabalBattle.result of a battle neither cabal showed up for
+NO_CONTEST = 'no_contest'
+
+# CabalBattle.result of a battle abandoned after CABAL_BATTLE_MAX_ATTEMPTS failed resolutions
+FAILED = 'failed'
+DEFAULT_MAX_ATTEMPTS = 3
+
+def load_rosters(battle_id):
+    """
+    Load both rosters of a cabal battle with one query.
+
+    Returns:
+        list: (participant, chad) tuples, with each Chad's user and class loaded
+    """
+    return db.session.query(CabalBattleParticipant, Chad).join(
+        Chad, CabalBattleParticipant.chad_id == Chad.id
+    ).options(
+        joinedload(Chad.user),
+        joinedload(Chad.chad_class)
+    ).filter(
+        CabalBattleParticipant.battle_id == battle_id
+    ).order_by(CabalBattleParticipant.id).all()
+
+def roll_cabal_war(powers, is_home_side, seed):
+    """
+    Roll every participant of a cabal war at once.
+
+    Args:
+        powers: Array of participant battle powers
+        is_home_side: Boolean array, True for the scheduling cabal's members
+        seed: Seed for the luck draws
+
+    Returns:
+        tuple: (rolls array, home score, away score)
+    """
+    powers = np.asarray(powers, dtype=np.float64)
+    is_home_side = np.asarray(is_home_side, dtype=bool)
+
+    luck = np.random.default_rng(seed).random(len(powers))
+    rolls = (powers * STAT_WEIGHT) + (luck * powers * LUCK_WEIGHT)
+
+    return rolls, float(rolls[is_home_side].sum()), float(rolls[~is_home_side].sum())
+
+def resolve_cabal_battle(battle, seed=None):
+    """
+    Fight a scheduled cabal battle and award every participant.
+
+    Args:
+        battle: CabalBattle to resolve
+        seed: Optional seed (a fresh one is stored otherwise)
+
+    A battle neither cabal turned up for is a no contest: it is completed
+    with no winner and neither cabal's record changes.
+
+    Returns:
+        int: ID of the winning cabal, or None for a no contest or on failure
+    """
+    if battle.completed:
+        return battle.winner_id
+
+    try:
+        roster = load_rosters(battle.id)
+        stats = Chad.get_total_stats_bulk([chad.id for _, chad in roster])
+
+        powers = np.array([
+            sum(stats[chad.id][name] for name in STAT_NAMES) if chad.id in stats else 0
+            for _, chad in roster
+        ], dtype=np.float64)
+        is_home_side = np.array([participant.cabal_id == battle.cabal_id for participant, _ in roster], dtype=bool)
+
+        battle.seed = seed if seed is not None else new_battle_seed()
+        rolls, home_score, away_score = roll_cabal_war(powers, is_home_side, battle.seed)
+
+        home_count = int(is_home_side.sum())
+        away_count = len(roster) - home_count
+        if home_count == 0 and away_count == 0:
+            return record_no_contest(battle)
+
+        # A side that didn't show up forfeits; ties go to the defending cabal
+        home_won = home_count > 0 and (away_count == 0 or home_score > away_score)
+
+        winner_id = battle.cabal_id if home_won else battle.opponent_cabal_id
+        loser_id = battle.opponent_cabal_id if home_won else battle.cabal_id
+
+        base_xp = current_app.config.get('BATTLE_XP_REWARD', 25)
+        base_chadcoin = current_app.config.get('CHADCOIN_BATTLE_REWARD', 10)
+
+        for (participant, chad), power, roll in zip(roster, powers, rolls):
+            won = participant.cabal_id == winner_id
+            participant.power = float(power)
+            participant.roll = float(roll)
+            participant.xp_earned = base_xp * (WINNER_XP_MULTIPLIER if won else LOSER_XP_MULTIPLIER)
+            participant.chadcoin_earned = base_chadcoin * WINNER_CHADCOIN_MULTIPLIER if won else 0
+
+            chad.add_xp(participant.xp_earned, commit=False)
+            if participant.chadcoin_earned and chad.user:
+                chad.user.add_chadcoin(participant.chadcoin_earned, commit=False)
+
+        battle.completed = True
+        battle.completed_at = datetime.utcnow()
+        battle.winner_id = winner_id
+        battle.result = 'win' if home_won else 'loss'
+        battle.participant_count = home_count
+        battle.opponent_participant_count = away_count
+        battle.cabal_power = home_score
+        battle.opponent_power = away_score
+        battle.xp_earned = base_xp * (WINNER_XP_MULTIPLIER if home_won else LOSER_XP_MULTIPLIER)
+
+        # Win/loss counters are bumped in the same UPDATE, not read-modify-write
+        Cabal.query.filter(Cabal.id == winner_id).update(
+            {Cabal.victory_count: Cabal.victory_count + 1}, synchronize_session=False
+        )
+        Cabal.query.filter(Cabal.id == loser_id).update(
+            {Cabal.defeat_count: Cabal.defeat_count + 1}, synchronize_session=False
+        )
+
+        db.session.commit()
+
+        logger.info(
+            f"Cabal battle {battle.id}: cabal {winner_id} won "
+            f"({home_score:.1f} vs {away_score:.1f}, {home_count} vs {away_count} members)"
+        )
+        return winner_id
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error resolving cabal battle {battle.id}: {str(e)}")
+        record_failed_attempt(battle, e)
+        return None
+
+def complete_without_winner(battle, result):
+    """Complete a battle with no winner, loser or rewards, without committing."""
+    battle.completed = True
+    battle.completed_at = datetime.utcnow()
+    battle.winner_id = None
+    battle.result = result
+    battle.participant_count = 0
+    battle.opponent_participant_count = 0
+    battle.cabal_power = 0
+    battle.opponent_power = 0
+    battle.xp_earned = 0
+
+def record_no_contest(battle):
+    """Complete a battle nobody opted into, with no winner, loser or rewards."""
+    complete_without_winner(battle, NO_CONTEST)
+    db.session.commit()
+
+    logger.info(f"Cabal battle {battle.id}: no contest (neither cabal showed up)")
+    return None
+
+def record_failed_attempt(battle, error):
+    """
+    Count a failed resolution of a battle.
+
+    Once CABAL_BATTLE_MAX_ATTEMPTS resolutions have failed the battle is
+    completed as FAILED, like a no contest, rather than retried forever.
+    """
+    max_attempts = current_app.config.get('CABAL_BATTLE_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+    try:
+        battle.attempts = (battle.attempts or 0) + 1
+        battle.last_error = str(error)
+        if battle.attempts >= max_attempts:
+            complete_without_winner(battle, FAILED)
+            logger.warning(f"Cabal battle {battle.id}: abandoned after {battle.attempts} failed attempts")
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error recording failed attempt at cabal battle {battle.id}: {str(e)}")
+
+def resolve_due_cabal_battles():
+    """
+    Resolve every cabal battle whose scheduled time has passed.
+
+    Returns:
+        int: Number of battles resolved
+    """
+    due_battles = CabalBattle.query.filter(
+        CabalBattle.completed == False,
+        CabalBattle.scheduled_at <= datetime.utcnow()
+    ).order_by(CabalBattle.scheduled_at).all()
+
+    resolved = sum(
+        1 for battle in due_battles
+        if resolve_cabal_battle(battle) is not None or battle.result == NO_CONTEST
+    )
+    if due_battles:
+        logger.info(f"Resolved {resolved} of {len(due_battles)} due cabal battles")
+    return resolved
@@ -6,6 +6,7 @@ such as cabal leaderboards and user stats.
 """
 
 import logging
+import time
 from functools import wraps
 from datetime import datetime, timedelta
 from flask import current_app
@@ -107,6 +108,8 @@ def invalidate_cabal_cache(cabal_id):
     Args:
         cabal_id: The ID of the cabal to invalidate cache for
     """
+    invalidate_cabal_rankings()
+    
     # Check if caching is enabled
     if not current_app.config.get('ENABLE_CACHING', False):
         return
@@ -124,4 +127,196 @@ def invalidate_cabal_cache(cabal_id):
     
     # Also invalidate the leaderboard cache
     cache.delete('cabal_leaderboard')
-    logger.debug(f"Invalidated cache for cabal {cabal_id} and the leaderboard") 
\ No newline at end of file
+    logger.debug(f"Invalidated cache for cabal {cabal_id} and the leaderboard") 
+# Chad stat snapshots are invalidated explicitly on every change (equip,
+# unequip, level up, elixir) in the shared cache, the timeout only bounds memory
+CHAD_STATS_TIMEOUT = 3600
+
+def chad_stats_cache_key(chad_id):
+    """Get the cache key for a Chad's total stat snapshot."""
+    return f"chad_stats_{chad_id}"
+
+def get_cached_chad_stats(chad_ids):
+    """
+    Get cached total stat snapshots for one or more Chads.
+    
+    Args:
+        chad_ids: List of Chad IDs to look up
+        
+    Returns:
+        dict: Mapping of chad_id to ChadStats for every cache hit
+    """
+    from app.extensions import cache
+    
+    try:
+        snapshots = cache.get_many(*[chad_stats_cache_key(chad_id) for chad_id in chad_ids])
+    except Exception as e:
+        logger.debug(f"Chad stats cache unavailable: {str(e)}")
+        return {}
+    
+    return {
+        chad_id: snapshot
+        for chad_id, snapshot in zip(chad_ids, snapshots)
+        if snapshot is not None
+    }
+
+def cache_chad_stats(snapshots):
+    """
+    Store total stat snapshots for one or more Chads.
+    
+    Args:
+        snapshots (dict): Mapping of chad_id to ChadStats
+    """
+    from app.extensions import cache
+    
+    if not snapshots:
+        return
+    
+    try:
+        cache.set_many(
+            {chad_stats_cache_key(chad_id): snapshot for chad_id, snapshot in snapshots.items()},
+            timeout=CHAD_STATS_TIMEOUT
+        )
+    except Exception as e:
+        logger.debug(f"Chad stats cache unavailable: {str(e)}")
+
+def invalidate_chad_stats(*chad_ids):
+    """
+    Invalidate the total stat snapshots of the given Chads.
+    
+    This should be called whenever anything feeding into a Chad's total
+    stats changes (equipment, level, active elixirs).
+    
+    Args:
+        chad_ids: IDs of the Chads to invalidate (None values are ignored)
+    """
+    from app.extensions import cache
+    
+    keys = [chad_stats_cache_key(chad_id) for chad_id in set(chad_ids) if chad_id is not None]
+    if not keys:
+        return
+    
+    try:
+        cache.delete_many(*keys)
+        logger.debug(f"Invalidated stat snapshots for Chads {chad_ids}")
+    except Exception as e:
+        logger.debug(f"Chad stats cache unavailable: {str(e)}")
+
+# Win probabilities are keyed by the stats that produced them, so they never
+# go stale; the timeout only bounds memory
+WIN_PROBABILITY_TIMEOUT = 86400
+
+def win_probability_cache_key(initiator_power, opponent_power, trials):
+    """Get the cache key for a matchup's estimated win probability."""
+    return f"win_probability_{initiator_power}_{opponent_power}_{trials}"
+
+def get_cached_win_probability(initiator_power, opponent_power, trials):
+    """
+    Get a cached win probability estimate.
+    
+    Returns:
+        float: The cached probability, or None on a cache miss
+    """
+    from app.extensions import cache
+    
+    try:
+        return cache.get(win_probability_cache_key(initiator_power, opponent_power, trials))
+    except Exception as e:
+        logger.debug(f"Win probability cache unavailable: {str(e)}")
+        return None
+
+def cache_win_probability(initiator_power, opponent_power, trials, probability):
+    """Store a win probability estimate."""
+    from app.extensions import cache
+    
+    try:
+        cache.set(
+            win_probability_cache_key(initiator_power, opponent_power, trials),
+            probability,
+            timeout=WIN_PROBABILITY_TIMEOUT
+        )
+    except Exception as e:
+        logger.debug(f"Win probability cache unavailable: {str(e)}")
+
+# The cabal ranking is invalidated on every membership or power change in the
+# shared cache, the timeout only bounds memory
+CABAL_RANKINGS_TIMEOUT = 300
+CABAL_RANKINGS_CACHE_KEY = 'cabal_rankings'
+
+def get_cached_cabal_rankings():
+    """
+    Get the cached cabal ranking.
+    
+    Returns:
+        dict: {'ranking': [...], 'ranks': {cabal_id: rank}}, or None on a cache miss
+    """
+    from app.extensions import cache
+    
+    try:
+        return cache.get(CABAL_RANKINGS_CACHE_KEY)
+    except Exception as e:
+        logger.debug(f"Cabal rankings cache unavailable: {str(e)}")
+        return None
+
+def cache_cabal_rankings(rankings):
+    """Store the cabal ranking produced by Cabal.get_cabal_rankings()."""
+    from app.extensions import cache
+    
+    try:
+        cache.set(CABAL_RANKINGS_CACHE_KEY, rankings, timeout=CABAL_RANKINGS_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"Cabal rankings cache unavailable: {str(e)}")
+
+def invalidate_cabal_rankings():
+    """
+    Invalidate the cached cabal ranking.
+    
+    This should be called whenever a cabal's membership or any member's
+    power contribution changes.
+    """
+    from app.extensions import cache
+    
+    try:
+        cache.delete(CABAL_RANKINGS_CACHE_KEY)
+        logger.debug("Invalidated cabal rankings")
+    except Exception as e:
+        logger.debug(f"Cabal rankings cache unavailable: {str(e)}")
+
+# Session-cached cabal access records carry the version of their cabal's
+# roles; bumping it in the shared cache makes every copy stale, in every
+# process, without touching any session
+CABAL_ACCESS_VERSION_TIMEOUT = 86400
+
+def cabal_access_version_key(cabal_id):
+    """Get the cache key for the version of a cabal's memberships and roles."""
+    return f"cabal_access_version_{cabal_id}"
+
+def get_cabal_access_version(cabal_id):
+    """
+    Get the current version of a cabal's memberships and roles.
+    
+    Returns:
+        int: The version, or None if it has never been bumped (or was evicted)
+    """
+    from app.extensions import cache
+    
+    try:
+        return cache.get(cabal_access_version_key(cabal_id))
+    except Exception as e:
+        logger.debug(f"Cabal access cache unavailable: {str(e)}")
+        return None
+
+def bump_cabal_access_version(cabal_id):
+    """
+    Bump the version of a cabal's memberships and roles.
+    
+    This should be called whenever anyone joins or leaves the cabal, or its
+    leader or officers change.
+    """
+    from app.extensions import cache
+    
+    try:
+        cache.set(cabal_access_version_key(cabal_id), time.time_ns(), timeout=CABAL_ACCESS_VERSION_TIMEOUT)
+        logger.debug(f"Bumped access version for cabal {cabal_id}")
+    except Exception as e:
+        logger.debug(f"Cabal access cache unavailable: {str(e)}")
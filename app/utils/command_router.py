@@ -0,0 +1,168 @@
+"""
+Single-pass command router for bot mentions.
+
+A mention is tokenized once into words, @mentions and punctuation. Each
+command is a sequence of steps starting with a keyword; the keyword table
+maps the first keyword of every command to the commands it can start, so
+the token stream is walked once and only commands whose first keyword
+appears are tried. When a tweet contains several commands, the one listed
+first in COMMANDS wins, as with the old chain of patterns.
+
+Keywords match whole words only, so "HELP" no longer matches "helpful" or
+"@chadhelper".
+"""
+
+import re
+from collections import namedtuple
+
+# Words, @mentions, and any other character on its own (punctuation ends cabal names)
+TOKEN_PATTERN = re.compile(r'@?\w+|[^\w\s]', re.ASCII)
+
+Token = namedtuple('Token', ['text', 'upper', 'start', 'end'])
+
+def tokenize(text):
+    """
+    Split a tweet into tokens.
+
+    Returns:
+        list: Tokens with their upper-cased text and position in the tweet
+    """
+    return [
+        Token(match.group(), match.group().upper(), match.start(), match.end())
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+
+def _is_word(token):
+    return token.upper[0].isalnum() or token.upper[0] == '_'
+
+def _is_mention(token):
+    return token.text[0] == '@' and len(token.text) > 1
+
+# Steps a command is built from. Each takes (tokens, index, text, args) and
+# returns the index after the step, or None if it does not match there.
+
+def _keyword(*words):
+    """Match one token against any of the given words."""
+    words = frozenset(words)
+
+    def step(tokens, index, text, args):
+        if index < len(tokens) and tokens[index].upper in words:
+            return index + 1
+        return None
+    step.keywords = words
+    return step
+
+def _optional(word):
+    """Match the word if it is there."""
+    def step(tokens, index, text, args):
+        if index < len(tokens) and tokens[index].upper == word:
+            return index + 1
+        return index
+    return step
+
+def _mention(name):
+    """Capture an @mention (without the @) as args[name]."""
+    def step(tokens, index, text, args):
+        if index < len(tokens) and _is_mention(tokens[index]):
+            args[name] = tokens[index].text[1:]
+            return index + 1
+        return None
+    return step
+
+def _choice(name, *words):
+    """Capture one of the given words, lower-cased, as args[name]."""
+    words = frozenset(words)
+
+    def step(tokens, index, text, args):
+        if index < len(tokens) and tokens[index].upper in words:
+            args[name] = tokens[index].upper.lower()
+            return index + 1
+        return None
+    return step
+
+def _name(name):
+    """Capture a run of words (a cabal name, as typed) as args[name]."""
+    def step(tokens, index, text, args):
+        end = index
+        while end < len(tokens) and _is_word(tokens[end]):
+            end += 1
+        if end == index:
+            return None
+        args[name] = text[tokens[index].start:tokens[end - 1].end]
+        return end
+    return step
+
+def _mention_before(name):
+    """Capture the last @mention before the command's first keyword as args[name]."""
+    def step(tokens, index, text, args):
+        args[name] = args.pop('_last_mention', None)
+        return index if args[name] else None
+    return step
+
+# (command, steps) in precedence order; the first step must be a _keyword
+COMMANDS = [
+    ('create_character', [_keyword('CREATE'), _keyword('CHARACTER')]),
+    ('fight_request', [_keyword('CHALLENGE'), _keyword('TO'), _keyword('BATTLE'), _mention_before('opponent_name')]),
+    ('check_stats', [_keyword('CHECK'), _keyword('STATS')]),
+    ('join_cabal', [_keyword('JOIN'), _keyword('CABAL'), _name('cabal_name')]),
+    ('create_cabal', [_keyword('CREATE'), _keyword('CABAL'), _name('cabal_name')]),
+    ('appoint_officer', [
+        _keyword('APPOINT'), _mention('officer_name'), _keyword('AS'),
+        _choice('officer_type', 'CLOUT', 'ROAST', 'CRINGE', 'DRIP'), _keyword('OFFICER')
+    ]),
+    ('schedule_battle', [_keyword('BATTLE'), _keyword('CABAL'), _name('opponent_cabal_name')]),
+    ('vote_remove_leader', [_keyword('VOTE'), _keyword('REMOVE'), _keyword('CABAL'), _keyword('LEADER')]),
+    ('opt_in_battle', [_keyword('JOIN'), _keyword('NEXT'), _keyword('CABAL'), _keyword('BATTLE')]),
+    ('queue_battle', [_keyword('FIND'), _optional('ME'), _keyword('A'), _keyword('BATTLE', 'MATCH')]),
+    ('matchup_odds', [_keyword('CAN'), _keyword('I'), _keyword('BEAT'), _mention('opponent_name')]),
+    ('help', [_keyword('HELP')]),
+]
+
+def _build_keyword_table(commands):
+    """Map each first keyword to the (precedence, command, steps) it can start."""
+    table = {}
+    for precedence, (command, steps) in enumerate(commands):
+        for word in steps[0].keywords:
+            table.setdefault(word, []).append((precedence, command, steps[1:]))
+    return table
+
+KEYWORD_TABLE = _build_keyword_table(COMMANDS)
+
+def parse_command(text):
+    """
+    Find the command in a mention and parse its arguments.
+
+    Args:
+        text (str): The tweet text
+
+    Returns:
+        tuple: (command, args) where args are the handler's keyword arguments,
+               or (None, {}) if the tweet holds no command
+    """
+    tokens = tokenize(text)
+    best = None
+    last_mention = None
+
+    for index, token in enumerate(tokens):
+        candidates = KEYWORD_TABLE.get(token.upper)
+        if candidates:
+            for precedence, command, steps in candidates:
+                if best is not None and precedence >= best[0]:
+                    continue
+                args = {'_last_mention': last_mention}
+                position = index + 1
+                for step in steps:
+                    position = step(tokens, position, text, args)
+                    if position is None:
+                        break
+                if position is not None:
+                    args.pop('_last_mention', None)
+                    best = (precedence, command, args)
+            if best is not None and best[0] == 0:
+                break
+        elif _is_mention(token):
+            last_mention = token.text[1:]
+
+    if best is None:
+        return None, {}
+    return best[1], best[2]
@@ -0,0 +1,83 @@
+"""
+Time series downsampling for charts.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the first and last points and,
+from each bucket in between, the point forming the largest triangle with the
+previously kept point and the average of the next bucket. Peaks, dips and
+trend changes survive, so a chart drawn from a few hundred points looks like
+one drawn from every point.
+"""
+import numpy as np
+
+# Fewest points LTTB can return (first, one bucket, last)
+MIN_POINTS = 3
+
+def lttb_indices(x, y, points):
+    """
+    Pick the indices of the points to keep with LTTB.
+
+    Args:
+        x: Sorted x values (e.g. timestamps as seconds)
+        y: y values, same length as x
+        points: Number of points wanted
+
+    Returns:
+        numpy.ndarray: Sorted indices into x/y; every index if no
+                       downsampling is needed
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = len(x)
+
+    if points >= count or points < MIN_POINTS:
+        return np.arange(count)
+
+    # points - 2 buckets spread over every point except the first and last
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+
+    previous = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # Average of the next bucket (the last point for the final bucket)
+        if bucket == points - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_end = edges[bucket + 2]
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+def downsample_series(timestamps, series, points, key):
+    """
+    Downsample several aligned series, picking points by one of them.
+
+    Args:
+        timestamps: Sorted datetimes shared by every series
+        series (dict): Mapping of name to list of values
+        points: Number of points wanted
+        key: Name of the series whose shape decides which points are kept
+
+    Returns:
+        tuple: (timestamps, series) with the same points kept in every series
+    """
+    x = [timestamp.timestamp() for timestamp in timestamps]
+    indices = lttb_indices(x, series[key], points)
+    if len(indices) == len(timestamps):
+        return timestamps, series
+
+    return (
+        [timestamps[index] for index in indices],
+        {name: [values[index] for index in indices] for name, values in series.items()}
+    )
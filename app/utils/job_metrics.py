@@ -0,0 +1,88 @@
+"""
+Run metrics for scheduled jobs.
+
+track_job() times a job run, collects whatever counters the job reports and
+records them as one structured log line. The last run of each job is also
+kept in the cache, so it can be checked without reading the logs.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Kept long enough to cover the least frequent (weekly) jobs
+JOB_METRICS_TIMEOUT = 8 * 86400
+
+def job_metrics_cache_key(job_name):
+    """Get the cache key for a job's last run metrics."""
+    return f"job_metrics_{job_name}"
+
+def record_job_metric(job_name, status, duration, counters=None):
+    """
+    Record the metrics of one job run.
+
+    Args:
+        job_name (str): Name of the job
+        status (str): 'ok' or 'error'
+        duration (float): Run time in seconds
+        counters (dict): Job-specific counts (items processed, posts sent...)
+
+    Returns:
+        dict: The recorded metric
+    """
+    from app.extensions import cache
+
+    metric = {
+        'job': job_name,
+        'status': status,
+        'duration_ms': round(duration * 1000, 1),
+        'finished_at': datetime.utcnow().isoformat(),
+        **(counters or {})
+    }
+
+    logger.info("job_metric " + " ".join(f"{key}={value}" for key, value in metric.items()))
+
+    try:
+        cache.set(job_metrics_cache_key(job_name), metric, timeout=JOB_METRICS_TIMEOUT)
+    except Exception as e:
+        logger.debug(f"Job metrics cache unavailable: {str(e)}")
+
+    return metric
+
+def get_job_metric(job_name):
+    """
+    Get the metrics of a job's last recorded run.
+
+    Returns:
+        dict: The metric, or None if the job has not run (or it was evicted)
+    """
+    from app.extensions import cache
+
+    try:
+        return cache.get(job_metrics_cache_key(job_name))
+    except Exception as e:
+        logger.debug(f"Job metrics cache unavailable: {str(e)}")
+        return None
+
+@contextmanager
+def track_job(job_name):
+    """
+    Time a job run and record it with record_job_metric().
+
+    The job adds its counters to the yielded dict. A run that raises is
+    recorded with status 'error' and the exception is re-raised.
+
+    Args:
+        job_name (str): Name of the job
+    """
+    counters = {}
+    started = time.perf_counter()
+    try:
+        yield counters
+    except Exception:
+        record_job_metric(job_name, 'error', time.perf_counter() - started, counters)
+        raise
+    record_job_metric(job_name, 'ok', time.perf_counter() - started, counters)
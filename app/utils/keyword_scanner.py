@@ -0,0 +1,102 @@
+"""
+Single-pass keyword scanning for tweet analysis.
+
+KeywordScanner is built once, at import, from every keyword the analysis
+uses: the stat keywords analyze_tweets reports and the class keywords
+determine_chad_class scores. Scanning a tweet tokenizes it once and looks
+each word up in a set, so the cost does not grow with the number of
+keywords. Keywords match whole words only ('gm' does not match 'gmail'); a
+multi-word keyword such as 'diamond hands' matches those words in a row.
+
+Tweet timestamps are only needed for a few comparisons, so they are kept as
+sortable keys (see timestamp_key) and parsed into datetimes on demand.
+"""
+
+import re
+from datetime import datetime
+
+WORD_PATTERN = re.compile(r'[a-z0-9_]+')
+
+KEY_FORMAT = '%Y%m%d %H:%M:%S'
+
+MONTHS = {
+    'Jan': '01', 'Feb': '02', 'Mar': '03', 'Apr': '04', 'May': '05', 'Jun': '06',
+    'Jul': '07', 'Aug': '08', 'Sep': '09', 'Oct': '10', 'Nov': '11', 'Dec': '12'
+}
+
+class KeywordScanner:
+    """Finds which of a fixed set of keywords appear in a text, in one pass."""
+
+    def __init__(self, keywords):
+        """
+        Args:
+            keywords: Lower-case keywords; ones with spaces are matched as phrases
+        """
+        self.words = frozenset(keyword for keyword in keywords if ' ' not in keyword)
+        # First word of a phrase -> (phrase, its remaining words)
+        self.phrases = {}
+        for keyword in keywords:
+            if ' ' in keyword:
+                first, *rest = keyword.split()
+                self.phrases.setdefault(first, []).append((keyword, tuple(rest)))
+        self._phrase_starts = frozenset(self.phrases)
+
+    def scan(self, text):
+        """
+        Get the keywords present in a text.
+
+        Args:
+            text (str): The text, in any case
+
+        Returns:
+            set: Keywords found (each once, however often it appears)
+        """
+        tokens = WORD_PATTERN.findall(text.lower())
+        found = set(self.words.intersection(tokens))
+
+        if self._phrase_starts.intersection(tokens):
+            for index, token in enumerate(tokens):
+                for phrase, rest in self.phrases.get(token, ()):
+                    if tuple(tokens[index + 1:index + 1 + len(rest)]) == rest:
+                        found.add(phrase)
+        return found
+
+    def count(self, texts):
+        """
+        Count the texts each keyword appears in.
+
+        Args:
+            texts: Iterable of texts
+
+        Returns:
+            dict: Keyword to the number of texts containing it (absent keywords omitted)
+        """
+        counts = {}
+        for text in texts:
+            for keyword in self.scan(text):
+                counts[keyword] = counts.get(keyword, 0) + 1
+        return counts
+
+def timestamp_key(created_at):
+    """
+    Get a key that sorts Twitter created_at strings chronologically, without parsing them.
+
+    'Wed Oct 10 20:19:24 +0000 2018' -> '20181010 20:19:24'
+
+    Returns:
+        str: The key, or None if created_at is not in Twitter's format
+    """
+    if not created_at or len(created_at) != 30:
+        return None
+    month = MONTHS.get(created_at[4:7])
+    if month is None:
+        return None
+    return f"{created_at[26:30]}{month}{created_at[8:10]} {created_at[11:19]}"
+
+def key_for_datetime(moment):
+    """Get the timestamp_key of a datetime, to compare keys against it."""
+    return moment.strftime(KEY_FORMAT)
+
+def datetime_for_key(key):
+    """Parse a timestamp_key into a datetime."""
+    return datetime.strptime(key, KEY_FORMAT)
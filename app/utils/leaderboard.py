@@ -0,0 +1,506 @@
+"""
+In-memory leaderboards for Chad Battles.
+
+Rankings are served from a RankIndex: a Fenwick tree of member counts per
+score value plus the members holding each value. Rank lookups and "who is at
+rank r" are O(log V) and a top-N read is O(N log V), independent of how much
+history produced the scores. Indexes are rebuilt from persisted counters on
+first use (and periodically, to pick up writes from other processes) and are
+updated in place whenever a counter changes in this process.
+"""
+import bisect
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Battle leaderboard score: every battle counts, wins count triple
+WIN_SCORE = 15
+LOSS_SCORE = 5
+
+# Seconds before an index is rebuilt to pick up other processes' writes
+LEADERBOARD_REBUILD_SECONDS = 300
+
+# Chad ranking metrics: metric -> (score column, tie-break column or None).
+# Higher values rank first; a higher tie-break wins a tied score.
+CHAD_RANK_METRICS = {
+    'clout': ('clout', None),
+    'level': ('level', 'xp'),
+    'rating': ('rating', None)
+}
+
+# Default number of Chads shown either side of a Chad's own rank
+RANK_NEIGHBOURS = 5
+
+class RankIndex:
+    """
+    Order-statistics index over non-negative integer scores.
+
+    Higher scores rank first; ties are ordered by a higher tie-break value,
+    then by member (e.g. Chad ID).
+    """
+
+    def __init__(self, size=1024):
+        self._size = size
+        self._tree = [0] * (size + 1)
+        self._values = {}
+        self._keys = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, member):
+        return member in self._values
+
+    def get(self, member):
+        """Get a member's score, or None if it is not ranked."""
+        return self._values.get(member)
+
+    def update(self, member, value, tiebreak=0):
+        """Set a member's score (and tie-break), inserting it if needed."""
+        value = max(0, int(value))
+        key = (-int(tiebreak or 0), member)
+        if self._values.get(member) == value and self._keys[member] == key:
+            return
+
+        self.remove(member)
+        if value >= self._size:
+            self._grow(value)
+
+        self._values[member] = value
+        self._keys[member] = key
+        bisect.insort(self._buckets.setdefault(value, []), key)
+        self._add(value, 1)
+
+    def remove(self, member):
+        """Remove a member. Returns True if it was ranked."""
+        value = self._values.pop(member, None)
+        if value is None:
+            return False
+
+        bucket = self._buckets[value]
+        del bucket[bisect.bisect_left(bucket, self._keys.pop(member))]
+        if not bucket:
+            del self._buckets[value]
+        self._add(value, -1)
+        return True
+
+    def clear(self):
+        """Remove every member."""
+        self._tree = [0] * (self._size + 1)
+        self._values.clear()
+        self._keys.clear()
+        self._buckets.clear()
+
+    def rank(self, member):
+        """Get a member's 1-based rank, or None if it is not ranked."""
+        value = self._values.get(member)
+        if value is None:
+            return None
+
+        higher = len(self._values) - self._prefix(value)
+        return higher + bisect.bisect_left(self._buckets[value], self._keys[member]) + 1
+
+    def shared_rank(self, member):
+        """
+        Get a member's 1-based competition rank, or None if it is not ranked.
+
+        Members with the same score and tie-break share a rank (1, 2, 2, 4),
+        one more than the number ranked strictly ahead of them.
+        """
+        value = self._values.get(member)
+        if value is None:
+            return None
+
+        higher = len(self._values) - self._prefix(value)
+        return higher + bisect.bisect_left(self._buckets[value], (self._keys[member][0],)) + 1
+
+    def at_rank(self, rank):
+        """Get the (member, score) at a 1-based rank, or None if out of range."""
+        total = len(self._values)
+        if rank < 1 or rank > total:
+            return None
+
+        # The rank-th highest is the (total - rank + 1)-th lowest
+        value = self._find_kth_lowest(total - rank + 1)
+        higher = total - self._prefix(value)
+        return self._buckets[value][rank - higher - 1][1], value
+
+    def top(self, limit):
+        """Get the first `limit` (member, score) pairs, best first."""
+        return [self.at_rank(rank) for rank in range(1, min(limit, len(self._values)) + 1)]
+
+    def around(self, member, radius=RANK_NEIGHBOURS):
+        """
+        Get the members ranked within `radius` places of a member.
+
+        Returns:
+            list: (rank, member, score) tuples, best first, including the
+                  member itself; empty if the member is not ranked
+        """
+        rank = self.rank(member)
+        if rank is None:
+            return []
+
+        first = max(1, rank - radius)
+        last = min(len(self._values), rank + radius)
+        return [(position,) + self.at_rank(position) for position in range(first, last + 1)]
+
+    def _add(self, value, delta):
+        index = value + 1
+        while index <= self._size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def _prefix(self, value):
+        """Count members with a score <= value."""
+        count = 0
+        index = min(value + 1, self._size)
+        while index > 0:
+            count += self._tree[index]
+            index -= index & -index
+        return count
+
+    def _find_kth_lowest(self, k):
+        """Get the score of the k-th lowest member (1-based)."""
+        position = 0
+        step = 1 << (self._size.bit_length() - 1)
+        while step:
+            if position + step <= self._size and self._tree[position + step] < k:
+                position += step
+                k -= self._tree[position]
+            step >>= 1
+        return position
+
+    def _grow(self, value):
+        """Resize the tree so it covers value, rebuilding it in O(V)."""
+        size = self._size
+        while size <= value:
+            size *= 2
+
+        tree = [0] * (size + 1)
+        for member_value, bucket in self._buckets.items():
+            tree[member_value + 1] += len(bucket)
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+
+        self._size = size
+        self._tree = tree
+
+class RebuildingLeaderboard(ABC):
+    """
+    Base for leaderboards mirrored in memory from persisted counters.
+
+    The index is built from the database on first read and rebuilt once it is
+    older than `rebuild_seconds`, so writes made by other processes show up
+    without every read querying the database.
+    """
+
+    def __init__(self, rebuild_seconds=LEADERBOARD_REBUILD_SECONDS, clock=time.monotonic):
+        self._built_at = None
+        self._rebuild_seconds = rebuild_seconds
+        self._clock = clock
+        self._lock = threading.RLock()
+
+    def invalidate(self):
+        """Force a rebuild on the next read (e.g. after a rollback)."""
+        with self._lock:
+            self._built_at = None
+
+    @abstractmethod
+    def rebuild(self):
+        """Rebuild the index from the database, then set `_built_at`."""
+
+    def _ensure_fresh(self):
+        if self._built_at is None or self._clock() - self._built_at > self._rebuild_seconds:
+            self.rebuild()
+
+class BattleLeaderboard(RebuildingLeaderboard):
+    """
+    Battle leaderboard kept in memory from the per-Chad battle counters.
+
+    The counters (Chad.battles_won, battles_lost, battle_score) are bumped
+    whenever a battle completes; this index mirrors them so reads never
+    aggregate battle history.
+    """
+
+    def __init__(self, rebuild_seconds=LEADERBOARD_REBUILD_SECONDS, clock=time.monotonic):
+        super().__init__(rebuild_seconds, clock)
+        self._index = RankIndex()
+        self._entries = {}
+
+    def rebuild(self):
+        """Rebuild the index from the persisted counters with one query."""
+        from app.extensions import db
+        from app.models.chad import Chad, ChadClass
+
+        rows = db.session.query(
+            Chad.id, Chad.name, ChadClass.name, Chad.battles_won, Chad.battles_lost, Chad.battle_score
+        ).outerjoin(
+            ChadClass, Chad.class_id == ChadClass.id
+        ).filter(
+            Chad.battle_score > 0
+        ).all()
+
+        with self._lock:
+            self._index.clear()
+            self._entries.clear()
+            for chad_id, name, class_name, wins, losses, score in rows:
+                self._set(chad_id, name, class_name, wins or 0, losses or 0, score or 0)
+            self._built_at = self._clock()
+
+        logger.info(f"Rebuilt battle leaderboard with {len(rows)} Chads")
+
+    def record(self, chad):
+        """Mirror a Chad's current battle counters into the index."""
+        with self._lock:
+            if self._built_at is None:
+                return
+            class_name = chad.chad_class.name if getattr(chad, 'chad_class', None) else None
+            self._set(chad.id, chad.name, class_name, chad.battles_won or 0, chad.battles_lost or 0, chad.battle_score or 0)
+
+    def top(self, limit=10):
+        """
+        Get the top Chads by battle score.
+
+        Returns:
+            list: Dictionaries with chad info and battle stats, best first
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return [dict(self._entries[chad_id]) for chad_id, _ in self._index.top(limit)]
+
+    def rank(self, chad_id):
+        """Get a Chad's battle leaderboard rank, or None if unranked."""
+        with self._lock:
+            self._ensure_fresh()
+            return self._index.rank(chad_id)
+
+    def around(self, chad_id, radius=RANK_NEIGHBOURS):
+        """
+        Get the Chads ranked within `radius` places of a Chad by battle score.
+
+        Returns:
+            list: Entry dictionaries with a 'rank' key, best first
+        """
+        with self._lock:
+            self._ensure_fresh()
+            return [
+                dict(self._entries[member], rank=rank)
+                for rank, member, _ in self._index.around(chad_id, radius)
+            ]
+
+    def _set(self, chad_id, name, class_name, wins, losses, score):
+        battles = wins + losses
+        self._entries[chad_id] = {
+            'chad_id': chad_id,
+            'chad_name': name,
+            'class_name': class_name,
+            'wins': wins,
+            'battles': battles,
+            'win_rate': wins / battles if battles else 0,
+            'score': score
+        }
+        self._index.update(chad_id, score)
+
+class ChadRankings(RebuildingLeaderboard):
+    """
+    Rank indexes over Chad stat columns, one per metric in CHAD_RANK_METRICS.
+
+    Committed changes to those columns are applied in place by the session
+    listeners installed with register_rank_listeners(), so "what is my rank"
+    and "who is around me" never count rows in the database.
+
+    Ranks are competition ranks: Chads tied on a metric (score and
+    tie-break) share a rank, as the old "count of Chads ahead + 1" did.
+    """
+
+    def __init__(self, metrics=None, rebuild_seconds=LEADERBOARD_REBUILD_SECONDS, clock=time.monotonic):
+        super().__init__(rebuild_seconds, clock)
+        self.metrics = dict(metrics or CHAD_RANK_METRICS)
+        self._indexes = {metric: RankIndex() for metric in self.metrics}
+        self._names = {}
+
+    @property
+    def columns(self):
+        """Names of every Chad column the rankings depend on."""
+        return {column for pair in self.metrics.values() for column in pair if column}
+
+    def rebuild(self):
+        """Rebuild every metric's index with one query."""
+        from app.extensions import db
+        from app.models.chad import Chad
+
+        columns = sorted(self.columns)
+        rows = db.session.query(Chad.id, Chad.name, *[getattr(Chad, column) for column in columns]).all()
+
+        with self._lock:
+            for index in self._indexes.values():
+                index.clear()
+            self._names.clear()
+            for chad_id, name, *values in rows:
+                self._set(chad_id, name, dict(zip(columns, values)))
+            self._built_at = self._clock()
+
+        logger.info(f"Rebuilt Chad rankings ({', '.join(self.metrics)}) with {len(rows)} Chads")
+
+    def apply(self, updates, removed=()):
+        """
+        Apply committed Chad changes.
+
+        Args:
+            updates: Mapping of chad_id to (name, {column: value})
+            removed: IDs of deleted Chads
+        """
+        with self._lock:
+            if self._built_at is None:
+                return
+            for chad_id, (name, values) in updates.items():
+                self._set(chad_id, name, values)
+            for chad_id in removed:
+                self._names.pop(chad_id, None)
+                for index in self._indexes.values():
+                    index.remove(chad_id)
+
+    def top(self, metric, limit=10):
+        """
+        Get the top Chads for a metric.
+
+        Returns:
+            list: {'rank', 'chad_id', 'chad_name', 'score'} dictionaries, best first
+        """
+        index = self._get_index(metric)
+        with self._lock:
+            self._ensure_fresh()
+            return [self._describe(index.shared_rank(chad_id), chad_id, score) for chad_id, score in index.top(limit)]
+
+    def rank(self, metric, chad_id):
+        """Get a Chad's 1-based rank for a metric (shared with tied Chads), or None if unranked."""
+        index = self._get_index(metric)
+        with self._lock:
+            self._ensure_fresh()
+            return index.shared_rank(chad_id)
+
+    def around(self, metric, chad_id, radius=RANK_NEIGHBOURS):
+        """
+        Get the Chads ranked within `radius` places of a Chad for a metric.
+
+        Returns:
+            list: {'rank', 'chad_id', 'chad_name', 'score'} dictionaries, best first
+        """
+        index = self._get_index(metric)
+        with self._lock:
+            self._ensure_fresh()
+            return [
+                self._describe(index.shared_rank(member), member, score)
+                for _, member, score in index.around(chad_id, radius)
+            ]
+
+    def _get_index(self, metric):
+        index = self._indexes.get(metric)
+        if index is None:
+            raise ValueError(f"Unknown ranking metric: {metric}")
+        return index
+
+    def _describe(self, rank, chad_id, score):
+        return {'rank': rank, 'chad_id': chad_id, 'chad_name': self._names.get(chad_id), 'score': score}
+
+    def _set(self, chad_id, name, values):
+        self._names[chad_id] = name
+        for metric, (column, tiebreak) in self.metrics.items():
+            self._indexes[metric].update(chad_id, values.get(column) or 0, values.get(tiebreak) if tiebreak else 0)
+
+# Process-wide leaderboards
+battle_leaderboard = BattleLeaderboard()
+chad_rankings = ChadRankings()
+
+def get_chad_rank(metric, chad_id, radius=RANK_NEIGHBOURS):
+    """
+    Get a Chad's rank and neighbours for any exposed ranking metric.
+
+    Args:
+        metric: 'battle' or a key of CHAD_RANK_METRICS
+        chad_id: ID of the Chad
+        radius: Number of Chads to include either side
+
+    Returns:
+        dict: {'metric', 'rank', 'around'}; rank is None if the Chad is unranked
+    """
+    if metric == 'battle':
+        return {
+            'metric': metric,
+            'rank': battle_leaderboard.rank(chad_id),
+            'around': battle_leaderboard.around(chad_id, radius)
+        }
+
+    return {
+        'metric': metric,
+        'rank': chad_rankings.rank(metric, chad_id),
+        'around': chad_rankings.around(metric, chad_id, radius)
+    }
+
+def record_battle_result(winner, loser):
+    """
+    Bump the winner's and loser's battle counters, without committing.
+
+    Either side may be None (e.g. an NPC opponent).
+    """
+    if winner is not None:
+        winner.battles_won = (winner.battles_won or 0) + 1
+        winner.battle_score = (winner.battle_score or 0) + WIN_SCORE
+        battle_leaderboard.record(winner)
+
+    if loser is not None:
+        loser.battles_lost = (loser.battles_lost or 0) + 1
+        loser.battle_score = (loser.battle_score or 0) + LOSS_SCORE
+        battle_leaderboard.record(loser)
+
+_PENDING_RANK_UPDATES = 'chad_rank_updates'
+
+def _collect_rank_changes(session, flush_context):
+    """Remember Chads whose ranked columns changed in this flush."""
+    from app.models.chad import Chad
+
+    columns = chad_rankings.columns
+    updates, removed = session.info.setdefault(_PENDING_RANK_UPDATES, ({}, set()))
+
+    for chad in session.new | session.dirty:
+        if not isinstance(chad, Chad) or chad.id is None:
+            continue
+        state = inspect(chad)
+        if chad in session.new or any(state.attrs[column].history.has_changes() for column in columns):
+            updates[chad.id] = (chad.name, {column: getattr(chad, column) for column in columns})
+            removed.discard(chad.id)
+
+    for chad in session.deleted:
+        if isinstance(chad, Chad):
+            updates.pop(chad.id, None)
+            removed.add(chad.id)
+
+def _apply_rank_changes(session):
+    """Apply the collected changes once they are committed."""
+    pending = session.info.pop(_PENDING_RANK_UPDATES, None)
+    if pending:
+        chad_rankings.apply(*pending)
+
+def _discard_rank_changes(session, previous_transaction=None):
+    """Drop collected changes that were rolled back."""
+    session.info.pop(_PENDING_RANK_UPDATES, None)
+
+def register_rank_listeners():
+    """Keep chad_rankings in sync with committed Chad changes (idempotent)."""
+    for name, listener in (
+        ('after_flush', _collect_rank_changes),
+        ('after_commit', _apply_rank_changes),
+        ('after_rollback', _discard_rank_changes)
+    ):
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
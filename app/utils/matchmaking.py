@@ -0,0 +1,294 @@
+"""
+Rating-indexed matchmaking queue for Chad Battles.
+
+Chads that opt in wait in the matchmaking_queue table, indexed by rating, so
+every bot process matches against the same queue and a restart loses no one.
+A new entrant is matched against its nearest neighbours either side of its
+rating (two indexed lookups), so the Chad table is never scanned for
+opponents. Tolerance bands widen the longer a Chad waits, and matched pairs
+are claimed under a lease and handed to the battle resolver in batches; a
+batch that fails is retried once its lease expires.
+"""
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Rating points a freshly queued Chad will accept either way
+BASE_TOLERANCE = 50
+
+# Widening of the band per second waited, and its ceiling
+TOLERANCE_PER_SECOND = 2
+MAX_TOLERANCE = 400
+
+# Matched pairs resolved per call to the battle resolver
+MATCH_BATCH_SIZE = 100
+
+# How long a claimed batch is held before another run may retry it, and how many tries it gets
+MATCH_LEASE_SECONDS = 120
+MATCH_MAX_ATTEMPTS = 3
+
+MATCH_FAILED_MESSAGE = "Sorry, your matchmade battle couldn't be resolved. Tweet FIND ME A BATTLE to queue again!"
+
+def get_tolerance(waited_seconds):
+    """Get the rating band a Chad accepts after waiting this long."""
+    return min(MAX_TOLERANCE, BASE_TOLERANCE + TOLERANCE_PER_SECOND * max(0, waited_seconds))
+
+class QueueEntry:
+    """A Chad waiting for a match."""
+    __slots__ = ('chad_id', 'rating', 'enqueued_at', 'tweet_id', 'username')
+
+    def __init__(self, chad_id, rating, enqueued_at, tweet_id=None, username=None):
+        self.chad_id = chad_id
+        self.rating = rating
+        self.enqueued_at = enqueued_at
+        self.tweet_id = tweet_id
+        self.username = username
+
+    @classmethod
+    def from_row(cls, row):
+        """Build an entry from a matchmaking_queue row."""
+        return cls(row['chad_id'], row['rating'], row['enqueued_at'], row['tweet_id'], row['username'])
+
+    def waited(self, now):
+        """Get the seconds this Chad has been waiting."""
+        return (now - self.enqueued_at).total_seconds()
+
+    def accepts(self, other, now):
+        """Whether either Chad's current band covers the rating gap."""
+        gap = abs(self.rating - other.rating)
+        return gap <= max(get_tolerance(self.waited(now)), get_tolerance(other.waited(now)))
+
+class MatchmakingQueue:
+    """
+    Matchmaking queue shared through the matchmaking_queue table.
+
+    Pairing a Chad is a conditional update that only applies while it is
+    still waiting, so processes matching at the same time never pair the
+    same Chad twice. Matched pairs stay in the table until their battles
+    are resolved.
+    """
+
+    def __init__(self, clock=datetime.utcnow):
+        self._clock = clock
+
+    def __len__(self):
+        from app.models.battle import MatchmakingEntry
+        return MatchmakingEntry.count_waiting()
+
+    def __contains__(self, chad_id):
+        from app.models.battle import MatchmakingEntry
+        return MatchmakingEntry.is_queued(chad_id)
+
+    def enqueue(self, chad_id, rating, tweet_id=None, username=None):
+        """
+        Add a Chad to the queue, matching it immediately if possible.
+
+        A Chad already waiting is re-queued with its new rating.
+
+        Args:
+            chad_id: ID of the queuing Chad
+            rating: The Chad's current rating
+            tweet_id: Tweet to reply to once the battle is resolved
+            username: Twitter handle of the Chad's owner
+
+        Returns:
+            QueueEntry: The matched opponent's entry, or None if now waiting
+        """
+        from app.extensions import db
+        from app.models.battle import MatchmakingEntry
+
+        try:
+            now = self._clock()
+            MatchmakingEntry.remove_waiting(chad_id)
+
+            entry = QueueEntry(chad_id, rating, now, tweet_id, username)
+            opponent = self._take_opponent(entry, now)
+            MatchmakingEntry.add(chad_id, rating, now, tweet_id, username,
+                                 opponent_chad_id=opponent.chad_id if opponent is not None else None)
+            db.session.commit()
+            return opponent
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def dequeue(self, chad_id):
+        """Remove a waiting Chad from the queue. Returns True if it was waiting."""
+        from app.extensions import db
+        from app.models.battle import MatchmakingEntry
+
+        removed = MatchmakingEntry.remove_waiting(chad_id)
+        db.session.commit()
+        return removed
+
+    def match_waiting(self):
+        """
+        Pair up waiting Chads whose tolerance bands have widened enough.
+
+        Adjacent entries in rating order have the smallest rating gaps, so one
+        pass over neighbours finds every newly acceptable pair. A pair another
+        process took first is skipped.
+
+        Returns:
+            int: Number of new pairs
+        """
+        from app.extensions import db
+        from app.models.battle import MatchmakingEntry
+
+        now = self._clock()
+        waiting = [QueueEntry.from_row(row) for row in MatchmakingEntry.waiting()]
+        matched = 0
+        index = 0
+        while index < len(waiting) - 1:
+            first, second = waiting[index], waiting[index + 1]
+            if not first.accepts(second, now):
+                index += 1
+                continue
+
+            if (MatchmakingEntry.take(first.chad_id, second.chad_id, now)
+                    and MatchmakingEntry.take(second.chad_id, first.chad_id, now)):
+                db.session.commit()
+                del waiting[index:index + 2]
+                matched += 1
+            else:
+                db.session.rollback()
+                index += 1
+        return matched
+
+    def claim_pairs(self, limit=None, lease_seconds=MATCH_LEASE_SECONDS):
+        """
+        Claim up to `limit` matched pairs to resolve, oldest first.
+
+        Returns:
+            tuple: (token, list of (first, second) QueueEntry pairs)
+        """
+        from app.models.battle import MatchmakingEntry
+
+        token, pairs = MatchmakingEntry.claim_pairs(limit, lease_seconds)
+        return token, [(QueueEntry.from_row(first), QueueEntry.from_row(second)) for first, second in pairs]
+
+    def finish(self, token):
+        """Remove claimed pairs from the queue, without committing."""
+        from app.models.battle import MatchmakingEntry
+        MatchmakingEntry.finish(token)
+
+    def unresolved(self, token):
+        """Whether any of a claim's pairs are still in the queue."""
+        from app.models.battle import MatchmakingEntry
+        return MatchmakingEntry.held(token) > 0
+
+    def give_up(self, token, max_attempts=MATCH_MAX_ATTEMPTS):
+        """
+        Drop a failed claim's pairs that have used all their attempts.
+
+        Returns:
+            list: QueueEntry of every dropped Chad
+        """
+        from app.models.battle import MatchmakingEntry
+        return [QueueEntry.from_row(row) for row in MatchmakingEntry.give_up(token, max_attempts)]
+
+    def _take_opponent(self, entry, now):
+        """Pair the entry with the closest-rated waiting Chad that accepts it, if any."""
+        from app.models.battle import MatchmakingEntry
+
+        candidates = [QueueEntry.from_row(row) for row in MatchmakingEntry.neighbours(entry.rating)]
+        candidates = [candidate for candidate in candidates if candidate.accepts(entry, now)]
+        candidates.sort(key=lambda candidate: (abs(candidate.rating - entry.rating), candidate.enqueued_at))
+        for candidate in candidates:
+            if MatchmakingEntry.take(candidate.chad_id, entry.chad_id, now):
+                return candidate
+        return None
+
+# Handle on the shared queue used by the bot
+matchmaking_queue = MatchmakingQueue()
+
+def create_matched_battles(pairs):
+    """
+    Create the battles for matched pairs, without committing.
+
+    Returns:
+        list: New Battle objects, in the same order as pairs
+    """
+    from datetime import datetime
+    from app.extensions import db
+    from app.models.battle import Battle, BattleEventCode
+
+    battles = []
+    for first, second in pairs:
+        battle = Battle(
+            initiator_id=first.chad_id,
+            opponent_id=second.chad_id,
+            initiator_chad_id=first.chad_id,
+            opponent_chad_id=second.chad_id,
+            status='in_progress',
+            challenge_tweet_id=second.tweet_id,
+            started_at=datetime.utcnow()
+        )
+        db.session.add(battle)
+        battle.add_event(BattleEventCode.BATTLE_STARTED, "Matchmade battle has begun!", turn=0)
+        battles.append(battle)
+    return battles
+
+def process_matchmaking_queue(queue=None, batch_size=MATCH_BATCH_SIZE):
+    """
+    Match waiting Chads and resolve the matched battles in batches.
+
+    Each batch is claimed, created and resolved with resolve_battles(),
+    which loads every participant's stats in one query and commits once,
+    removing the pairs from the queue in the same commit. A batch that
+    fails keeps its claim and is retried once the lease expires; pairs that
+    have failed MATCH_MAX_ATTEMPTS times are dropped and told so.
+
+    Args:
+        queue: Queue to process (defaults to the shared queue)
+        batch_size: Pairs per resolver batch
+
+    Returns:
+        int: Number of battles resolved
+    """
+    from app.extensions import db
+    from app.utils.battle_resolver import resolve_battles
+    from app.utils.outbound import schedule_reply
+
+    if queue is None:
+        queue = matchmaking_queue
+    queue.match_waiting()
+
+    resolved = 0
+    while True:
+        token, pairs = queue.claim_pairs(batch_size)
+        if not pairs:
+            break
+
+        summaries = None
+        try:
+            battles = create_matched_battles(pairs)
+            # Deleted in the same commit as the battles' results
+            queue.finish(token)
+            summaries = resolve_battles(battles)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error resolving {len(pairs)} matchmade battles: {str(e)}")
+
+        # resolve_battles() rolls back on failure, which leaves the pairs claimed
+        if summaries is None or queue.unresolved(token):
+            dropped = queue.give_up(token)
+            for entry in dropped:
+                if entry.tweet_id:
+                    schedule_reply(f"@{entry.username} {MATCH_FAILED_MESSAGE}", entry.tweet_id, lane='battle')
+            logger.warning(
+                f"{len(pairs)} matchmade battles weren't resolved; "
+                f"{len(pairs) - len(dropped) // 2} will be retried after their lease"
+            )
+            continue
+
+        for (first, second), summary in zip(pairs, summaries):
+            for entry in (first, second):
+                if entry.tweet_id:
+                    schedule_reply(f"@{entry.username} ⚔️ MATCH FOUND! ⚔️\n\n{summary}", entry.tweet_id, lane='battle')
+
+        resolved += len(pairs)
+
+    if resolved:
+        logger.info(f"Resolved {resolved} matchmade battles; {len(queue)} Chads still waiting")
+    return resolved
@@ -0,0 +1,113 @@
+"""
+Concurrent mention processing for the Twitter bot.
+
+Mentions are sharded by author so each author's mentions are still handled
+one after another, in the order they were tweeted, while different authors'
+shards are handled concurrently by a thread pool. Every shard runs in its own
+application context, so it gets its own database session, which is removed
+when the shard is done.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+def mention_author(mention):
+    """Get the key mentions are sharded by: the author's user ID, or screen name."""
+    user = mention.get('user', {})
+    return user.get('id_str') or user.get('screen_name')
+
+def shard_mentions(mentions):
+    """
+    Group mentions by author, keeping each author's mentions in order.
+
+    Args:
+        mentions (list): Mentions sorted oldest first
+
+    Returns:
+        list: One list of mentions per author, in order of each author's first mention
+    """
+    shards = OrderedDict()
+    for mention in mentions:
+        shards.setdefault(mention_author(mention), []).append(mention)
+    return list(shards.values())
+
+def percentile(sorted_values, fraction):
+    """Get the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def _process_shard(app, shard, handler):
+    """
+    Handle one author's mentions in order, in a fresh app context.
+
+    Returns:
+        list: (latency in seconds, succeeded) for each mention
+    """
+    results = []
+    with app.app_context():
+        for mention in shard:
+            logger.info(f"Processing mention {mention.get('id_str')} from @{mention.get('user', {}).get('screen_name')}")
+            started = time.perf_counter()
+            try:
+                handler(mention)
+                succeeded = True
+            except Exception as e:
+                logger.error(f"Error handling mention {mention.get('id_str')}: {str(e)}")
+                succeeded = False
+                # Leave the session usable for the author's next mention
+                from app.extensions import db
+                db.session.rollback()
+            results.append((time.perf_counter() - started, succeeded))
+    return results
+
+def process_mentions_concurrently(app, mentions, handler, workers):
+    """
+    Handle mentions with a pool of workers, sharded by author.
+
+    Args:
+        app: The Flask app each shard pushes a context for
+        mentions (list): Mentions sorted oldest first
+        handler: Function handling one mention (usually bot_commands.handle_mention)
+        workers (int): Number of worker threads
+
+    Returns:
+        dict: Throughput and latency stats for the batch
+    """
+    shards = shard_mentions(mentions)
+    started = time.perf_counter()
+
+    if workers <= 1 or len(shards) == 1:
+        results = [_process_shard(app, shard, handler) for shard in shards]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(shards)), thread_name_prefix='mention-worker') as pool:
+            results = list(pool.map(lambda shard: _process_shard(app, shard, handler), shards))
+
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for shard_results in results for latency, _ in shard_results)
+    failed = sum(1 for shard_results in results for _, succeeded in shard_results if not succeeded)
+
+    stats = {
+        'mentions': len(latencies),
+        'authors': len(shards),
+        'workers': max(1, min(workers, len(shards))),
+        'failed': failed,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p95': percentile(latencies, 0.95),
+        'latency_max': latencies[-1] if latencies else 0.0
+    }
+
+    logger.info(
+        f"Processed {stats['mentions']} mentions from {stats['authors']} authors "
+        f"with {stats['workers']} workers in {elapsed:.2f}s ({stats['throughput']:.1f}/s, "
+        f"{failed} failed); latency p50 {stats['latency_p50'] * 1000:.0f}ms, "
+        f"p95 {stats['latency_p95'] * 1000:.0f}ms, max {stats['latency_max'] * 1000:.0f}ms"
+    )
+    return stats
@@ -0,0 +1,611 @@
+"""
+Outbound tweet scheduler.
+
+Everything the bot posts goes through one scheduler, which posts from its
+own background thread so no request or job thread ever sleeps for pacing:
+
+- Posts wait in priority lanes: battle replies first, then other replies,
+  then promotional and stats tweets. Within a lane they go out in order.
+- Each endpoint has a token bucket: bursts of up to OUTBOUND_TWEET_BURST
+  posts, refilled at OUTBOUND_TWEET_LIMIT posts per OUTBOUND_TWEET_WINDOW
+  seconds. The bucket is kept in the database (SharedTokenBucket), so every
+  process posting for the bot shares the one limit.
+- A post identical to one still waiting (same text, same tweet replied to) is
+  coalesced into it instead of being posted twice.
+- Posts queued inside delivery_group() are held until the block ends, then
+  reported on together once each has been sent or has failed, so a mention
+  is only marked done once its replies are actually out, and failed replies
+  can be retried on their own.
+
+stats() reports the queue depth per lane and the send latency (time from
+enqueue to post).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Highest priority first
+LANES = ('battle', 'reply', 'promo', 'stats')
+
+# Tweets and replies are both statuses/update calls
+UPDATE_ENDPOINT = 'statuses/update'
+
+MAX_TWEET_LENGTH = 280
+
+# Defaults match the v1.1 statuses/update limit of 300 posts per 3 hours
+DEFAULT_TWEET_LIMIT = 300
+DEFAULT_TWEET_WINDOW = 3 * 3600
+DEFAULT_TWEET_BURST = 5
+
+class TokenBucket:
+    """A token bucket: up to `capacity` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = rate
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, tokens=1):
+        """Take tokens if the bucket has them. Returns True if it did."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, tokens=1):
+        """Get the seconds until the bucket will hold the given number of tokens."""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+class SharedTokenBucket:
+    """
+    A token bucket kept in the outbound_rate_limits table, shared by every process.
+
+    Has the same interface as TokenBucket. If the database can't be reached
+    no token is handed out, so an outage never lets posts exceed the limit.
+    """
+
+    # Seconds to wait before asking the database again after an error
+    ERROR_BACKOFF = 5.0
+
+    def __init__(self, endpoint, capacity, rate):
+        self.endpoint = endpoint
+        self.capacity = capacity
+        self.rate = rate
+        self._wait = 0.0
+
+    def try_take(self, tokens=1):
+        """Take tokens if the bucket has them. Returns True if it did."""
+        from app.extensions import db
+        from app.models.tweet_tracker import OutboundRateLimit
+
+        try:
+            self._wait = OutboundRateLimit.try_take(self.endpoint, self.capacity, self.rate, tokens)
+        except Exception as e:
+            logger.error(f"Error taking an outbound token for {self.endpoint}: {str(e)}")
+            db.session.rollback()
+            self._wait = self.ERROR_BACKOFF
+        return self._wait == 0.0
+
+    def wait_time(self, tokens=1):
+        """Get the seconds until the bucket held enough tokens, as of the last try_take()."""
+        return self._wait
+
+class DeliveryGroup:
+    """
+    Posts queued while handling one thing (such as a mention), reported on together.
+
+    The posts are held by the group until its block ends, so a handler that
+    fails part way posts nothing (see delivery_group()). Once every submitted
+    post has been tried, on_delivered is called if they were all sent (as
+    soon as the group is submitted, if none were queued), or on_failed with
+    the first error and the posts that failed. Only one of the two is ever
+    called, on whichever thread settles the group.
+    """
+
+    def __init__(self, on_delivered, on_failed):
+        self._on_delivered = on_delivered
+        self._on_failed = on_failed
+        self._lock = threading.Lock()
+        self._held = []
+        self._unsent = []
+        self._failed_posts = []
+        self._error = None
+        self._closed = False
+        self._settled = False
+
+    @property
+    def waiting(self):
+        """Number of the group's posts not tried yet."""
+        with self._lock:
+            return len(self._held) + len(self._unsent)
+
+    @property
+    def posts(self):
+        """The group's posts not sent yet, as dicts of message, in_reply_to and lane."""
+        with self._lock:
+            pending = [post for _, post in self._held] + self._unsent + self._failed_posts
+            return [describe_post(post) for post in pending]
+
+    def hold(self, scheduler, post):
+        """Keep a post until the group is submitted."""
+        with self._lock:
+            self._held.append((scheduler, post))
+
+    def submit(self):
+        """Queue the held posts, then close the group: no more posts will join it."""
+        with self._lock:
+            held, self._held = self._held, []
+            self._unsent.extend(post for _, post in held)
+        for scheduler, post in held:
+            post.callbacks.append(lambda result, post=post: self._tried(post))
+            post.failure_callbacks.append(lambda error, post=post: self._tried(post, error))
+            scheduler.submit(post)
+
+        with self._lock:
+            self._closed = True
+        self._settle()
+
+    def _tried(self, post, error=None):
+        """Record one of the group's posts as sent, or failed with error."""
+        with self._lock:
+            self._unsent.remove(post)
+            if error is not None:
+                self._failed_posts.append(post)
+                self._error = self._error or error
+        self._settle()
+
+    def _settle(self):
+        """Report on the group if every post has been tried and it wasn't reported on yet."""
+        with self._lock:
+            if self._settled or not self._closed or self._unsent:
+                return
+            self._settled = True
+            error, failed = self._error, [describe_post(post) for post in self._failed_posts]
+        if failed:
+            self._on_failed(error, failed)
+        else:
+            self._on_delivered()
+
+    def abandon(self):
+        """Stop reporting on the group (its owner handles the outcome itself)."""
+        with self._lock:
+            self._settled = True
+
+_delivery = threading.local()
+
+@contextmanager
+def delivery_group(on_delivered, on_failed, send_on_error=False):
+    """
+    Collect the posts queued by this thread into a DeliveryGroup.
+
+    The posts are held until the block exits normally, then queued. If the
+    block raises, the group is abandoned and neither callback is called; its
+    posts are dropped, or queued anyway with send_on_error (e.g. the error
+    reply of a mention's last attempt).
+
+    Args:
+        on_delivered: Called with no arguments once every post has been sent
+        on_failed: Called with the first error and the failed posts (see
+                   describe_post()) if any post fails
+        send_on_error: Whether to post what was queued even if the block raises
+
+    Yields:
+        DeliveryGroup: The group, to check how many posts are still waiting
+    """
+    group = DeliveryGroup(on_delivered, on_failed)
+    previous = getattr(_delivery, 'group', None)
+    _delivery.group = group
+    try:
+        yield group
+    except BaseException:
+        group.abandon()
+        if send_on_error:
+            group.submit()
+        raise
+    finally:
+        _delivery.group = previous
+    group.submit()
+
+def describe_post(post):
+    """Get what is needed to queue a post again, as plain data."""
+    return {'message': post.message, 'in_reply_to': post.in_reply_to, 'lane': post.lane}
+
+class OutboundPost:
+    """A post waiting in the scheduler."""
+
+    __slots__ = ('endpoint', 'lane', 'message', 'in_reply_to', 'enqueued_at', 'callbacks', 'failure_callbacks')
+
+    def __init__(self, endpoint, lane, message, in_reply_to, enqueued_at, on_sent=None, on_failed=None):
+        self.endpoint = endpoint
+        self.lane = lane
+        self.message = message
+        self.in_reply_to = in_reply_to
+        self.enqueued_at = enqueued_at
+        self.callbacks = [on_sent] if on_sent else []
+        self.failure_callbacks = [on_failed] if on_failed else []
+
+    @property
+    def key(self):
+        """Identical posts share a key and are coalesced."""
+        return (self.endpoint, self.in_reply_to, self.message)
+
+class OutboundScheduler:
+    """Priority lanes of posts, sent within per-endpoint token buckets by a background thread."""
+
+    def __init__(self, buckets, senders, clock=time.monotonic, app=None, latency_samples=500):
+        """
+        Args:
+            buckets: Mapping of endpoint to TokenBucket
+            senders: Mapping of endpoint to a function posting an OutboundPost,
+                     returning the new tweet ID (or a truthy value) on success
+            clock: Monotonic clock, replaceable in tests
+            app: Flask app the sending thread pushes a context for
+            latency_samples: How many recent send latencies stats() reports on
+        """
+        self._buckets = buckets
+        self._senders = senders
+        self._clock = clock
+        self._app = app
+        self._lanes = {lane: deque() for lane in LANES}
+        self._pending = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+        self._sent = 0
+        self._failed = 0
+        self._coalesced = 0
+        self._latencies = deque(maxlen=latency_samples)
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def enqueue(self, endpoint, message, lane, in_reply_to=None, on_sent=None, on_failed=None):
+        """
+        Queue a post.
+
+        A post queued inside delivery_group() is held by that group until
+        the group's block ends.
+
+        Args:
+            endpoint: Endpoint the post is made to (its bucket paces it)
+            message: The text to post
+            lane: Priority lane, one of LANES
+            in_reply_to: ID of the tweet replied to, if any
+            on_sent: Called with the sender's result once the post succeeds
+            on_failed: Called with the error if the post fails
+
+        Returns:
+            bool: True if queued (or held), False if coalesced into an identical waiting post
+        """
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown outbound lane: {lane}")
+
+        post = OutboundPost(endpoint, lane, message, in_reply_to, self._clock(), on_sent, on_failed)
+        group = getattr(_delivery, 'group', None)
+        if group is not None:
+            group.hold(self, post)
+            return True
+        return self.submit(post)
+
+    def submit(self, post):
+        """
+        Queue a post built by enqueue() (called directly for posts a delivery group held).
+
+        Returns:
+            bool: True if queued, False if coalesced into an identical waiting post
+        """
+        with self._cond:
+            waiting = self._pending.get(post.key)
+            if waiting is not None:
+                waiting.callbacks.extend(post.callbacks)
+                waiting.failure_callbacks.extend(post.failure_callbacks)
+                self._coalesced += 1
+                return False
+
+            self._pending[post.key] = post
+            self._lanes[post.lane].append(post)
+            self._cond.notify_all()
+        return True
+
+    def _next_post(self):
+        """
+        Take the highest priority post whose endpoint has a token.
+
+        Taking a token can mean a database round trip (SharedTokenBucket), so
+        it is done without holding the queue's lock: the lane heads are read
+        under the lock, the token is taken outside it, and the post is only
+        removed from the queue under the lock again. Only the sending thread
+        removes posts, so the head is still there unless drop_pending()
+        emptied the queue meanwhile.
+
+        Returns:
+            tuple: (post, None) if one can be sent now, otherwise (None, seconds
+                   to wait until one can, or None if nothing is waiting)
+        """
+        with self._cond:
+            heads = [self._lanes[lane][0] for lane in LANES if self._lanes[lane]]
+
+        wait = None
+        blocked = set()
+        for post in heads:
+            if post.endpoint in blocked:
+                continue
+
+            bucket = self._buckets.get(post.endpoint)
+            if bucket is None or bucket.try_take():
+                with self._cond:
+                    queue = self._lanes[post.lane]
+                    if not queue or queue[0] is not post:
+                        # Dropped while the token was taken; look again
+                        return None, 0.0
+                    queue.popleft()
+                    del self._pending[post.key]
+                    self._in_flight += 1
+                return post, None
+
+            # Lower lanes on the same endpoint must not overtake this one
+            blocked.add(post.endpoint)
+            post_wait = bucket.wait_time()
+            wait = post_wait if wait is None else min(wait, post_wait)
+        return None, wait
+
+    def _send(self, post):
+        """Post one message and record the outcome."""
+        error = None
+        try:
+            result = self._senders[post.endpoint](post)
+        except Exception as e:
+            logger.error(f"Error sending outbound {post.lane} post: {str(e)}")
+            result = None
+            error = e
+
+        with self._cond:
+            self._in_flight -= 1
+            if result:
+                self._sent += 1
+                self._latencies.append(self._clock() - post.enqueued_at)
+            else:
+                self._failed += 1
+            self._cond.notify_all()
+
+        if not result:
+            logger.error(f"Failed to send outbound {post.lane} post: {post.message[:50]}")
+            error = error or f"Failed to send {post.lane} post"
+            for callback in post.failure_callbacks:
+                try:
+                    callback(error)
+                except Exception as e:
+                    logger.error(f"Error in outbound post failure callback: {str(e)}")
+            return
+
+        for callback in post.callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error(f"Error in outbound post callback: {str(e)}")
+
+    def send_due(self):
+        """
+        Send every post the buckets allow right now, highest priority first.
+
+        Returns:
+            float: Seconds until the next post can be sent, or None if the queue is empty
+        """
+        while True:
+            post, wait = self._next_post()
+            if post is None:
+                return wait
+            self._send(post)
+
+    def _run(self):
+        """Background sending loop."""
+        while True:
+            wait = self.send_due()
+            with self._cond:
+                if self._stopped:
+                    return
+                if wait is None:
+                    if not self._pending:
+                        self._cond.wait()
+                elif wait > 0:
+                    self._cond.wait(timeout=wait)
+
+    def _run_in_context(self):
+        if self._app is None:
+            self._run()
+            return
+        with self._app.app_context():
+            self._run()
+
+    def start(self):
+        """Start the background sending thread (once)."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run_in_context, name='outbound-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background sending thread; waiting posts stay queued."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued post has been sent (for short-lived processes).
+
+        Args:
+            timeout: Maximum seconds to wait, None to wait as long as it takes
+
+        Returns:
+            bool: True if the queue emptied in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def drop_pending(self, error):
+        """
+        Remove every waiting post, reporting each as failed (e.g. when a short-lived process exits).
+
+        Posts in a delivery group are reported to it, so their owner can
+        keep them to post later.
+
+        Returns:
+            int: Number of posts dropped
+        """
+        with self._cond:
+            posts = list(self._pending.values())
+            self._pending.clear()
+            for queue in self._lanes.values():
+                queue.clear()
+            self._failed += len(posts)
+
+        for post in posts:
+            for callback in post.failure_callbacks:
+                try:
+                    callback(error)
+                except Exception as e:
+                    logger.error(f"Error in outbound post failure callback: {str(e)}")
+        return len(posts)
+
+    def stats(self):
+        """
+        Get the scheduler's queue depth and send latency.
+
+        Returns:
+            dict: Depth per lane and in total, sent/failed/coalesced counts and
+                  p50/p95/max latency in seconds over recent sends
+        """
+        from app.utils.mention_pool import percentile
+
+        with self._cond:
+            latencies = sorted(self._latencies)
+            return {
+                'depth': {lane: len(queue) for lane, queue in self._lanes.items()},
+                'queued': len(self._pending),
+                'sent': self._sent,
+                'failed': self._failed,
+                'coalesced': self._coalesced,
+                'latency_p50': percentile(latencies, 0.5),
+                'latency_p95': percentile(latencies, 0.95),
+                'latency_max': latencies[-1] if latencies else 0.0
+            }
+
+def send_update(post):
+    """Post a tweet or reply. Returns the new tweet's ID, or None on failure."""
+    from app.utils.twitter_api import create_tweet, post_reply
+
+    if post.in_reply_to:
+        return post_reply(post.message, post.in_reply_to)
+    return create_tweet(post.message)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_outbound_scheduler():
+    """
+    Get the process-wide outbound scheduler, configured from the app config
+    and started on first use. Its queue is per process; its rate limit is
+    shared through the database.
+
+    Returns:
+        OutboundScheduler: The shared scheduler
+    """
+    global _scheduler
+
+    if _scheduler is None:
+        from flask import current_app
+
+        with _scheduler_lock:
+            if _scheduler is None:
+                config = current_app.config
+                limit = config.get('OUTBOUND_TWEET_LIMIT', DEFAULT_TWEET_LIMIT)
+                window = config.get('OUTBOUND_TWEET_WINDOW', DEFAULT_TWEET_WINDOW)
+                burst = config.get('OUTBOUND_TWEET_BURST', DEFAULT_TWEET_BURST)
+                scheduler = OutboundScheduler(
+                    # Shared with every other process posting for the bot
+                    buckets={UPDATE_ENDPOINT: SharedTokenBucket(UPDATE_ENDPOINT, burst, limit / window)},
+                    senders={UPDATE_ENDPOINT: send_update},
+                    app=current_app._get_current_object()
+                )
+                scheduler.start()
+                _scheduler = scheduler
+    return _scheduler
+
+def _fit(message):
+    """Trim a message to the tweet length limit."""
+    if len(message) > MAX_TWEET_LENGTH:
+        return message[:MAX_TWEET_LENGTH - 3] + "..."
+    return message
+
+def schedule_tweet(message, lane='stats', on_sent=None):
+    """
+    Queue a tweet to be posted by the outbound scheduler.
+
+    Args:
+        message (str): The tweet text
+        lane (str): Priority lane (see LANES)
+        on_sent: Called with the new tweet's ID once it is posted
+
+    Returns:
+        bool: True if queued, False if an identical tweet was already waiting
+    """
+    return get_outbound_scheduler().enqueue(UPDATE_ENDPOINT, _fit(message), lane, on_sent=on_sent)
+
+def schedule_reply(message, in_reply_to_status_id, lane='reply', on_sent=None):
+    """
+    Queue a reply to be posted by the outbound scheduler.
+
+    Args:
+        message (str): The reply text
+        in_reply_to_status_id (str): The tweet replied to
+        lane (str): Priority lane (see LANES); 'battle' for battle results
+        on_sent: Called with the reply's tweet ID once it is posted
+
+    Returns:
+        bool: True if queued, False if the same reply was already waiting
+    """
+    return get_outbound_scheduler().enqueue(
+        UPDATE_ENDPOINT, _fit(message), lane, in_reply_to=in_reply_to_status_id, on_sent=on_sent
+    )
+
+def schedule_posts(posts):
+    """
+    Queue posts again from their describe_post() data, e.g. replies stored for a retry.
+
+    Args:
+        posts (list): Dicts with 'message', 'in_reply_to' and 'lane'
+    """
+    scheduler = get_outbound_scheduler()
+    for post in posts:
+        scheduler.enqueue(UPDATE_ENDPOINT, post['message'], post['lane'], in_reply_to=post['in_reply_to'])
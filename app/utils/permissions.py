@@ -3,6 +3,11 @@ Permissions utilities for controlling access to features.
 
 This module provides decorators and functions for checking permissions,
 such as requiring cabal membership or officer status.
+
+Membership and roles come from app.utils.cabal_loader.get_cabal_access(),
+which caches them for the request (and optionally the session), so a
+protected route that looks them up again does not query for them a second
+time. Routes read the result with current_cabal_access().
 """
 
 import logging
@@ -12,148 +17,100 @@ from flask_login import current_user
 
 logger = logging.getLogger(__name__)
 
+def current_cabal_access(cabal_id):
+    """
+    Get the current user's membership and role in a cabal.
+
+    Args:
+        cabal_id: The ID of the cabal
+
+    Returns:
+        dict: See cabal_loader.get_cabal_access(), or None if the user is not
+              logged in or not an active member
+    """
+    if not current_user.is_authenticated:
+        return None
+
+    from app.utils.cabal_loader import get_cabal_access
+
+    return get_cabal_access(current_user, cabal_id)
+
+def _require_cabal_role(roles, message):
+    """
+    Build a decorator that requires one of the given cabal roles.
+
+    Args:
+        roles: Roles that may access the route ('leader', 'officer', 'member')
+        message: The 403 message for users without one of them
+
+    Returns:
+        The decorator
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Check if user is logged in (should be handled by login_required)
+            if not current_user.is_authenticated:
+                return abort(401)
+
+            # Get cabal_id from route params
+            cabal_id = kwargs.get('cabal_id')
+            if not cabal_id:
+                return abort(400, "Cabal ID is required")
+
+            access = current_cabal_access(cabal_id)
+            if not access or access['role'] not in roles:
+                return abort(403, message)
+
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
 def require_cabal_membership(f):
     """
     Decorator to require cabal membership for a route.
-    
+
     Args:
         f: The route function to decorate
-        
+
     Returns:
         The decorated function
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Check if user is logged in (should be handled by login_required)
-        if not current_user.is_authenticated:
-            return abort(401)
-        
-        # Get cabal_id from route params
-        cabal_id = kwargs.get('cabal_id')
-        if not cabal_id:
-            return abort(400, "Cabal ID is required")
-        
-        # Check if user's chad is a member of the cabal
-        from app.models.cabal import CabalMember
-        
-        # Get user's chad ID
-        chad_id = current_user.chad_id
-        if not chad_id:
-            return abort(400, "User does not have a Chad character")
-        
-        # Check membership
-        member = CabalMember.query.filter_by(
-            cabal_id=cabal_id,
-            chad_id=chad_id,
-            is_active=True
-        ).first()
-        
-        if not member:
-            return abort(403, "You are not a member of this cabal")
-        
-        # Pass the member object to the route
-        kwargs['member'] = member
-        
-        return f(*args, **kwargs)
-    
-    return decorated_function
+    return _require_cabal_role(
+        ('leader', 'officer', 'member'),
+        "You are not a member of this cabal"
+    )(f)
 
 def require_cabal_officer(f):
     """
     Decorator to require cabal officer status for a route.
-    
+
+    The cabal leader passes as well.
+
     Args:
         f: The route function to decorate
-        
+
     Returns:
         The decorated function
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Check if user is logged in (should be handled by login_required)
-        if not current_user.is_authenticated:
-            return abort(401)
-        
-        # Get cabal_id from route params
-        cabal_id = kwargs.get('cabal_id')
-        if not cabal_id:
-            return abort(400, "Cabal ID is required")
-        
-        # Get user's chad ID
-        chad_id = current_user.chad_id
-        if not chad_id:
-            return abort(400, "User does not have a Chad character")
-        
-        # Check if user is cabal leader
-        from app.models.cabal import Cabal
-        
-        cabal = Cabal.query.get(cabal_id)
-        if not cabal:
-            return abort(404, "Cabal not found")
-        
-        if cabal.leader_id == chad_id:
-            # User is leader, pass cabal to route
-            kwargs['cabal'] = cabal
-            return f(*args, **kwargs)
-        
-        # Check if user is an officer
-        from app.models.cabal import CabalOfficerRole
-        
-        officer = CabalOfficerRole.query.filter_by(
-            cabal_id=cabal_id,
-            chad_id=chad_id
-        ).first()
-        
-        if not officer:
-            return abort(403, "You must be a cabal leader or officer to access this feature")
-        
-        # Pass the officer object to the route
-        kwargs['officer'] = officer
-        kwargs['cabal'] = cabal
-        
-        return f(*args, **kwargs)
-    
-    return decorated_function
+    return _require_cabal_role(
+        ('leader', 'officer'),
+        "You must be a cabal leader or officer to access this feature"
+    )(f)
 
 def require_cabal_leader(f):
     """
     Decorator to require cabal leader status for a route.
-    
+
     Args:
         f: The route function to decorate
-        
+
     Returns:
         The decorated function
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Check if user is logged in (should be handled by login_required)
-        if not current_user.is_authenticated:
-            return abort(401)
-        
-        # Get cabal_id from route params
-        cabal_id = kwargs.get('cabal_id')
-        if not cabal_id:
-            return abort(400, "Cabal ID is required")
-        
-        # Get user's chad ID
-        chad_id = current_user.chad_id
-        if not chad_id:
-            return abort(400, "User does not have a Chad character")
-        
-        # Check if user is cabal leader
-        from app.models.cabal import Cabal
-        
-        cabal = Cabal.query.get(cabal_id)
-        if not cabal:
-            return abort(404, "Cabal not found")
-        
-        if cabal.leader_id != chad_id:
-            return abort(403, "You must be the cabal leader to access this feature")
-        
-        # Pass the cabal object to the route
-        kwargs['cabal'] = cabal
-        
-        return f(*args, **kwargs)
-    
-    return decorated_function 
\ No newline at end of file
+    return _require_cabal_role(
+        ('leader',),
+        "You must be the cabal leader to access this feature"
+    )(f)
@@ -4,206 +4,298 @@ from app import db
 from app.models.cabal import Cabal, CabalMember, CabalBattle
 from app.models.user import User
 from app.models.chad import Chad
-from app.utils.twitter_api import share_weekly_leaderboard, post_tweet
+from app.utils.twitter_api import render_weekly_leaderboard
 from app.models.referral import Referral
 from app.models.cabal_analytics import CabalAnalytics
 
 logger = logging.getLogger(__name__)
 
+def render_cabal_recap(name, position, stats):
+    """
+    Render a cabal leader's weekly recap tweet.
+    
+    Args:
+        name (str): The cabal's name
+        position (int): The cabal's leaderboard position
+        stats (dict): The cabal's figures from Cabal.get_weekly_recap_stats()
+        
+    Returns:
+        str: The tweet text
+    """
+    message = f"@{stats['leader_handle']} 📊 Weekly Cabal Recap for {name} 📊\n\n"
+    message += f"🏆 Current Rank: #{position}\n"
+    message += f"⚔️ Battles: {stats['wins']} wins, {stats['losses']} losses\n"
+    message += f"👥 New Members: {stats['new_members']}\n"
+    message += f"🔗 Referrals: {stats['referrals']}\n\n"
+    
+    # Add leaderboard position
+    if position == 1:
+        message += "🥇 Your cabal is #1 on the leaderboard! Congratulations!\n\n"
+    elif position <= 3:
+        message += f"🏅 Your cabal is #{position} on the leaderboard! Keep it up!\n\n"
+    else:
+        message += f"📈 Your cabal is #{position} on the leaderboard.\n\n"
+    
+    # Add tips based on cabal's performance
+    if stats['wins'] == 0 and stats['losses']:
+        message += "💡 Tip: Try appointing officers to boost your cabal's power in battles.\n"
+    if stats['new_members'] == 0:
+        message += "💡 Tip: Share your referral link to recruit new members and earn rewards.\n"
+    
+    return message
+
 def send_weekly_cabal_recap():
     """
     Send weekly recap of cabal activities.
     
-    This function:
-    1. Generates the leaderboard of top cabals
-    2. Shares the leaderboard on Twitter
-    3. Sends personalized recaps to cabal leaders
+    This function runs as a pipeline:
+    1. Reads the top cabals from the cached ranking
+    2. Computes every top cabal's weekly figures with one grouped query per figure
+    3. Renders the leaderboard tweet and each leader's recap in memory
+    4. Queues them on the outbound tweet scheduler's stats lane
+    
+    The run is recorded as the 'weekly_cabal_recap' job metric.
     
     Returns:
         bool: True if successful, False otherwise
     """
+    from app.utils.job_metrics import track_job
+    from app.utils.outbound import schedule_tweet
+    
     try:
-        # Get the top cabals
-        top_cabals = Cabal.get_leaderboard(limit=10)
-        
-        if not top_cabals or len(top_cabals) < 3:
-            logger.warning("Not enough cabals for leaderboard")
-            return False
-        
-        # Format cabal data for the leaderboard tweet
-        cabal_data = []
-        for cabal in top_cabals[:3]:  # Top 3 for the tweet
-            cabal_data.append({
-                'name': cabal.name,
-                'level': cabal.level,
-                'power': int(cabal.total_power),
-                'rank': cabal.rank
-            })
-        
-        # Share the weekly leaderboard on Twitter
-        share_weekly_leaderboard(cabal_data)
-        
-        # Calculate the start of the previous week
-        now = datetime.utcnow()
-        week_ago = now - timedelta(days=7)
-        
-        # Process each cabal
-        for cabal in top_cabals:
-            # Get battles from the past week
-            battles = CabalBattle.query.filter(
-                CabalBattle.cabal_id == cabal.id,
-                CabalBattle.completed == True,
-                CabalBattle.scheduled_at >= week_ago
-            ).all()
+        with track_job('weekly_cabal_recap') as metrics:
+            # Get the top cabals
+            top_cabals = Cabal.get_top_cabals(limit=10)
+            metrics['cabals'] = len(top_cabals)
             
-            # Count wins and losses
-            wins = sum(1 for battle in battles if battle.result == 'win')
-            losses = sum(1 for battle in battles if battle.result == 'loss')
+            if len(top_cabals) < 3:
+                logger.warning("Not enough cabals for leaderboard")
+                return False
             
-            # Get new members from the past week
-            new_members = CabalMember.query.filter(
-                CabalMember.cabal_id == cabal.id,
-                CabalMember.joined_at >= week_ago
-            ).count()
+            week_ago = datetime.utcnow() - timedelta(days=7)
+            stats = Cabal.get_weekly_recap_stats([cabal_id for cabal_id, _, _, _ in top_cabals], week_ago)
             
-            # Get referrals from the past week
-            referrals = Referral.query.filter(
-                Referral.cabal_id == cabal.id,
-                Referral.created_at >= week_ago
-            ).count()
+            # The leaderboard goes out first, then each leader's recap
+            queued = int(schedule_tweet(render_weekly_leaderboard([
+                {'name': name, 'members': member_count, 'power': int(total_power), 'rank': position}
+                for position, (_, name, member_count, total_power) in enumerate(top_cabals[:3], start=1)
+            ]), lane='stats'))
             
-            # Get the cabal leader
-            leader_chad = Chad.query.get(cabal.leader_id)
-            if leader_chad:
-                leader_user = User.query.filter_by(chad_id=leader_chad.id).first()
-                if leader_user and leader_user.twitter_handle:
-                    # Create personalized recap for the leader
-                    message = f"📊 Weekly Cabal Recap for {cabal.name} 📊\n\n"
-                    message += f"🏆 Current Rank: #{cabal.rank}\n"
-                    message += f"⚔️ Battles: {wins} wins, {losses} losses\n"
-                    message += f"👥 New Members: {new_members}\n"
-                    message += f"🔗 Referrals: {referrals}\n\n"
-                    
-                    # Add leaderboard position if in top 10
-                    position = next((i+1 for i, c in enumerate(top_cabals) if c.id == cabal.id), None)
-                    if position:
-                        if position == 1:
-                            message += "🥇 Your cabal is #1 on the leaderboard! Congratulations!\n\n"
-                        elif position <= 3:
-                            message += f"🏅 Your cabal is #{position} on the leaderboard! Keep it up!\n\n"
-                        else:
-                            message += f"📈 Your cabal is #{position} on the leaderboard.\n\n"
-                    
-                    # Add tips based on cabal's performance
-                    if wins == 0 and battles:
-                        message += "💡 Tip: Try appointing officers to boost your cabal's power in battles.\n"
-                    if new_members == 0:
-                        message += "💡 Tip: Share your referral link to recruit new members and earn rewards.\n"
-                    
-                    # Send the recap as a direct message to the leader
-                    # Note: Direct messages require additional Twitter API permissions
-                    # For now, we'll just post a tweet mentioning the leader
-                    post_tweet(f"@{leader_user.twitter_handle} {message}")
+            recaps = 0
+            for position, (cabal_id, name, _, _) in enumerate(top_cabals, start=1):
+                # Direct messages need additional API permissions, so mention the leader instead
+                if stats[cabal_id]['leader_handle']:
+                    queued += int(schedule_tweet(render_cabal_recap(name, position, stats[cabal_id]), lane='stats'))
+                    recaps += 1
+            metrics['recaps'] = recaps
+            metrics['queued'] = queued
         
         return True
     except Exception as e:
         logger.error(f"Error sending weekly cabal recap: {str(e)}")
         return False
 
+def resolve_cabal_battles():
+    """
+    Fight every cabal battle whose scheduled time has passed.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        from app.utils.cabal_war import resolve_due_cabal_battles
+        
+        resolved = resolve_due_cabal_battles()
+        logger.info(f"Resolved {resolved} due cabal battles")
+        return True
+    except Exception as e:
+        logger.error(f"Error resolving cabal battles: {str(e)}")
+        return False
+
+def run_tournament_rounds():
+    """
+    Resolve the next round of every unfinished tournament.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        from app.utils.tournament import advance_tournaments
+        
+        advanced = advance_tournaments()
+        if advanced:
+            logger.info(f"Advanced {advanced} tournaments by one round")
+        return True
+    except Exception as e:
+        logger.error(f"Error advancing tournaments: {str(e)}")
+        return False
+
+def reconcile_cabal_aggregates():
+    """
+    Verify and repair the persisted member counts and power of every cabal.
+    
+    add_member, remove_member and power changes keep the aggregate columns
+    up to date; this catches any drift from writes that bypassed them.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        repaired = Cabal.reconcile_aggregates()
+        logger.info(f"Cabal aggregate reconciliation repaired {repaired} cabals")
+        return True
+    except Exception as e:
+        logger.error(f"Error reconciling cabal aggregates: {str(e)}")
+        db.session.rollback()
+        return False
+
 def update_cabal_rankings():
     """
     Update the rankings of all cabals.
     
     This function:
-    1. Recalculates the total power of each cabal
-    2. Updates their rank on the leaderboard
-    3. Records analytics data for each cabal
+    1. Computes every active cabal's power and dense rank in one query
+    2. Writes the power and ranks back with one bulk update
+    3. Records analytics snapshots for every cabal with one bulk insert
+    
+    The number of queries is fixed, however many cabals there are.
     
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # Get all active cabals
-        cabals = Cabal.query.filter_by(is_active=True).all()
+        rankings = Cabal.compute_rankings()
         
-        # Update power and rank for each cabal
-        for cabal in cabals:
-            # Recalculate total power
-            cabal.calculate_total_power()
-            
-            # Update rank
-            cabal.update_rank()
-            
-            # Record analytics snapshot
-            CabalAnalytics.create_snapshot(cabal.id)
+        Cabal.apply_rankings(rankings)
+        CabalAnalytics.bulk_create_snapshots(rankings)
         
         # Commit all changes
         db.session.commit()
         
+        logger.info(f"Updated rankings for {len(rankings)} cabals")
+        
+        prune_cabal_analytics()
         return True
     except Exception as e:
         logger.error(f"Error updating cabal rankings: {str(e)}")
         db.session.rollback()
         return False
 
+def prune_cabal_analytics():
+    """
+    Delete cabal analytics snapshots and rollups past their retention.
+    
+    Raw snapshots are already folded into the rollups, so history stays
+    available at a coarser resolution.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        deleted = CabalAnalytics.prune()
+        db.session.commit()
+        
+        if deleted:
+            logger.info(f"Pruned {deleted} expired cabal analytics rows")
+        return True
+    except Exception as e:
+        logger.error(f"Error pruning cabal analytics: {str(e)}")
+        db.session.rollback()
+        return False
+
+def prune_mention_inbox():
+    """
+    Delete handled mentions from the bot's inbox once they are past retention.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        from flask import current_app
+        from app.models.tweet_tracker import MentionInbox
+        
+        deleted = MentionInbox.prune(days=current_app.config.get('MENTION_INBOX_RETENTION_DAYS', 7))
+        db.session.commit()
+        
+        if deleted:
+            logger.info(f"Pruned {deleted} handled mentions from the inbox")
+        return True
+    except Exception as e:
+        logger.error(f"Error pruning mention inbox: {str(e)}")
+        db.session.rollback()
+        return False
+
+def prune_twitter_lookup_cache():
+    """
+    Delete cached Twitter lookups that are too stale to serve.
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        from app.models.tweet_tracker import TwitterLookupCache
+        
+        deleted = TwitterLookupCache.prune()
+        db.session.commit()
+        
+        if deleted:
+            logger.info(f"Pruned {deleted} stale Twitter lookups from the cache")
+        return True
+    except Exception as e:
+        logger.error(f"Error pruning Twitter lookup cache: {str(e)}")
+        db.session.rollback()
+        return False
+
+def record_stats_tweet(tweet_id):
+    """
+    Store a posted stats tweet's ID so replies to it are processed later.
+    
+    Called by the outbound scheduler once the tweet is posted.
+    
+    Args:
+        tweet_id (str): The ID of the posted tweet
+    """
+    from app.models.tweet_tracker import TweetTracker
+    
+    try:
+        tracker = TweetTracker(
+            tweet_id=tweet_id,
+            tweet_type="stats_update",
+            replied_to=False,
+            created_at=datetime.utcnow()
+        )
+        
+        db.session.add(tracker)
+        db.session.commit()
+        
+        logger.info(f"Stored stats tweet ID {tweet_id} for reply processing")
+    except Exception as e:
+        logger.error(f"Error storing stats tweet ID {tweet_id}: {str(e)}")
+        db.session.rollback()
+
 def post_game_stats_update():
     """
     Post game statistics update to Twitter.
     
     This function:
     1. Generates a tweet with interesting game statistics
-    2. Posts the tweet to the @RollMasterChad account
-    3. Stores the tweet ID for later reply processing
+    2. Queues it on the outbound scheduler for the @RollMasterChad account
+    3. Has its ID stored for later reply processing once it is posted
     
     Returns:
         bool: True if successful, False otherwise
     """
     try:
         from app.utils.twitter_api import post_automated_stats_tweet
-        from app.models.tweet_tracker import TweetTracker
-        from app import db
-        import time
         
-        # Post the automated stats tweet
-        result = post_automated_stats_tweet()
+        # Queue the automated stats tweet
+        result = post_automated_stats_tweet(on_sent=record_stats_tweet)
         
         if not result:
-            logger.error("Failed to post automated stats tweet")
+            logger.error("Failed to queue automated stats tweet")
             return False
         
-        logger.info("Successfully posted game stats update to Twitter")
-        
-        # Wait a moment for Twitter to process the tweet
-        time.sleep(2)
-        
-        # Store the tweet ID for processing replies later
-        # This requires checking the most recent tweet from our account
-        from app.utils.twitter_api import get_twitter_api
-        api = get_twitter_api()
-        
-        if api:
-            try:
-                # Get our own timeline
-                tweets = api.user_timeline(screen_name="RollMasterChad", count=1)
-                if tweets:
-                    latest_tweet = tweets[0]
-                    tweet_id = latest_tweet.id_str
-                    
-                    # Store this tweet ID in our database
-                    tracker = TweetTracker(
-                        tweet_id=tweet_id,
-                        tweet_type="stats_update",
-                        replied_to=False,
-                        created_at=datetime.utcnow()
-                    )
-                    
-                    db.session.add(tracker)
-                    db.session.commit()
-                    
-                    logger.info(f"Stored stats tweet ID {tweet_id} for reply processing")
-            except Exception as e:
-                logger.error(f"Error retrieving or storing tweet ID: {str(e)}")
-        
+        logger.info("Queued game stats update for Twitter")
         return True
     except Exception as e:
         logger.error(f"Error posting game stats update: {str(e)}")
@@ -249,13 +341,9 @@ def process_tweet_replies():
             replies_processed = handle_automated_tweet_replies(tweet.tweet_id)
             logger.info(f"Processed {replies_processed} replies for tweet {tweet.tweet_id}")
             
-            # Mark as processed
+            # Mark as processed (the replies are paced by the outbound scheduler)
             tweet.replied_to = True
             db.session.commit()
-            
-            # Sleep to respect rate limits
-            if len(pending_tweets) > 1:
-                time.sleep(30)
         
         return True
     except Exception as e:
@@ -269,7 +357,7 @@ def post_promotional_tweet():
     This function:
     1. Generates a promotional tweet with instructions on playing the game
     2. Occasionally includes donation information
-    3. Posts the tweet to the @RollMasterChad account
+    3. Queues the tweet for the @RollMasterChad account
     
     Returns:
         bool: True if successful, False otherwise
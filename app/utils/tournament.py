@@ -0,0 +1,318 @@
+"""
+Tournament bracket engine for Chad Battles.
+
+Brackets are seeded from Chad battle power (stats are frozen at seeding time),
+then resolved round by round. The matches of a round are independent, so they
+are replayed across a process pool from plain data only; workers never touch
+the database. Each round's results, eliminations and rewards are then written
+in a single batched commit, and every match updates the Chads' ratings and
+battle counters just as a regular battle does.
+"""
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models.chad import Chad
+from app.models.tournament import Tournament, TournamentEntry, TournamentMatch, TournamentStatus
+from app.utils.battle_resolver import calculate_battle_power, apply_battle_rewards, record_match_result, STAT_NAMES
+from app.utils.leaderboard import battle_leaderboard
+from app.utils.battle_replay import new_battle_seed, encode_replay, replay_auto_battle, REPLAY_AUTO
+
+logger = logging.getLogger(__name__)
+
+# Rounds with fewer matches than this are resolved in-process; below it the
+# cost of starting workers outweighs the work
+PARALLEL_MATCH_THRESHOLD = 256
+
+def get_bracket_size(entrant_count):
+    """Get the smallest power of two that fits every entrant."""
+    size = 1
+    while size < entrant_count:
+        size *= 2
+    return max(size, 2)
+
+def get_bracket_order(bracket_size):
+    """
+    Get the seed placed in each bracket slot.
+
+    Standard seeding: seed 1 meets the lowest seed, and seeds 1 and 2 can
+    only meet in the final.
+
+    Returns:
+        list: Seed numbers (1-based) in slot order
+    """
+    order = [1]
+    while len(order) < bracket_size:
+        size = len(order) * 2
+        order = [seed for top in order for seed in (top, size + 1 - top)]
+    return order
+
+def create_tournament(name, chad_ids):
+    """
+    Create a tournament and seed its bracket by battle power.
+
+    Every entrant's stats are loaded with one bulk query and frozen on the
+    entry, so the bracket is resolved with the stats it was seeded with.
+
+    Args:
+        name: Tournament name
+        chad_ids: IDs of the entering Chads
+
+    Returns:
+        Tournament: The new tournament, or None on failure
+    """
+    chad_ids = list(dict.fromkeys(chad_ids))
+    if len(chad_ids) < 2:
+        raise ValueError("A tournament needs at least two entrants")
+
+    try:
+        stats = Chad.get_total_stats_bulk(chad_ids)
+        ranked = sorted(
+            (chad_id for chad_id in chad_ids if chad_id in stats),
+            key=lambda chad_id: (-calculate_battle_power(stats[chad_id]), chad_id)
+        )
+
+        bracket_size = get_bracket_size(len(ranked))
+        slot_by_seed = {seed: slot for slot, seed in enumerate(get_bracket_order(bracket_size))}
+
+        tournament = Tournament(
+            name=name,
+            status=TournamentStatus.PENDING.value,
+            bracket_size=bracket_size,
+            entrant_count=len(ranked)
+        )
+        db.session.add(tournament)
+
+        for rank, chad_id in enumerate(ranked, start=1):
+            snapshot = stats[chad_id]
+            tournament.entries.append(TournamentEntry(
+                chad_id=chad_id,
+                seed_rank=rank,
+                bracket_slot=slot_by_seed[rank],
+                power=calculate_battle_power(snapshot),
+                **{stat: snapshot[stat] for stat in STAT_NAMES}
+            ))
+
+        db.session.commit()
+        logger.info(f"Created tournament {tournament.id} with {len(ranked)} entrants")
+        return tournament
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating tournament {name}: {str(e)}")
+        return None
+
+def create_top_rated_tournament(name, size):
+    """
+    Create a tournament for the highest-rated Chads.
+
+    Args:
+        name: Tournament name
+        size: Number of entrants
+
+    Returns:
+        Tournament: The new tournament, or None on failure
+    """
+    chad_ids = [
+        chad_id for chad_id, in db.session.query(Chad.id).order_by(Chad.rating.desc(), Chad.id).limit(size)
+    ]
+    return create_tournament(name, chad_ids)
+
+def pair_round(entries, round_number):
+    """
+    Pair the surviving entries for a round.
+
+    After r rounds exactly one entrant survives in each block of 2^r slots,
+    so the round's matches are the blocks of 2^round_number slots.
+
+    Args:
+        entries: Surviving TournamentEntry objects
+        round_number: 1-based round number
+
+    Returns:
+        list: (position, entry, opponent_entry or None) tuples in bracket order
+    """
+    blocks = defaultdict(list)
+    for entry in entries:
+        blocks[entry.bracket_slot >> round_number].append(entry)
+
+    pairs = []
+    for position in sorted(blocks):
+        block = sorted(blocks[position], key=lambda entry: entry.bracket_slot)
+        if len(block) > 2:
+            raise ValueError(f"Bracket block {position} has {len(block)} survivors in round {round_number}")
+        pairs.append((position, block[0], block[1] if len(block) == 2 else None))
+    return pairs
+
+def _resolve_match_chunk(chunk):
+    """Replay a chunk of matches. Runs in a worker process; plain data only."""
+    return [replay_auto_battle(seed, initiator_stats, opponent_stats)
+            for seed, initiator_stats, opponent_stats in chunk]
+
+def resolve_matches(matches, workers=None):
+    """
+    Resolve independent matches, across a process pool for large rounds.
+
+    Args:
+        matches: List of (seed, initiator_stats, opponent_stats) tuples
+        workers: Number of worker processes (None/0 = one per CPU)
+
+    Returns:
+        list: replay_auto_battle() results, in the same order as matches
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(matches) < PARALLEL_MATCH_THRESHOLD:
+        return _resolve_match_chunk(matches)
+
+    chunk_size = -(-len(matches) // workers)
+    chunks = [matches[i:i + chunk_size] for i in range(0, len(matches), chunk_size)]
+
+    try:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            return [result for chunk in executor.map(_resolve_match_chunk, chunks) for result in chunk]
+    except Exception as e:
+        # Results are deterministic per seed, so falling back is always safe
+        logger.warning(f"Process pool unavailable, resolving {len(matches)} matches in-process: {str(e)}")
+        return _resolve_match_chunk(matches)
+
+def run_tournament_round(tournament, workers=None):
+    """
+    Resolve the next round of a tournament.
+
+    Matches are resolved in parallel, then the match records, eliminations,
+    rating and battle counter updates and rewards for the whole round are
+    written in one commit.
+
+    Args:
+        tournament: Tournament to advance
+        workers: Number of worker processes (defaults to TOURNAMENT_WORKERS)
+
+    Returns:
+        int: Number of matches resolved, or None on failure
+    """
+    if tournament.is_finished:
+        return 0
+
+    if workers is None:
+        workers = current_app.config.get('TOURNAMENT_WORKERS', 0)
+
+    round_number = tournament.current_round + 1
+
+    try:
+        entries = tournament.entries.filter(TournamentEntry.eliminated_round.is_(None)).all()
+        pairs = pair_round(entries, round_number)
+
+        contested = [(position, entry, opponent) for position, entry, opponent in pairs if opponent is not None]
+        seeds = [new_battle_seed() for _ in contested]
+
+        results = resolve_matches([
+            (seed, entry.get_stats(), opponent.get_stats())
+            for seed, (_, entry, opponent) in zip(seeds, contested)
+        ], workers=workers)
+        results_by_position = {
+            position: (seed, result)
+            for seed, result, (position, _, _) in zip(seeds, results, contested)
+        }
+
+        # One query for every Chad (and user) that gets a reward this round
+        chads = {
+            chad.id: chad
+            for chad in Chad.query.options(joinedload(Chad.user)).filter(
+                Chad.id.in_([chad_id for _, entry, opponent in contested for chad_id in (entry.chad_id, opponent.chad_id)])
+            ).all()
+        } if contested else {}
+
+        now = datetime.utcnow()
+        matches = []
+        for position, entry, opponent in pairs:
+            if opponent is None:
+                matches.append(TournamentMatch(
+                    tournament_id=tournament.id, round=round_number, position=position,
+                    initiator_id=entry.chad_id, opponent_id=None, winner_id=entry.chad_id,
+                    completed_at=now
+                ))
+                continue
+
+            seed, result = results_by_position[position]
+            winner, loser = (entry, opponent) if result['initiator_won'] else (opponent, entry)
+            loser.eliminated_round = round_number
+
+            matches.append(TournamentMatch(
+                tournament_id=tournament.id, round=round_number, position=position,
+                initiator_id=entry.chad_id, opponent_id=opponent.chad_id, winner_id=winner.chad_id,
+                seed=seed,
+                replay_data=encode_replay(REPLAY_AUTO, entry.get_stats(), opponent.get_stats()),
+                xp_reward=result['winner_xp'],
+                chadcoin_reward=result['winner_reward'],
+                completed_at=now
+            ))
+
+            winner_chad, loser_chad = chads[winner.chad_id], chads[loser.chad_id]
+            record_match_result(winner_chad, loser_chad)
+            apply_battle_rewards(
+                winner_chad, loser_chad,
+                result['winner_xp'], result['loser_xp'], result['winner_reward']
+            )
+
+        db.session.add_all(matches)
+
+        tournament.current_round = round_number
+        if tournament.started_at is None:
+            tournament.started_at = now
+            tournament.status = TournamentStatus.IN_PROGRESS.value
+
+        if len(pairs) == 1:
+            tournament.winner_chad_id = matches[0].winner_id
+            tournament.status = TournamentStatus.COMPLETED.value
+            tournament.completed_at = now
+
+        db.session.commit()
+
+        logger.info(f"Tournament {tournament.id}: resolved round {round_number} ({len(contested)} matches)")
+        return len(contested)
+    except Exception as e:
+        db.session.rollback()
+        # Counters recorded before the rollback were applied to the index too
+        battle_leaderboard.invalidate()
+        logger.error(f"Error resolving round {round_number} of tournament {tournament.id}: {str(e)}")
+        return None
+
+def run_tournament(tournament, workers=None):
+    """
+    Resolve every remaining round of a tournament.
+
+    Returns:
+        int: Winning Chad ID, or None if a round failed
+    """
+    while not tournament.is_finished:
+        if run_tournament_round(tournament, workers=workers) is None:
+            return None
+    return tournament.winner_chad_id
+
+def advance_tournaments(workers=None):
+    """
+    Resolve the next round of every unfinished tournament.
+
+    One round per call, so a bracket plays out over several runs of the
+    bot loop rather than all at once.
+
+    Returns:
+        int: Number of tournaments advanced
+    """
+    advanced = 0
+    tournaments = Tournament.query.filter(
+        Tournament.status != TournamentStatus.COMPLETED.value
+    ).order_by(Tournament.id).all()
+
+    for tournament in tournaments:
+        if run_tournament_round(tournament, workers=workers) is not None:
+            advanced += 1
+            if tournament.is_finished:
+                logger.info(f"Tournament {tournament.id} won by Chad {tournament.winner_chad_id}")
+
+    return advanced
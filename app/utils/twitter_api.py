@@ -7,49 +7,61 @@ import os
 import tweepy
 from datetime import datetime, timedelta
 import random
-import time
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
 def get_twitter_api():
     """
-    Get a Twitter API client.
+    Get the process's pooled Twitter API client.
+    
+    The client is built once per set of credentials and reused, keeping its
+    HTTP connections and rate-limit state (see app.utils.twitter_client).
     
     Returns:
         tweepy.API: Twitter API client or None if configuration is missing
     """
     try:
-        # Get Twitter API credentials from environment variables
-        api_key = os.environ.get('TWITTER_API_KEY')
-        api_secret = os.environ.get('TWITTER_API_SECRET')
-        access_token = os.environ.get('TWITTER_ACCESS_TOKEN')
-        access_token_secret = os.environ.get('TWITTER_ACCESS_TOKEN_SECRET')
-        
-        # Check if credentials are available
-        if not all([api_key, api_secret, access_token, access_token_secret]):
-            logger.warning("Twitter API credentials not found in environment variables")
-            return None
-        
-        # Set up authentication
-        auth = tweepy.OAuth1UserHandler(
-            api_key, api_secret, access_token, access_token_secret
-        )
+        from app.utils.twitter_client import get_twitter_client
         
-        # Create API client
-        api = tweepy.API(auth)
-        
-        return api
+        client = get_twitter_client()
+        return client.api if client else None
     except Exception as e:
         logger.error(f"Error creating Twitter API client: {e}")
         return None
 
+def can_afford_twitter_call(endpoint, calls=1):
+    """
+    Check whether a Twitter endpoint has quota left for the given number of calls.
+    
+    Args:
+        endpoint (str): Endpoint name, e.g. 'statuses/mentions_timeline'
+        calls (int): Number of calls about to be made
+        
+    Returns:
+        bool: True if the calls fit in the endpoint's current rate-limit window
+              (or its limit is not known yet)
+    """
+    from app.utils.twitter_client import get_twitter_client
+    
+    client = get_twitter_client()
+    if client is None or client.can_afford(endpoint, calls):
+        return True
+    
+    logger.warning(
+        f"Skipping {endpoint}: rate limit spent, resets in "
+        f"{client.rate_limits.seconds_until_reset(endpoint):.0f}s"
+    )
+    return False
+
 def get_user_profile(username):
     """Get a user's profile data from Twitter"""
     try:
         api = get_twitter_api()
         if not api:
             return None
+        if not can_afford_twitter_call('users/show'):
+            return None
         
         user = api.get_user(screen_name=username)
         return user._json
@@ -57,47 +69,114 @@ def get_user_profile(username):
         logger.error(f"Error getting user profile for {username}: {str(e)}")
         return None
 
-def get_user_tweets(username, count=50):
-    """Get a user's recent tweets"""
+# Most tweets one user_timeline call returns, and most the API will page back through
+TIMELINE_PAGE_SIZE = 200
+TIMELINE_MAX_TWEETS = 3200
+
+def get_user_tweets(username, count=None):
+    """
+    Get a user's recent tweets, paging back through the timeline as needed.
+    
+    Args:
+        username (str): The user's screen name
+        count (int): Number of tweets, at most 3200; defaults to TWEET_ANALYSIS_COUNT
+    
+    Returns:
+        list: Tweet JSON, newest first
+    """
     try:
         api = get_twitter_api()
         if not api:
             return []
         
-        tweets = api.user_timeline(screen_name=username, count=count, tweet_mode='extended')
-        return [tweet._json for tweet in tweets]
+        if count is None:
+            from flask import current_app
+            count = current_app.config.get('TWEET_ANALYSIS_COUNT', TIMELINE_PAGE_SIZE)
+        count = min(count, TIMELINE_MAX_TWEETS)
+        
+        tweets = []
+        max_id = None
+        while len(tweets) < count:
+            if not can_afford_twitter_call('statuses/user_timeline'):
+                break
+            
+            page_kwargs = {'screen_name': username, 'count': min(TIMELINE_PAGE_SIZE, count - len(tweets)), 'tweet_mode': 'extended'}
+            if max_id is not None:
+                page_kwargs['max_id'] = max_id
+            page = api.user_timeline(**page_kwargs)
+            if not page:
+                break
+            
+            tweets.extend(tweet._json for tweet in page)
+            max_id = page[-1].id - 1
+        return tweets
     except Exception as e:
         logger.error(f"Error getting tweets for {username}: {str(e)}")
         return []
 
+# Keywords reported in the analysis and used for base stats
+STAT_KEYWORDS = [
+    'meme', 'pepe', 'wojak', 'crypto', 'nft', 'hodl', 'moon', 'alpha', 'chad',
+    'based', 'sigma', 'ratio', 'king', 'gigachad', 'normie', 'gm', 'wagmi',
+    'ngmi', 'bullish', 'bearish', 'fud', 'dyor', 'btc', 'eth', 'solana',
+    'defi', 'staking', 'gym', 'debate', 'investing', 'diamond hands'
+]
+
+# Keywords scoring each regular Chad Class
+CLASS_KEYWORDS = {
+    'Meme Overlord': ['meme', 'pepe', 'wojak'],
+    'Crypto Knight': ['crypto', 'nft', 'hodl', 'moon'],
+    'Alpha Chad': ['alpha', 'chad', 'based'],
+    'Sigma Grindset': ['sigma', 'based', 'grind'],
+    'Ratio King': ['ratio', 'based', 'chad'],
+    'KOL': ['opinion', 'leader', 'influence', 'trend'],
+    'Tech Bro': ['startup', 'disrupt', 'scale', 'tech'],
+    'Gym Rat': ['gym', 'protein', 'lift', 'gains'],
+    'Debate Lord': ['debate', 'argument', 'logic', 'fallacy'],
+    'Diamond Hands': ['hodl', 'diamond', 'hands', 'hold'],
+    'Lore Master': ['lore', 'history', 'knowledge', 'facts']
+}
+
+BLOCKCHAIN_DETECTIVE_KEYWORDS = ['onchain', 'blockchain', 'detective', 'investigation', 'forensics', 'sleuth']
+
+def _build_tweet_keyword_scanner():
+    from app.utils.keyword_scanner import KeywordScanner
+
+    keywords = set(STAT_KEYWORDS) | set(BLOCKCHAIN_DETECTIVE_KEYWORDS)
+    for class_keywords in CLASS_KEYWORDS.values():
+        keywords.update(class_keywords)
+    return KeywordScanner(keywords)
+
+# Built once; counts every stat and class keyword in one scan of each tweet
+TWEET_KEYWORD_SCANNER = _build_tweet_keyword_scanner()
+
+# Bump whenever analyze_tweets would score the same tweets differently, so
+# cached analyses are redone (from cached timelines) rather than reused
+ANALYSIS_VERSION = '2'
+
 def analyze_tweets(tweets):
     """Analyze a user's tweets to determine their Chad Class and stats"""
-    # Count occurrences of various keywords
+    from app.utils.keyword_scanner import timestamp_key
+    
+    # Number of tweets each keyword appears in, and the earliest of them
     keyword_counts = {}
-    keywords = [
-        'meme', 'pepe', 'wojak', 'crypto', 'nft', 'hodl', 'moon', 'alpha', 'chad',
-        'based', 'sigma', 'ratio', 'king', 'gigachad', 'normie', 'gm', 'wagmi',
-        'ngmi', 'bullish', 'bearish', 'fud', 'dyor', 'btc', 'eth', 'solana',
-        'defi', 'staking', 'gym', 'debate', 'investing', 'diamond hands'
-    ]
+    keyword_first_seen = {}
+    timestamp_keys = []
     
     for tweet in tweets:
-        text = tweet.get('text', '').lower()
-        created_at = datetime.strptime(tweet.get('created_at', ''), '%a %b %d %H:%M:%S +0000 %Y')
-        
-        # Process each keyword
-        for keyword in keywords:
-            if keyword in text:
-                if keyword not in keyword_counts:
-                    keyword_counts[keyword] = {
-                        'count': 0,
-                        'timestamps': []
-                    }
-                keyword_counts[keyword]['count'] += 1
-                keyword_counts[keyword]['timestamps'].append(created_at)
+        text = tweet.get('full_text') or tweet.get('text', '')
+        # Timestamps stay as sortable strings; only the earliest is ever parsed
+        key = timestamp_key(tweet.get('created_at'))
+        if key:
+            timestamp_keys.append(key)
+        
+        for keyword in TWEET_KEYWORD_SCANNER.scan(text):
+            keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
+            if key and (keyword not in keyword_first_seen or key < keyword_first_seen[keyword]):
+                keyword_first_seen[keyword] = key
     
     # Check for account age and tweet distribution
-    account_age, tweet_distribution, is_suspicious = analyze_account_behavior(tweets, keyword_counts)
+    account_age, tweet_distribution, is_suspicious = analyze_account_behavior(timestamp_keys, keyword_first_seen)
     
     # Determine Chad Class based on keyword frequencies, account age, and distribution
     chad_class = determine_chad_class(keyword_counts, account_age, tweet_distribution, is_suspicious)
@@ -108,7 +187,7 @@ def analyze_tweets(tweets):
     return {
         'chad_class': chad_class,
         'base_stats': base_stats,
-        'keyword_analysis': {k: v['count'] for k, v in keyword_counts.items()},
+        'keyword_analysis': keyword_counts,
         'account_metadata': {
             'age_days': account_age,
             'distribution_score': tweet_distribution,
@@ -116,22 +195,25 @@ def analyze_tweets(tweets):
         }
     }
 
-def analyze_account_behavior(tweets, keyword_counts):
-    """Analyze account age and tweet distribution for suspicious patterns"""
-    from datetime import datetime, timedelta
+def analyze_account_behavior(timestamp_keys, keyword_first_seen):
+    """
+    Analyze account age and tweet distribution for suspicious patterns.
+    
+    Args:
+        timestamp_keys (list): timestamp_key of every tweet
+        keyword_first_seen (dict): Keyword to the timestamp_key of its earliest tweet
+    
+    Returns:
+        tuple: (account age in days, distribution score, whether the pattern is suspicious)
+    """
+    from app.utils.keyword_scanner import datetime_for_key, key_for_datetime
     
     # Get current time
     now = datetime.utcnow()
     
-    # Calculate account age
-    if tweets and len(tweets) > 0:
-        # Get the earliest tweet
-        created_at_str = min(tweets, key=lambda x: x.get('created_at', '')).get('created_at', '')
-        if created_at_str:
-            created_at = datetime.strptime(created_at_str, '%a %b %d %H:%M:%S +0000 %Y')
-            account_age = (now - created_at).days
-        else:
-            account_age = 0
+    # Calculate account age from the earliest tweet
+    if timestamp_keys:
+        account_age = (now - datetime_for_key(min(timestamp_keys))).days
     else:
         account_age = 0
     
@@ -140,30 +222,20 @@ def analyze_account_behavior(tweets, keyword_counts):
     tweet_distribution = 1.0  # 1.0 means evenly distributed
     
     # Check for suspicious patterns
-    if keyword_counts:
-        # Check if all keywords were used in the last week
-        recent_threshold = now - timedelta(days=7)
-        
-        # Count keywords with timestamps
-        keywords_with_timestamps = [k for k, v in keyword_counts.items() if 'timestamps' in v and v['timestamps']]
-        
-        if keywords_with_timestamps:
-            # Calculate percentage of keywords that only appear in recent tweets
-            recent_only_keywords = 0
-            for keyword, data in keyword_counts.items():
-                if 'timestamps' in data and data['timestamps']:
-                    if all(ts > recent_threshold for ts in data['timestamps']):
-                        recent_only_keywords += 1
+    if keyword_first_seen:
+        # Keywords whose earliest use was in the last week only appear in recent tweets
+        recent_threshold = key_for_datetime(now - timedelta(days=7))
+        recent_only_keywords = sum(1 for key in keyword_first_seen.values() if key > recent_threshold)
+        
+        if recent_only_keywords > 0:
+            recent_keyword_percentage = recent_only_keywords / len(keyword_first_seen)
             
-            if recent_only_keywords > 0:
-                recent_keyword_percentage = recent_only_keywords / len(keywords_with_timestamps)
-                
-                # If more than 80% of keywords only appear in recent tweets, flag as suspicious
-                if recent_keyword_percentage > 0.8 and len(keywords_with_timestamps) > 3:
-                    is_suspicious = True
-                    tweet_distribution = 0.2
-                elif recent_keyword_percentage > 0.5:
-                    tweet_distribution = 0.5
+            # If more than 80% of keywords only appear in recent tweets, flag as suspicious
+            if recent_keyword_percentage > 0.8 and len(keyword_first_seen) > 3:
+                is_suspicious = True
+                tweet_distribution = 0.2
+            elif recent_keyword_percentage > 0.5:
+                tweet_distribution = 0.5
     
     return account_age, tweet_distribution, is_suspicious
 
@@ -186,31 +258,15 @@ def determine_chad_class(keyword_counts, account_age=None, tweet_distribution=No
         return "Exit Liquidity"
     
     # 3. Check for Blockchain Detective (rare class)
-    blockchain_detective_keywords = ['onchain', 'blockchain', 'detective', 'investigation', 'forensics', 'sleuth']
-    blockchain_detective_score = sum(keyword_counts_simple.get(keyword, 0) for keyword in blockchain_detective_keywords)
+    blockchain_detective_score = sum(keyword_counts_simple.get(keyword, 0) for keyword in BLOCKCHAIN_DETECTIVE_KEYWORDS)
     
     if blockchain_detective_score >= 10 and account_age and account_age > 365:
         # Only assign if they have been active for over a year and have significant relevant content
         return "Blockchain Detective"
     
-    # Define class criteria for regular classes
-    class_criteria = {
-        'Meme Overlord': ['meme', 'pepe', 'wojak'],
-        'Crypto Knight': ['crypto', 'nft', 'hodl', 'moon'],
-        'Alpha Chad': ['alpha', 'chad', 'based'],
-        'Sigma Grindset': ['sigma', 'based', 'grind'],
-        'Ratio King': ['ratio', 'based', 'chad'],
-        'KOL': ['opinion', 'leader', 'influence', 'trend'],
-        'Tech Bro': ['startup', 'disrupt', 'scale', 'tech'],
-        'Gym Rat': ['gym', 'protein', 'lift', 'gains'],
-        'Debate Lord': ['debate', 'argument', 'logic', 'fallacy'],
-        'Diamond Hands': ['hodl', 'diamond', 'hands', 'hold'],
-        'Lore Master': ['lore', 'history', 'knowledge', 'facts']
-    }
-    
     # Score each class
     class_scores = {}
-    for class_name, keywords in class_criteria.items():
+    for class_name, keywords in CLASS_KEYWORDS.items():
         score = sum(keyword_counts_simple.get(keyword, 0) for keyword in keywords)
         
         # Apply tweet distribution factor if available
@@ -266,12 +322,22 @@ def calculate_base_stats(tweets, keyword_counts):
         'drip_factor': drip_factor
     }
 
-def calculate_clout(user_id):
-    """Calculate Clout stat based on follower network strength"""
+# Clout given when the follower network can't be measured
+DEFAULT_CLOUT = 5
+
+def fetch_clout(user_id):
+    """
+    Measure Clout from the user's follower network.
+    
+    Returns:
+        int: Clout from 0 to 100, or None if it couldn't be measured
+    """
     try:
         api = get_twitter_api()
         if not api:
-            return 0
+            return None
+        if not can_afford_twitter_call('followers/list'):
+            return None
         
         # Get user followers (limited to 200 by Twitter API)
         followers = api.get_followers(user_id=user_id, count=200)
@@ -280,12 +346,15 @@ def calculate_clout(user_id):
         total_followers_of_followers = sum(follower.followers_count for follower in followers)
         
         # Normalize the value
-        clout = min(100, int(total_followers_of_followers / 10000))
-        
-        return clout
+        return min(100, int(total_followers_of_followers / 10000))
     except Exception as e:
         logger.error(f"Error calculating clout for user {user_id}: {str(e)}")
-        return 5  # Default value
+        return None
+
+def calculate_clout(user_id):
+    """Calculate Clout stat based on follower network strength"""
+    clout = fetch_clout(user_id)
+    return DEFAULT_CLOUT if clout is None else clout
 
 def post_tweet(message):
     """
@@ -334,6 +403,8 @@ def monitor_mentions(since_id=None):
         api = get_twitter_api()
         if not api:
             return []
+        if not can_afford_twitter_call('statuses/mentions_timeline'):
+            return []
         
         if since_id:
             mentions = api.mentions_timeline(since_id=since_id, tweet_mode='extended')
@@ -465,40 +536,51 @@ def share_referral_invitation(cabal_name, referrer_username, invite_code, cabal_
     message = f"🔗 Join my cabal '{cabal_name}' in #ChadBattles! Use this link to get started: {referral_link} #GamersUnite #CryptoGaming"
     return create_tweet(message)
 
+def render_weekly_leaderboard(cabal_data):
+    """
+    Render the weekly cabal leaderboard tweet.
+    
+    Args:
+        cabal_data (list): List of dictionaries containing cabal information
+            Each dictionary should have 'name', 'members', 'power', and 'rank' keys
+            
+    Returns:
+        str: The tweet text, or None if there is no cabal data
+    """
+    if not cabal_data:
+        return None
+    
+    # Format the current date
+    current_date = datetime.utcnow().strftime("%B %d, %Y")
+    
+    # Create the leaderboard message
+    message = f"🏆 Chad Battles Weekly Cabal Leaderboard - {current_date} 🏆\n\n"
+    
+    # Add the top cabals to the message
+    for medal, cabal in zip(("🥇", "🥈", "🥉"), cabal_data):  # Top 3 cabals
+        message += f"{medal} #{cabal['rank']} {cabal['name']} - {cabal['members']} Members - {cabal['power']} Power\n"
+    
+    # Add hashtags
+    message += "\n#ChadBattles #Cabal #WeeklyLeaderboard"
+    
+    return message
+
 def share_weekly_leaderboard(cabal_data):
     """
     Share the weekly cabal leaderboard on Twitter.
     
     Args:
-        cabal_data (list): List of dictionaries containing cabal information
-            Each dictionary should have 'name', 'level', 'power', and 'rank' keys
+        cabal_data (list): See render_weekly_leaderboard()
             
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        if not cabal_data or len(cabal_data) < 1:
+        message = render_weekly_leaderboard(cabal_data)
+        if not message:
             logger.warning("Cannot share leaderboard: No cabal data provided")
             return False
         
-        # Format the current date
-        current_date = datetime.utcnow().strftime("%B %d, %Y")
-        
-        # Create the leaderboard message
-        message = f"🏆 Chad Battles Weekly Cabal Leaderboard - {current_date} 🏆\n\n"
-        
-        # Add the top cabals to the message
-        for i, cabal in enumerate(cabal_data[:3]):  # Top 3 cabals
-            if i == 0:
-                message += f"🥇 #{cabal['rank']} {cabal['name']} - Level {cabal['level']} - {cabal['power']} Power\n"
-            elif i == 1:
-                message += f"🥈 #{cabal['rank']} {cabal['name']} - Level {cabal['level']} - {cabal['power']} Power\n"
-            elif i == 2:
-                message += f"🥉 #{cabal['rank']} {cabal['name']} - Level {cabal['level']} - {cabal['power']} Power\n"
-        
-        # Add hashtags
-        message += "\n#ChadBattles #Cabal #WeeklyLeaderboard"
-        
         # Post the tweet
         return post_tweet(message)
     except Exception as e:
@@ -699,25 +781,30 @@ def generate_reply_to_stats_tweet(mention):
     # If no keywords match, use a default response
     return random.choice(default_responses)
 
-def post_automated_stats_tweet():
+def post_automated_stats_tweet(on_sent=None):
     """
-    Generate and post an automated tweet with game statistics.
+    Generate an automated tweet with game statistics and queue it for posting.
     Should be called by a scheduled task.
     
+    Args:
+        on_sent: Called with the tweet's ID once the outbound scheduler posts it
+    
     Returns:
-        bool: True if the tweet was posted successfully, False otherwise
+        bool: True if the tweet was queued successfully, False otherwise
     """
     try:
+        from app.utils.outbound import schedule_tweet
+        
         # Generate tweet content
         message = generate_automated_tweet()
         
-        # Post the tweet
-        result = post_tweet(message)
+        # Queue the tweet
+        result = schedule_tweet(message, lane='stats', on_sent=on_sent)
         
         if result:
-            logger.info("Automated stats tweet posted successfully")
+            logger.info("Automated stats tweet queued")
         else:
-            logger.error("Failed to post automated stats tweet")
+            logger.warning("Identical automated stats tweet already queued")
             
         return result
     except Exception as e:
@@ -769,20 +856,19 @@ def handle_automated_tweet_replies(tweet_id):
         # Limit to 3 replies to avoid rate limits
         replies_to_process = priority_replies[:3]
         
-        # Generate and post replies
-        replies_posted = 0
+        # Generate replies; the outbound scheduler paces the posting
+        from app.utils.outbound import schedule_reply
+        
+        replies_queued = 0
         for reply in replies_to_process:
             reply_text = generate_reply_to_stats_tweet(reply)
             reply_id = reply.get('id_str')
             
-            # Post the reply
-            if post_reply(reply_text, reply_id):
-                replies_posted += 1
-                # Sleep to avoid rate limits
-                time.sleep(2)
+            if schedule_reply(reply_text, reply_id, lane='reply'):
+                replies_queued += 1
         
-        logger.info(f"Responded to {replies_posted} replies to automated tweet {tweet_id}")
-        return replies_posted
+        logger.info(f"Queued {replies_queued} responses to replies to automated tweet {tweet_id}")
+        return replies_queued
         
     except Exception as e:
         logger.error(f"Error handling replies to automated tweet: {str(e)}")
@@ -831,23 +917,25 @@ def generate_promotional_tweet():
 
 def post_promotional_tweet():
     """
-    Generate and post a promotional tweet about how to play the game.
+    Generate a promotional tweet about how to play the game and queue it for posting.
     Should be called by a scheduled task.
     
     Returns:
-        bool: True if the tweet was posted successfully, False otherwise
+        bool: True if the tweet was queued successfully, False otherwise
     """
     try:
+        from app.utils.outbound import schedule_tweet
+        
         # Generate tweet content
         message = generate_promotional_tweet()
         
-        # Post the tweet
-        result = post_tweet(message)
+        # Queue the tweet
+        result = schedule_tweet(message, lane='promo')
         
         if result:
-            logger.info("Promotional tweet posted successfully")
+            logger.info("Promotional tweet queued")
         else:
-            logger.error("Failed to post promotional tweet")
+            logger.warning("Identical promotional tweet already queued")
             
         return result
     except Exception as e:
@@ -0,0 +1,249 @@
+"""
+Cached Twitter lookups for character creation and stat refreshes.
+
+Profiles, timelines and Clout are kept in the twitter_lookup_cache table,
+keyed by user, each kind with its own TTL (TWITTER_*_CACHE_TTL). Once a
+value is past its TTL it is still served for TWITTER_CACHE_STALE_SECONDS
+while one background refresh (guarded by a lease in the table) fetches a
+new one, so retries and repeated requests never wait on, or spend, the
+rate limit for data that was fetched moments ago.
+
+Tweet analyses are cached too, tagged with ANALYSIS_VERSION and the
+timeline they came from. When the analysis code changes, the version no
+longer matches and the analysis is redone from the cached timeline, without
+fetching it again.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+PROFILE = 'profile'
+TIMELINE = 'timeline'
+CLOUT = 'clout'
+ANALYSIS = 'analysis'
+
+# Seconds each kind of lookup stays fresh, and the config keys overriding them
+DEFAULT_TTLS = {
+    PROFILE: 3600,
+    TIMELINE: 6 * 3600,
+    CLOUT: 24 * 3600
+}
+TTL_CONFIG_KEYS = {
+    PROFILE: 'TWITTER_PROFILE_CACHE_TTL',
+    TIMELINE: 'TWITTER_TIMELINE_CACHE_TTL',
+    CLOUT: 'TWITTER_CLOUT_CACHE_TTL'
+}
+DEFAULT_STALE_SECONDS = 7 * 86400
+
+# Tweet fields kept in cached timelines: what analyze_tweets reads. Full tweet
+# JSON (user object, entities, ...) is several KB a tweet, for up to 3200 tweets
+TIMELINE_FIELDS = ('id_str', 'full_text', 'text', 'created_at', 'favorite_count', 'retweet_count')
+
+# How long one refresh holds off the others
+REFRESH_LEASE_SECONDS = 120
+
+_refresh_pool = None
+_refreshes = set()
+_refresh_lock = threading.Lock()
+
+def cache_ttl(kind):
+    """Get the seconds a kind of lookup stays fresh."""
+    from flask import current_app
+    return current_app.config.get(TTL_CONFIG_KEYS[kind], DEFAULT_TTLS[kind])
+
+def cache_stale_seconds():
+    """Get the seconds a lookup may be served past its TTL while it is refreshed."""
+    from flask import current_app
+    return current_app.config.get('TWITTER_CACHE_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+
+def _lookup(kind, key):
+    """Get a servable cached value, or None (also if the cache is unavailable)."""
+    from app.extensions import db
+    from app.models.tweet_tracker import TwitterLookupCache
+
+    try:
+        return TwitterLookupCache.lookup(kind, key)
+    except Exception as e:
+        logger.warning(f"Twitter lookup cache unavailable: {str(e)}")
+        db.session.rollback()
+        return None
+
+def _store(kind, key, value, ttl, version=None):
+    """Cache a value. Returns its fetched_at (now, if it couldn't be cached)."""
+    from datetime import datetime
+    from app.extensions import db
+    from app.models.tweet_tracker import TwitterLookupCache
+
+    try:
+        return TwitterLookupCache.store(kind, key, value, ttl, cache_stale_seconds(), version)
+    except Exception as e:
+        logger.warning(f"Error caching {kind} for {key}: {str(e)}")
+        db.session.rollback()
+        return datetime.utcnow()
+
+def _refresh(app, kind, key, fetch):
+    """Fetch a new value for a stale lookup and cache it (runs on the refresh pool)."""
+    with app.app_context():
+        try:
+            value = fetch()
+            if value is None:
+                logger.warning(f"Couldn't refresh cached {kind} for {key}; serving the stale value")
+                return
+            _store(kind, key, value, cache_ttl(kind))
+            logger.info(f"Refreshed cached {kind} for {key}")
+        except Exception as e:
+            logger.error(f"Error refreshing cached {kind} for {key}: {str(e)}")
+
+def _schedule_refresh(kind, key, fetch):
+    """Refresh a stale lookup in the background, unless another refresh holds the lease."""
+    global _refresh_pool
+
+    from flask import current_app
+    from app.extensions import db
+    from app.models.tweet_tracker import TwitterLookupCache
+
+    try:
+        if not TwitterLookupCache.claim_refresh(kind, key, REFRESH_LEASE_SECONDS):
+            return
+    except Exception as e:
+        logger.warning(f"Couldn't claim refresh of cached {kind} for {key}: {str(e)}")
+        db.session.rollback()
+        return
+
+    app = current_app._get_current_object()
+    with _refresh_lock:
+        if _refresh_pool is None:
+            _refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='twitter-cache-refresh')
+        future = _refresh_pool.submit(_refresh, app, kind, key, fetch)
+        _refreshes.add(future)
+    future.add_done_callback(_refreshes.discard)
+
+def wait_for_refreshes(timeout=None):
+    """
+    Wait for background refreshes to finish (for short-lived processes and tests).
+
+    Returns:
+        bool: True if they all finished in time
+    """
+    with _refresh_lock:
+        pending = list(_refreshes)
+    if not pending:
+        return True
+    _, not_done = wait(pending, timeout=timeout)
+    return not not_done
+
+def cached_lookup(kind, key, fetch):
+    """
+    Get a lookup from the cache, fetching it on a miss.
+
+    A fresh value is returned as is. A stale one is returned too, and
+    refreshed in the background. On a miss the value is fetched now and
+    cached, unless the fetch fails.
+
+    Args:
+        kind (str): PROFILE, TIMELINE or CLOUT
+        key (str): The user it is for
+        fetch: Function fetching the value, returning None on failure
+
+    Returns:
+        tuple: (value, fetched_at), or (None, None) if it couldn't be fetched
+    """
+    cached = _lookup(kind, key)
+    if cached is not None:
+        if not cached['fresh']:
+            _schedule_refresh(kind, key, fetch)
+        return cached['value'], cached['fetched_at']
+
+    value = fetch()
+    if value is None:
+        return None, None
+    return value, _store(kind, key, value, cache_ttl(kind))
+
+def _user_key(user_id, username):
+    """Users are cached by their (stable) ID, or by screen name when it isn't known."""
+    return str(user_id) if user_id else username.lower()
+
+def get_cached_user_profile(username):
+    """
+    Get a user's profile, from the cache if possible.
+
+    Returns:
+        dict: The profile JSON, or None if it couldn't be fetched
+    """
+    from app.utils.twitter_api import get_user_profile
+
+    profile, _ = cached_lookup(PROFILE, username.lower(), lambda: get_user_profile(username))
+    return profile
+
+def get_cached_user_tweets(user_id, username):
+    """
+    Get a user's timeline, from the cache if possible.
+
+    Only the TIMELINE_FIELDS of each tweet are fetched into the cache.
+
+    Returns:
+        tuple: (tweets, fetched_at), or (None, None) if they couldn't be fetched
+    """
+    from app.utils.twitter_api import get_user_tweets
+
+    def fetch():
+        # An empty timeline is a failed fetch (private account, spent rate limit), not worth caching
+        tweets = get_user_tweets(username)
+        return compact_tweets(tweets) if tweets else None
+
+    return cached_lookup(TIMELINE, _user_key(user_id, username), fetch)
+
+def compact_tweets(tweets):
+    """Keep only the TIMELINE_FIELDS of each tweet."""
+    return [
+        {field: tweet[field] for field in TIMELINE_FIELDS if field in tweet}
+        for tweet in tweets
+    ]
+
+def get_cached_clout(user_id):
+    """
+    Get a user's Clout, from the cache if possible.
+
+    Returns:
+        int: Clout, or the default Clout if it couldn't be measured
+    """
+    from app.utils.twitter_api import fetch_clout, DEFAULT_CLOUT
+
+    if not user_id:
+        return DEFAULT_CLOUT
+    clout, _ = cached_lookup(CLOUT, str(user_id), lambda: fetch_clout(user_id))
+    return DEFAULT_CLOUT if clout is None else clout
+
+def get_cached_analysis(user_id, username):
+    """
+    Analyze a user's tweets, reusing the cached timeline and, when neither
+    it nor the analysis code has changed since, the cached analysis.
+
+    Args:
+        user_id (str): The user's Twitter ID
+        username (str): The user's screen name
+
+    Returns:
+        dict: The analyze_tweets() result, or None if the tweets couldn't be fetched
+    """
+    from app.utils.twitter_api import analyze_tweets, ANALYSIS_VERSION
+
+    key = _user_key(user_id, username)
+    tweets, timeline_fetched_at = get_cached_user_tweets(user_id, username)
+    if not tweets:
+        return None
+
+    timeline_stamp = timeline_fetched_at.isoformat()
+    cached = _lookup(ANALYSIS, key)
+    if (cached is not None and cached['version'] == ANALYSIS_VERSION
+            and cached['value'].get('timeline_fetched_at') == timeline_stamp):
+        return cached['value']['analysis']
+
+    analysis = analyze_tweets(tweets)
+    # Kept as long as the timeline it came from
+    _store(ANALYSIS, key, {'timeline_fetched_at': timeline_stamp, 'analysis': analysis},
+           cache_ttl(TIMELINE), version=ANALYSIS_VERSION)
+    return analysis
@@ -0,0 +1,200 @@
+"""
+Pooled Twitter API clients with rate-limit bookkeeping.
+
+get_twitter_client() hands out one client per set of credentials per
+process, instead of building a new auth handler and tweepy.API on every
+call. Each client keeps its HTTP session (and so its keep-alive
+connections) for the life of the process, and records the rate-limit
+headers of every response per endpoint. Callers can then ask
+client.can_afford('statuses/mentions_timeline') before spending a call.
+"""
+
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+import tweepy
+
+logger = logging.getLogger(__name__)
+
+API_PATH_PREFIX = '/1.1/'
+
+def endpoint_for_url(url):
+    """
+    Get the endpoint name rate limits are tracked under for a request URL.
+
+    '/1.1/statuses/mentions_timeline.json?since_id=1' -> 'statuses/mentions_timeline'
+    """
+    path = urlparse(url).path
+    if path.startswith(API_PATH_PREFIX):
+        path = path[len(API_PATH_PREFIX):]
+    if path.endswith('.json'):
+        path = path[:-len('.json')]
+    return path.strip('/')
+
+class KeepAliveSession(requests.Session):
+    """
+    A requests session that outlives tweepy's per-request close().
+
+    tweepy.API closes its session after every request, which drops the
+    pooled connections; this session only really closes on shutdown().
+    """
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        """Close the session's pooled connections."""
+        super().close()
+
+class RateLimitTracker:
+    """Remaining quota per endpoint, as reported by the x-rate-limit-* headers."""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, headers, status_code=None):
+        """
+        Record the rate-limit state reported with a response.
+
+        Args:
+            endpoint: Endpoint name (see endpoint_for_url)
+            headers: The response headers
+            status_code: The response status; a 429 means no calls are left
+        """
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        limit = headers.get('x-rate-limit-limit')
+
+        if remaining is None and status_code != 429:
+            return
+
+        with self._lock:
+            state = self._limits.setdefault(endpoint, {'limit': None, 'remaining': None, 'reset': None})
+            if remaining is not None:
+                state['remaining'] = int(remaining)
+            if status_code == 429:
+                state['remaining'] = 0
+            if reset is not None:
+                state['reset'] = int(reset)
+            if limit is not None:
+                state['limit'] = int(limit)
+
+    def remaining(self, endpoint):
+        """
+        Get the calls left on an endpoint in its current window.
+
+        Returns:
+            int: Calls left, or None if the endpoint has not reported a limit
+                 (or its window has reset since)
+        """
+        with self._lock:
+            state = self._limits.get(endpoint)
+            if not state or state['remaining'] is None:
+                return None
+            if state['reset'] is not None and self._clock() >= state['reset']:
+                return None
+            return state['remaining']
+
+    def can_afford(self, endpoint, calls=1):
+        """Whether the endpoint has at least `calls` calls left (unknown endpoints are assumed to)."""
+        remaining = self.remaining(endpoint)
+        return remaining is None or remaining >= calls
+
+    def seconds_until_reset(self, endpoint):
+        """Get how long until the endpoint's window resets (0 if unknown or already reset)."""
+        with self._lock:
+            state = self._limits.get(endpoint)
+            if not state or state['reset'] is None:
+                return 0
+            return max(0, state['reset'] - self._clock())
+
+    def snapshot(self):
+        """Get a copy of every endpoint's recorded state."""
+        with self._lock:
+            return {endpoint: dict(state) for endpoint, state in self._limits.items()}
+
+class TwitterClient:
+    """A reusable tweepy.API with a keep-alive session and rate-limit bookkeeping."""
+
+    def __init__(self, api_key, api_secret, access_token, access_token_secret):
+        auth = tweepy.OAuth1UserHandler(api_key, api_secret, access_token, access_token_secret)
+        self.api = tweepy.API(auth)
+        self.rate_limits = RateLimitTracker()
+
+        self.session = KeepAliveSession()
+        self.session.hooks['response'].append(self._record_response)
+        self.api.session = self.session
+
+    def _record_response(self, response, *args, **kwargs):
+        """Session response hook recording the endpoint's rate-limit headers."""
+        self.rate_limits.record(endpoint_for_url(response.url), response.headers, response.status_code)
+        return response
+
+    def can_afford(self, endpoint, calls=1):
+        """
+        Whether `calls` calls to an endpoint fit in its current rate-limit window.
+
+        Args:
+            endpoint: Endpoint name, e.g. 'statuses/mentions_timeline'
+            calls: Number of calls about to be made
+        """
+        return self.rate_limits.can_afford(endpoint, calls)
+
+    def close(self):
+        """Close the client's pooled connections."""
+        self.session.shutdown()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_twitter_credentials():
+    """
+    Get the Twitter API credentials from the environment.
+
+    Returns:
+        tuple: (api_key, api_secret, access_token, access_token_secret), or None if any is missing
+    """
+    credentials = (
+        os.environ.get('TWITTER_API_KEY'),
+        os.environ.get('TWITTER_API_SECRET'),
+        os.environ.get('TWITTER_ACCESS_TOKEN'),
+        os.environ.get('TWITTER_ACCESS_TOKEN_SECRET')
+    )
+    return credentials if all(credentials) else None
+
+def get_twitter_client():
+    """
+    Get this process's pooled Twitter client for the configured credentials.
+
+    Returns:
+        TwitterClient: The client, or None if the credentials are missing
+    """
+    credentials = get_twitter_credentials()
+    if credentials is None:
+        logger.warning("Twitter API credentials not found in environment variables")
+        return None
+
+    # Keyed by process too, so a forked worker does not share its parent's sockets
+    key = (os.getpid(), credentials)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = TwitterClient(*credentials)
+                _clients[key] = client
+                logger.info("Created pooled Twitter API client")
+    return client
+
+def reset_twitter_clients():
+    """Close and forget every pooled client (after a credentials change, or in tests)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
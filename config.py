@@ -37,6 +37,35 @@ class Config:
     BATTLE_XP_REWARD = int(os.getenv('BATTLE_XP_REWARD', 25))
     CHADCOIN_BATTLE_REWARD = int(os.getenv('CHADCOIN_BATTLE_REWARD', 10))
     MAX_CABAL_SIZE = int(os.getenv('MAX_CABAL_SIZE', 21))
+    CABAL_RECONCILE_INTERVAL = int(os.getenv('CABAL_RECONCILE_INTERVAL', 3600))  # Seconds between aggregate checks
+    CABAL_ACCESS_SESSION_TTL = int(os.getenv('CABAL_ACCESS_SESSION_TTL', 0))  # Seconds to keep cabal roles in the session, 0 to disable
+    CABAL_BATTLE_MAX_ATTEMPTS = int(os.getenv('CABAL_BATTLE_MAX_ATTEMPTS', 3))  # Failed resolutions before a cabal battle is abandoned
+    TOURNAMENT_WORKERS = int(os.getenv('TOURNAMENT_WORKERS', 0))  # 0 = one per CPU
+    
+    # Outbound tweet token bucket, shared by every process: sustained rate (posts per window) and burst size
+    OUTBOUND_TWEET_LIMIT = int(os.getenv('OUTBOUND_TWEET_LIMIT', 300))
+    OUTBOUND_TWEET_WINDOW = int(os.getenv('OUTBOUND_TWEET_WINDOW', 10800))  # Seconds
+    OUTBOUND_TWEET_BURST = int(os.getenv('OUTBOUND_TWEET_BURST', 5))
+    
+    # Mention inbox: claim batch size, claim lease, retries and retention of handled mentions
+    MENTION_CLAIM_LIMIT = int(os.getenv('MENTION_CLAIM_LIMIT', 100))
+    MENTION_LEASE_SECONDS = int(os.getenv('MENTION_LEASE_SECONDS', 300))
+    MENTION_MAX_ATTEMPTS = int(os.getenv('MENTION_MAX_ATTEMPTS', 3))
+    MENTION_REPLY_LEASE_SECONDS = int(os.getenv('MENTION_REPLY_LEASE_SECONDS', 3600))  # How long a handled mention waits for its replies to post
+    MENTION_INBOX_RETENTION_DAYS = int(os.getenv('MENTION_INBOX_RETENTION_DAYS', 7))
+    
+    # Tweets fetched for character analysis (200 per timeline call, up to the API's 3200)
+    TWEET_ANALYSIS_COUNT = int(os.getenv('TWEET_ANALYSIS_COUNT', 200))
+    
+    # Twitter lookup cache: seconds each kind stays fresh, and how long past that it may be served while refreshed
+    TWITTER_PROFILE_CACHE_TTL = int(os.getenv('TWITTER_PROFILE_CACHE_TTL', 3600))
+    TWITTER_TIMELINE_CACHE_TTL = int(os.getenv('TWITTER_TIMELINE_CACHE_TTL', 21600))
+    TWITTER_CLOUT_CACHE_TTL = int(os.getenv('TWITTER_CLOUT_CACHE_TTL', 86400))
+    TWITTER_CACHE_STALE_SECONDS = int(os.getenv('TWITTER_CACHE_STALE_SECONDS', 604800))
+    
+    # Redis cache shared by every web worker and the bot, so invalidating a
+    # cached value reaches all of them (falls back to a per-process cache)
+    REDIS_URL = os.getenv('REDIS_URL')
 
     # Music Settings
     MUSIC_STORAGE_RENDER = os.path.join(os.path.dirname(__file__), 'music')
@@ -97,9 +126,6 @@ class ProductionConfig(Config):
     ELASTICSEARCH_USERNAME = os.getenv('ELASTICSEARCH_USERNAME')
     ELASTICSEARCH_PASSWORD = os.getenv('ELASTICSEARCH_PASSWORD')
     
-    # Redis cache configuration (when implemented)
-    REDIS_URL = os.getenv('REDIS_URL')
-    
     # For production, explicitly get feature flags from environment
     ENABLE_BLOCKCHAIN = os.getenv('ENABLE_BLOCKCHAIN', 'false').lower() == 'true'
     ENABLE_TWITTER_BOT = os.getenv('ENABLE_TWITTER_BOT', 'false').lower() == 'true'
@@ -0,0 +1,139 @@
+"""Add append-only battle event log
+
+Revision ID: add_battle_events
+Revises: add_missing_user_fields
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+from datetime import datetime
+import json
+
+# revision identifiers, used by Alembic.
+revision = 'add_battle_events'
+down_revision = 'add_missing_user_fields'
+branch_labels = None
+depends_on = None
+
+# Mirrors app.models.battle.BattleEventCode
+EVENT_CODES = {
+    'battle_started': 1,
+    'battle_ended': 2,
+    'roast': 10,
+    'flex': 11,
+    'defend': 12,
+    'special': 13
+}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value) if value else datetime.utcnow()
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+def upgrade():
+    """Create battle_events table and move existing JSON battle logs into it."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'battle_events' not in inspector.get_table_names():
+        op.create_table(
+            'battle_events',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('battle_id', sa.String(36), sa.ForeignKey('battles.id'), nullable=False),
+            sa.Column('sequence', sa.Integer, nullable=False),
+            sa.Column('turn', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('code', sa.SmallInteger, nullable=False),
+            sa.Column('chad_id', sa.Integer, nullable=True),
+            sa.Column('text', sa.Text, nullable=True),
+            sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.UniqueConstraint('battle_id', 'sequence', name='uq_battle_events_battle_sequence')
+        )
+        op.create_index('ix_battle_events_battle_id', 'battle_events', ['battle_id'])
+
+    battle_columns = [column['name'] for column in inspector.get_columns('battles')]
+    if 'event_count' not in battle_columns:
+        op.add_column('battles', sa.Column('event_count', sa.Integer, nullable=False, server_default='0'))
+
+    if 'battle_log' not in battle_columns:
+        return
+
+    # Convert existing JSON logs, one row per entry
+    events_table = sa.table(
+        'battle_events',
+        sa.column('battle_id', sa.String),
+        sa.column('sequence', sa.Integer),
+        sa.column('turn', sa.Integer),
+        sa.column('code', sa.SmallInteger),
+        sa.column('chad_id', sa.Integer),
+        sa.column('text', sa.Text),
+        sa.column('created_at', sa.DateTime)
+    )
+
+    battles = conn.execute(sa.text(
+        "SELECT id, battle_log FROM battles WHERE battle_log IS NOT NULL"
+    )).fetchall()
+
+    for battle_id, battle_log in battles:
+        try:
+            entries = json.loads(battle_log) or []
+        except (TypeError, ValueError):
+            continue
+
+        rows = []
+        for sequence, entry in enumerate(entries, start=1):
+            name = entry.get('action') or entry.get('event')
+            rows.append({
+                'battle_id': battle_id,
+                'sequence': sequence,
+                'turn': entry.get('turn', 0),
+                'code': EVENT_CODES.get(name, 0),
+                'chad_id': entry.get('chad_id'),
+                'text': entry.get('result') if 'action' in entry else entry.get('description'),
+                'created_at': _parse_timestamp(entry.get('timestamp'))
+            })
+
+        if rows:
+            op.bulk_insert(events_table, rows)
+            conn.execute(
+                sa.text("UPDATE battles SET event_count = :count WHERE id = :id"),
+                {'count': len(rows), 'id': battle_id}
+            )
+
+
+def downgrade():
+    """Drop battle_events table, writing the events back to the JSON battle logs."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    battle_columns = [column['name'] for column in inspector.get_columns('battles')]
+    if 'battle_log' in battle_columns:
+        events = conn.execute(sa.text(
+            "SELECT battle_id, turn, code, chad_id, text, created_at "
+            "FROM battle_events ORDER BY battle_id, sequence"
+        )).fetchall()
+
+        logs = {}
+        for battle_id, turn, code, chad_id, text, created_at in events:
+            name = EVENT_NAMES.get(code, 'unknown')
+            timestamp = created_at.isoformat() if hasattr(created_at, 'isoformat') else created_at
+            if code >= EVENT_CODES['roast']:
+                entry = {'turn': turn, 'timestamp': timestamp, 'chad_id': chad_id, 'action': name, 'result': text}
+            else:
+                entry = {'turn': turn, 'timestamp': timestamp, 'event': name, 'description': text}
+            logs.setdefault(battle_id, []).append(entry)
+
+        for battle_id, entries in logs.items():
+            conn.execute(
+                sa.text("UPDATE battles SET battle_log = :log WHERE id = :id"),
+                {'log': json.dumps(entries), 'id': battle_id}
+            )
+
+    op.drop_index('ix_battle_events_battle_id', table_name='battle_events')
+    op.drop_table('battle_events')
+    op.drop_column('battles', 'event_count')
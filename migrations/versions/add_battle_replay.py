@@ -0,0 +1,34 @@
+"""Add battle replay seed and record
+
+Revision ID: add_battle_replay
+Revises: add_battle_events
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'add_battle_replay'
+down_revision = 'add_battle_events'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add seed and replay_data columns to battles."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    battle_columns = [column['name'] for column in inspector.get_columns('battles')]
+
+    if 'seed' not in battle_columns:
+        op.add_column('battles', sa.Column('seed', sa.Integer, nullable=True))
+    if 'replay_data' not in battle_columns:
+        op.add_column('battles', sa.Column('replay_data', sa.Text, nullable=True))
+
+
+def downgrade():
+    """Remove seed and replay_data columns from battles."""
+    op.drop_column('battles', 'replay_data')
+    op.drop_column('battles', 'seed')
@@ -0,0 +1,33 @@
+"""Add cabal rank column
+
+Revision ID: add_cabal_rank
+Revises: backfill_cabal_aggregates
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'add_cabal_rank'
+down_revision = 'backfill_cabal_aggregates'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add the rank column written by the bulk cabal rankings job."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    cabal_columns = [column['name'] for column in inspector.get_columns('cabals')]
+
+    if 'rank' not in cabal_columns:
+        op.add_column('cabals', sa.Column('rank', sa.Integer, nullable=True))
+        op.create_index('ix_cabals_rank', 'cabals', ['rank'])
+
+
+def downgrade():
+    """Remove the rank column from cabals."""
+    op.drop_index('ix_cabals_rank', table_name='cabals')
+    op.drop_column('cabals', 'rank')
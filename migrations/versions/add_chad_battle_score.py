@@ -0,0 +1,39 @@
+"""Add chad battle leaderboard score
+
+Revision ID: add_chad_battle_score
+Revises: create_cabal_battles
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'add_chad_battle_score'
+down_revision = 'create_cabal_battles'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add an indexed battle_score counter to chads, backfilled from win/loss counters."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    chad_columns = [column['name'] for column in inspector.get_columns('chads')]
+
+    if 'battle_score' not in chad_columns:
+        op.add_column('chads', sa.Column('battle_score', sa.Integer, nullable=False, server_default='0'))
+        op.create_index('ix_chads_battle_score', 'chads', ['battle_score'])
+
+        # Same weights as app.utils.leaderboard (WIN_SCORE / LOSS_SCORE)
+        conn.execute(sa.text(
+            "UPDATE chads SET battle_score = "
+            "COALESCE(battles_won, 0) * 15 + COALESCE(battles_lost, 0) * 5"
+        ))
+
+
+def downgrade():
+    """Remove the battle_score column from chads."""
+    op.drop_index('ix_chads_battle_score', table_name='chads')
+    op.drop_column('chads', 'battle_score')
@@ -0,0 +1,33 @@
+"""Add chad matchmaking rating
+
+Revision ID: add_chad_rating
+Revises: create_tournaments
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'add_chad_rating'
+down_revision = 'create_tournaments'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add an indexed Elo-style rating column to chads."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    chad_columns = [column['name'] for column in inspector.get_columns('chads')]
+
+    if 'rating' not in chad_columns:
+        op.add_column('chads', sa.Column('rating', sa.Integer, nullable=False, server_default='1200'))
+        op.create_index('ix_chads_rating', 'chads', ['rating'])
+
+
+def downgrade():
+    """Remove the rating column from chads."""
+    op.drop_index('ix_chads_rating', table_name='chads')
+    op.drop_column('chads', 'rating')
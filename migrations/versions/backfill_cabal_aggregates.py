@@ -0,0 +1,41 @@
+"""Backfill persisted cabal aggregates
+
+Revision ID: backfill_cabal_aggregates
+Revises: add_chad_battle_score
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'backfill_cabal_aggregates'
+down_revision = 'add_chad_battle_score'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Ensure cabals has member_count/total_power columns and fill them from active memberships."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    cabal_columns = [column['name'] for column in inspector.get_columns('cabals')]
+
+    if 'member_count' not in cabal_columns:
+        op.add_column('cabals', sa.Column('member_count', sa.Integer, nullable=False, server_default='0'))
+    if 'total_power' not in cabal_columns:
+        op.add_column('cabals', sa.Column('total_power', sa.Float, nullable=False, server_default='0'))
+
+    conn.execute(sa.text(
+        "UPDATE cabals SET "
+        "member_count = (SELECT COUNT(*) FROM cabal_members "
+        "WHERE cabal_members.cabal_id = cabals.id AND cabal_members.is_active), "
+        "total_power = (SELECT COALESCE(SUM(power_contribution), 0) FROM cabal_members "
+        "WHERE cabal_members.cabal_id = cabals.id AND cabal_members.is_active)"
+    ))
+
+
+def downgrade():
+    """Nothing to undo: the columns predate this migration and hold derived data."""
+    pass
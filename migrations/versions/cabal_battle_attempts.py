@@ -0,0 +1,37 @@
+"""Count failed resolutions of each cabal battle
+
+Revision ID: cabal_battle_attempts
+Revises: mention_replies_and_battle_tweets
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'cabal_battle_attempts'
+down_revision = 'mention_replies_and_battle_tweets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add cabal_battles.attempts and cabal_battles.last_error."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'cabal_battles' not in inspector.get_table_names():
+        return
+
+    columns = [column['name'] for column in inspector.get_columns('cabal_battles')]
+    if 'attempts' not in columns:
+        op.add_column('cabal_battles', sa.Column('attempts', sa.Integer, nullable=False, server_default='0'))
+    if 'last_error' not in columns:
+        op.add_column('cabal_battles', sa.Column('last_error', sa.Text, nullable=True))
+
+
+def downgrade():
+    """Remove cabal_battles.attempts and cabal_battles.last_error."""
+    op.drop_column('cabal_battles', 'last_error')
+    op.drop_column('cabal_battles', 'attempts')
@@ -0,0 +1,71 @@
+"""Store cabal leaders by user ID
+
+Revision ID: cabal_leader_user_ids
+Revises: create_twitter_lookup_cache
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'cabal_leader_user_ids'
+down_revision = 'create_twitter_lookup_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Convert cabals.leader_id (and remove_leader vote targets) written as
+    chad IDs to the leader's user ID, which is what the column's foreign key
+    and every reader expect.
+
+    A leader_id is taken to be a chad ID when no active member of the cabal
+    has that user ID but the user owning the chad with that ID is one.
+    """
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if not {'cabals', 'cabal_members', 'chads'}.issubset(tables):
+        return
+
+    conn.execute(sa.text("""
+        UPDATE cabals
+        SET leader_id = (SELECT chads.user_id FROM chads WHERE chads.id = cabals.leader_id)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM cabal_members
+            WHERE cabal_members.cabal_id = cabals.id
+              AND cabal_members.user_id = cabals.leader_id
+              AND cabal_members.is_active = :active
+        )
+        AND EXISTS (
+            SELECT 1 FROM chads
+            JOIN cabal_members ON cabal_members.user_id = chads.user_id
+            WHERE chads.id = cabals.leader_id
+              AND cabal_members.cabal_id = cabals.id
+              AND cabal_members.is_active = :active
+        )
+    """), {'active': True})
+
+    if 'cabal_votes' in tables:
+        # Votes against the current leader still name them by chad
+        conn.execute(sa.text("""
+            UPDATE cabal_votes
+            SET target_id = (SELECT chads.user_id FROM chads WHERE chads.id = cabal_votes.target_id)
+            WHERE vote_type = 'remove_leader'
+            AND EXISTS (
+                SELECT 1 FROM chads
+                JOIN cabals ON cabals.leader_id = chads.user_id
+                WHERE chads.id = cabal_votes.target_id
+                  AND cabals.id = cabal_votes.cabal_id
+                  AND chads.user_id <> cabal_votes.target_id
+            )
+        """))
+
+
+def downgrade():
+    """Nothing to undo: user IDs are what leader_id was always meant to hold."""
+    pass
@@ -0,0 +1,71 @@
+"""Create cabal analytics rollups table
+
+Revision ID: create_cabal_analytics_rollups
+Revises: add_cabal_rank
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_cabal_analytics_rollups'
+down_revision = 'add_cabal_rank'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the hourly/daily/weekly cabal_analytics_rollups table."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'cabal_analytics_rollups' not in inspector.get_table_names():
+        op.create_table(
+            'cabal_analytics_rollups',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('cabal_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=False),
+            sa.Column('resolution', sa.String(8), nullable=False),
+            sa.Column('timestamp', sa.DateTime, nullable=False),
+            sa.Column('sample_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('total_power', sa.Float, nullable=False, server_default='0'),
+            sa.Column('total_power_sum', sa.Float, nullable=False, server_default='0'),
+            sa.Column('max_power', sa.Float, nullable=False, server_default='0'),
+            sa.Column('member_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('active_member_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('rank', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('best_rank', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('battles_won', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('battles_lost', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('referrals', sa.Integer, nullable=False, server_default='0'),
+            sa.UniqueConstraint('cabal_id', 'resolution', 'timestamp', name='uq_cabal_analytics_rollups_bucket')
+        )
+        op.create_index(
+            'ix_cabal_analytics_rollups_lookup',
+            'cabal_analytics_rollups', ['resolution', 'cabal_id', 'timestamp']
+        )
+
+        # Seed the rollups from the raw snapshots recorded so far. Counters
+        # only grow, so MAX() is the bucket's last value (date_trunc is
+        # PostgreSQL-only; other backends start with empty rollups)
+        if conn.dialect.name == 'postgresql':
+            for resolution in ('hour', 'day', 'week'):
+                conn.execute(sa.text(
+                    "INSERT INTO cabal_analytics_rollups "
+                    "(cabal_id, resolution, timestamp, sample_count, total_power, total_power_sum, max_power, "
+                    "member_count, active_member_count, rank, best_rank, battles_won, battles_lost, referrals) "
+                    "SELECT CAST(cabal_id AS INTEGER), :resolution, date_trunc(:resolution, timestamp), COUNT(*), "
+                    "AVG(total_power), SUM(total_power), MAX(total_power), MAX(member_count), "
+                    "MAX(active_member_count), MIN(rank), MIN(rank), MAX(battles_won), MAX(battles_lost), MAX(referrals) "
+                    "FROM cabal_analytics GROUP BY cabal_id, date_trunc(:resolution, timestamp)"
+                ), {'resolution': resolution})
+
+def downgrade():
+    """Drop the cabal_analytics_rollups table."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'cabal_analytics_rollups' in inspector.get_table_names():
+        op.drop_index('ix_cabal_analytics_rollups_lookup', table_name='cabal_analytics_rollups')
+        op.drop_table('cabal_analytics_rollups')
@@ -0,0 +1,73 @@
+"""Create cabal battle tables
+
+Revision ID: create_cabal_battles
+Revises: add_chad_rating
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_cabal_battles'
+down_revision = 'add_chad_rating'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create cabal_battles and cabal_battle_participants tables."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'cabal_battles' not in tables:
+        op.create_table(
+            'cabal_battles',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('cabal_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=False),
+            sa.Column('opponent_cabal_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=False),
+            sa.Column('scheduled_at', sa.DateTime, nullable=False),
+            sa.Column('week_number', sa.Integer, nullable=False),
+            sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('completed', sa.Boolean, nullable=False, server_default=sa.false()),
+            sa.Column('completed_at', sa.DateTime, nullable=True),
+            sa.Column('winner_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=True),
+            sa.Column('result', sa.String(10), nullable=True),
+            sa.Column('seed', sa.Integer, nullable=True),
+            sa.Column('participant_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('opponent_participant_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('cabal_power', sa.Float, nullable=False, server_default='0'),
+            sa.Column('opponent_power', sa.Float, nullable=False, server_default='0'),
+            sa.Column('xp_earned', sa.Integer, nullable=False, server_default='0')
+        )
+        op.create_index('ix_cabal_battles_cabal_id', 'cabal_battles', ['cabal_id'])
+        op.create_index('ix_cabal_battles_opponent_cabal_id', 'cabal_battles', ['opponent_cabal_id'])
+        op.create_index('ix_cabal_battles_scheduled_at', 'cabal_battles', ['scheduled_at'])
+
+    if 'cabal_battle_participants' not in tables:
+        op.create_table(
+            'cabal_battle_participants',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('battle_id', sa.Integer, sa.ForeignKey('cabal_battles.id'), nullable=False),
+            sa.Column('cabal_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=False),
+            sa.Column('chad_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=False),
+            sa.Column('opted_in_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('power', sa.Float, nullable=False, server_default='0'),
+            sa.Column('roll', sa.Float, nullable=False, server_default='0'),
+            sa.Column('xp_earned', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('chadcoin_earned', sa.Integer, nullable=False, server_default='0'),
+            sa.UniqueConstraint('battle_id', 'chad_id', name='uq_cabal_battle_participants_battle_chad')
+        )
+        op.create_index('ix_cabal_battle_participants_battle_id', 'cabal_battle_participants', ['battle_id'])
+
+
+def downgrade():
+    """Drop cabal battle tables."""
+    op.drop_index('ix_cabal_battle_participants_battle_id', table_name='cabal_battle_participants')
+    op.drop_table('cabal_battle_participants')
+    op.drop_index('ix_cabal_battles_scheduled_at', table_name='cabal_battles')
+    op.drop_index('ix_cabal_battles_opponent_cabal_id', table_name='cabal_battles')
+    op.drop_index('ix_cabal_battles_cabal_id', table_name='cabal_battles')
+    op.drop_table('cabal_battles')
@@ -0,0 +1,63 @@
+"""Create cabal officer role and vote tables
+
+Revision ID: create_cabal_officers_and_votes
+Revises: create_cabal_analytics_rollups
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_cabal_officers_and_votes'
+down_revision = 'create_cabal_analytics_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create cabal_officer_roles and cabal_votes tables."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'cabal_officer_roles' not in tables:
+        op.create_table(
+            'cabal_officer_roles',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('cabal_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=False),
+            sa.Column('chad_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=False),
+            sa.Column('role_type', sa.String(32), nullable=False),
+            sa.Column('appointed_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.UniqueConstraint('cabal_id', 'role_type', name='uq_cabal_officer_roles_cabal_role')
+        )
+        op.create_index('ix_cabal_officer_roles_cabal_id', 'cabal_officer_roles', ['cabal_id'])
+
+    if 'cabal_votes' not in tables:
+        op.create_table(
+            'cabal_votes',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('cabal_id', sa.Integer, sa.ForeignKey('cabals.id'), nullable=False),
+            sa.Column('voter_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=False),
+            sa.Column('vote_type', sa.String(32), nullable=False),
+            sa.Column('target_id', sa.Integer, nullable=False),
+            sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.UniqueConstraint('cabal_id', 'voter_id', 'vote_type', 'target_id', name='uq_cabal_votes_ballot')
+        )
+        op.create_index('ix_cabal_votes_tally', 'cabal_votes', ['cabal_id', 'vote_type', 'target_id'])
+
+
+def downgrade():
+    """Drop cabal_votes and cabal_officer_roles tables."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'cabal_votes' in tables:
+        op.drop_index('ix_cabal_votes_tally', table_name='cabal_votes')
+        op.drop_table('cabal_votes')
+
+    if 'cabal_officer_roles' in tables:
+        op.drop_index('ix_cabal_officer_roles_cabal_id', table_name='cabal_officer_roles')
+        op.drop_table('cabal_officer_roles')
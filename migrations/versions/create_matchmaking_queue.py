@@ -0,0 +1,48 @@
+"""Create the shared matchmaking queue table
+
+Revision ID: create_matchmaking_queue
+Revises: create_outbound_rate_limits
+Create Date: 2026-10-19 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_matchmaking_queue'
+down_revision = 'create_outbound_rate_limits'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the matchmaking_queue table holding waiting and matched Chads."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'matchmaking_queue' not in inspector.get_table_names():
+        op.create_table(
+            'matchmaking_queue',
+            sa.Column('chad_id', sa.Integer, primary_key=True),
+            sa.Column('rating', sa.Integer, nullable=False),
+            sa.Column('tweet_id', sa.String(64), nullable=True),
+            sa.Column('username', sa.String(64), nullable=True),
+            sa.Column('enqueued_at', sa.DateTime, nullable=False),
+            sa.Column('opponent_chad_id', sa.Integer, nullable=True),
+            sa.Column('matched_at', sa.DateTime, nullable=True),
+            sa.Column('claim_token', sa.String(64), nullable=True),
+            sa.Column('lease_expires_at', sa.DateTime, nullable=True),
+            sa.Column('attempts', sa.Integer, nullable=False, server_default='0')
+        )
+        op.create_index('ix_matchmaking_queue_waiting', 'matchmaking_queue', ['opponent_chad_id', 'rating'])
+
+
+def downgrade():
+    """Drop the matchmaking_queue table."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'matchmaking_queue' in inspector.get_table_names():
+        op.drop_index('ix_matchmaking_queue_waiting', table_name='matchmaking_queue')
+        op.drop_table('matchmaking_queue')
@@ -0,0 +1,52 @@
+"""Create the bot's mention inbox table
+
+Revision ID: create_mention_inbox
+Revises: create_cabal_officers_and_votes
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_mention_inbox'
+down_revision = 'create_cabal_officers_and_votes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the mention_inbox table the bot claims mentions from."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'mention_inbox' not in inspector.get_table_names():
+        op.create_table(
+            'mention_inbox',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('tweet_id', sa.String(64), nullable=False, unique=True),
+            sa.Column('author_id', sa.String(64), nullable=True),
+            sa.Column('payload', sa.Text, nullable=False),
+            sa.Column('status', sa.String(16), nullable=False, server_default='pending'),
+            sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('claim_token', sa.String(64), nullable=True),
+            sa.Column('claimed_by', sa.String(128), nullable=True),
+            sa.Column('lease_expires_at', sa.DateTime, nullable=True),
+            sa.Column('last_error', sa.Text, nullable=True),
+            sa.Column('received_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('processed_at', sa.DateTime, nullable=True)
+        )
+        op.create_index('ix_mention_inbox_author_id', 'mention_inbox', ['author_id'])
+        op.create_index('ix_mention_inbox_claimable', 'mention_inbox', ['status', 'lease_expires_at'])
+
+
+def downgrade():
+    """Drop the mention_inbox table."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'mention_inbox' in inspector.get_table_names():
+        op.drop_index('ix_mention_inbox_claimable', table_name='mention_inbox')
+        op.drop_index('ix_mention_inbox_author_id', table_name='mention_inbox')
+        op.drop_table('mention_inbox')
@@ -0,0 +1,40 @@
+"""Create the shared outbound rate limit table
+
+Revision ID: create_outbound_rate_limits
+Revises: cabal_leader_user_ids
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_outbound_rate_limits'
+down_revision = 'cabal_leader_user_ids'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the outbound_rate_limits table holding each endpoint's token bucket."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'outbound_rate_limits' not in inspector.get_table_names():
+        op.create_table(
+            'outbound_rate_limits',
+            sa.Column('endpoint', sa.String(64), primary_key=True),
+            sa.Column('tokens', sa.Float, nullable=False),
+            sa.Column('version', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp())
+        )
+
+
+def downgrade():
+    """Drop the outbound_rate_limits table."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'outbound_rate_limits' in inspector.get_table_names():
+        op.drop_table('outbound_rate_limits')
@@ -0,0 +1,84 @@
+"""Create tournament tables
+
+Revision ID: create_tournaments
+Revises: add_battle_replay
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_tournaments'
+down_revision = 'add_battle_replay'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create tournaments, tournament_entries and tournament_matches tables."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'tournaments' not in tables:
+        op.create_table(
+            'tournaments',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.String(100), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+            sa.Column('bracket_size', sa.Integer, nullable=False),
+            sa.Column('entrant_count', sa.Integer, nullable=False),
+            sa.Column('current_round', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('winner_chad_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=True),
+            sa.Column('created_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('started_at', sa.DateTime, nullable=True),
+            sa.Column('completed_at', sa.DateTime, nullable=True)
+        )
+
+    if 'tournament_entries' not in tables:
+        op.create_table(
+            'tournament_entries',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('tournament_id', sa.Integer, sa.ForeignKey('tournaments.id'), nullable=False),
+            sa.Column('chad_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=False),
+            sa.Column('seed_rank', sa.Integer, nullable=False),
+            sa.Column('bracket_slot', sa.Integer, nullable=False),
+            sa.Column('power', sa.Float, nullable=False, server_default='0'),
+            sa.Column('eliminated_round', sa.Integer, nullable=True),
+            sa.Column('clout', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('roast_level', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('cringe_resistance', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('drip_factor', sa.Integer, nullable=False, server_default='0'),
+            sa.UniqueConstraint('tournament_id', 'chad_id', name='uq_tournament_entries_tournament_chad')
+        )
+        op.create_index('ix_tournament_entries_tournament_id', 'tournament_entries', ['tournament_id'])
+
+    if 'tournament_matches' not in tables:
+        op.create_table(
+            'tournament_matches',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('tournament_id', sa.Integer, sa.ForeignKey('tournaments.id'), nullable=False),
+            sa.Column('round', sa.Integer, nullable=False),
+            sa.Column('position', sa.Integer, nullable=False),
+            sa.Column('initiator_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=False),
+            sa.Column('opponent_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=True),
+            sa.Column('winner_id', sa.Integer, sa.ForeignKey('chads.id'), nullable=False),
+            sa.Column('seed', sa.Integer, nullable=True),
+            sa.Column('replay_data', sa.Text, nullable=True),
+            sa.Column('xp_reward', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('chadcoin_reward', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('completed_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.UniqueConstraint('tournament_id', 'round', 'position', name='uq_tournament_matches_round_position')
+        )
+        op.create_index('ix_tournament_matches_tournament_id', 'tournament_matches', ['tournament_id'])
+
+
+def downgrade():
+    """Drop tournament tables."""
+    op.drop_index('ix_tournament_matches_tournament_id', table_name='tournament_matches')
+    op.drop_table('tournament_matches')
+    op.drop_index('ix_tournament_entries_tournament_id', table_name='tournament_entries')
+    op.drop_table('tournament_entries')
+    op.drop_table('tournaments')
@@ -0,0 +1,48 @@
+"""Create the Twitter lookup cache table
+
+Revision ID: create_twitter_lookup_cache
+Revises: create_mention_inbox
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'create_twitter_lookup_cache'
+down_revision = 'create_mention_inbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the twitter_lookup_cache table for cached profiles, timelines, clout and analyses."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'twitter_lookup_cache' not in inspector.get_table_names():
+        op.create_table(
+            'twitter_lookup_cache',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('kind', sa.String(16), nullable=False),
+            sa.Column('lookup_key', sa.String(128), nullable=False),
+            sa.Column('payload', sa.Text, nullable=False),
+            sa.Column('version', sa.String(32), nullable=True),
+            sa.Column('fetched_at', sa.DateTime, nullable=False, server_default=sa.func.current_timestamp()),
+            sa.Column('fresh_until', sa.DateTime, nullable=False),
+            sa.Column('stale_until', sa.DateTime, nullable=False),
+            sa.Column('refreshing_until', sa.DateTime, nullable=True),
+            sa.UniqueConstraint('kind', 'lookup_key', name='uq_twitter_lookup_cache_kind_key')
+        )
+        op.create_index('ix_twitter_lookup_cache_stale_until', 'twitter_lookup_cache', ['stale_until'])
+
+
+def downgrade():
+    """Drop the twitter_lookup_cache table."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+
+    if 'twitter_lookup_cache' in inspector.get_table_names():
+        op.drop_index('ix_twitter_lookup_cache_stale_until', table_name='twitter_lookup_cache')
+        op.drop_table('twitter_lookup_cache')
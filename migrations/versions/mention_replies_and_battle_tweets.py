@@ -0,0 +1,43 @@
+"""Track handled mentions' replies and the tweet each battle came from
+
+Revision ID: mention_replies_and_battle_tweets
+Revises: create_matchmaking_queue
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.engine.reflection import Inspector
+
+# revision identifiers, used by Alembic.
+revision = 'mention_replies_and_battle_tweets'
+down_revision = 'create_matchmaking_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add mention_inbox.replies and a unique battles.challenge_tweet_id."""
+    conn = op.get_bind()
+    inspector = Inspector.from_engine(conn)
+    tables = inspector.get_table_names()
+
+    if 'mention_inbox' in tables:
+        inbox_columns = [column['name'] for column in inspector.get_columns('mention_inbox')]
+        if 'replies' not in inbox_columns:
+            op.add_column('mention_inbox', sa.Column('replies', sa.Text, nullable=True))
+
+    if 'battles' in tables:
+        battle_columns = [column['name'] for column in inspector.get_columns('battles')]
+        if 'challenge_tweet_id' not in battle_columns:
+            op.add_column('battles', sa.Column('challenge_tweet_id', sa.String(64), nullable=True))
+        battle_indexes = [index['name'] for index in inspector.get_indexes('battles')]
+        if 'ix_battles_challenge_tweet_id' not in battle_indexes:
+            op.create_index('ix_battles_challenge_tweet_id', 'battles', ['challenge_tweet_id'], unique=True)
+
+
+def downgrade():
+    """Remove mention_inbox.replies and battles.challenge_tweet_id."""
+    op.drop_index('ix_battles_challenge_tweet_id', table_name='battles')
+    op.drop_column('battles', 'challenge_tweet_id')
+    op.drop_column('mention_inbox', 'replies')
@@ -0,0 +1,57 @@
+import unittest
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+from app import create_app
+from app.models.battle import BattleEvent, BattleEventCode, BattleLogView
+
+class TestBattleEvents(unittest.TestCase):
+    """Test cases for the append-only battle event log."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    def make_event(self, sequence, code, text, chad_id=None, turn=1):
+        """Build an event without touching the session."""
+        event = MagicMock(sequence=sequence, code=int(code), text=text, chad_id=chad_id, turn=turn,
+                          created_at=datetime(2024, 1, 1, 12, 0, sequence))
+        event.to_dict = lambda: BattleEvent.to_dict(event)
+        return event
+
+    def test_event_codes_are_interned(self):
+        """Test that event and action names map to compact codes."""
+        self.assertEqual(BattleEventCode.from_name('battle_started'), BattleEventCode.BATTLE_STARTED)
+        self.assertEqual(BattleEventCode.from_name('roast'), BattleEventCode.ROAST)
+        self.assertEqual(BattleEventCode.from_name('dance'), BattleEventCode.UNKNOWN)
+        self.assertTrue(BattleEventCode.FLEX.is_action)
+        self.assertFalse(BattleEventCode.BATTLE_ENDED.is_action)
+
+    def test_log_view_renders_legacy_format_lazily(self):
+        """Test that the view loads events once and renders the old JSON shape."""
+        events = [
+            self.make_event(1, BattleEventCode.BATTLE_STARTED, "Battle has begun!", turn=0),
+            self.make_event(2, BattleEventCode.ROAST, "Roasted for 12 damage!", chad_id=7)
+        ]
+        battle = MagicMock()
+        battle.events.order_by.return_value.all.return_value = events
+
+        view = BattleLogView(battle)
+        battle.events.order_by.assert_not_called()
+
+        self.assertEqual(len(view), 2)
+        self.assertEqual(view[0]['event'], 'battle_started')
+        self.assertEqual(view[0]['description'], "Battle has begun!")
+        self.assertEqual(view[1]['action'], 'roast')
+        self.assertEqual(view[1]['chad_id'], 7)
+        self.assertEqual(json.loads(view.to_json())[1]['result'], "Roasted for 12 damage!")
+        battle.events.order_by.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
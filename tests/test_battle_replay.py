@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from app import create_app
+from app.models.battle import Battle, BattleEventCode
+from app.models.chad import ChadStats
+from app.utils.battle_resolver import draw_battle_luck, get_battle_rng, roll_battles
+from app.utils.battle_replay import (
+    encode_replay, decode_replay, replay_auto_battle, replay_battle, audit_battles,
+    REPLAY_AUTO, REPLAY_TURNS, MAX_TURNS
+)
+
+class TestBattleReplay(unittest.TestCase):
+    """Test cases for the deterministic battle replay engine."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+        self.strong = ChadStats(40, 50, 45, 55)
+        self.weak = ChadStats(10, 12, 11, 13)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    def test_replay_record_round_trip(self):
+        """Test that replay records survive encoding."""
+        data = encode_replay(REPLAY_TURNS, self.strong, None, [10, 11])
+        record = decode_replay(data)
+
+        self.assertEqual(record['kind'], REPLAY_TURNS)
+        self.assertEqual(record['initiator_stats'], self.strong)
+        self.assertIsNone(record['opponent_stats'])
+        self.assertEqual(record['actions'], [10, 11])
+        self.assertIsNone(decode_replay('not json'))
+
+    def test_auto_replay_matches_batch_resolver(self):
+        """Test that a replay reproduces the vectorized batch outcome for each seed."""
+        for seed in range(200):
+            draws = draw_battle_luck(get_battle_rng(seed))
+            batch_won = roll_battles([193], [186], [draws[0]], [draws[1]])[0]
+
+            result = replay_auto_battle(seed, ChadStats(40, 50, 45, 58), ChadStats(40, 50, 45, 51))
+            self.assertEqual(result['initiator_won'], bool(batch_won))
+            self.assertEqual((result['winner_xp'], result['loser_xp'], result['winner_reward']), draws[2:])
+
+    def test_turn_replay_regenerates_prose(self):
+        """Test that a turn-based battle regenerates its log and description."""
+        actions = [int(BattleEventCode.ROAST), int(BattleEventCode.DEFEND)] * (MAX_TURNS // 2)
+        data = encode_replay(REPLAY_TURNS, self.weak, self.strong, actions)
+
+        result = replay_battle(1, data, 'Brad', 'Chad')
+
+        self.assertEqual(len(result['log']), MAX_TURNS)
+        self.assertEqual(result['log'][0][3], "Brad roasted Chad for 1 damage!")
+        self.assertEqual(result['log'][1][3], "Chad prepared to defend with 45 cringe resistance!")
+        self.assertFalse(result['initiator_won'])
+        self.assertEqual(result['description'], "Chad defeated Brad!")
+
+    def test_audit_flags_mismatched_battles(self):
+        """Test that a bulk audit separates verified, mismatched and legacy battles."""
+        data = encode_replay(REPLAY_AUTO, self.strong, self.weak)
+        initiator_won = replay_auto_battle(3, self.strong, self.weak)['initiator_won']
+
+        # winner_id holds user IDs, initiator_id a chad ID: keep them apart
+        initiator = MagicMock(id=1, user_id=101)
+        honest = MagicMock(id='a', seed=3, replay_data=data, initiator_id=1, initiator=initiator)
+        honest.winner_id = 101 if initiator_won else 202
+        tampered = MagicMock(id='b', seed=3, replay_data=data, initiator_id=1, initiator=initiator)
+        tampered.winner_id = 202 if initiator_won else 101
+        legacy = MagicMock(id='c', seed=None, replay_data=None, initiator_id=1, initiator=initiator, winner_id=101)
+
+        report = audit_battles([honest, tampered, legacy])
+
+        self.assertEqual(report['verified'], ['a'])
+        self.assertEqual(report['mismatched'], ['b'])
+        self.assertEqual(report['unreplayable'], ['c'])
+
+    def test_audit_verifies_turn_based_battles(self):
+        """Test that turn-based winners are stored as user IDs, like auto-resolved ones."""
+        actions = [int(BattleEventCode.ROAST), int(BattleEventCode.DEFEND)] * (MAX_TURNS // 2)
+        data = encode_replay(REPLAY_TURNS, self.strong, self.weak, actions)
+
+        initiator = MagicMock(id=1, user_id=101)
+        initiator.name = 'Brad'
+        defender = MagicMock(id=2, user_id=202)
+        defender.name = 'Chad'
+        battle = MagicMock(
+            id='t', seed=1, replay_data=data, initiator_id=1, defender_id=2,
+            initiator=initiator, defender=defender, wager_amount=0, current_turn=MAX_TURNS
+        )
+        battle._get_replay_record.return_value = decode_replay(data)
+
+        with patch('app.utils.leaderboard.record_battle_result') as record_result, \
+                patch('app.models.transaction.Transaction'), \
+                patch('app.models.user.User'):
+            Battle._end_battle(battle)
+
+        self.assertEqual(battle.winner_id, 101)
+        self.assertEqual(battle.loser_id, 202)
+        record_result.assert_called_once_with(initiator, defender)
+        self.assertEqual(audit_battles([battle])['verified'], ['t'])
+
+    def test_replay_names_the_opponent_it_was_resolved_against(self):
+        """Test that auto-resolved battles are not replayed against an NPC."""
+        data = encode_replay(REPLAY_AUTO, self.strong, self.weak)
+        initiator = MagicMock()
+        initiator.name = 'Brad'
+        opponent = MagicMock()
+        opponent.name = 'Chad'
+        battle = MagicMock(seed=3, replay_data=data, initiator_chad=initiator, opponent_chad=opponent, defender=None)
+        battle._get_participants.side_effect = lambda: Battle._get_participants(battle)
+
+        description = Battle.replay(battle)['description']
+
+        self.assertIn('Brad', description)
+        self.assertIn('Chad', description)
+        self.assertNotIn('NPC', description)
+
+if __name__ == '__main__':
+    unittest.main()
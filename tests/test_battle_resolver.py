@@ -0,0 +1,135 @@
+import unittest
+import random
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.utils.battle_resolver import (
+    get_battle_rng, draw_battle_luck, calculate_battle_power,
+    roll_battles, resolve_battles, estimate_win_probability, BATTLE_FAILED_MESSAGE
+)
+from app.utils.cache import win_probability_cache_key
+from app.extensions import cache
+
+class TestBattleResolver(unittest.TestCase):
+    """Test cases for the batch battle resolver."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    def test_seeded_draws_are_reproducible(self):
+        """Test that the same seed always draws the same luck."""
+        first = draw_battle_luck(get_battle_rng(42))
+        second = draw_battle_luck(get_battle_rng(42))
+        self.assertEqual(first, second)
+
+        winner_xp, loser_xp, winner_reward = first[2:]
+        self.assertTrue(50 <= winner_xp <= 100)
+        self.assertTrue(10 <= loser_xp <= 30)
+        self.assertTrue(100 <= winner_reward <= 200)
+
+    def test_battle_power_accepts_dicts_and_objects(self):
+        """Test that battle power works for stat dicts and stat objects."""
+        stats = {'clout': 10, 'roast_level': 20, 'cringe_resistance': 15, 'drip_factor': 25}
+        stats_object = MagicMock(**stats)
+
+        self.assertEqual(calculate_battle_power(stats), 70)
+        self.assertEqual(calculate_battle_power(stats_object), 70)
+
+    def test_vectorized_rolls_match_scalar_formula(self):
+        """Test that the NumPy rolls match the scalar 60/40 formula exactly."""
+        rng = random.Random(7)
+        initiator_powers = [rng.randint(40, 400) for _ in range(500)]
+        opponent_powers = [rng.randint(40, 400) for _ in range(500)]
+        initiator_luck = [rng.random() for _ in range(500)]
+        opponent_luck = [rng.random() for _ in range(500)]
+
+        initiator_wins = roll_battles(initiator_powers, opponent_powers, initiator_luck, opponent_luck)
+
+        for i in range(500):
+            initiator_roll = (initiator_powers[i] * 0.6) + (initiator_luck[i] * initiator_powers[i] * 0.4)
+            opponent_roll = (opponent_powers[i] * 0.6) + (opponent_luck[i] * opponent_powers[i] * 0.4)
+            self.assertEqual(bool(initiator_wins[i]), initiator_roll > opponent_roll)
+
+    @patch('app.utils.battle_resolver.apply_battle_rewards')
+    @patch('app.utils.battle_resolver.finish_battle')
+    @patch('app.utils.battle_resolver.db')
+    @patch('app.utils.battle_resolver.joinedload')
+    @patch('app.utils.battle_resolver.Chad')
+    def test_resolve_battles_commits_once(self, chad_mock, joinedload_mock, db_mock,
+                                          finish_battle_mock, apply_rewards_mock):
+        """Test that a batch is written in a single commit."""
+        chads = []
+        for i in range(4):
+            chad = MagicMock()
+            chad.id = i + 1
+            chad.name = f"Chad {i + 1}"
+            chads.append(chad)
+
+        chad_mock.query.options.return_value.filter.return_value.all.return_value = chads
+        chad_mock.get_total_stats_bulk.return_value = {
+            chad.id: {'clout': 10 * chad.id, 'roast_level': 10, 'cringe_resistance': 10, 'drip_factor': 10}
+            for chad in chads
+        }
+
+        battles = [
+            MagicMock(initiator_chad_id=1, opponent_chad_id=2),
+            MagicMock(initiator_chad_id=3, opponent_chad_id=4)
+        ]
+
+        summaries = resolve_battles(battles, seeds=[1, 2])
+
+        self.assertEqual(len(summaries), 2)
+        self.assertNotIn(BATTLE_FAILED_MESSAGE, summaries)
+        chad_mock.get_total_stats_bulk.assert_called_once()
+        self.assertEqual(finish_battle_mock.call_count, 2)
+        self.assertEqual(apply_rewards_mock.call_count, 2)
+        db_mock.session.commit.assert_called_once()
+
+    @patch('app.utils.battle_resolver.db')
+    @patch('app.utils.battle_resolver.joinedload')
+    @patch('app.utils.battle_resolver.Chad')
+    def test_resolve_battles_rolls_back_on_error(self, chad_mock, joinedload_mock, db_mock):
+        """Test that a failing batch is rolled back as a whole."""
+        chad_mock.query.options.return_value.filter.return_value.all.return_value = []
+        chad_mock.get_total_stats_bulk.return_value = {}
+
+        battles = [MagicMock(initiator_chad_id=1, opponent_chad_id=2)]
+
+        summaries = resolve_battles(battles, seeds=[1])
+
+        self.assertEqual(summaries, [BATTLE_FAILED_MESSAGE])
+        db_mock.session.rollback.assert_called_once()
+        db_mock.session.commit.assert_not_called()
+
+    def test_win_probability_matches_formula(self):
+        """Test that the Monte Carlo odds agree with the 60/40 formula."""
+        even = {'clout': 10, 'roast_level': 10, 'cringe_resistance': 10, 'drip_factor': 10}
+        strong = {'clout': 30, 'roast_level': 30, 'cringe_resistance': 30, 'drip_factor': 30}
+
+        self.assertAlmostEqual(estimate_win_probability(even, even, trials=20000), 0.5, delta=0.02)
+
+        # At 3x the power the weaker Chad's best roll (40) is below the stronger one's worst (72)
+        self.assertEqual(estimate_win_probability(strong, even, trials=20000), 1.0)
+        self.assertEqual(estimate_win_probability(even, strong, trials=20000), 0.0)
+
+    @patch('app.utils.battle_resolver.roll_battles', wraps=roll_battles)
+    def test_win_probability_is_cached_per_matchup(self, roll_battles_mock):
+        """Test that repeated matchups are served from the cache."""
+        stats = {'clout': 11, 'roast_level': 13, 'cringe_resistance': 17, 'drip_factor': 19}
+        other = {'clout': 12, 'roast_level': 12, 'cringe_resistance': 12, 'drip_factor': 12}
+        cache.delete(win_probability_cache_key(60, 48, 5000))
+
+        first = estimate_win_probability(stats, other, trials=5000)
+        second = estimate_win_probability(stats, other, trials=5000)
+
+        self.assertEqual(first, second)
+        roll_battles_mock.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,8 @@ from app.utils.bot_commands import (
     handle_appoint_officer,
     handle_schedule_battle,
     handle_vote_remove_leader,
-    handle_opt_in_battle
+    handle_opt_in_battle,
+    handle_fight_request
 )
 import uuid
 from datetime import datetime, timedelta
@@ -227,5 +228,44 @@ class TestBotCabalCommands(unittest.TestCase):
         self.assertIsNotNone(participant)
 
 
+class TestFightRequestRetries(unittest.TestCase):
+    """Test that a retried fight request never fights (or rewards) twice."""
+
+    def setUp(self):
+        """Set up an app context; the models are mocked."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test"""
+        self.app_context.pop()
+
+    @patch('app.utils.bot_commands.schedule_reply')
+    @patch('app.utils.bot_commands.simulate_battle')
+    @patch('app.utils.bot_commands.db')
+    @patch('app.utils.bot_commands.Battle')
+    @patch('app.utils.bot_commands.User')
+    def test_retry_finds_the_battle_of_its_tweet(self, user_mock, battle_mock, db_mock, simulate_mock, reply_mock):
+        """Test that the battle started by an earlier attempt is reused, not created again."""
+        user_mock.query.filter_by.return_value.first.return_value = MagicMock(chad=MagicMock(id=1))
+        earlier = MagicMock(status='completed', result_description='Chad 1 won!')
+        battle_mock.query.filter_by.return_value.first.return_value = earlier
+
+        self.assertTrue(handle_fight_request('555', 'alice', 'bob'))
+
+        battle_mock.query.filter_by.assert_called_once_with(challenge_tweet_id='555')
+        battle_mock.assert_not_called()
+        simulate_mock.assert_not_called()
+        self.assertIn('Chad 1 won!', reply_mock.call_args[0][0])
+
+        # Started but not resolved: resolved now, still without a second battle
+        earlier.status = 'in_progress'
+        simulate_mock.return_value = 'Chad 2 won!'
+        self.assertTrue(handle_fight_request('555', 'alice', 'bob'))
+        simulate_mock.assert_called_once_with(earlier)
+        battle_mock.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
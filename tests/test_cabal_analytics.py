@@ -0,0 +1,43 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from app.models.cabal_analytics import CabalAnalyticsRollup, get_bucket_start, choose_resolution
+
+class TestCabalAnalyticsRollups(unittest.TestCase):
+    """Test cases for cabal analytics rollups and resolution selection."""
+
+    def test_bucket_starts(self):
+        """Test that timestamps fall into the right hour, day and ISO week."""
+        timestamp = datetime(2026, 10, 15, 13, 47, 12)  # A Thursday
+
+        self.assertEqual(get_bucket_start(timestamp, 'hour'), datetime(2026, 10, 15, 13))
+        self.assertEqual(get_bucket_start(timestamp, 'day'), datetime(2026, 10, 15))
+        self.assertEqual(get_bucket_start(timestamp, 'week'), datetime(2026, 10, 12))
+        self.assertRaises(ValueError, get_bucket_start, timestamp, 'month')
+
+    def test_resolution_follows_window(self):
+        """Test that longer windows are served from coarser data."""
+        self.assertEqual(choose_resolution(1), 'raw')
+        self.assertEqual(choose_resolution(7), 'hour')
+        self.assertEqual(choose_resolution(30), 'day')
+        self.assertEqual(choose_resolution(365), 'day')
+        self.assertEqual(choose_resolution(1000), 'week')
+
+    def test_samples_fold_incrementally(self):
+        """Test that power is averaged and the best rank kept as samples arrive."""
+        rollup = SimpleNamespace(sample_count=0, total_power_sum=0, total_power=0, max_power=0, best_rank=0)
+
+        for power, rank in [(100, 3), (300, 1), (200, 2)]:
+            CabalAnalyticsRollup.add_sample(rollup, {
+                'cabal_id': 1, 'member_count': 5, 'active_member_count': 4, 'total_power': power,
+                'rank': rank, 'battles_won': 2, 'battles_lost': 1, 'referrals': 0
+            })
+
+        self.assertEqual(rollup.sample_count, 3)
+        self.assertEqual(rollup.total_power, 200)
+        self.assertEqual(rollup.max_power, 300)
+        self.assertEqual(rollup.rank, 2)
+        self.assertEqual(rollup.best_rank, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from app import create_app
+from werkzeug.exceptions import Forbidden
+from app.utils import cabal_loader
+from app.utils.permissions import require_cabal_officer
+
+class TestCabalLoader(unittest.TestCase):
+    """Test cases for the per-request cabal identity cache."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+
+    def test_cabal_loaded_once_per_request(self):
+        """Test that repeated lookups in one request reuse the loaded cabal."""
+        cabal = type('Cabal', (SimpleNamespace,), {})(id=7)
+
+        cabal_model = MagicMock(__name__='Cabal')
+        query_mock = cabal_model.query
+        query_mock.get.return_value = cabal
+
+        with self.app.test_request_context('/'), patch('app.models.cabal.Cabal', cabal_model):
+            self.assertIs(cabal_loader.get_cabal('7'), cabal)
+            self.assertIs(cabal_loader.get_cabal(7), cabal)
+            self.assertIsNone(cabal_loader.get_cabal('not-an-id'))
+            query_mock.get.assert_called_once_with(7)
+
+        # A new request starts with an empty cache
+        with self.app.test_request_context('/'), patch('app.models.cabal.Cabal', cabal_model):
+            cabal_loader.get_cabal(7)
+            self.assertEqual(query_mock.get.call_count, 2)
+
+    def test_missing_membership_is_remembered(self):
+        """Test that a user with no cabal is only looked up once per request."""
+        member_model = MagicMock(__name__='CabalMember')
+        query_mock = member_model.query
+        query_mock.options.return_value.filter_by.return_value.first.return_value = None
+
+        with self.app.test_request_context('/'), patch('app.models.cabal.CabalMember', member_model), \
+                patch('app.utils.cabal_loader.joinedload'):
+            self.assertIsNone(cabal_loader.get_membership(13))
+            self.assertIsNone(cabal_loader.get_membership(13))
+
+        query_mock.options.assert_called_once()
+
+    def _membership(self, user_id=13, cabal_id=7, leader_id=1, officer_user_id=None):
+        """Build a membership whose cabal has one officer."""
+        officer = SimpleNamespace(role_type='clout', chad=SimpleNamespace(user_id=officer_user_id))
+        cabal = SimpleNamespace(id=cabal_id, leader_id=leader_id, officer_roles=[officer])
+        return SimpleNamespace(id=3, cabal_id=cabal_id, cabal=cabal, role='member')
+
+    def test_access_looked_up_once_per_request(self):
+        """Test that the role is worked out from one membership lookup per request."""
+        user = SimpleNamespace(id=13)
+        membership = self._membership(officer_user_id=13)
+
+        with self.app.test_request_context('/'), \
+                patch('app.utils.cabal_loader.get_membership', return_value=membership) as get_membership:
+            access = cabal_loader.get_cabal_access(user, '7')
+            self.assertEqual(access['role'], 'officer')
+            self.assertEqual(access['officer_roles'], ['clout'])
+            self.assertIs(cabal_loader.get_cabal_access(user, 7), access)
+            self.assertIsNone(cabal_loader.get_cabal_access(user, 8))
+            self.assertEqual(get_membership.call_count, 2)
+
+    def test_session_access_invalidated_on_role_change(self):
+        """Test that session-cached roles are reused until the cabal's roles change."""
+        self.app.config['CABAL_ACCESS_SESSION_TTL'] = 60
+        self.app.config['SECRET_KEY'] = 'test'
+        user = SimpleNamespace(id=13)
+
+        with self.app.test_request_context('/'), \
+                patch('app.utils.cabal_loader.get_membership', return_value=self._membership()) as get_membership:
+            self.assertEqual(cabal_loader.get_cabal_access(user, 7)['role'], 'member')
+
+            # A later request in the same session
+            cabal_loader.g.pop('cabal_identity_cache')
+            self.assertEqual(cabal_loader.get_cabal_access(user, 7)['role'], 'member')
+            self.assertEqual(get_membership.call_count, 1)
+
+            # Promoted by the leader in another session
+            get_membership.return_value = self._membership(officer_user_id=13)
+            cabal_loader.invalidate_cabal_access(7)
+            cabal_loader.g.pop('cabal_identity_cache', None)
+            self.assertEqual(cabal_loader.get_cabal_access(user, 7)['role'], 'officer')
+            self.assertEqual(get_membership.call_count, 2)
+
+    def test_access_version_bumped_after_commit(self):
+        """Test that a change still in the transaction only bumps the access version once committed."""
+        from sqlalchemy import text
+        from app.extensions import db
+
+        with self.app.test_request_context('/'), \
+                patch('app.utils.cache.bump_cabal_access_version') as bump:
+            # Nothing uncommitted: bumped straight away
+            cabal_loader.invalidate_cabal_access(7)
+            bump.assert_called_once_with(7)
+            bump.reset_mock()
+
+            # As after a flush of the new membership
+            db.session.execute(text('SELECT 1'))
+            cabal_loader._note_flush(db.session(), None)
+            cabal_loader.invalidate_cabal_access(7)
+            bump.assert_not_called()
+            db.session.commit()
+            bump.assert_called_once_with(7)
+            bump.reset_mock()
+
+            # Rolled back changes are never announced
+            db.session.execute(text('SELECT 1'))
+            cabal_loader._note_flush(db.session(), None)
+            cabal_loader.invalidate_cabal_access(8)
+            db.session.rollback()
+            db.session.commit()
+            bump.assert_not_called()
+
+    def test_require_cabal_officer(self):
+        """Test that the officer decorator admits officers and rejects members."""
+        user = SimpleNamespace(id=13, is_authenticated=True)
+        view = require_cabal_officer(lambda cabal_id: 'ok')
+
+        with self.app.test_request_context('/'), patch('app.utils.permissions.current_user', user), \
+                patch('app.utils.cabal_loader.get_membership', return_value=self._membership()):
+            with self.assertRaises(Forbidden):
+                view(cabal_id='7')
+
+        with self.app.test_request_context('/'), patch('app.utils.permissions.current_user', user), \
+                patch('app.utils.cabal_loader.get_membership', return_value=self._membership(leader_id=13)):
+            self.assertEqual(view(cabal_id='7'), 'ok')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.models.cabal import Cabal
+
+class TestCabalRankings(unittest.TestCase):
+    """Test cases for the cached, SQL-aggregated cabal ranking."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'CACHE_TYPE': 'SimpleCache'
+        })
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        Cabal.invalidate_rankings()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        Cabal.invalidate_rankings()
+        self.app_context.pop()
+
+    @patch.object(Cabal, '_query_cabal_rankings')
+    def test_ranking_is_cached_until_invalidated(self, query_mock):
+        """Test top-N and rank lookups share one aggregate query until invalidated."""
+        query_mock.return_value = [(3, 'Sigmas', 4, 400), (1, 'Alphas', 2, 250.5), (2, 'Betas', 1, 0)]
+
+        self.assertEqual(Cabal.get_top_cabals(limit=2), [(3, 'Sigmas', 4, 400.0), (1, 'Alphas', 2, 250.5)])
+        self.assertEqual(Cabal.get_cabal_rank(2), 3)
+        self.assertIsNone(Cabal.get_cabal_rank(99))
+        query_mock.assert_called_once()
+
+        query_mock.return_value = [(1, 'Alphas', 3, 500), (3, 'Sigmas', 4, 400)]
+        Cabal.invalidate_rankings()
+
+        self.assertEqual(Cabal.get_cabal_rank(1), 1)
+        self.assertIsNone(Cabal.get_cabal_rank(2))
+        self.assertEqual(query_mock.call_count, 2)
+
+    @patch('app.models.cabal.db')
+    def test_reconcile_repairs_only_drifted_cabals(self, db_mock):
+        """Test that reconciliation bulk-updates just the cabals whose aggregates drifted."""
+        actual_query, stored_query = MagicMock(), MagicMock()
+        db_mock.session.query.side_effect = [actual_query, stored_query]
+        actual_query.filter.return_value.group_by.return_value.all.return_value = [(1, 3, 300.0), (2, 2, 150.0)]
+        stored_query.all.return_value = [(1, 3, 300.0), (2, 3, 150.0), (3, 1, 100.0)]
+
+        self.assertEqual(Cabal.reconcile_aggregates(), 2)
+
+        repairs = db_mock.session.execute.call_args[0][1]
+        self.assertEqual(repairs, [
+            {'b_id': 2, 'member_count': 2, 'total_power': 150.0},
+            {'b_id': 3, 'member_count': 0, 'total_power': 0.0}
+        ])
+        db_mock.session.commit.assert_called_once()
+
+    @patch.object(Cabal, '_query_cabal_rankings')
+    def test_tied_cabals_share_a_rank(self, query_mock):
+        """Test that lookups rank densely, like the persisted rank column."""
+        query_mock.return_value = [(3, 'Sigmas', 4, 400), (1, 'Alphas', 2, 400), (2, 'Betas', 1, 100)]
+
+        self.assertEqual([Cabal.get_cabal_rank(cabal_id) for cabal_id in (3, 1, 2)], [1, 1, 2])
+
+    def test_bulk_update_runs_as_core_executemany(self):
+        """Test that the bulk UPDATE works without the ORM bulk-by-primary-key path."""
+        from app import db
+
+        table = Cabal.__table__
+        table.create(db.engine)
+        db.session.execute(table.insert(), [
+            {'id': cabal_id, 'name': f"Cabal {cabal_id}", 'leader_id': 1, 'member_count': 0, 'total_power': 0}
+            for cabal_id in (1, 2, 3)
+        ])
+
+        Cabal._bulk_update([
+            {'id': 1, 'member_count': 4, 'total_power': 400.0, 'rank': 1},
+            {'id': 3, 'member_count': 2, 'total_power': 100.0, 'rank': 2}
+        ])
+        db.session.commit()
+
+        rows = db.session.execute(
+            db.select(table.c.id, table.c.member_count, table.c.rank).order_by(table.c.id)
+        ).all()
+        self.assertEqual([tuple(row) for row in rows], [(1, 4, 1), (2, 0, None), (3, 2, 2)])
+        db.session.remove()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.models.chad import ChadStats
+from app.utils.cabal_war import roll_cabal_war, resolve_cabal_battle, NO_CONTEST, FAILED
+
+class TestCabalWar(unittest.TestCase):
+    """Test cases for the cabal war engine."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    def make_roster(self, home_powers, away_powers):
+        """Build (participant, chad) rows and their stats for both sides."""
+        roster, stats = [], {}
+        for index, (cabal_id, power) in enumerate([(1, p) for p in home_powers] + [(2, p) for p in away_powers]):
+            chad = MagicMock(id=index + 1)
+            roster.append((MagicMock(cabal_id=cabal_id), chad))
+            stats[chad.id] = ChadStats(power, 0, 0, 0)
+        return roster, stats
+
+    def test_rolls_follow_the_battle_formula(self):
+        """Test that side scores are the sum of 60/40 rolls."""
+        rolls, home, away = roll_cabal_war([100, 100, 50], [True, True, False], seed=5)
+
+        self.assertTrue(all(60 <= roll <= 100 for roll in rolls[:2]))
+        self.assertTrue(30 <= rolls[2] <= 50)
+        self.assertAlmostEqual(home, rolls[0] + rolls[1])
+        self.assertAlmostEqual(away, rolls[2])
+
+    @patch('app.utils.cabal_war.Cabal')
+    @patch('app.utils.cabal_war.db')
+    @patch('app.utils.cabal_war.Chad')
+    @patch('app.utils.cabal_war.load_rosters')
+    def test_war_is_written_in_one_transaction(self, load_rosters_mock, chad_mock, db_mock, cabal_mock):
+        """Test that a 21-vs-21 war costs a fixed number of queries and one commit."""
+        roster, stats = self.make_roster([200] * 21, [20] * 21)
+        load_rosters_mock.return_value = roster
+        chad_mock.get_total_stats_bulk.return_value = stats
+
+        battle = MagicMock(id=9, cabal_id=1, opponent_cabal_id=2, completed=False)
+
+        winner_id = resolve_cabal_battle(battle, seed=3)
+
+        self.assertEqual(winner_id, 1)
+        self.assertEqual(battle.result, 'win')
+        self.assertEqual(battle.participant_count, 21)
+        load_rosters_mock.assert_called_once_with(9)
+        chad_mock.get_total_stats_bulk.assert_called_once()
+        db_mock.session.commit.assert_called_once()
+
+        for participant, chad in roster:
+            chad.add_xp.assert_called_once_with(participant.xp_earned, commit=False)
+        self.assertEqual(sum(1 for _, chad in roster if chad.user.add_chadcoin.called), 21)
+
+    @patch('app.utils.cabal_war.Cabal')
+    @patch('app.utils.cabal_war.db')
+    @patch('app.utils.cabal_war.Chad')
+    @patch('app.utils.cabal_war.load_rosters')
+    def test_no_show_forfeits(self, load_rosters_mock, chad_mock, db_mock, cabal_mock):
+        """Test that a cabal with no participants loses."""
+        roster, stats = self.make_roster([], [10])
+        load_rosters_mock.return_value = roster
+        chad_mock.get_total_stats_bulk.return_value = stats
+
+        battle = MagicMock(id=1, cabal_id=1, opponent_cabal_id=2, completed=False)
+
+        self.assertEqual(resolve_cabal_battle(battle, seed=1), 2)
+        self.assertEqual(battle.result, 'loss')
+
+    @patch('app.utils.cabal_war.Cabal')
+    @patch('app.utils.cabal_war.db')
+    @patch('app.utils.cabal_war.Chad')
+    @patch('app.utils.cabal_war.load_rosters')
+    def test_nobody_shows_up(self, load_rosters_mock, chad_mock, db_mock, cabal_mock):
+        """Test that a battle neither cabal turned up for is a no contest."""
+        load_rosters_mock.return_value = []
+        chad_mock.get_total_stats_bulk.return_value = {}
+
+        battle = MagicMock(id=1, cabal_id=1, opponent_cabal_id=2, completed=False)
+
+        self.assertIsNone(resolve_cabal_battle(battle, seed=1))
+        self.assertTrue(battle.completed)
+        self.assertIsNone(battle.winner_id)
+        self.assertEqual(battle.result, NO_CONTEST)
+        cabal_mock.query.filter.assert_not_called()
+        db_mock.session.commit.assert_called_once()
+
+    @patch('app.utils.cabal_war.db')
+    @patch('app.utils.cabal_war.Chad')
+    @patch('app.utils.cabal_war.load_rosters')
+    def test_failing_battle_abandoned_after_max_attempts(self, load_rosters_mock, chad_mock, db_mock):
+        """Test that failed resolutions are counted and the battle is given up on at the cap."""
+        load_rosters_mock.side_effect = RuntimeError("database is locked")
+        self.app.config['CABAL_BATTLE_MAX_ATTEMPTS'] = 2
+
+        battle = MagicMock(id=1, cabal_id=1, opponent_cabal_id=2, completed=False, attempts=0)
+
+        self.assertIsNone(resolve_cabal_battle(battle, seed=1))
+        self.assertEqual(battle.attempts, 1)
+        self.assertEqual(battle.last_error, "database is locked")
+        self.assertFalse(battle.completed)
+
+        self.assertIsNone(resolve_cabal_battle(battle, seed=1))
+        self.assertEqual(battle.attempts, 2)
+        self.assertTrue(battle.completed)
+        self.assertIsNone(battle.winner_id)
+        self.assertEqual(battle.result, FAILED)
+        self.assertEqual(db_mock.session.rollback.call_count, 2)
+        self.assertEqual(db_mock.session.commit.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
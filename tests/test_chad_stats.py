@@ -0,0 +1,68 @@
+import unittest
+import pickle
+from app import create_app
+from app.models.chad import ChadStats
+from app.utils.cache import get_cached_chad_stats, cache_chad_stats, invalidate_chad_stats
+
+class TestChadStats(unittest.TestCase):
+    """Test cases for the cached Chad stat snapshots."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        invalidate_chad_stats(1, 2)
+        self.app_context.pop()
+
+    def test_snapshot_supports_attribute_and_mapping_access(self):
+        """Test that existing callers can read stats either way."""
+        stats = ChadStats(10, 20, 15, 25)
+
+        self.assertEqual(stats.roast_level, 20)
+        self.assertEqual(stats['drip_factor'], 25)
+        self.assertEqual(sum(stats.values()), 70)
+        self.assertEqual(max(stats.items(), key=lambda x: x[1])[0], 'drip_factor')
+        self.assertEqual(stats.to_dict()['clout'], 10)
+        self.assertRaises(KeyError, lambda: stats['luck'])
+        self.assertFalse(hasattr(stats, '__dict__'))
+
+    def test_snapshot_survives_pickling(self):
+        """Test that snapshots can be stored in any cache backend."""
+        stats = ChadStats(10, 20, 15, 25)
+        self.assertEqual(pickle.loads(pickle.dumps(stats)), stats)
+
+    def test_cache_round_trip_and_invalidation(self):
+        """Test that cached snapshots are served until invalidated."""
+        cache_chad_stats({1: ChadStats(10, 20, 15, 25), 2: ChadStats(1, 2, 3, 4)})
+
+        cached = get_cached_chad_stats([1, 2, 3])
+        self.assertEqual(set(cached.keys()), {1, 2})
+        self.assertEqual(cached[1], ChadStats(10, 20, 15, 25))
+
+        invalidate_chad_stats(1, None)
+
+        cached = get_cached_chad_stats([1, 2])
+        self.assertNotIn(1, cached)
+        self.assertIn(2, cached)
+
+    def test_cache_shared_through_redis_when_configured(self):
+        """Test that invalidations reach every process when REDIS_URL is set."""
+        from flask_caching.backends import RedisCache, SimpleCache
+        from app.extensions import cache
+
+        self.assertIsInstance(cache.cache, SimpleCache)
+
+        shared_app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'REDIS_URL': 'redis://localhost:6379/0'
+        })
+        with shared_app.app_context():
+            self.assertIsInstance(cache.cache, RedisCache)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from app.utils.command_router import parse_command, tokenize
+
+class TestCommandRouter(unittest.TestCase):
+    """Test cases for the single-pass mention command router."""
+    
+    def test_commands_and_arguments(self):
+        """Test that each command is found with its parsed arguments."""
+        cases = [
+            ("@RollMasterChad CREATE CHARACTER", ('create_character', {})),
+            ("@RollMasterChad @bob_99 challenge to battle!", ('fight_request', {'opponent_name': 'bob_99'})),
+            ("check stats @RollMasterChad", ('check_stats', {})),
+            ("@RollMasterChad JOIN CABAL  Alpha Squad, thanks", ('join_cabal', {'cabal_name': 'Alpha Squad'})),
+            ("@RollMasterChad create cabal Based_Ones", ('create_cabal', {'cabal_name': 'Based_Ones'})),
+            ("@RollMasterChad APPOINT @alice AS Drip OFFICER",
+             ('appoint_officer', {'officer_name': 'alice', 'officer_type': 'drip'})),
+            ("@RollMasterChad BATTLE CABAL Night Owls @RollMasterChad",
+             ('schedule_battle', {'opponent_cabal_name': 'Night Owls'})),
+            ("@RollMasterChad VOTE REMOVE CABAL LEADER", ('vote_remove_leader', {})),
+            ("@RollMasterChad JOIN NEXT CABAL BATTLE", ('opt_in_battle', {})),
+            ("@RollMasterChad find me a match", ('queue_battle', {})),
+            ("@RollMasterChad FIND A BATTLE", ('queue_battle', {})),
+            ("@RollMasterChad can I beat @carol?", ('matchup_odds', {'opponent_name': 'carol'})),
+            ("@RollMasterChad HELP", ('help', {})),
+        ]
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(parse_command(text), expected)
+    
+    def test_precedence_and_whole_words(self):
+        """Test that the earlier command wins and keywords only match whole words."""
+        # Same precedence as the old pattern chain, wherever the commands appear
+        self.assertEqual(parse_command("help me CREATE CHARACTER")[0], 'create_character')
+        self.assertEqual(parse_command("JOIN CABAL Alpha or CREATE CABAL Beta")[0], 'join_cabal')
+        
+        self.assertEqual(parse_command("@RollMasterChad this is so helpful"), (None, {}))
+        self.assertEqual(parse_command("@chadhelper gm"), (None, {}))
+        # No one to fight, no cabal name
+        self.assertEqual(parse_command("CHALLENGE TO BATTLE"), (None, {}))
+        self.assertEqual(parse_command("JOIN CABAL !"), (None, {}))
+    
+    def test_tokenize(self):
+        """Test that the tweet is split into words, mentions and punctuation with positions."""
+        tokens = tokenize("@a JOIN, b")
+        self.assertEqual([token.upper for token in tokens], ['@A', 'JOIN', ',', 'B'])
+        self.assertEqual((tokens[3].start, tokens[3].end), (9, 10))
+    
+    @patch('app.utils.bot_commands.schedule_reply')
+    def test_handle_mention_dispatch(self, schedule_reply_mock):
+        """Test that handle_mention calls the command's handler with the parsed arguments."""
+        from app.utils import bot_commands
+        
+        handler = MagicMock(return_value=True)
+        tweet = {'id_str': '42', 'user': {'screen_name': 'dave'}, 'full_text': '@RollMasterChad JOIN CABAL Alpha'}
+        with patch.dict(bot_commands.COMMAND_HANDLERS, {'join_cabal': handler}):
+            self.assertTrue(bot_commands.handle_mention(tweet))
+        handler.assert_called_once_with('42', 'dave', cabal_name='Alpha')
+        
+        tweet['full_text'] = '@RollMasterChad gm'
+        self.assertFalse(bot_commands.handle_mention(tweet))
+        self.assertIn("I don't understand", schedule_reply_mock.call_args[0][0])
+
+if __name__ == '__main__':
+    unittest.main()
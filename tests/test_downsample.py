@@ -0,0 +1,40 @@
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from app.utils.downsample import lttb_indices, downsample_series
+
+class TestDownsample(unittest.TestCase):
+    """Test cases for LTTB downsampling."""
+
+    def test_keeps_endpoints_and_spikes(self):
+        """Test that downsampling keeps the ends and the extremes of the series."""
+        x = np.arange(5000)
+        y = np.sin(x / 300.0)
+        y[1234] = 50
+        y[3456] = -50
+
+        indices = lttb_indices(x, y, 200)
+
+        self.assertEqual(len(indices), 200)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 4999)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(1234, indices)
+        self.assertIn(3456, indices)
+
+    def test_short_series_are_untouched(self):
+        """Test that series no longer than the target are returned as-is."""
+        start = datetime(2026, 1, 1)
+        timestamps = [start + timedelta(hours=hour) for hour in range(10)]
+        series = {'power': list(range(10)), 'rank': [1] * 10}
+
+        self.assertEqual(downsample_series(timestamps, series, 50, key='power'), (timestamps, series))
+
+        kept_timestamps, kept = downsample_series(timestamps, series, 4, key='power')
+        self.assertEqual(len(kept_timestamps), 4)
+        self.assertEqual(len(kept['rank']), 4)
+        self.assertEqual(kept_timestamps[0], timestamps[0])
+        self.assertEqual(kept_timestamps[-1], timestamps[-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from datetime import datetime, timedelta
+from app.utils.keyword_scanner import KeywordScanner, timestamp_key, key_for_datetime, datetime_for_key
+from app.utils.twitter_api import analyze_tweets
+
+def twitter_time(moment):
+    return moment.strftime('%a %b %d %H:%M:%S +0000 %Y')
+
+class TestKeywordScanner(unittest.TestCase):
+    """Test cases for single-pass tweet keyword scanning."""
+    
+    def test_scan_whole_words_and_phrases(self):
+        """Test that keywords match whole words and phrases match words in a row."""
+        scanner = KeywordScanner(['gm', 'moon', 'diamond hands', 'hands'])
+        
+        self.assertEqual(scanner.scan("GM frens, to the MOON!"), {'gm', 'moon'})
+        self.assertEqual(scanner.scan("my gmail is mooning"), set())
+        self.assertEqual(scanner.scan("Diamond   hands forever"), {'diamond hands', 'hands'})
+        self.assertEqual(scanner.scan("hands of a diamond"), {'hands'})
+        
+        self.assertEqual(scanner.count(["gm gm gm", "gm moon", "nothing"]), {'gm': 2, 'moon': 1})
+    
+    def test_timestamp_keys_sort_chronologically(self):
+        """Test that timestamp keys order like the times they stand for, without parsing."""
+        earlier = datetime(2019, 12, 31, 23, 59, 59)
+        later = datetime(2020, 2, 1, 0, 0, 0)
+        
+        earlier_key = timestamp_key(twitter_time(earlier))
+        self.assertLess(earlier_key, timestamp_key(twitter_time(later)))
+        self.assertEqual(earlier_key, key_for_datetime(earlier))
+        self.assertEqual(datetime_for_key(earlier_key), earlier)
+        self.assertIsNone(timestamp_key(''))
+        self.assertIsNone(timestamp_key('not a twitter timestamp at all'))
+    
+    def test_analyze_full_timeline(self):
+        """Test that a 3200 tweet timeline is scored on class keywords as well as stat keywords."""
+        now = datetime.utcnow()
+        tweets = []
+        for i in range(3200):
+            text = "leg day at the gym, protein shake and gains" if i % 2 else "gm, just vibing"
+            tweets.append({
+                'full_text': text,
+                'created_at': twitter_time(now - timedelta(hours=3 * i)),
+                'favorite_count': 0,
+                'retweet_count': 0
+            })
+        
+        analysis = analyze_tweets(tweets)
+        
+        self.assertEqual(analysis['chad_class'], 'Gym Rat')
+        self.assertEqual(analysis['keyword_analysis']['gym'], 1600)
+        self.assertEqual(analysis['keyword_analysis']['gm'], 1600)
+        self.assertEqual(analysis['account_metadata']['age_days'], (3 * 3199) // 24)
+        self.assertFalse(analysis['account_metadata']['suspicious_activity'])
+    
+    def test_recent_only_keywords_flagged(self):
+        """Test that an account whose keywords all appeared this week is flagged as suspicious."""
+        now = datetime.utcnow()
+        tweets = [{'text': "old tweet about nothing", 'created_at': twitter_time(now - timedelta(days=400))}]
+        tweets += [
+            {'text': "alpha sigma based ratio chad", 'created_at': twitter_time(now - timedelta(days=1))}
+            for _ in range(5)
+        ]
+        
+        analysis = analyze_tweets(tweets)
+        
+        self.assertEqual(analysis['chad_class'], 'Clown')
+        self.assertTrue(analysis['account_metadata']['suspicious_activity'])
+        self.assertEqual(analysis['base_stats']['roast_level'], 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import random
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.utils.leaderboard import (
+    RankIndex, BattleLeaderboard, ChadRankings, record_battle_result, WIN_SCORE, LOSS_SCORE
+)
+
+class TestRankIndex(unittest.TestCase):
+    """Test cases for the order-statistics rank index."""
+
+    def naive_ranking(self, scores):
+        """Rank by score descending, ties by member."""
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def test_matches_sorted_ranking_under_updates(self):
+        """Test rank() and at_rank() against a full sort after random updates."""
+        rng = random.Random(11)
+        index = RankIndex(size=8)
+        scores = {}
+
+        for _ in range(2000):
+            member = rng.randint(1, 150)
+            if rng.random() < 0.1:
+                index.remove(member)
+                scores.pop(member, None)
+            else:
+                scores[member] = rng.randint(0, 3000)
+                index.update(member, scores[member])
+
+        expected = self.naive_ranking(scores)
+        self.assertEqual(len(index), len(expected))
+        for rank, (member, score) in enumerate(expected, start=1):
+            self.assertEqual(index.rank(member), rank)
+            self.assertEqual(index.at_rank(rank), (member, score))
+
+        self.assertEqual(index.top(5), expected[:5])
+        self.assertIsNone(index.at_rank(len(expected) + 1))
+        self.assertIsNone(index.rank(-1))
+
+    def test_tiebreak_and_neighbours(self):
+        """Test that tie-breaks order equal scores and around() returns the window."""
+        index = RankIndex(size=4)
+        for member in range(1, 21):
+            index.update(member, member // 2, tiebreak=member % 3)
+
+        expected = sorted(range(1, 21), key=lambda member: (-(member // 2), -(member % 3), member))
+        self.assertEqual([member for member, _ in index.top(20)], expected)
+
+        position = expected.index(7) + 1
+        around = index.around(7, radius=5)
+        self.assertEqual([rank for rank, _, _ in around], list(range(position - 5, position + 6)))
+        self.assertEqual([member for _, member, _ in around], expected[position - 6:position + 5])
+
+        self.assertEqual([member for _, member, _ in index.around(expected[0], radius=2)], expected[:3])
+        self.assertEqual(index.around(99), [])
+
+class TestBattleLeaderboard(unittest.TestCase):
+    """Test cases for the incrementally maintained battle leaderboard."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    def make_chad(self, chad_id, wins=0, losses=0):
+        chad = MagicMock(id=chad_id, battles_won=wins, battles_lost=losses,
+                         battle_score=wins * WIN_SCORE + losses * LOSS_SCORE)
+        chad.name = f"Chad {chad_id}"
+        chad.chad_class.name = "Sigma"
+        return chad
+
+    def test_results_update_counters_and_ranking_without_rebuilding(self):
+        """Test that completed battles move Chads without touching battle history."""
+        leaderboard = BattleLeaderboard()
+        with patch('app.utils.leaderboard.battle_leaderboard', leaderboard):
+            with patch.object(BattleLeaderboard, 'rebuild', autospec=True) as rebuild_mock:
+                def rebuild(board):
+                    board._built_at = board._clock()
+                    for chad in (first, second):
+                        board.record(chad)
+                rebuild_mock.side_effect = rebuild
+
+                first, second = self.make_chad(1, wins=2), self.make_chad(2, wins=1)
+                self.assertEqual([entry['chad_id'] for entry in leaderboard.top()], [1, 2])
+
+                record_battle_result(second, first)
+                record_battle_result(second, first)
+
+                top = leaderboard.top()
+                rebuild_mock.assert_called_once()
+
+        self.assertEqual(second.battles_won, 3)
+        self.assertEqual(first.battles_lost, 2)
+        self.assertEqual([entry['chad_id'] for entry in top], [2, 1])
+        self.assertEqual(top[0]['score'], 3 * WIN_SCORE)
+        self.assertEqual(top[1]['battles'], 4)
+
+class TestChadRankings(unittest.TestCase):
+    """Test cases for the per-metric Chad rank indexes."""
+
+    def test_committed_changes_move_ranks(self):
+        """Test rank(), around() and top() across metrics after applied changes."""
+        rankings = ChadRankings()
+        rankings._built_at = rankings._clock()
+        rankings.apply({
+            chad_id: (f"Chad {chad_id}", {'clout': chad_id * 10, 'level': 3, 'xp': 100 - chad_id, 'rating': 1200})
+            for chad_id in range(1, 13)
+        })
+
+        self.assertEqual(rankings.rank('clout', 12), 1)
+        self.assertEqual(rankings.rank('level', 1), 1)
+        self.assertEqual([entry['chad_id'] for entry in rankings.around('clout', 1)], [6, 5, 4, 3, 2, 1])
+
+        rankings.apply({1: ("Chad 1", {'clout': 500, 'level': 3, 'xp': 99, 'rating': 1250})}, removed=[12])
+
+        self.assertEqual(rankings.top('clout', limit=1)[0], {'rank': 1, 'chad_id': 1, 'chad_name': 'Chad 1', 'score': 500})
+        self.assertEqual(rankings.rank('rating', 1), 1)
+        self.assertIsNone(rankings.rank('clout', 12))
+        self.assertRaises(ValueError, rankings.rank, 'charisma', 1)
+
+    def test_tied_chads_share_a_rank(self):
+        """Test that tied Chads share a rank and the next Chad skips past them."""
+        rankings = ChadRankings()
+        rankings._built_at = rankings._clock()
+        rankings.apply({
+            1: ("Chad 1", {'clout': 300, 'level': 5, 'xp': 10, 'rating': 1200}),
+            2: ("Chad 2", {'clout': 200, 'level': 5, 'xp': 10, 'rating': 1200}),
+            3: ("Chad 3", {'clout': 200, 'level': 5, 'xp': 20, 'rating': 1200}),
+            4: ("Chad 4", {'clout': 100, 'level': 4, 'xp': 90, 'rating': 1200})
+        })
+
+        self.assertEqual([rankings.rank('clout', chad_id) for chad_id in (1, 2, 3, 4)], [1, 2, 2, 4])
+        self.assertEqual([entry['rank'] for entry in rankings.around('clout', 2)], [1, 2, 2, 4])
+        # The tie-break column splits ties in the score
+        self.assertEqual([rankings.rank('level', chad_id) for chad_id in (3, 1, 2, 4)], [1, 2, 2, 4])
+        self.assertEqual({entry['rank'] for entry in rankings.top('rating')}, {1})
+
+if __name__ == '__main__':
+    unittest.main()
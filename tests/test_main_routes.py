@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.models.battle import Battle
+from app.models.cabal import CabalBattle
+
+def model_spec(model, *extra):
+    """Attributes a mocked model may expose: its real columns plus the given names."""
+    return list(model.__table__.columns.keys()) + ['query', *extra]
+
+class TestMainRoutes(unittest.TestCase):
+    """Test cases for the main blueprint's pages."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    @patch('app.controllers.main.render_template')
+    @patch('app.controllers.main.CabalMember')
+    @patch('app.controllers.main.CabalBattle', spec=model_spec(CabalBattle, 'involving'))
+    @patch('app.controllers.main.Battle', spec=model_spec(Battle))
+    @patch('app.controllers.main.current_user')
+    def test_index_shows_recent_and_upcoming_battles(self, mock_user, mock_battle, mock_cabal_battle,
+                                                     mock_member, mock_render):
+        """Test that a logged-in member sees their battles and their cabal's upcoming wars."""
+        from app.controllers.main import index
+
+        mock_user.is_authenticated = True
+        mock_user.chad = MagicMock(id=7)
+        cabal = MagicMock(id=3)
+        mock_cabal_battle.completed = CabalBattle.__table__.c.completed
+        mock_cabal_battle.scheduled_at = CabalBattle.__table__.c.scheduled_at
+        mock_member.query.filter_by.return_value.first.return_value = MagicMock(cabal=cabal)
+
+        recent = [MagicMock()]
+        upcoming = [MagicMock()]
+        mock_battle.query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = recent
+        mock_cabal_battle.query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = upcoming
+
+        with self.app.test_request_context('/'), patch.object(self.app.logger, 'error') as log_error:
+            index()
+
+        log_error.assert_not_called()
+        mock_cabal_battle.involving.assert_called_once_with(3)
+        mock_render.assert_called_once_with(
+            'index.html', chad=mock_user.chad, recent_battles=recent, cabal=cabal, upcoming_battles=upcoming
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+from sqlalchemy import update
+from app import create_app
+from app.extensions import db
+from app.models.battle import MatchmakingEntry
+from app.utils.battle_resolver import calculate_rating_change
+from app.utils.matchmaking import (
+    MatchmakingQueue, process_matchmaking_queue, BASE_TOLERANCE, TOLERANCE_PER_SECOND, MATCH_MAX_ATTEMPTS
+)
+
+class FakeClock:
+    """Controllable clock for the queue."""
+
+    def __init__(self):
+        self.start = datetime.utcnow()
+        self.now = 0.0
+
+    def __call__(self):
+        return self.start + timedelta(seconds=self.now)
+
+class TestMatchmaking(unittest.TestCase):
+    """Test cases for the rating-indexed matchmaking queue."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        MatchmakingEntry.__table__.create(db.engine)
+
+        self.clock = FakeClock()
+        self.queue = MatchmakingQueue(clock=self.clock)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        db.session.remove()
+        self.app_context.pop()
+
+    def test_enqueue_matches_closest_rating_within_band(self):
+        """Test that a new entrant is paired with its nearest acceptable neighbour."""
+        self.assertIsNone(self.queue.enqueue(1, 1000))
+        self.assertIsNone(self.queue.enqueue(2, 1200))
+        self.assertIsNone(self.queue.enqueue(3, 1400))
+
+        opponent = self.queue.enqueue(4, 1210)
+
+        self.assertEqual(opponent.chad_id, 2)
+        self.assertEqual(len(self.queue), 2)
+        self.assertIn(2, self.queue)
+        self.assertFalse(self.queue.dequeue(2))
+        _, pairs = self.queue.claim_pairs()
+        self.assertEqual([(a.chad_id, b.chad_id) for a, b in pairs], [(2, 4)])
+
+    def test_queue_is_shared_between_processes(self):
+        """Test that Chads queued by one process are matched by another."""
+        MatchmakingQueue(clock=self.clock).enqueue(1, 1000, tweet_id='1', username='alice')
+
+        opponent = self.queue.enqueue(2, 1010, tweet_id='2', username='bob')
+
+        self.assertEqual(opponent.chad_id, 1)
+        self.assertEqual(opponent.username, 'alice')
+        _, pairs = MatchmakingQueue(clock=self.clock).claim_pairs()
+        self.assertEqual([(a.chad_id, b.chad_id) for a, b in pairs], [(1, 2)])
+        # Claimed pairs aren't handed to anyone else while the lease lasts
+        self.assertEqual(self.queue.claim_pairs()[1], [])
+
+    def test_tolerance_widens_while_waiting(self):
+        """Test that waiting Chads are eventually paired with wider gaps."""
+        gap = BASE_TOLERANCE + 30
+        self.queue.enqueue(1, 1000)
+        self.queue.enqueue(2, 1000 + gap)
+
+        self.assertEqual(self.queue.match_waiting(), 0)
+
+        self.clock.now = 30 / TOLERANCE_PER_SECOND
+        self.assertEqual(self.queue.match_waiting(), 1)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_requeue_replaces_previous_entry(self):
+        """Test that a Chad is never in the index twice."""
+        self.queue.enqueue(1, 1000)
+        self.queue.enqueue(1, 1500)
+        self.assertEqual(len(self.queue), 1)
+        self.assertTrue(self.queue.dequeue(1))
+        self.assertFalse(self.queue.dequeue(1))
+
+    def test_rating_change_rewards_upsets(self):
+        """Test that beating a higher-rated Chad is worth more."""
+        self.assertEqual(calculate_rating_change(1200, 1200), 16)
+        self.assertGreater(calculate_rating_change(1000, 1400), calculate_rating_change(1400, 1000))
+        self.assertEqual(calculate_rating_change(3000, 100), 1)
+
+    @patch('app.utils.outbound.schedule_reply')
+    @patch('app.utils.battle_resolver.resolve_battles')
+    @patch('app.utils.matchmaking.create_matched_battles')
+    def test_pairs_are_resolved_in_batches(self, create_battles_mock, resolve_mock, schedule_reply_mock):
+        """Test that matched pairs go to the resolver in batches."""
+        for chad_id in range(10):
+            self.queue.enqueue(chad_id, 1000 + chad_id, tweet_id=str(chad_id), username=f"user{chad_id}")
+
+        create_battles_mock.side_effect = lambda pairs: [MagicMock() for _ in pairs]
+        resolve_mock.side_effect = lambda battles: ["summary"] * len(battles)
+
+        resolved = process_matchmaking_queue(self.queue, batch_size=2)
+
+        self.assertEqual(resolved, 5)
+        self.assertEqual(resolve_mock.call_count, 3)
+        self.assertEqual(schedule_reply_mock.call_count, 10)
+        self.assertEqual(schedule_reply_mock.call_args[1]['lane'], 'battle')
+
+    @patch('app.utils.outbound.schedule_reply')
+    @patch('app.utils.battle_resolver.resolve_battles')
+    @patch('app.utils.matchmaking.create_matched_battles')
+    def test_failed_batch_is_retried_then_dropped(self, create_battles_mock, resolve_mock, schedule_reply_mock):
+        """Test that pairs whose battles fail stay queued until they run out of attempts."""
+        self.queue.enqueue(1, 1000, tweet_id='1', username='alice')
+        self.queue.enqueue(2, 1000, tweet_id='2', username='bob')
+        create_battles_mock.side_effect = RuntimeError("database is down")
+
+        for attempt in range(MATCH_MAX_ATTEMPTS - 1):
+            self.assertEqual(process_matchmaking_queue(self.queue), 0)
+            self.assertIn(1, self.queue)
+            self.assertIn(2, self.queue)
+            schedule_reply_mock.assert_not_called()
+
+            # Nothing is retried until the lease expires
+            process_matchmaking_queue(self.queue)
+            self.assertEqual(create_battles_mock.call_count, attempt + 1)
+            db.session.execute(update(MatchmakingEntry.__table__).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+            db.session.commit()
+
+        self.assertEqual(process_matchmaking_queue(self.queue), 0)
+
+        self.assertNotIn(1, self.queue)
+        self.assertNotIn(2, self.queue)
+        self.assertEqual(schedule_reply_mock.call_count, 2)
+        self.assertIn("couldn't be resolved", schedule_reply_mock.call_args[0][0])
+        resolve_mock.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
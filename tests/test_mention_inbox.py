@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.tweet_tracker import MentionInbox
+
+def make_mention(tweet_id, author):
+    """Build a minimal mention payload."""
+    return {'id_str': str(tweet_id), 'user': {'id_str': author, 'screen_name': f"user{author}"}, 'full_text': 'CHECK STATS'}
+
+class TestMentionInbox(unittest.TestCase):
+    """Test cases for the bot's durable mention inbox."""
+    
+    def setUp(self):
+        """Set up an app with just the inbox table."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        MentionInbox.__table__.create(db.engine)
+    
+    def tearDown(self):
+        """Clean up the app context."""
+        db.session.remove()
+        self.ctx.pop()
+    
+    def test_record_is_idempotent(self):
+        """Test that refetched mentions are only recorded once."""
+        self.assertEqual(MentionInbox.record([make_mention(12, 'a'), make_mention(9, 'b')]), 2)
+        self.assertEqual(MentionInbox.record([make_mention(12, 'a'), make_mention(100, 'c')]), 1)
+        
+        self.assertEqual(MentionInbox.latest_tweet_id(), '100')
+    
+    def test_claims_are_exclusive(self):
+        """Test that concurrent workers never claim the same mention or author."""
+        MentionInbox.record([make_mention(1, 'a'), make_mention(2, 'b'), make_mention(3, 'a'), make_mention(4, 'c')])
+        
+        first = MentionInbox.claim('worker-1', limit=2)
+        second = MentionInbox.claim('worker-2')
+        
+        self.assertEqual([entry['tweet_id'] for entry in first], ['1', '2'])
+        # Author 'a' is still being handled by worker-1
+        self.assertEqual([entry['tweet_id'] for entry in second], ['4'])
+        self.assertEqual(first[0]['mention']['user']['id_str'], 'a')
+        
+        self.assertTrue(MentionInbox.complete('1', first[0]['token']))
+        self.assertFalse(MentionInbox.complete('2', second[0]['token']))
+        self.assertEqual([entry['tweet_id'] for entry in MentionInbox.claim('worker-2')], ['3'])
+    
+    def test_expired_and_failed_claims_are_retried(self):
+        """Test that abandoned claims are taken over and failures retried up to the limit."""
+        MentionInbox.record([make_mention(1, 'a')])
+        
+        abandoned = MentionInbox.claim('crashed-worker', lease_seconds=-1)
+        retried = MentionInbox.claim('worker-2')
+        self.assertEqual([entry['tweet_id'] for entry in retried], ['1'])
+        
+        # The crashed worker's claim no longer counts
+        self.assertFalse(MentionInbox.complete('1', abandoned[0]['token']))
+        
+        self.assertTrue(MentionInbox.release('1', retried[0]['token'], 'boom', max_attempts=2))
+        self.assertEqual(MentionInbox.claim('worker-3'), [])
+        
+        status = db.session.execute(db.select(MentionInbox.__table__.c.status)).scalar()
+        self.assertEqual(status, MentionInbox.FAILED)
+
+    def test_expired_claims_capped_at_max_attempts(self):
+        """Test that a mention whose worker keeps dying is failed rather than reclaimed forever."""
+        MentionInbox.record([make_mention(1, 'a')])
+        
+        MentionInbox.claim('crashed-1', lease_seconds=-1, max_attempts=2)
+        self.assertEqual(len(MentionInbox.claim('crashed-2', lease_seconds=-1, max_attempts=2)), 1)
+        self.assertEqual(MentionInbox.claim('worker-3', max_attempts=2), [])
+        
+        status = db.session.execute(db.select(MentionInbox.__table__.c.status)).scalar()
+        self.assertEqual(status, MentionInbox.FAILED)
+    
+    def test_handled_mentions_only_retry_their_replies(self):
+        """Test that a handled mention keeps its claim while replies wait, and is reclaimed just for them."""
+        MentionInbox.record([make_mention(1, 'a')])
+        reply = {'message': '@usera done', 'in_reply_to': '1', 'lane': 'reply'}
+        
+        claimed = MentionInbox.claim('worker-1', lease_seconds=-1)
+        self.assertIsNone(claimed[0]['replies'])
+        self.assertTrue(MentionInbox.mark_handled('1', claimed[0]['token'], [reply], 3600))
+        self.assertEqual(MentionInbox.claim('worker-2'), [])
+        
+        self.assertTrue(MentionInbox.retry_replies('1', claimed[0]['token'], 'rate limited', [reply]))
+        retried = MentionInbox.claim('worker-2', max_attempts=2)
+        self.assertEqual(retried[0]['replies'], [reply])
+        # A failing reply is never released back to be run as a command
+        self.assertFalse(MentionInbox.release('1', retried[0]['token'], 'boom'))
+        
+        self.assertTrue(MentionInbox.retry_replies('1', retried[0]['token'], 'rate limited', [reply]))
+        self.assertEqual(MentionInbox.claim('worker-3', max_attempts=2), [])
+        status, error = db.session.execute(
+            db.select(MentionInbox.__table__.c.status, MentionInbox.__table__.c.last_error)
+        ).one()
+        self.assertEqual((status, error), (MentionInbox.FAILED, 'Replies not posted by the last attempt'))
+
+if __name__ == '__main__':
+    unittest.main()
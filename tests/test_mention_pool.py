@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+from app import create_app
+from app.utils.mention_pool import shard_mentions, process_mentions_concurrently
+
+def make_mention(tweet_id, author):
+    """Build a minimal mention payload."""
+    return {'id_str': str(tweet_id), 'user': {'id_str': author, 'screen_name': f"user{author}"}, 'full_text': 'CHECK STATS'}
+
+class TestMentionPool(unittest.TestCase):
+    """Test cases for concurrent, author-sharded mention processing."""
+    
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.mentions = [make_mention(i, str(i % 3)) for i in range(1, 10)]
+    
+    def test_shard_mentions_keeps_author_order(self):
+        """Test that mentions are grouped by author in tweet order."""
+        shards = shard_mentions(self.mentions)
+        
+        self.assertEqual(len(shards), 3)
+        self.assertEqual([m['id_str'] for m in shards[0]], ['1', '4', '7'])
+        self.assertEqual([m['id_str'] for m in shards[2]], ['3', '6', '9'])
+    
+    def test_shards_processed_concurrently_in_order(self):
+        """Test that shards run on separate workers, each in its own app context, in author order."""
+        handled = []
+        contexts = set()
+        lock = threading.Lock()
+        
+        def handler(mention):
+            from flask import current_app
+            time.sleep(0.01)
+            with lock:
+                handled.append((mention['user']['id_str'], int(mention['id_str']), threading.current_thread().name))
+                contexts.add(id(current_app._get_current_object()))
+            if mention['id_str'] == '5':
+                raise ValueError("boom")
+        
+        stats = process_mentions_concurrently(self.app, self.mentions, handler, workers=3)
+        
+        self.assertEqual(stats['mentions'], 9)
+        self.assertEqual(stats['authors'], 3)
+        self.assertEqual(stats['failed'], 1)
+        self.assertGreater(stats['throughput'], 0)
+        self.assertGreaterEqual(stats['latency_max'], stats['latency_p50'])
+        
+        for author in ('0', '1', '2'):
+            ids = [tweet_id for handled_author, tweet_id, _ in handled if handled_author == author]
+            self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len({thread for _, _, thread in handled}), 3)
+        self.assertEqual(contexts, {id(self.app)})
+
+if __name__ == '__main__':
+    unittest.main()
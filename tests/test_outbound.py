@@ -0,0 +1,256 @@
+import threading
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+from app import create_app, db
+from app.models.tweet_tracker import OutboundRateLimit
+from app.utils.outbound import OutboundScheduler, TokenBucket, SharedTokenBucket, delivery_group, UPDATE_ENDPOINT
+
+class FakeClock:
+    """A clock that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestOutboundScheduler(unittest.TestCase):
+    """Test cases for the token-bucket outbound tweet scheduler."""
+    
+    def setUp(self):
+        """Set up a scheduler allowing bursts of 2 posts, then one every 10 seconds."""
+        self.clock = FakeClock()
+        self.sent = []
+        self.scheduler = OutboundScheduler(
+            buckets={UPDATE_ENDPOINT: TokenBucket(2, 0.1, clock=self.clock)},
+            senders={UPDATE_ENDPOINT: self.send},
+            clock=self.clock
+        )
+    
+    def send(self, post):
+        self.sent.append(post.message)
+        return None if post.message == 'bad' else f"id-{len(self.sent)}"
+    
+    def test_token_bucket(self):
+        """Test that the bucket allows a burst, then refills at its rate."""
+        bucket = TokenBucket(2, 0.5, clock=self.clock)
+        
+        self.assertTrue(bucket.try_take())
+        self.assertTrue(bucket.try_take())
+        self.assertFalse(bucket.try_take())
+        self.assertEqual(bucket.wait_time(), 2.0)
+        
+        self.clock.now = 2.0
+        self.assertTrue(bucket.try_take())
+    
+    def test_lanes_by_priority_within_bucket(self):
+        """Test that battle replies go out before promo and stats tweets, paced by the bucket."""
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'stats', 'stats')
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'promo', 'promo')
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'battle', 'battle', in_reply_to='1')
+        
+        # Two tokens, then ten seconds until the next
+        self.assertEqual(self.scheduler.send_due(), 10.0)
+        self.assertEqual(self.sent, ['battle', 'promo'])
+        self.assertEqual(self.scheduler.stats()['depth']['stats'], 1)
+        
+        self.clock.now = 10.0
+        self.assertIsNone(self.scheduler.send_due())
+        self.assertEqual(self.sent, ['battle', 'promo', 'stats'])
+        
+        stats = self.scheduler.stats()
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(stats['latency_max'], 10.0)
+    
+    def test_duplicates_coalesced(self):
+        """Test that an identical waiting post absorbs the duplicate and both callbacks fire."""
+        results = []
+        
+        self.assertTrue(self.scheduler.enqueue(UPDATE_ENDPOINT, 'hi', 'reply', in_reply_to='7', on_sent=results.append))
+        self.assertFalse(self.scheduler.enqueue(UPDATE_ENDPOINT, 'hi', 'reply', in_reply_to='7', on_sent=results.append))
+        # Same text to another tweet is a different post
+        self.assertTrue(self.scheduler.enqueue(UPDATE_ENDPOINT, 'hi', 'reply', in_reply_to='8'))
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'bad', 'reply')
+        
+        self.scheduler.send_due()
+        self.clock.now = 10.0
+        self.scheduler.send_due()
+        
+        self.assertEqual(self.sent, ['hi', 'hi', 'bad'])
+        self.assertEqual(results, ['id-1', 'id-1'])
+        stats = self.scheduler.stats()
+        self.assertEqual((stats['coalesced'], stats['failed']), (1, 1))
+    
+    def test_tokens_taken_without_blocking_enqueue(self):
+        """Test that a slow (database) token take doesn't hold up threads queueing posts."""
+        queued = []
+        
+        class SlowBucket:
+            def try_take(bucket, tokens=1):
+                # Another thread queues a post while the token is being taken
+                thread = threading.Thread(target=lambda: queued.append(
+                    self.scheduler.enqueue(UPDATE_ENDPOINT, 'meanwhile', 'stats')
+                ))
+                thread.start()
+                thread.join(timeout=2)
+                return True
+            
+            def wait_time(bucket, tokens=1):
+                return 0.0
+        
+        self.scheduler._buckets[UPDATE_ENDPOINT] = SlowBucket()
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'first', 'battle', in_reply_to='5')
+        self.scheduler.send_due()
+        
+        self.assertEqual(queued[:1], [True])
+        self.assertEqual(self.sent[:2], ['first', 'meanwhile'])
+    
+    def test_background_thread_posts(self):
+        """Test that the scheduler posts on its own thread without the caller waiting."""
+        scheduler = OutboundScheduler(
+            buckets={UPDATE_ENDPOINT: TokenBucket(5, 1.0)},
+            senders={UPDATE_ENDPOINT: self.send}
+        )
+        scheduler.start()
+        try:
+            scheduler.enqueue(UPDATE_ENDPOINT, 'first', 'stats')
+            scheduler.enqueue(UPDATE_ENDPOINT, 'second', 'battle')
+            self.assertTrue(scheduler.flush(timeout=5))
+        finally:
+            scheduler.stop()
+        
+        self.assertEqual(sorted(self.sent), ['first', 'second'])
+        self.assertEqual(len(scheduler), 0)
+
+    def test_delivery_group_waits_for_every_post(self):
+        """Test that a group is delivered once all its posts are sent, and fails on the first failure."""
+        outcomes = []
+        
+        with delivery_group(lambda: outcomes.append('delivered'), lambda error, unsent: outcomes.append(error)) as group:
+            self.scheduler.enqueue(UPDATE_ENDPOINT, 'one', 'reply', in_reply_to='1')
+            self.scheduler.enqueue(UPDATE_ENDPOINT, 'two', 'reply', in_reply_to='1')
+            self.scheduler.enqueue(UPDATE_ENDPOINT, 'three', 'reply', in_reply_to='1')
+            # Held until the block ends
+            self.assertEqual(len(self.scheduler), 0)
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'outside', 'stats')
+        self.assertEqual(group.waiting, 3)
+        
+        # Two sent, the third waits for a token
+        self.scheduler.send_due()
+        self.assertEqual((group.waiting, outcomes), (1, []))
+        self.clock.now = 10.0
+        self.scheduler.send_due()
+        self.assertEqual(outcomes, ['delivered'])
+        
+        # Nothing queued: delivered as soon as the block ends
+        with delivery_group(lambda: outcomes.append('empty'), outcomes.append):
+            pass
+        self.assertEqual(outcomes[-1], 'empty')
+    
+    def test_failed_delivery_group_reports_unsent_posts(self):
+        """Test that a failed group reports only the posts that failed, once every post was tried."""
+        failures = []
+        
+        with delivery_group(lambda: failures.append('delivered'), lambda error, unsent: failures.append((error, unsent))):
+            self.scheduler.enqueue(UPDATE_ENDPOINT, 'bad', 'battle', in_reply_to='2')
+            self.scheduler.enqueue(UPDATE_ENDPOINT, 'later', 'reply', in_reply_to='2')
+            self.scheduler.enqueue(UPDATE_ENDPOINT, 'last', 'reply', in_reply_to='2')
+        self.scheduler.send_due()
+        self.assertEqual((self.sent, failures), (['bad', 'later'], []))
+        
+        self.clock.now = 10.0
+        self.scheduler.send_due()
+        self.assertEqual(self.sent, ['bad', 'later', 'last'])
+        self.assertEqual(failures, [('Failed to send battle post', [{'message': 'bad', 'in_reply_to': '2', 'lane': 'battle'}])])
+    
+    def test_dropped_posts_reported_to_their_group(self):
+        """Test that posts dropped at exit are reported as failed, so their replies can be kept."""
+        failures = []
+        
+        with delivery_group(lambda: failures.append('delivered'), lambda error, unsent: failures.append((error, unsent))):
+            for message in ('one', 'two', 'three'):
+                self.scheduler.enqueue(UPDATE_ENDPOINT, message, 'reply', in_reply_to='4')
+        self.scheduler.enqueue(UPDATE_ENDPOINT, 'stats', 'stats')
+        self.scheduler.send_due()
+        
+        self.assertEqual(self.scheduler.drop_pending('exiting'), 2)
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertEqual(failures, [('exiting', [{'message': 'three', 'in_reply_to': '4', 'lane': 'reply'}])])
+    
+    def test_abandoned_delivery_group(self):
+        """Test that a group whose block raised reports nothing and only posts if asked to."""
+        outcomes = []
+        
+        with self.assertRaises(RuntimeError):
+            with delivery_group(lambda: outcomes.append('delivered'), outcomes.append):
+                self.scheduler.enqueue(UPDATE_ENDPOINT, 'partial', 'reply', in_reply_to='3')
+                raise RuntimeError('handler failed')
+        self.scheduler.send_due()
+        self.assertEqual(self.sent, [])
+        
+        with self.assertRaises(RuntimeError):
+            with delivery_group(lambda: outcomes.append('delivered'), outcomes.append, send_on_error=True):
+                self.scheduler.enqueue(UPDATE_ENDPOINT, 'sorry', 'reply', in_reply_to='3')
+                raise RuntimeError('handler failed again')
+        self.scheduler.send_due()
+        
+        self.assertEqual(self.sent, ['sorry'])
+        self.assertEqual(outcomes, [])
+
+class TestSharedTokenBucket(unittest.TestCase):
+    """Test cases for the token bucket shared through the database."""
+    
+    def setUp(self):
+        """Set up an app with just the rate limit table."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        OutboundRateLimit.__table__.create(db.engine)
+    
+    def tearDown(self):
+        """Clean up the app context."""
+        db.session.remove()
+        self.ctx.pop()
+    
+    def test_processes_share_the_limit(self):
+        """Test that buckets in different processes spend the same tokens."""
+        first = SharedTokenBucket(UPDATE_ENDPOINT, 2, 0.001)
+        second = SharedTokenBucket(UPDATE_ENDPOINT, 2, 0.001)
+        
+        self.assertTrue(first.try_take())
+        self.assertTrue(second.try_take())
+        self.assertFalse(first.try_take())
+        self.assertGreater(first.wait_time(), 900)
+        self.assertFalse(second.try_take())
+        
+        # Refilled as time passes
+        table = OutboundRateLimit.__table__
+        updated_at = db.session.execute(db.select(table.c.updated_at)).scalar()
+        db.session.execute(db.update(table).values(updated_at=updated_at - timedelta(seconds=1000)))
+        db.session.commit()
+        self.assertTrue(second.try_take())
+        self.assertFalse(first.try_take())
+    
+    def test_concurrent_update_is_retried(self):
+        """Test that a token is not handed out twice when another process updates the bucket first."""
+        table = OutboundRateLimit.__table__
+        self.assertEqual(OutboundRateLimit.try_take(UPDATE_ENDPOINT, 2, 0.001), 0.0)
+        
+        real_execute = db.session.execute
+        raced = []
+        
+        def racing_execute(statement, *args, **kwargs):
+            # Another process takes the last token between our read and our update
+            if statement.is_dml and not raced:
+                raced.append(True)
+                real_execute(db.update(table).values(tokens=0.0, version=table.c.version + 1))
+            return real_execute(statement, *args, **kwargs)
+        
+        with patch.object(db.session, 'execute', side_effect=racing_execute):
+            self.assertGreater(OutboundRateLimit.try_take(UPDATE_ENDPOINT, 2, 0.001), 0.0)
+        
+        self.assertLess(db.session.execute(db.select(table.c.tokens)).scalar(), 0.01)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,8 @@ from app.models.cabal import Cabal, CabalMember, CabalBattle
 from app.models.user import User
 from app.models.chad import Chad
 from app.models.referral import Referral
-from app import db
+from app import db, create_app
+from app.utils.job_metrics import get_job_metric
 
 class TestScheduledTasks(unittest.TestCase):
     """Test cases for scheduled tasks related to cabals."""
@@ -16,110 +17,63 @@ class TestScheduledTasks(unittest.TestCase):
         # Mock database session
         self.db_session_mock = MagicMock()
         
-    @patch('app.models.cabal.Cabal.get_leaderboard')
-    @patch('app.utils.twitter_api.share_weekly_leaderboard')
-    @patch('app.utils.twitter_api.post_tweet')
-    @patch('app.models.cabal.CabalBattle.query')
-    @patch('app.models.cabal.CabalMember.query')
-    @patch('app.models.referral.Referral.query')
-    @patch('app.models.chad.Chad.query')
-    @patch('app.models.user.User.query')
-    def test_send_weekly_cabal_recap(self, user_query_mock, chad_query_mock, 
-                                    referral_query_mock, member_query_mock, 
-                                    battle_query_mock, post_tweet_mock, 
-                                    share_leaderboard_mock, get_leaderboard_mock):
+    @patch('app.utils.outbound.schedule_tweet')
+    @patch('app.models.cabal.Cabal.get_weekly_recap_stats')
+    @patch('app.models.cabal.Cabal.get_top_cabals')
+    def test_send_weekly_cabal_recap(self, get_top_cabals_mock, recap_stats_mock, schedule_tweet_mock):
         """Test the weekly cabal recap function."""
-        # Mock cabal data
-        mock_cabal1 = MagicMock(spec=Cabal)
-        mock_cabal1.id = 1
-        mock_cabal1.name = "Test Cabal 1"
-        mock_cabal1.level = 5
-        mock_cabal1.total_power = 1000
-        mock_cabal1.rank = 1
-        mock_cabal1.leader_id = 101
-        
-        mock_cabal2 = MagicMock(spec=Cabal)
-        mock_cabal2.id = 2
-        mock_cabal2.name = "Test Cabal 2"
-        mock_cabal2.level = 4
-        mock_cabal2.total_power = 800
-        mock_cabal2.rank = 2
-        mock_cabal2.leader_id = 102
-        
-        mock_cabal3 = MagicMock(spec=Cabal)
-        mock_cabal3.id = 3
-        mock_cabal3.name = "Test Cabal 3"
-        mock_cabal3.level = 3
-        mock_cabal3.total_power = 600
-        mock_cabal3.rank = 3
-        mock_cabal3.leader_id = 103
-        
-        # Set up the mock leaderboard
-        get_leaderboard_mock.return_value = [mock_cabal1, mock_cabal2, mock_cabal3]
-        
-        # Mock battle data
-        mock_battle1 = MagicMock(spec=CabalBattle)
-        mock_battle1.result = 'win'
-        
-        mock_battle2 = MagicMock(spec=CabalBattle)
-        mock_battle2.result = 'loss'
-        
-        # Set up battle query filter chain
-        battle_filter_mock = MagicMock()
-        battle_filter_mock.all.return_value = [mock_battle1, mock_battle2]
-        battle_query_mock.filter.return_value = battle_filter_mock
-        
-        # Mock member data
-        member_filter_mock = MagicMock()
-        member_filter_mock.count.return_value = 3
-        member_query_mock.filter.return_value = member_filter_mock
-        
-        # Mock referral data
-        referral_filter_mock = MagicMock()
-        referral_filter_mock.count.return_value = 2
-        referral_query_mock.filter.return_value = referral_filter_mock
-        
-        # Mock Chad and User data
-        mock_chad = MagicMock(spec=Chad)
-        mock_chad.id = 101
-        chad_query_mock.get.return_value = mock_chad
-        
-        mock_user = MagicMock(spec=User)
-        mock_user.twitter_handle = "test_user"
-        user_filter_mock = MagicMock()
-        user_filter_mock.first.return_value = mock_user
-        user_query_mock.filter_by.return_value = user_filter_mock
-        
-        # Call the function
-        result = send_weekly_cabal_recap()
+        get_top_cabals_mock.return_value = [
+            (1, "Test Cabal 1", 10, 1000.0),
+            (2, "Test Cabal 2", 8, 800.0),
+            (3, "Test Cabal 3", 5, 600.0)
+        ]
+        recap_stats_mock.return_value = {
+            1: {'wins': 1, 'losses': 1, 'new_members': 3, 'referrals': 2, 'leader_handle': 'test_user'},
+            2: {'wins': 0, 'losses': 2, 'new_members': 0, 'referrals': 0, 'leader_handle': 'other_user'},
+            3: {'wins': 0, 'losses': 0, 'new_members': 1, 'referrals': 0, 'leader_handle': None}
+        }
+        schedule_tweet_mock.return_value = True
+        
+        app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        with app.app_context():
+            result = send_weekly_cabal_recap()
+            metric = get_job_metric('weekly_cabal_recap')
         
         # Verify the function executed successfully
         self.assertTrue(result)
         
-        # Verify the leaderboard was shared
-        share_leaderboard_mock.assert_called_once()
-        
-        # Verify tweets were sent to cabal leaders
-        self.assertTrue(post_tweet_mock.called)
-        
-    @patch('app.models.cabal.Cabal.query')
-    @patch('app.models.cabal.Cabal.calculate_total_power')
-    @patch('app.models.cabal.Cabal.update_rank')
-    @patch('app.extensions.db.session.commit')
-    def test_update_cabal_rankings(self, db_mock, update_rank_mock, 
-                                  calculate_power_mock, cabal_query_mock):
+        # All three cabals' figures come from one batched call
+        recap_stats_mock.assert_called_once()
+        self.assertEqual(recap_stats_mock.call_args[0][0], [1, 2, 3])
+        
+        # The leaderboard, then a recap for each leader with an X handle, on the stats lane
+        posts = [call[0][0] for call in schedule_tweet_mock.call_args_list]
+        self.assertEqual({call[1]['lane'] for call in schedule_tweet_mock.call_args_list}, {'stats'})
+        self.assertEqual(len(posts), 3)
+        self.assertIn("Weekly Cabal Leaderboard", posts[0])
+        self.assertTrue(posts[1].startswith("@test_user"))
+        self.assertIn("Try appointing officers", posts[2])
+        
+        # The run was recorded as a job metric
+        self.assertEqual(metric['status'], 'ok')
+        self.assertEqual(metric['queued'], 3)
+        self.assertEqual(metric['recaps'], 2)
+        
+    @patch('app.utils.scheduled_tasks.prune_cabal_analytics')
+    @patch('app.models.cabal_analytics.CabalAnalyticsRollup.add_snapshots')
+    @patch('app.models.cabal.Cabal.compute_rankings')
+    @patch('app.utils.scheduled_tasks.db')
+    @patch('app.models.cabal_analytics.db')
+    @patch('app.models.cabal.db')
+    def test_update_cabal_rankings(self, cabal_db_mock, analytics_db_mock,
+                                  task_db_mock, compute_rankings_mock,
+                                  add_snapshots_mock, prune_mock):
         """Test the cabal rankings update function."""
-        # Mock cabal data
-        mock_cabal1 = MagicMock(spec=Cabal)
-        mock_cabal2 = MagicMock(spec=Cabal)
-        
-        # Set up the mock query
-        filter_mock = MagicMock()
-        filter_mock.all.return_value = [mock_cabal1, mock_cabal2]
-        cabal_query_mock.filter_by.return_value = filter_mock
-        
-        # Set up db mock
-        db_mock.session = self.db_session_mock
+        compute_rankings_mock.return_value = [
+            {'cabal_id': cabal_id, 'member_count': 3, 'active_member_count': 2, 'total_power': power,
+             'rank': rank, 'battles_won': 1, 'battles_lost': 0, 'referrals': 0}
+            for cabal_id, power, rank in [(1, 300.0, 1), (2, 300.0, 1), (3, 100.0, 2)]
+        ]
         
         # Call the function
         result = update_cabal_rankings()
@@ -127,14 +81,21 @@ class TestScheduledTasks(unittest.TestCase):
         # Verify the function executed successfully
         self.assertTrue(result)
         
-        # Verify power was calculated for each cabal
-        self.assertEqual(calculate_power_mock.call_count, 2)
+        # Verify ranks were written with one bulk update, whatever the number of cabals
+        cabal_db_mock.session.execute.assert_called_once()
+        updates = cabal_db_mock.session.execute.call_args[0][1]
+        self.assertEqual([(row['b_id'], row['rank'], row['member_count']) for row in updates], [(1, 1, 2), (2, 1, 2), (3, 2, 2)])
+        
+        # Verify snapshots were written with one bulk insert
+        analytics_db_mock.session.execute.assert_called_once()
+        self.assertEqual(len(analytics_db_mock.session.execute.call_args[0][1]), 3)
         
-        # Verify rank was updated for each cabal
-        self.assertEqual(update_rank_mock.call_count, 2)
+        # Verify the snapshots were folded into the rollups and expired rows pruned
+        add_snapshots_mock.assert_called_once()
+        prune_mock.assert_called_once()
         
-        # Verify changes were committed
-        self.db_session_mock.commit.assert_called_once()
+        # Verify changes were committed once
+        task_db_mock.session.commit.assert_called_once()
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from app import create_app
+from app.models.chad import ChadStats
+from app.utils.battle_replay import replay_auto_battle
+from app.utils.tournament import (
+    get_bracket_size, get_bracket_order, pair_round, resolve_matches, run_tournament_round,
+    advance_tournaments, PARALLEL_MATCH_THRESHOLD
+)
+
+class TestTournament(unittest.TestCase):
+    """Test cases for the tournament bracket engine."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app_context.pop()
+
+    def make_entries(self, count):
+        """Build seeded entries the way create_tournament places them."""
+        slot_by_seed = {seed: slot for slot, seed in enumerate(get_bracket_order(get_bracket_size(count)))}
+        return [MagicMock(chad_id=100 + rank, seed_rank=rank, bracket_slot=slot_by_seed[rank])
+                for rank in range(1, count + 1)]
+
+    def test_standard_seeding(self):
+        """Test that top seeds are kept apart until the late rounds."""
+        self.assertEqual(get_bracket_size(5), 8)
+        self.assertEqual(get_bracket_size(4096), 4096)
+        self.assertEqual(get_bracket_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+
+    def test_pairing_gives_byes_to_top_seeds(self):
+        """Test that empty slots become byes for the highest seeds."""
+        entries = self.make_entries(6)
+
+        pairs = pair_round(entries, 1)
+
+        self.assertEqual(len(pairs), 4)
+        byes = sorted(entry.seed_rank for _, entry, opponent in pairs if opponent is None)
+        self.assertEqual(byes, [1, 2])
+
+        # Seeds 3 and 6 meet in round one, and the winner plays seed 2 next
+        survivors = [entry for entry in entries if entry.seed_rank in (1, 2, 3, 4)]
+        semi_finals = {frozenset((entry.seed_rank, opponent.seed_rank)) for _, entry, opponent in pair_round(survivors, 2)}
+        self.assertEqual(semi_finals, {frozenset((1, 4)), frozenset((2, 3))})
+
+    def test_parallel_resolution_matches_in_process(self):
+        """Test that the process pool returns the same results, in order."""
+        matches = [(seed, ChadStats(10 + seed % 7, 20, 15, 25), ChadStats(12, 18, 15 + seed % 5, 25))
+                   for seed in range(PARALLEL_MATCH_THRESHOLD + 10)]
+
+        parallel = resolve_matches(matches, workers=2)
+        expected = [replay_auto_battle(*match) for match in matches]
+
+        self.assertEqual(parallel, expected)
+
+    @patch('app.utils.tournament.db')
+    @patch('app.utils.tournament.apply_battle_rewards')
+    @patch('app.utils.tournament.record_match_result')
+    @patch('app.utils.tournament.resolve_matches')
+    @patch('app.utils.tournament.TournamentMatch', MagicMock(__name__='TournamentMatch'))
+    @patch('app.utils.tournament.TournamentEntry', MagicMock(__name__='TournamentEntry'))
+    @patch('app.utils.tournament.joinedload', MagicMock())
+    @patch('app.utils.tournament.Chad', MagicMock(__name__='Chad'))
+    def test_round_records_ratings_and_counters(self, resolve_mock, record_result_mock, rewards_mock, db_mock):
+        """Test that every contested match updates ratings and counters like a battle."""
+        from app.utils import tournament as tournament_module
+
+        entries = self.make_entries(4)
+        chads = {entry.chad_id: MagicMock(id=entry.chad_id) for entry in entries}
+        tournament_module.Chad.query.options.return_value.filter.return_value.all.return_value = list(chads.values())
+
+        tournament = MagicMock(id=1, is_finished=False, current_round=0, started_at=None)
+        tournament.entries.filter.return_value.all.return_value = entries
+        resolve_mock.side_effect = lambda matches, workers: [
+            {'initiator_won': True, 'winner_xp': 10, 'loser_xp': 5, 'winner_reward': 3} for _ in matches
+        ]
+
+        self.assertEqual(run_tournament_round(tournament, workers=1), 2)
+
+        # Slot order pairs seed 1 with seed 4 and seed 2 with seed 3
+        self.assertEqual(
+            [call.args for call in record_result_mock.call_args_list],
+            [(chads[101], chads[104]), (chads[102], chads[103])]
+        )
+        self.assertEqual(rewards_mock.call_count, 2)
+        db_mock.session.commit.assert_called_once()
+
+    @patch('app.utils.tournament.run_tournament_round')
+    @patch('app.utils.tournament.Tournament', MagicMock(__name__='Tournament'))
+    def test_advance_plays_one_round_of_each_open_tournament(self, round_mock):
+        """Test that the bot loop advances every unfinished tournament by a round."""
+        from app.utils import tournament as tournament_module
+
+        running, failing = MagicMock(is_finished=False), MagicMock(is_finished=False)
+        tournament_module.Tournament.query.filter.return_value.order_by.return_value.all.return_value = [running, failing]
+        round_mock.side_effect = lambda tournament, workers: None if tournament is failing else 2
+
+        self.assertEqual(advance_tournaments(workers=1), 1)
+        self.assertEqual([call.args[0] for call in round_mock.call_args_list], [running, failing])
+
+    @patch('app.utils.tournament.create_top_rated_tournament')
+    def test_admin_starts_tournament_for_top_rated_chads(self, create_mock):
+        """Test that the admin route seeds a tournament from the requested number of Chads."""
+        from app.controllers.admin import create_tournament
+
+        self.app.config['SECRET_KEY'] = 'test'
+        create_mock.return_value = MagicMock(entrant_count=8)
+        with self.app.test_request_context('/admin/tournaments', method='POST', data={'name': 'Weekly', 'size': '8'}):
+            response = create_tournament.__wrapped__()
+
+        create_mock.assert_called_once_with('Weekly', 8)
+        self.assertEqual(response.status_code, 302)
+
+if __name__ == '__main__':
+    unittest.main()
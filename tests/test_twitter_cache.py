@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import patch
+from app import create_app, db
+from app.models.tweet_tracker import TwitterLookupCache
+from app.utils import twitter_cache
+
+class TestTwitterCache(unittest.TestCase):
+    """Test cases for the persistent Twitter lookup cache."""
+    
+    def setUp(self):
+        """Set up an app with just the cache table."""
+        self.app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        TwitterLookupCache.__table__.create(db.engine)
+    
+    def tearDown(self):
+        """Clean up the app context."""
+        twitter_cache.wait_for_refreshes(timeout=5)
+        db.session.remove()
+        self.ctx.pop()
+    
+    @patch('app.utils.twitter_api.get_user_profile')
+    def test_profile_cached_until_ttl(self, get_profile_mock):
+        """Test that a profile is fetched once, and a failed fetch is not cached."""
+        get_profile_mock.return_value = {'id_str': '1', 'screen_name': 'Chad'}
+        
+        self.assertEqual(twitter_cache.get_cached_user_profile('Chad'), {'id_str': '1', 'screen_name': 'Chad'})
+        self.assertEqual(twitter_cache.get_cached_user_profile('chad')['id_str'], '1')
+        self.assertEqual(get_profile_mock.call_count, 1)
+        
+        get_profile_mock.return_value = None
+        self.assertIsNone(twitter_cache.get_cached_user_profile('nobody'))
+        self.assertIsNone(TwitterLookupCache.lookup(twitter_cache.PROFILE, 'nobody'))
+    
+    @patch('app.utils.twitter_api.fetch_clout')
+    def test_stale_value_served_while_refreshed(self, fetch_clout_mock):
+        """Test that an expired value is served at once and refreshed in the background."""
+        self.app.config['TWITTER_CLOUT_CACHE_TTL'] = 0
+        fetch_clout_mock.return_value = 10
+        self.assertEqual(twitter_cache.get_cached_clout('1'), 10)
+        
+        fetch_clout_mock.return_value = 20
+        self.assertEqual(twitter_cache.get_cached_clout('1'), 10)
+        self.assertTrue(twitter_cache.wait_for_refreshes(timeout=5))
+        
+        self.assertEqual(TwitterLookupCache.lookup(twitter_cache.CLOUT, '1')['value'], 20)
+        self.assertEqual(fetch_clout_mock.call_count, 2)
+    
+    def test_refresh_lease(self):
+        """Test that only one caller at a time gets to refresh a value."""
+        TwitterLookupCache.store(twitter_cache.PROFILE, 'chad', {'id_str': '1'}, ttl=0, stale_seconds=60)
+        
+        self.assertTrue(TwitterLookupCache.claim_refresh(twitter_cache.PROFILE, 'chad'))
+        self.assertFalse(TwitterLookupCache.claim_refresh(twitter_cache.PROFILE, 'chad'))
+        self.assertFalse(TwitterLookupCache.claim_refresh(twitter_cache.PROFILE, 'unknown'))
+        
+        # Storing the refreshed value releases the lease
+        TwitterLookupCache.store(twitter_cache.PROFILE, 'chad', {'id_str': '1'}, ttl=0, stale_seconds=60)
+        self.assertTrue(TwitterLookupCache.claim_refresh(twitter_cache.PROFILE, 'chad'))
+        
+        # Past its stale window a value is neither served nor kept
+        TwitterLookupCache.store(twitter_cache.CLOUT, '1', 5, ttl=0, stale_seconds=-1)
+        self.assertIsNone(TwitterLookupCache.lookup(twitter_cache.CLOUT, '1'))
+        self.assertEqual(TwitterLookupCache.prune(), 1)
+    
+    @patch('app.utils.twitter_api.analyze_tweets')
+    @patch('app.utils.twitter_api.get_user_tweets')
+    def test_analysis_versioned_over_cached_timeline(self, get_tweets_mock, analyze_mock):
+        """Test that the analysis is reused, and redone from the cached timeline when its version changes."""
+        get_tweets_mock.return_value = [{'full_text': 'gm'}]
+        analyze_mock.return_value = {'chad_class': 'Normie Chad'}
+        
+        self.assertEqual(twitter_cache.get_cached_analysis('1', 'chad'), {'chad_class': 'Normie Chad'})
+        self.assertEqual(twitter_cache.get_cached_analysis('1', 'chad'), {'chad_class': 'Normie Chad'})
+        self.assertEqual(analyze_mock.call_count, 1)
+        
+        analyze_mock.return_value = {'chad_class': 'Gym Rat'}
+        with patch('app.utils.twitter_api.ANALYSIS_VERSION', 'next'):
+            self.assertEqual(twitter_cache.get_cached_analysis('1', 'chad'), {'chad_class': 'Gym Rat'})
+        
+        self.assertEqual(analyze_mock.call_count, 2)
+        self.assertEqual(get_tweets_mock.call_count, 1)
+        self.assertEqual(TwitterLookupCache.lookup(twitter_cache.ANALYSIS, '1')['version'], 'next')
+
+    @patch('app.utils.twitter_api.get_user_tweets')
+    def test_timeline_cached_without_full_tweet_json(self, get_tweets_mock):
+        """Test that only the fields the analysis reads are kept in a cached timeline."""
+        get_tweets_mock.return_value = [{
+            'id': 1, 'id_str': '1', 'full_text': 'gm', 'created_at': 'Mon Jan 01 00:00:00 +0000 2024',
+            'favorite_count': 3, 'retweet_count': 1, 'user': {'screen_name': 'chad'}, 'entities': {}
+        }]
+        expected = [{
+            'id_str': '1', 'full_text': 'gm', 'created_at': 'Mon Jan 01 00:00:00 +0000 2024',
+            'favorite_count': 3, 'retweet_count': 1
+        }]
+        
+        tweets, _ = twitter_cache.get_cached_user_tweets('1', 'chad')
+        
+        self.assertEqual(tweets, expected)
+        self.assertEqual(TwitterLookupCache.lookup(twitter_cache.TIMELINE, '1')['value'], expected)
+
+if __name__ == '__main__':
+    unittest.main()
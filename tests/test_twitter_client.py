@@ -0,0 +1,79 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.utils.twitter_client import (
+    endpoint_for_url, RateLimitTracker, KeepAliveSession, get_twitter_client, reset_twitter_clients
+)
+
+CREDENTIALS = {
+    'TWITTER_API_KEY': 'key',
+    'TWITTER_API_SECRET': 'secret',
+    'TWITTER_ACCESS_TOKEN': 'token',
+    'TWITTER_ACCESS_TOKEN_SECRET': 'token-secret'
+}
+
+class TestTwitterClient(unittest.TestCase):
+    """Test cases for the pooled Twitter client and its rate-limit bookkeeping."""
+    
+    def tearDown(self):
+        """Forget any pooled clients."""
+        reset_twitter_clients()
+    
+    def test_endpoint_for_url(self):
+        """Test that request URLs map to their rate-limit endpoint."""
+        self.assertEqual(
+            endpoint_for_url('https://api.twitter.com/1.1/statuses/mentions_timeline.json?since_id=5'),
+            'statuses/mentions_timeline'
+        )
+        self.assertEqual(endpoint_for_url('https://api.twitter.com/1.1/users/show.json'), 'users/show')
+    
+    def test_rate_limit_tracking(self):
+        """Test that quota is tracked per endpoint until its window resets."""
+        now = [1000]
+        tracker = RateLimitTracker(clock=lambda: now[0])
+        
+        self.assertTrue(tracker.can_afford('users/show'))
+        
+        tracker.record('users/show', {'x-rate-limit-remaining': '2', 'x-rate-limit-reset': '1900', 'x-rate-limit-limit': '900'})
+        self.assertTrue(tracker.can_afford('users/show', calls=2))
+        self.assertFalse(tracker.can_afford('users/show', calls=3))
+        self.assertTrue(tracker.can_afford('statuses/user_timeline', calls=3))
+        
+        tracker.record('users/show', {}, status_code=429)
+        self.assertFalse(tracker.can_afford('users/show'))
+        self.assertEqual(tracker.seconds_until_reset('users/show'), 900)
+        
+        # A new window
+        now[0] = 1900
+        self.assertTrue(tracker.can_afford('users/show'))
+    
+    @patch.dict(os.environ, CREDENTIALS)
+    def test_client_is_pooled(self):
+        """Test that one client, with a keep-alive session, is reused and records response headers."""
+        client = get_twitter_client()
+        
+        self.assertIs(get_twitter_client(), client)
+        self.assertIsInstance(client.api.session, KeepAliveSession)
+        
+        # tweepy closes its session after every request; the pooled connections survive
+        with patch('requests.adapters.HTTPAdapter.close') as adapter_close:
+            client.api.session.close()
+        adapter_close.assert_not_called()
+        
+        response = SimpleNamespace(
+            url='https://api.twitter.com/1.1/statuses/mentions_timeline.json',
+            headers={'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(2 ** 40)},
+            status_code=200
+        )
+        for hook in client.session.hooks['response']:
+            hook(response)
+        self.assertFalse(client.can_afford('statuses/mentions_timeline'))
+    
+    @patch.dict(os.environ, {}, clear=True)
+    def test_missing_credentials(self):
+        """Test that no client is built without credentials."""
+        self.assertIsNone(get_twitter_client())
+
+if __name__ == '__main__':
+    unittest.main()
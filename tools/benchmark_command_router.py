@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Benchmark of mention command parsing.
+
+Builds a corpus of realistic mentions (commands, commands buried in chatter,
+and plain chatter that matches no command) and times the single-pass
+command router against the chain of regexes handle_mention used before,
+reporting the per-mention parse cost of each.
+
+Usage:
+    python tools/benchmark_command_router.py [--mentions 20000] [--repeat 5]
+
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# Add the parent directory to the path so we can import the app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.command_router import parse_command
+
+# The chain of patterns handle_mention searched in turn before the router
+LEGACY_PATTERNS = [
+    ('create_character', re.compile(r'CREATE\s+CHARACTER', re.IGNORECASE)),
+    ('fight_request', re.compile(r'.*@(\w+).*CHALLENGE\s+TO\s+BATTLE', re.IGNORECASE)),
+    ('check_stats', re.compile(r'CHECK\s+STATS', re.IGNORECASE)),
+    ('join_cabal', re.compile(r'JOIN\s+CABAL\s+([A-Za-z0-9_\s]+)', re.IGNORECASE)),
+    ('create_cabal', re.compile(r'CREATE\s+CABAL\s+([A-Za-z0-9_\s]+)', re.IGNORECASE)),
+    ('appoint_officer', re.compile(r'APPOINT\s+@(\w+)\s+AS\s+(CLOUT|ROAST|CRINGE|DRIP)\s+OFFICER', re.IGNORECASE)),
+    ('schedule_battle', re.compile(r'BATTLE\s+CABAL\s+([A-Za-z0-9_\s]+)', re.IGNORECASE)),
+    ('vote_remove_leader', re.compile(r'VOTE\s+REMOVE\s+CABAL\s+LEADER', re.IGNORECASE)),
+    ('opt_in_battle', re.compile(r'JOIN\s+NEXT\s+CABAL\s+BATTLE', re.IGNORECASE)),
+    ('queue_battle', re.compile(r'FIND\s+(?:ME\s+)?A\s+(?:BATTLE|MATCH)', re.IGNORECASE)),
+    ('matchup_odds', re.compile(r'CAN\s+I\s+BEAT\s+@(\w+)', re.IGNORECASE)),
+    ('help', re.compile(r'HELP', re.IGNORECASE)),
+]
+
+COMMAND_TEMPLATES = [
+    "@RollMasterChad CREATE CHARACTER",
+    "@RollMasterChad @{user} CHALLENGE TO BATTLE",
+    "@RollMasterChad check stats pls",
+    "@RollMasterChad JOIN CABAL {cabal}",
+    "@RollMasterChad create cabal {cabal}",
+    "@RollMasterChad APPOINT @{user} AS {officer} OFFICER",
+    "@RollMasterChad BATTLE CABAL {cabal}",
+    "@RollMasterChad VOTE REMOVE CABAL LEADER",
+    "@RollMasterChad JOIN NEXT CABAL BATTLE",
+    "@RollMasterChad find me a battle",
+    "@RollMasterChad can I beat @{user}?",
+    "@RollMasterChad HELP",
+]
+
+CHATTER = [
+    "gm chads", "this game is wild", "who else is grinding tonight", "lfg",
+    "my waifu just hit legendary rarity and I cannot believe it",
+    "the devs really cooked with the latest update ngl",
+    "anyone know when the next season starts?", "ratio + L + touch grass",
+    "been playing for three weeks and still no drip officer role",
+]
+
+USERS = ['bob_99', 'alice', 'carol', 'based_dave', 'Gigachad4', 'xX_roaster_Xx']
+CABALS = ['Alpha Squad', 'Night Owls', 'Based_Ones', 'Drip Lords']
+OFFICERS = ['CLOUT', 'ROAST', 'CRINGE', 'DRIP']
+
+def build_corpus(size, seed=0):
+    """Build `size` mentions: half plain commands, a quarter in chatter, a quarter chatter only."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        kind = i % 4
+        if kind == 3:
+            corpus.append(f"@RollMasterChad {rng.choice(CHATTER)} {rng.choice(CHATTER)}")
+            continue
+        command = rng.choice(COMMAND_TEMPLATES).format(
+            user=rng.choice(USERS), cabal=rng.choice(CABALS), officer=rng.choice(OFFICERS)
+        )
+        if kind == 2:
+            command = f"{rng.choice(CHATTER)} {command} {rng.choice(CHATTER)}"
+        corpus.append(command)
+    return corpus
+
+def legacy_parse(text):
+    """Parse a mention the way handle_mention used to (search, then search again for the groups)."""
+    for command, pattern in LEGACY_PATTERNS:
+        if pattern.search(text):
+            match = pattern.search(text)
+            return command, match.groups()
+    return None, ()
+
+def time_parser(parse, corpus, repeat):
+    """Get the best per-mention parse time in microseconds over `repeat` runs."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in corpus:
+            parse(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(corpus) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark mention command parsing')
+    parser.add_argument('--mentions', type=int, default=20000, help='Number of mentions in the corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per parser (best is reported)')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.mentions)
+
+    legacy_us = time_parser(legacy_parse, corpus, args.repeat)
+    router_us = time_parser(parse_command, corpus, args.repeat)
+
+    differing = sum(1 for text in corpus if legacy_parse(text)[0] != parse_command(text)[0])
+
+    print(f"Corpus: {len(corpus)} mentions")
+    print(f"Regex chain:    {legacy_us:8.2f} us/mention")
+    print(f"Command router: {router_us:8.2f} us/mention ({legacy_us / router_us:.1f}x)")
+    # Only expected where a keyword is part of a longer word ('helpful' is no longer HELP)
+    print(f"Mentions routed differently: {differing}")
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,19 @@ Chad Battles Twitter Bot
 This script monitors the @RollMasterChad Twitter/X account for mentions and processes commands.
 It should be run as a scheduled task (e.g., every 5 minutes) to check for new mentions.
 It can also be used to manually trigger game stats tweets.
+
+Mentions are recorded in the mention_inbox table and claimed from there, so
+several bot processes can run side by side and a restarted bot carries on
+from the inbox.
 """
 
 import os
 import sys
+import socket
 import time
 import logging
 import argparse
+from flask import current_app
 from datetime import datetime, timedelta
 
 # Set up logging
@@ -31,54 +37,131 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import create_app, db
 from app.utils.twitter_api import monitor_mentions
 from app.utils.bot_commands import handle_mention
+from app.utils.mention_pool import process_mentions_concurrently
+from app.utils.matchmaking import process_matchmaking_queue
 from app.models.user import User
-from app.utils.scheduled_tasks import post_game_stats_update, post_promotional_tweet
+from app.utils.scheduled_tasks import (
+    post_game_stats_update, post_promotional_tweet, resolve_cabal_battles, reconcile_cabal_aggregates,
+    prune_mention_inbox, prune_twitter_lookup_cache, run_tournament_rounds
+)
+from app.models.tweet_tracker import MentionInbox
+from app.utils.outbound import get_outbound_scheduler, delivery_group, schedule_posts
 
-def process_mentions(since_id=None):
-    """Process mentions from Twitter/X"""
+# Names this process on the inbox claims it holds
+WORKER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+def inbox_handler(entry_by_tweet_id):
+    """
+    Build a mention handler that runs each inbox entry's command once, then
+    marks the entry done once its replies are posted.
+    
+    After the command has run the entry is marked handled, with its replies
+    stored and its lease extended by MENTION_REPLY_LEASE_SECONDS while they
+    wait in the outbound queue. If a reply fails, or the process stops before
+    they are sent, the entry is claimed again later and only the replies are
+    posted. If the command itself fails, the entry is released to be run
+    again; the replies it queued are only posted on its last attempt.
+    """
+    max_attempts = current_app.config.get('MENTION_MAX_ATTEMPTS', 3)
+    reply_lease_seconds = current_app.config.get('MENTION_REPLY_LEASE_SECONDS', 3600)
+    
+    def handle(mention):
+        entry = entry_by_tweet_id[mention.get('id_str')]
+        tweet_id, token = entry['tweet_id'], entry['token']
+        try:
+            with delivery_group(
+                on_delivered=lambda: MentionInbox.complete(tweet_id, token),
+                on_failed=lambda error, unsent: MentionInbox.retry_replies(tweet_id, token, error, unsent),
+                send_on_error=entry['attempts'] >= max_attempts
+            ) as replies:
+                if entry['replies'] is not None:
+                    # Already carried out: only its replies are left to post
+                    schedule_posts(entry['replies'])
+                    return
+                handle_mention(mention)
+                MentionInbox.mark_handled(tweet_id, token, replies.posts, reply_lease_seconds)
+        except Exception as e:
+            MentionInbox.release(tweet_id, token, e, max_attempts=max_attempts)
+            raise
+    
+    return handle
+
+def process_mentions(app=None, workers=1):
+    """
+    Fetch new mentions into the inbox, then claim and handle a batch of them.
+    
+    Fetching and claiming are separate, so several bot processes can share
+    the inbox: every mention is recorded once and handled by whichever
+    process claims it. Mentions claimed by a process that died are claimed
+    again once their lease expires.
+    """
+    app = app or current_app._get_current_object()
+    
+    since_id = MentionInbox.latest_tweet_id() or load_legacy_since_id()
     logger.info(f"Checking for mentions since ID: {since_id}")
     
     # Get mentions from Twitter API
     mentions = monitor_mentions(since_id)
+    if mentions:
+        recorded = MentionInbox.record(mentions)
+        logger.info(f"Found {len(mentions)} mentions, {recorded} new")
+    
+    claimed = MentionInbox.claim(
+        WORKER_NAME,
+        limit=app.config.get('MENTION_CLAIM_LIMIT', 100),
+        lease_seconds=app.config.get('MENTION_LEASE_SECONDS', 300),
+        max_attempts=app.config.get('MENTION_MAX_ATTEMPTS', 3)
+    )
     
-    if not mentions:
+    if not claimed:
         logger.info("No new mentions found")
-        return since_id
+        # Waiting Chads' tolerance bands keep widening between mentions
+        process_matchmaking_queue()
+        return 0
     
-    logger.info(f"Found {len(mentions)} new mentions")
+    logger.info(f"Claimed {len(claimed)} mentions")
     
-    # Sort mentions by ID (chronological order)
-    mentions.sort(key=lambda x: int(x.get('id_str', '0')))
+    # Each author's mentions are handled in order; different authors concurrently
+    entries = {entry['tweet_id']: entry for entry in claimed}
+    process_mentions_concurrently(app, [entry['mention'] for entry in claimed], inbox_handler(entries), workers)
     
-    # Process each mention
-    for mention in mentions:
-        tweet_id = mention.get('id_str')
-        user_screen_name = mention.get('user', {}).get('screen_name')
-        
-        logger.info(f"Processing mention {tweet_id} from @{user_screen_name}")
-        
-        # Handle the mention
-        try:
-            handle_mention(mention)
-        except Exception as e:
-            logger.error(f"Error handling mention {tweet_id}: {str(e)}")
+    # Resolve any battles matched by the mentions above
+    process_matchmaking_queue()
     
-    # Return the highest ID for next time
-    return mentions[-1].get('id_str')
-
-def save_since_id(since_id):
-    """Save the since_id to a file"""
-    with open("last_mention_id.txt", "w") as f:
-        f.write(since_id)
+    return len(claimed)
 
-def load_since_id():
-    """Load the since_id from a file"""
+def load_legacy_since_id():
+    """Load the since_id left by bots that tracked progress in last_mention_id.txt"""
     try:
         with open("last_mention_id.txt", "r") as f:
-            return f.read().strip()
+            return f.read().strip() or None
     except FileNotFoundError:
         return None
 
+def flush_outbound(timeout=600):
+    """
+    Wait for queued tweets to be posted before a one-shot run exits.
+    
+    At the rate limit a backlog can take hours to post, so whatever is still
+    queued after timeout is dropped: mention replies go back to their inbox
+    entries, to be posted by the next run (the commands are not run again).
+    """
+    scheduler = get_outbound_scheduler()
+    if not scheduler.flush(timeout):
+        scheduler.stop()
+        dropped = scheduler.drop_pending("Not posted before the bot exited")
+        logger.warning(f"Exiting with {dropped} tweets unposted; mention replies among them are kept for the next run")
+
+def log_outbound_stats():
+    """Log the outbound tweet queue depth and send latency"""
+    stats = get_outbound_scheduler().stats()
+    depth = ", ".join(f"{lane} {count}" for lane, count in stats['depth'].items())
+    logger.info(
+        f"Outbound queue: {depth}; sent {stats['sent']}, failed {stats['failed']}, "
+        f"coalesced {stats['coalesced']}; latency p50 {stats['latency_p50']:.1f}s, "
+        f"p95 {stats['latency_p95']:.1f}s"
+    )
+
 def main():
     """Main function to run the bot"""
     parser = argparse.ArgumentParser(description="Chad Battles Twitter Bot")
@@ -86,6 +169,7 @@ def main():
     parser.add_argument("--interval", type=int, default=300, help="Check interval in seconds (default: 300)")
     parser.add_argument("--stats-tweet", action="store_true", help="Post a game stats tweet and exit")
     parser.add_argument("--promo-tweet", action="store_true", help="Post a promotional tweet and exit")
+    parser.add_argument("--workers", type=int, default=1, help="Mention worker threads, sharded by author (default: 1)")
     args = parser.parse_args()
     
     # Create Flask app context
@@ -106,6 +190,7 @@ def main():
             logger.info("Posting a game stats tweet...")
             success = post_game_stats_update()
             if success:
+                flush_outbound()
                 logger.info("Game stats tweet posted successfully!")
             else:
                 logger.error("Failed to post game stats tweet.")
@@ -116,29 +201,42 @@ def main():
             logger.info("Posting a promotional tweet...")
             success = post_promotional_tweet()
             if success:
+                flush_outbound()
                 logger.info("Promotional tweet posted successfully!")
             else:
                 logger.error("Failed to post promotional tweet.")
             return
         
-        # Load the last processed mention ID
-        since_id = load_since_id()
-        
         if args.once:
             # Run once
-            new_since_id = process_mentions(since_id)
-            if new_since_id and new_since_id != since_id:
-                save_since_id(new_since_id)
+            process_mentions(app, args.workers)
+            flush_outbound()
         else:
             # Run continuously
             logger.info(f"Starting bot loop. Checking every {args.interval} seconds.")
             
+            reconcile_interval = app.config.get('CABAL_RECONCILE_INTERVAL', 3600)
+            last_reconciled = 0
+            
             try:
                 while True:
-                    new_since_id = process_mentions(since_id)
-                    if new_since_id and new_since_id != since_id:
-                        since_id = new_since_id
-                        save_since_id(since_id)
+                    process_mentions(app, args.workers)
+                    
+                    # Fight any cabal battles that are due
+                    resolve_cabal_battles()
+                    
+                    # Play the next round of any running tournament
+                    run_tournament_rounds()
+                    
+                    # Periodically repair any drift in the cabal aggregate columns
+                    if time.time() - last_reconciled >= reconcile_interval:
+                        reconcile_cabal_aggregates()
+                        prune_mention_inbox()
+                        prune_twitter_lookup_cache()
+                        last_reconciled = time.time()
+                    
+                    # Replies are posted in the background, paced by the outbound scheduler
+                    log_outbound_stats()
                     
                     logger.info(f"Sleeping for {args.interval} seconds...")
                     time.sleep(args.interval)